@@ -0,0 +1,389 @@
+"""
+Admin-only operational endpoints.
+"""
+
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import FileResponse
+from pydantic import BaseModel
+from starlette.concurrency import run_in_threadpool
+from typing import List, Optional
+import logging
+
+from app.core.auth import verify_admin
+
+logger = logging.getLogger(__name__)
+router = APIRouter(prefix="/admin", tags=["admin"])
+
+
+class HospitalRecord(BaseModel):
+    """Hospital master data row; rows with an id replace that hospital"""
+    id: Optional[str] = None
+    name: str
+    aliases: List[str] = []
+    city: Optional[str] = None
+
+
+class TariffRecord(BaseModel):
+    """Procedure tariff row, keyed by code"""
+    code: str
+    name: str
+    aliases: List[str] = []
+    category: Optional[str] = None
+    max_rate: Optional[float] = None
+    unit: Optional[str] = None
+
+
+class TenantBudget(BaseModel):
+    """Daily budget in USD; null falls back to TENANT_DAILY_BUDGET_USD, 0 means no budget"""
+    daily_budget_usd: Optional[float] = None
+
+
+@router.get("/queue")
+async def queue_status(admin_user: dict = Depends(verify_admin)):
+    """
+    Claim queue status (Admin only).
+    
+    Returns:
+        Worker utilization plus per-tenant queued/running counts and queue wait times
+    """
+    from workers.dispatcher import get_dispatcher
+    
+    dispatcher = get_dispatcher()
+    return {
+        "workers": dispatcher.stats(),
+        "tenants": dispatcher.scheduler.tenant_stats(),
+    }
+
+
+@router.post("/policies/{policy_id}/reaudit", status_code=202)
+async def reaudit_policy(
+    policy_id: str,
+    dry_run: bool = False,
+    admin_user: dict = Depends(verify_admin)
+):
+    """
+    Re-audit every completed claim attached to a policy (Admin only).
+    
+    Args:
+        policy_id: UUID of the policy
+        dry_run: Only estimate LLM tokens and cost; nothing is re-audited
+        
+    Returns:
+        The re-audit job; poll GET /admin/reaudit/{job_id} for progress
+    """
+    from app.core.database import supabase
+    from workers.reaudit import start_reaudit
+    
+    result = supabase.table("insurance_policies")\
+        .select("id, policy_text")\
+        .eq("id", policy_id)\
+        .execute()
+    if not result.data:
+        raise HTTPException(status_code=404, detail="Policy not found")
+    
+    job = start_reaudit(policy_id, result.data[0]["policy_text"], dry_run=dry_run)
+    logger.info(f"Re-audit job {job.id} for policy {policy_id} started by admin {admin_user['email']} (dry_run={dry_run})")
+    return job.to_dict()
+
+
+@router.get("/reaudit")
+async def list_reaudit_jobs(admin_user: dict = Depends(verify_admin)):
+    """Re-audit jobs started by this instance, newest first (Admin only)."""
+    from workers.reaudit import list_jobs
+    
+    return [job.to_dict() for job in list_jobs()]
+
+
+@router.get("/reaudit/{job_id}")
+async def reaudit_job_status(job_id: str, admin_user: dict = Depends(verify_admin)):
+    """
+    Progress of a re-audit job (Admin only).
+    
+    Returns:
+        Processed/total counts, failures, verdict changes, ETA and, for dry
+        runs, the token and cost estimate
+    """
+    from workers.reaudit import get_job
+    
+    job = get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Re-audit job not found")
+    return job.to_dict()
+
+
+@router.post("/renormalize", status_code=202)
+async def renormalize_claims(admin_user: dict = Depends(verify_admin)):
+    """
+    Re-run the normalizer over completed claims below NORMALIZER_VERSION (Admin only).
+    
+    Only the stored raw text is re-normalized; nothing is downloaded or
+    OCRed. Safe to start again after an interruption: it resumes with the
+    claims still below the current version.
+    
+    Returns:
+        The job; poll GET /admin/renormalize/{job_id} for progress
+    """
+    from workers.renormalize import start_renormalize
+    
+    try:
+        job = start_renormalize()
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    logger.info(f"Re-normalize job {job.id} (version {job.version}) started by admin {admin_user['email']}")
+    return job.to_dict()
+
+
+@router.get("/renormalize")
+async def list_renormalize_jobs(admin_user: dict = Depends(verify_admin)):
+    """Re-normalize jobs started by this instance, newest first (Admin only)."""
+    from workers.renormalize import list_jobs
+    
+    return [job.to_dict() for job in list_jobs()]
+
+
+@router.get("/renormalize/{job_id}")
+async def renormalize_job_status(job_id: str, admin_user: dict = Depends(verify_admin)):
+    """
+    Progress of a re-normalize job (Admin only).
+    
+    Returns:
+        Processed/total counts, claims whose structured data changed, LLM
+        extractions, skipped and failed claims, the last claim id reached and ETA
+    """
+    from workers.renormalize import get_job
+    
+    job = get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Re-normalize job not found")
+    return job.to_dict()
+
+
+@router.post("/analytics/export", status_code=202)
+async def start_analytics_export(full: bool = False, admin_user: dict = Depends(verify_admin)):
+    """
+    Export claims, line items and findings to partitioned Parquet/Arrow files (Admin only).
+    
+    Args:
+        full: Ignore the watermark and export every finished claim
+        
+    Returns:
+        Export status; poll GET /admin/analytics/export until it completes
+    """
+    from workers.analytics_export import export_status, start_export
+    
+    if not start_export(full=full):
+        raise HTTPException(status_code=409, detail="An analytics export is already running")
+    logger.info(f"Analytics export started by admin {admin_user['email']} (full={full})")
+    return export_status()
+
+
+@router.get("/analytics/export")
+async def analytics_export_status(admin_user: dict = Depends(verify_admin)):
+    """Last analytics export run on this instance and the current watermark (Admin only)."""
+    from workers.analytics_export import export_status
+    
+    return export_status()
+
+
+@router.get("/master-data")
+async def master_data_status(admin_user: dict = Depends(verify_admin)):
+    """Hospitals and tariffs in this instance's match index (Admin only)."""
+    from app.services.master_data import get_master_data, status
+    
+    await run_in_threadpool(get_master_data)
+    return status()
+
+
+@router.get("/master-data/match")
+async def match_master_data(
+    hospital: Optional[str] = None,
+    item: Optional[str] = None,
+    admin_user: dict = Depends(verify_admin)
+):
+    """
+    Resolve a hospital name and/or line-item description (Admin only).
+    
+    Returns:
+        The matched hospital and tariff with their similarity scores (null if unmatched)
+    """
+    from app.services.master_data import resolve_hospital, resolve_item
+    
+    return await run_in_threadpool(lambda: {
+        "hospital": resolve_hospital(hospital),
+        "tariff": resolve_item(item),
+    })
+
+
+@router.put("/master-data/hospitals")
+async def upsert_hospitals(hospitals: List[HospitalRecord], admin_user: dict = Depends(verify_admin)):
+    """
+    Add or replace hospitals (Admin only).
+    
+    Returns:
+        Number of rows written and the refreshed index status
+    """
+    from app.core.database import supabase
+    from app.services.master_data import refresh, status
+    
+    new = [h.model_dump(exclude={"id"}) for h in hospitals if not h.id]
+    existing = [h.model_dump() for h in hospitals if h.id]
+    
+    def write():
+        if new:
+            supabase.table("hospitals").insert(new).execute()
+        if existing:
+            supabase.table("hospitals").upsert(existing).execute()
+        refresh(force=True)
+    
+    await run_in_threadpool(write)
+    logger.info(f"{len(hospitals)} hospitals written by admin {admin_user['email']}")
+    return {"written": len(hospitals), **status()}
+
+
+@router.put("/master-data/tariffs")
+async def upsert_tariffs(tariffs: List[TariffRecord], admin_user: dict = Depends(verify_admin)):
+    """
+    Add or replace procedure tariffs by code (Admin only).
+    
+    Returns:
+        Number of rows written and the refreshed index status
+    """
+    from app.core.database import supabase
+    from app.services.master_data import refresh, status
+    
+    rows = [t.model_dump() for t in tariffs]
+    
+    def write():
+        if rows:
+            supabase.table("procedure_tariffs").upsert(rows, on_conflict="code").execute()
+        refresh(force=True)
+    
+    await run_in_threadpool(write)
+    logger.info(f"{len(tariffs)} tariffs written by admin {admin_user['email']}")
+    return {"written": len(tariffs), **status()}
+
+
+@router.get("/routing")
+async def model_routing_stats(admin_user: dict = Depends(verify_admin)):
+    """
+    Model routing decisions made by this instance (Admin only).
+    
+    Returns:
+        Per task (extraction, audit) and route (rules, small, large): count,
+        escalations, mean LLM seconds, mean and total estimated cost, mean
+        complexity score
+    """
+    from app.services.model_router import routing_stats
+    
+    return routing_stats()
+
+
+@router.get("/usage")
+async def tenant_usage(day: Optional[str] = None, limit: int = 100, admin_user: dict = Depends(verify_admin)):
+    """
+    Resource usage per tenant on one day, most expensive first (Admin only).
+    
+    Args:
+        day: UTC date (YYYY-MM-DD); default today
+    
+    Returns:
+        Per tenant: claims, CPU seconds, OCR pages, pages rasterized, LLM
+        tokens per model size, bytes stored and estimated cost in USD
+    """
+    from app.services.resource_ledger import list_tenant_usage
+    
+    return await run_in_threadpool(list_tenant_usage, day, limit)
+
+
+@router.get("/usage/{user_id}")
+async def tenant_usage_history(user_id: str, days: int = 30, admin_user: dict = Depends(verify_admin)):
+    """
+    One tenant's daily resource usage, today's spend and budget (Admin only).
+    """
+    from app.services.resource_ledger import get_tenant_usage
+    
+    return await run_in_threadpool(get_tenant_usage, user_id, days)
+
+
+@router.put("/usage/{user_id}/budget")
+async def set_budget(user_id: str, budget: TenantBudget, admin_user: dict = Depends(verify_admin)):
+    """
+    Set a tenant's daily budget (Admin only).
+    
+    Once a tenant's spend today reaches it, its claims take the cheap path
+    (fast OCR profile, rules extraction, small-model audits) until the next
+    UTC day.
+    """
+    from app.services.resource_ledger import get_tenant_usage, set_tenant_budget
+    
+    if budget.daily_budget_usd is not None and budget.daily_budget_usd < 0:
+        raise HTTPException(status_code=400, detail="daily_budget_usd must be >= 0")
+    
+    def write():
+        set_tenant_budget(user_id, budget.daily_budget_usd)
+        logger.info(f"Daily budget of {user_id} set to {budget.daily_budget_usd} by admin {admin_user['email']}")
+        return get_tenant_usage(user_id, days=1)
+    
+    return await run_in_threadpool(write)
+
+
+@router.get("/profiler")
+async def profiler_status(admin_user: dict = Depends(verify_admin)):
+    """Running profiles and recent profiles written by this instance (Admin only)."""
+    from app.services.profiler import profiler_status as status
+    
+    return await run_in_threadpool(status)
+
+
+@router.post("/profiler/start")
+async def start_profiler(seconds: Optional[float] = None, admin_user: dict = Depends(verify_admin)):
+    """
+    Start sampling every thread of this API process (Admin only).
+    
+    Only the instance that receives the request is profiled; standalone
+    workers are profiled with `kill -USR2 <pid>`.
+    
+    Args:
+        seconds: Stop automatically after this long (at most PROFILE_MAX_SECONDS)
+    """
+    from app.services.profiler import start_profile
+    
+    if seconds is not None and seconds <= 0:
+        raise HTTPException(status_code=400, detail="seconds must be positive")
+    try:
+        profile = start_profile(seconds)
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    logger.info(f"Profile {profile.name} started by admin {admin_user['email']}")
+    return profile.to_dict()
+
+
+@router.post("/profiler/stop")
+async def stop_profiler(admin_user: dict = Depends(verify_admin)):
+    """
+    Stop this process's profile and write it out (Admin only).
+    
+    Returns:
+        The profile's sample count and its .folded (collapsed stacks) and
+        .svg (flamegraph) files
+    """
+    from app.services.profiler import stop_profile
+    
+    profile = await run_in_threadpool(stop_profile)
+    if profile is None:
+        raise HTTPException(status_code=404, detail="No profile is running")
+    return profile.to_dict()
+
+
+@router.get("/profiler/profiles/{name}")
+async def download_profile(name: str, format: str = "svg", admin_user: dict = Depends(verify_admin)):
+    """Download a written profile as a flamegraph (svg) or collapsed stacks (folded) (Admin only)."""
+    from app.services.profiler import profile_dir
+    
+    if format not in ("svg", "folded"):
+        raise HTTPException(status_code=400, detail="format must be svg or folded")
+    path = profile_dir() / f"{name}.{format}"
+    if "/" in name or name.startswith(".") or not path.is_file():
+        raise HTTPException(status_code=404, detail="Profile not found")
+    media_type = "image/svg+xml" if format == "svg" else "text/plain"
+    return FileResponse(path, media_type=media_type, filename=path.name)
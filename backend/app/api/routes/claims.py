@@ -1,8 +1,16 @@
-from fastapi import APIRouter, UploadFile, File, HTTPException, Depends
+from fastapi import APIRouter, UploadFile, File, Header, HTTPException, Depends, Response
+from typing import Optional, Tuple
+from app.core.config import settings
 from app.core.database import supabase
 from app.core.auth import verify_token
-from app.services.storage import upload_claim_file
-from app.schemas.claims import ClaimResponse
+from app.core.responses import FastJSONResponse
+from app.models.serialization import encode
+from app.services import claim_cache
+from app.services.storage import delete_claim_file, upload_claim_file
+from app.services.claim_stats import get_claim_stats, record_submission
+from app.schemas.claims import ClaimResponse, ClaimStatus
+from workers.scheduler import PRIORITIES
+import hashlib
 import uuid
 import logging
 
@@ -12,6 +20,29 @@ router = APIRouter(prefix="/api/v1", tags=["Claims"])
 
 ALLOWED_TYPES = ["application/pdf"]
 MAX_FILE_SIZE = 10 * 1024 * 1024  # 10MB
+UPLOAD_CHUNK_SIZE = 256 * 1024
+
+
+async def _read_upload(file: UploadFile) -> Tuple[bytes, str]:
+    """Read the upload in chunks, hashing it as it arrives; stops as soon as it's over MAX_FILE_SIZE."""
+    digest = hashlib.sha256()
+    chunks, size = [], 0
+    while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+        size += len(chunk)
+        if size > MAX_FILE_SIZE:
+            raise HTTPException(status_code=400, detail="File too large. Max 10MB allowed")
+        digest.update(chunk)
+        chunks.append(chunk)
+    return b"".join(chunks), digest.hexdigest()
+
+
+def _duplicate_response(existing: dict, file_name: str) -> ClaimResponse:
+    return ClaimResponse(
+        job_id=existing["id"],
+        status=existing["status"],
+        message=f"Claim '{file_name}' was already uploaded; returning the existing job",
+        duplicate=True,
+    )
 
 
 @router.post("/ingest", response_model=ClaimResponse)
@@ -19,71 +50,134 @@ async def ingest_claim(
     file: UploadFile = File(...),
     user: dict = Depends(verify_token),
     policy_id: str = None,
+    priority: str = "interactive",
+    profile: bool = False,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
 ):
-    """Upload a claim PDF for processing (requires authentication)"""
+    """
+    Upload a claim PDF for processing (requires authentication).
+    
+    `priority` is "urgent" for cashless pre-authorisation claims,
+    "interactive" (default) for normal uploads or "bulk" for backfills.
+    `profile=true` (admins only) profiles the worker while it processes
+    the claim.
+    
+    Ingest is idempotent: a retry with the same Idempotency-Key, or the
+    same PDF and policy uploaded again within INGEST_DEDUP_WINDOW_SECONDS,
+    returns the existing job_id (duplicate=true) instead of queuing the
+    claim again (app/services/ingest_dedup.py).
+    """
+    
+    if priority not in PRIORITIES:
+        raise HTTPException(status_code=400, detail=f"priority must be one of {', '.join(PRIORITIES)}")
+    if profile and user.get("role") != "admin":
+        raise HTTPException(status_code=403, detail="Only admins can profile claims")
     
     # Validate file type
     if file.content_type not in ALLOWED_TYPES:
         raise HTTPException(status_code=400, detail="Only PDF files are allowed")
     
-    # Read file content
-    content = await file.read()
-    
-    # Validate file size
-    if len(content) > MAX_FILE_SIZE:
-        raise HTTPException(status_code=400, detail="File too large. Max 10MB allowed")
-    
-    # Generate job_id
-    job_id = str(uuid.uuid4())
+    # Read file content (size-checked and hashed while reading)
+    content, content_hash = await _read_upload(file)
     
     # Get authenticated user ID
     user_id = user["user_id"]
-    logger.info(f"User {user['email']} uploading claim {job_id}")
     
-    try:
-        # Fetch policy text if policy_id provided
-        policy_text = None
-        if policy_id:
-            logger.info(f"Fetching policy {policy_id} for claim {job_id}")
+    # Fetch policy text if policy_id provided; before the duplicate check, which compares policies
+    policy_text = None
+    if policy_id:
+        try:
             policy_result = supabase.table("insurance_policies")\
                 .select("policy_text, name, company_name")\
                 .eq("id", policy_id)\
                 .execute()
-            
-            if policy_result.data and len(policy_result.data) > 0:
-                policy_text = policy_result.data[0]["policy_text"]
-                logger.info(f"Attached policy '{policy_result.data[0]['name']}' to claim {job_id}")
-            else:
-                logger.warning(f"Policy {policy_id} not found, proceeding without policy")
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Upload failed: {str(e)}")
+        
+        if policy_result.data and len(policy_result.data) > 0:
+            policy_text = policy_result.data[0]["policy_text"]
+        else:
+            logger.warning(f"Policy {policy_id} not found, proceeding without policy")
+            policy_id = None
+    
+    # Duplicate upload (client retry) or same document for another policy
+    source = None
+    if settings.ingest_dedup:
+        from app.services.ingest_dedup import find_by_content, find_by_idempotency_key
         
-        # Upload to storage
-        upload_result = upload_claim_file(content, file.filename, user_id)
+        try:
+            existing = find_by_idempotency_key(user_id, idempotency_key) if idempotency_key else None
+            if existing is None:
+                source = find_by_content(user_id, content_hash)
+        except Exception as e:
+            logger.error(f"Duplicate upload check failed, ingesting anyway: {str(e)}")
+            existing = None
+        
+        if existing is not None and existing.get("content_hash") not in (None, content_hash):
+            raise HTTPException(status_code=422, detail="Idempotency-Key was already used for a different file")
+        if existing is None and source is not None and source.get("policy_id") == policy_id:
+            existing, source = source, None
+        if existing is not None:
+            logger.info(f"User {user['email']} re-uploaded claim {existing['id']}; returning the existing job")
+            return _duplicate_response(existing, file.filename)
+    
+    # Generate job_id
+    job_id = str(uuid.uuid4())
+    logger.info(f"User {user['email']} uploading claim {job_id}")
+    
+    try:
+        if policy_id:
+            logger.info(f"Attached policy '{policy_result.data[0]['name']}' to claim {job_id}")
+        
+        # Upload to storage (a document already stored for an earlier claim is reused)
+        if source is not None:
+            logger.info(f"Claim {job_id} is the document of claim {source['id']}; reusing its file and extraction")
+            file_path = source["file_path"]
+        else:
+            file_path = upload_claim_file(content, file.filename, user_id)["file_path"]
         
         # Create claim record
         claim_data = {
             "id": job_id,
             "file_name": file.filename,
-            "file_path": upload_result["file_path"],
+            "file_path": file_path,
             "status": "queued",
             "uploaded_by": user_id,
             "policy_text": policy_text,  # Attach policy text if available
+            "policy_id": policy_id,  # So a policy update can find and re-audit this claim
+            "priority": priority,
+            "content_hash": content_hash,
         }
+        if idempotency_key:
+            claim_data["idempotency_key"] = idempotency_key
+        if source is not None:
+            claim_data["source_claim_id"] = source["id"]
+        if profile:
+            claim_data["profile"] = True
         
-        result = supabase.table("claims").insert(claim_data).execute()
-        
-        # Auto-trigger processing in background thread
-        import threading
-        from workers.claim_processor import process_claim_with_retry
-        
-        def process_in_background():
-            try:
-                process_claim_with_retry(job_id)  # Now with retry logic!
-            except Exception as e:
-                logger.error(f"Background processing failed for {job_id}: {str(e)}")
+        try:
+            supabase.table("claims").insert(claim_data).execute()
+        except Exception:
+            # No claim points at the file we just uploaded; don't leave it behind
+            if source is None:
+                try:
+                    delete_claim_file(file_path)
+                except Exception as e:
+                    logger.warning(f"Failed to delete orphaned upload {file_path}: {str(e)}")
+            # A concurrent request with the same Idempotency-Key created the claim first
+            if not (idempotency_key and settings.ingest_dedup):
+                raise
+            from app.services.ingest_dedup import find_by_idempotency_key
+            
+            existing = find_by_idempotency_key(user_id, idempotency_key)
+            if existing is None:
+                raise
+            return _duplicate_response(existing, file.filename)
+        record_submission(user_id)
         
-        thread = threading.Thread(target=process_in_background)
-        thread.daemon = True
-        thread.start()
+        # Auto-trigger processing on the bounded worker pool (with retry logic)
+        from workers.dispatcher import get_dispatcher
+        get_dispatcher().submit(job_id, tenant=user_id, priority=priority)
         
         return ClaimResponse(
             job_id=job_id,
@@ -108,12 +202,131 @@ async def list_claims(user: dict = Depends(verify_token)):
             .eq("uploaded_by", user_id)\
             .order("created_at", desc=True)\
             .execute()
-            
-        return {"claims": result.data}
+        
+        # Rows straight from the claims table: encode them as-is
+        return FastJSONResponse({"claims": result.data})
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to fetch claims: {str(e)}")
 
 
+@router.get("/claims/stats")
+async def claim_stats(days: int = 30, user: dict = Depends(verify_token)):
+    """
+    Dashboard statistics for the authenticated user.
+    
+    Served from incrementally maintained rollups, so the cost doesn't grow
+    with the number of claims.
+    
+    Args:
+        days: Length of the daily series (1-366), ending today (UTC)
+        
+    Returns:
+        All-time totals (counts by status and verdict, claimed total,
+        average risk, risk histogram) and the same per day
+    """
+    if not 1 <= days <= 366:
+        raise HTTPException(status_code=400, detail="days must be between 1 and 366")
+    try:
+        return get_claim_stats(user["user_id"], days=days)
+    except Exception as e:
+        logger.error(f"Error fetching claim stats for {user['email']}: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Failed to fetch claim stats: {str(e)}")
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in tags or etag in (tag[2:] if tag.startswith("W/") else tag for tag in tags)
+
+
+def _cached_claim(view: str, job_id: str, user_id: str, if_none_match: Optional[str], load) -> Response:
+    """
+    Serve one view of a claim from the claim cache, with its ETag.
+
+    Returns:
+        304 if the client's If-None-Match still matches, the encoded view otherwise
+
+    Raises:
+        HTTPException: 404 if the claim doesn't exist or isn't the user's
+    """
+    try:
+        uuid.UUID(job_id)
+    except ValueError:
+        raise HTTPException(status_code=404, detail="Claim not found")
+    try:
+        cached = claim_cache.get_or_load(view, job_id, load)
+    except Exception as e:
+        logger.error(f"Error fetching claim {job_id}: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Failed to fetch claim: {str(e)}")
+    # Someone else's claim is answered exactly like a missing one
+    if cached is None or cached[0] != user_id:
+        raise HTTPException(status_code=404, detail="Claim not found")
+    _, body, etag = cached
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if _etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+    return Response(body, media_type="application/json", headers=headers)
+
+
+@router.get("/claims/{job_id}")
+def get_claim(
+    job_id: str,
+    user: dict = Depends(verify_token),
+    if_none_match: Optional[str] = Header(None, alias="If-None-Match"),
+):
+    """
+    A single claim of the authenticated user (the full row, as in GET /claims).
+
+    Served from a short-TTL cache that the worker's status transitions
+    invalidate; send the ETag back as If-None-Match to get a 304 while the
+    claim hasn't changed.
+    """
+    def load():
+        result = supabase.table("claims")\
+            .select("*")\
+            .eq("id", job_id)\
+            .limit(1)\
+            .execute()
+        if not result.data:
+            return None
+        row = result.data[0]
+        return row, encode(row)
+
+    return _cached_claim("detail", job_id, user["user_id"], if_none_match, load)
+
+
+@router.get("/claims/{job_id}/status", response_model=ClaimStatus)
+def get_claim_status(
+    job_id: str,
+    user: dict = Depends(verify_token),
+    if_none_match: Optional[str] = Header(None, alias="If-None-Match"),
+):
+    """
+    Status of a single claim, for polling while it's processed.
+
+    Same cache and ETag handling as GET /claims/{job_id}, but reads only the
+    few columns ClaimStatus needs.
+    """
+    def load():
+        result = supabase.table("claims")\
+            .select("id, status, file_name, created_at, uploaded_by")\
+            .eq("id", job_id)\
+            .limit(1)\
+            .execute()
+        if not result.data:
+            return None
+        row = result.data[0]
+        return row, encode({
+            "job_id": row["id"],
+            "status": row["status"],
+            "file_name": row.get("file_name"),
+            "created_at": row.get("created_at"),
+        })
+
+    return _cached_claim("status", job_id, user["user_id"], if_none_match, load)
+
+
 @router.post("/process")
 async def trigger_processing():
     """Trigger processing of queued claims (for testing/manual trigger)"""
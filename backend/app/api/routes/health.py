@@ -1,22 +1,74 @@
 from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
 from app.core.database import supabase
+from app.services.health_checks import check_dependencies
+from app.services.ocr_pool import pool_status
+from app.services.warmup import is_warm, warmup_status
 
 router = APIRouter()
 
 
 @router.get("/health")
+@router.get("/health/live")
 async def health_check():
+    """Liveness: the process is up and its event loop is responding"""
     return {
         "status": "healthy",
         "service": "priclaim-api"
     }
 
 
+@router.get("/health/ready")
+async def readiness_check():
+    """
+    Readiness: whether this instance should receive traffic.
+
+    Not ready while warming up, when the database or storage is unreachable,
+    or when the worker queue / OCR backlog crosses the backpressure
+    thresholds, so the load balancer sheds load to other instances.
+    """
+    from workers.dispatcher import get_dispatcher
+
+    workers = get_dispatcher().stats()
+    ocr_pool = pool_status()
+    dependencies = await check_dependencies()
+
+    reasons = []
+    if not is_warm():
+        reasons.append("warming up")
+    for name, result in dependencies.items():
+        if not result["ok"] and (name != "llm" or settings.readiness_require_llm):
+            reasons.append(f"{name} unavailable")
+    if workers["queue_depth"] >= settings.readiness_max_queue_depth:
+        reasons.append(f"queue depth {workers['queue_depth']} >= {settings.readiness_max_queue_depth}")
+    if ocr_pool["pending_pages"] >= settings.readiness_max_ocr_backlog:
+        reasons.append(f"OCR backlog {ocr_pool['pending_pages']} pages >= {settings.readiness_max_ocr_backlog}")
+
+    ready = not reasons
+    degraded = ready and not all(result["ok"] for result in dependencies.values())
+    return JSONResponse(
+        status_code=200 if ready else 503,
+        content={
+            "status": "degraded" if degraded else "ready" if ready else "not_ready",
+            "reasons": reasons,
+            "workers": workers,
+            "ocr_pool": ocr_pool,
+            "dependencies": dependencies,
+            "warmup": warmup_status(),
+        },
+    )
+
+
 @router.get("/health/db")
 async def db_health_check():
     """Test database connection"""
     try:
-        result = supabase.table("hospitals").select("id").limit(1).execute()
+        await run_in_threadpool(
+            lambda: supabase.table("claims").select("id").limit(1).execute()
+        )
         return {
             "status": "healthy",
             "database": "connected",
@@ -27,4 +79,4 @@ async def db_health_check():
             "status": "unhealthy",
             "database": "error",
             "error": str(e)
-        }
\ No newline at end of file
+        }
@@ -3,14 +3,15 @@ Policy management API routes.
 Admin-only endpoints for managing insurance policies.
 """
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Response
 from pydantic import BaseModel
 from typing import List, Optional
-from datetime import datetime
+from datetime import datetime, timezone
 import logging
 
 from app.core.auth import verify_token, verify_admin
 from app.core.database import supabase
+from app.core.responses import FastJSONResponse
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/policies", tags=["policies"])
@@ -26,6 +27,15 @@ class PolicyCreate(BaseModel):
     coverage_limit: Optional[float] = None
 
 
+class PolicyUpdate(BaseModel):
+    """Model for updating a policy; only the fields provided are changed"""
+    name: Optional[str] = None
+    policy_text: Optional[str] = None
+    company_name: Optional[str] = None
+    policy_type: Optional[str] = None
+    coverage_limit: Optional[float] = None
+
+
 class PolicyResponse(BaseModel):
     """Model for policy response"""
     id: str
@@ -107,7 +117,8 @@ async def list_policies(
             .execute()
         
         logger.info(f"Policies fetched: {len(result.data)} items for user {user['email']}")
-        return result.data
+        # Rows from our own table; skip re-validating each one through PolicyResponse
+        return FastJSONResponse(result.data)
         
     except Exception as e:
         logger.error(f"Error fetching policies: {str(e)}")
@@ -152,6 +163,74 @@ async def get_policy(
         raise HTTPException(status_code=500, detail=f"Failed to fetch policy: {str(e)}")
 
 
+@router.put("/{policy_id}", response_model=PolicyResponse)
+async def update_policy(
+    policy_id: str,
+    policy: PolicyUpdate,
+    response: Response,
+    reaudit: bool = True,
+    admin_user: dict = Depends(verify_admin)
+):
+    """
+    Update a policy (Admin only).
+    
+    If the policy text changes, completed claims audited against it are
+    re-audited in the background (unless reaudit=false); the job id is
+    returned in the X-Reaudit-Job header.
+    
+    Args:
+        policy_id: UUID of the policy to update
+        policy: Fields to change
+        reaudit: Re-audit affected claims when policy_text changes
+        admin_user: Authenticated admin user from JWT
+        
+    Returns:
+        Updated policy data
+        
+    Raises:
+        HTTPException: If policy not found or database error
+    """
+    try:
+        check_result = supabase.table("insurance_policies")\
+            .select("id, policy_text")\
+            .eq("id", policy_id)\
+            .execute()
+        
+        if not check_result.data:
+            raise HTTPException(status_code=404, detail="Policy not found")
+        previous_text = check_result.data[0].get("policy_text")
+        
+        changes = policy.model_dump(exclude_unset=True)
+        if not changes:
+            raise HTTPException(status_code=400, detail="No fields to update")
+        changes["updated_at"] = datetime.now(timezone.utc).isoformat()
+        
+        result = supabase.table("insurance_policies")\
+            .update(changes)\
+            .eq("id", policy_id)\
+            .execute()
+        
+        if not result.data:
+            raise HTTPException(status_code=500, detail="Failed to update policy")
+        
+        logger.info(f"Policy {policy_id} updated by admin {admin_user['email']}: {sorted(changes)}")
+        
+        if reaudit and "policy_text" in changes and changes["policy_text"] != previous_text:
+            from workers.reaudit import start_reaudit
+            
+            job = start_reaudit(policy_id, changes["policy_text"])
+            response.headers["X-Reaudit-Job"] = job.id
+            logger.info(f"Policy {policy_id} text changed, re-audit job {job.id} started")
+        
+        return result.data[0]
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error updating policy {policy_id}: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Failed to update policy: {str(e)}")
+
+
 @router.delete("/{policy_id}", status_code=204)
 async def delete_policy(
     policy_id: str,
@@ -7,9 +7,17 @@ class Settings(BaseSettings):
     supabase_key: str = ""
     supabase_service_key: str = ""
 
+    # data backend: "supabase" or "local" (SQLite + filesystem, no network)
+    data_backend: str = "supabase"
+    local_data_dir: str = "./local_data"
+    local_db_path: str = ""  # defaults to <local_data_dir>/priclaim.db
+    local_auth_secret: str = ""
+
     #ai
     groq_api_key: str = ""
     openai_api_key: str = ""
+    llm_requests_per_minute: int = 0  # applies to every Groq call in the process (0 = unlimited)
+    llm_tokens_per_minute: int = 0
 
     #aws
     aws_access_key_id: str = ""
@@ -19,6 +27,100 @@ class Settings(BaseSettings):
     # CORS
     cors_origins: List[str] = ["http://localhost:5173"]
     
+    # Metrics (standalone worker exposes /metrics on this port; 0 = disabled)
+    worker_metrics_port: int = 0
+    
+    # Startup: OCR worker processes (0 = OCR in the calling thread) and warm-up
+    ocr_workers: int = 2
+    ocr_profile: str = "balanced"  # legacy, fast, balanced or multilingual (see text_extractor.OCR_PROFILES)
+    ocr_cache_path: str = ""  # shared by all workers on the host; defaults to <local_data_dir>/ocr_cache.db
+    ocr_cache_max_bytes: int = 512 * 1024 * 1024  # 0 disables the cache
+    warmup_on_startup: bool = True
+    
+    # Claim workers (threads per process) and readiness/backpressure thresholds
+    worker_concurrency: int = 4
+    tenant_max_concurrency: int = 2  # claims one tenant may run at once (0 = no cap)
+    scheduler_aging_seconds: float = 300.0  # queued claims move up one priority class per interval
+    readiness_max_queue_depth: int = 50
+    readiness_max_ocr_backlog: int = 200  # pages waiting on the OCR pool
+    readiness_require_llm: bool = False  # regex extraction still works without Groq
+    probe_ttl_seconds: float = 15.0
+    probe_timeout_seconds: float = 3.0
+    
+    # Claim leases: lets several worker processes/replicas share one queue
+    worker_id: str = ""  # defaults to <hostname>:<pid>
+    lease_seconds: float = 60.0  # renewed every lease_seconds / 3 while a claim runs
+    lease_max_attempts: int = 3  # expired leases before a claim is marked failed
+    worker_poll_seconds: float = 5.0
+    
+    # Bulk re-audit after a policy change (its own LLM budget, on top of the global one)
+    reaudit_concurrency: int = 4
+    reaudit_batch_size: int = 50
+    reaudit_claims_per_call: int = 5  # claims audited per LLM call (max groq_service.MAX_AUDIT_BATCH)
+    reaudit_requests_per_minute: int = 30
+    reaudit_tokens_per_minute: int = 0
+    reaudit_in_flight_timeout_seconds: int = 900  # how long a re-audit waits for claims still being processed
+    
+    # Re-normalizing stored claims after a NORMALIZER_VERSION bump (workers/renormalize.py)
+    renormalize_batch_size: int = 200  # claims loaded per page
+    renormalize_processes: int = 2  # regex extraction runs in a process pool of this size
+    renormalize_concurrency: int = 4  # LLM extractions in flight
+    renormalize_requests_per_minute: int = 30
+    renormalize_tokens_per_minute: int = 0
+    
+    # Duplicate uploads at ingest (app/services/ingest_dedup.py)
+    ingest_dedup: bool = True
+    ingest_dedup_window_seconds: int = 86400  # how far back an identical upload or Idempotency-Key counts
+    
+    # Duplicate / fraud detection across claims (app/services/duplicate_index.py)
+    duplicate_detection: bool = True
+    duplicate_similarity_threshold: float = 0.85  # estimated Jaccard similarity of the raw text
+
+    # Hospital / tariff master data matching (app/services/master_data.py)
+    master_data_refresh_seconds: int = 60  # how often each process checks the tables for changes
+    master_data_match_threshold: float = 0.6  # trigram (Dice) similarity for a name to resolve
+    tariff_tolerance: float = 0.1  # charges up to 10% over a tariff's max_rate aren't flagged
+
+    # Model routing for extraction and audits (app/services/model_router.py)
+    model_routing: bool = True  # False: 8B extraction and 70B audits for every claim
+    routing_long_document_pages: int = 10
+    routing_min_ocr_confidence: float = 0.6  # mean Tesseract word confidence (0-1) for a scan to count as clean
+    routing_large_extraction_score: float = 0.6  # complexity at which extraction goes straight to the large model
+    routing_small_audit_score: float = 0.35  # audits scoring below this use the small model
+    routing_simple_audit_items: int = 15
+    routing_simple_audit_amount: float = 200000  # INR
+    routing_escalation_confidence: float = 0.7  # small-model audits less confident than this are redone
+    
+    # Analytics export (Parquet/Arrow files partitioned by month and policy)
+    analytics_export_dir: str = ""  # default: <local_data_dir>/analytics
+    analytics_export_format: str = "parquet"  # parquet or arrow
+    analytics_export_page_size: int = 500  # claims per DB page
+    analytics_export_flush_rows: int = 50000  # buffered rows before writing files
+    
+    # Per-claim resource ledger and tenant budgets (app/services/resource_ledger.py)
+    cost_cpu_hour_usd: float = 0.05  # what a worker CPU-hour costs us
+    cost_storage_gb_month_usd: float = 0.021  # stored documents and extracted data, charged for one month
+    tenant_daily_budget_usd: float = 0.0  # default per tenant per UTC day (0 = no budget); tenant_budgets overrides
+    tenant_budget_cache_seconds: int = 30  # how stale a tenant's spend may be when checking its budget
+    budget_ocr_profile: str = "fast"  # OCR profile for claims of over-budget tenants
+    
+    # Response compression (gzip; brotli for clients that accept it when brotli-asgi is installed)
+    response_compression: bool = True
+    response_compression_min_bytes: int = 1024  # smaller responses go out uncompressed
+    response_gzip_level: int = 4  # 1-9; higher is smaller but slower (benchmarks/bench_responses.py)
+    response_brotli_quality: int = 4  # 0-11
+    
+    # Sampling profiler (app/services/profiler.py)
+    profile_dir: str = ""  # flamegraphs and collapsed stacks; default: <local_data_dir>/profiles
+    profile_interval_ms: float = 10.0  # time between stack samples
+    profile_sample_rate: float = 0.0  # fraction of claims profiled without the claim's profile flag
+    profile_max_seconds: int = 300  # on-demand process profiles stop themselves after this
+
+    # Single-claim read cache (app/services/claim_cache.py)
+    claim_cache_ttl_seconds: float = 2.0  # claims still being processed (0 = no caching)
+    claim_cache_final_ttl_seconds: float = 30.0  # completed and failed claims
+    claim_cache_max_entries: int = 10000  # claims kept, least recently read evicted first
+    
     class Config:
         env_file = ".env"
 
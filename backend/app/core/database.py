@@ -1,16 +1,64 @@
-from supabase import create_client, Client
+import threading
+from typing import TYPE_CHECKING
+
 from app.core.config import settings
 
+if TYPE_CHECKING:
+    from supabase import Client
+
+
+def get_local_client():
+    """Get the SQLite/filesystem stand-in client (DATA_BACKEND=local)"""
+    from app.core.local_backend import LocalClient
+    return LocalClient(
+        settings.local_data_dir,
+        db_path=settings.local_db_path,
+        auth_secret=settings.local_auth_secret,
+    )
 
-def get_supabase_client() -> Client:
+
+def get_supabase_client() -> "Client":
     """Get Supabase client with anon key (for auth flows)"""
+    if settings.data_backend == "local":
+        return get_local_client()
+    from supabase import create_client
     return create_client(settings.supabase_url, settings.supabase_key)
 
 
-def get_supabase_admin() -> Client:
+def get_supabase_admin() -> "Client":
     """Get Supabase client with service role key (for backend operations)"""
+    if settings.data_backend == "local":
+        return get_local_client()
+    from supabase import create_client
     return create_client(settings.supabase_url, settings.supabase_service_key)
 
 
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_db() -> "Client":
+    """
+    Shared admin client, built on first use.
+
+    Importing supabase-py costs most of the API's cold start, and building
+    the client fails if Supabase isn't configured, so neither happens at
+    import time.
+    """
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = get_supabase_admin()
+    return _client
+
+
+class _LazyClient:
+    """Forwards attribute access to get_db() so `supabase.table(...)` keeps working."""
+
+    def __getattr__(self, name):
+        return getattr(get_db(), name)
+
+
 # Default admin client for backend operations
-supabase: Client = get_supabase_admin()
\ No newline at end of file
+supabase: "Client" = _LazyClient()
@@ -0,0 +1,548 @@
+"""
+Local stand-in for the Supabase client.
+
+Implements the part of the supabase-py interface the backend uses
+(table queries, rpc() for the Postgres functions in LOCAL_FUNCTIONS,
+storage buckets and auth.get_user) on top of SQLite and
+the local filesystem, so the whole service can run on one machine with
+no network access: performance testing, CI and air-gapped deployments.
+
+Selected with DATA_BACKEND=local. Rows are stored as JSON documents
+(one SQLite table per Supabase table), so new columns need no migration.
+"""
+import base64
+import hashlib
+import hmac
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Columns the Postgres schema fills in with defaults
+TIMESTAMP_DEFAULTS = {
+    "claims": ("created_at", "updated_at"),
+    "insurance_policies": ("created_at", "updated_at"),
+    "claim_fingerprints": ("created_at",),
+    "hospitals": ("created_at", "updated_at"),
+    "procedure_tariffs": ("created_at", "updated_at"),
+    "tenant_budgets": ("created_at", "updated_at"),
+}
+
+# Expression indexes mirroring the Postgres ones that lookups depend on
+LOCAL_INDEXES = {
+    "claim_fingerprints": ("key", "claim_id"),
+    "claims": ("content_hash", "idempotency_key"),
+}
+
+
+class LocalBackendError(Exception):
+    """Raised for query errors (mirrors postgrest.APIError usage)."""
+
+
+class LocalResponse:
+    def __init__(self, data, count: Optional[int] = None):
+        self.data = data
+        self.count = count
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _sql_value(value: Any) -> Any:
+    """Convert a Python filter value to what json_extract() returns."""
+    if isinstance(value, bool):
+        return int(value)
+    if isinstance(value, (dict, list)):
+        return json.dumps(value)
+    return value
+
+
+def _project_column(row: dict, column: str) -> tuple:
+    """
+    (name, value) for a select column; supports JSON paths like PostgREST:
+    "extracted_data->structured_data" returns the nested value as
+    "structured_data", "->>" returns it as text.
+    """
+    if "->" not in column:
+        return column, row.get(column)
+    parts = re.split(r"->>?", column)
+    value = row.get(parts[0])
+    for key in parts[1:]:
+        value = value.get(key) if isinstance(value, dict) else None
+    if re.findall(r"->>?", column)[-1] == "->>" and value is not None and not isinstance(value, str):
+        value = json.dumps(value)
+    return parts[-1], value
+
+
+class LocalDatabase:
+    """SQLite document store with one connection per thread."""
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._local = threading.local()
+        self._known_tables = set()
+        self._lock = threading.Lock()
+        Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+
+    def connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def ensure_table(self, name: str) -> None:
+        if name in self._known_tables:
+            return
+        with self._lock:
+            conn = self.connection()
+            conn.execute(f'CREATE TABLE IF NOT EXISTS "{name}" (id TEXT PRIMARY KEY, doc TEXT NOT NULL)')
+            for column in LOCAL_INDEXES.get(name, ()):
+                conn.execute(
+                    f'CREATE INDEX IF NOT EXISTS "idx_{name}_{column}" ON "{name}" (json_extract(doc, \'$.{column}\'))'
+                )
+            self._known_tables.add(name)
+
+
+class LocalQuery:
+    """Chainable query builder matching postgrest's SyncRequestBuilder subset."""
+
+    def __init__(self, db: LocalDatabase, table: str):
+        self._db = db
+        self._table = table
+        self._op = "select"
+        self._columns = "*"
+        self._count = None
+        self._payload = None
+        self._on_conflict = "id"
+        self._where: List[str] = []
+        self._params: List[Any] = []
+        self._order: List[str] = []
+        self._limit: Optional[int] = None
+        self._offset: Optional[int] = None
+        self._single = False
+        self._maybe_single = False
+
+    # Operations
+
+    def select(self, columns: str = "*", count: Optional[str] = None):
+        self._op, self._columns, self._count = "select", columns, count
+        return self
+
+    def insert(self, data):
+        self._op, self._payload = "insert", data
+        return self
+
+    def upsert(self, data, on_conflict: str = "id"):
+        self._op, self._payload, self._on_conflict = "upsert", data, on_conflict
+        return self
+
+    def update(self, data: dict):
+        self._op, self._payload = "update", data
+        return self
+
+    def delete(self):
+        self._op = "delete"
+        return self
+
+    # Filters
+
+    def _filter(self, column: str, operator: str, value: Any):
+        self._where.append(f"json_extract(doc, '$.{column}') {operator} ?")
+        self._params.append(_sql_value(value))
+        return self
+
+    def eq(self, column: str, value: Any):
+        return self._filter(column, "=", value)
+
+    def neq(self, column: str, value: Any):
+        return self._filter(column, "!=", value)
+
+    def gt(self, column: str, value: Any):
+        return self._filter(column, ">", value)
+
+    def gte(self, column: str, value: Any):
+        return self._filter(column, ">=", value)
+
+    def lt(self, column: str, value: Any):
+        return self._filter(column, "<", value)
+
+    def lte(self, column: str, value: Any):
+        return self._filter(column, "<=", value)
+
+    def in_(self, column: str, values: List[Any]):
+        values = list(values)
+        if not values:
+            self._where.append("0")
+            return self
+        placeholders = ", ".join("?" for _ in values)
+        self._where.append(f"json_extract(doc, '$.{column}') IN ({placeholders})")
+        self._params.extend(_sql_value(v) for v in values)
+        return self
+
+    def is_(self, column: str, value: Any):
+        if value is None or value == "null":
+            self._where.append(f"json_extract(doc, '$.{column}') IS NULL")
+            return self
+        return self._filter(column, "IS", value)
+
+    # Modifiers
+
+    def order(self, column: str, desc: bool = False):
+        self._order.append(f"json_extract(doc, '$.{column}') {'DESC' if desc else 'ASC'}")
+        return self
+
+    def limit(self, count: int):
+        self._limit = count
+        return self
+
+    def range(self, start: int, end: int):
+        self._offset, self._limit = start, end - start + 1
+        return self
+
+    def single(self):
+        self._single = True
+        return self
+
+    def maybe_single(self):
+        self._maybe_single = True
+        return self
+
+    # Execution
+
+    def _where_sql(self) -> str:
+        return f" WHERE {' AND '.join(self._where)}" if self._where else ""
+
+    def _project(self, row: dict) -> dict:
+        if self._columns.strip() == "*":
+            return row
+        columns = [c.strip() for c in self._columns.split(",") if c.strip()]
+        return dict(_project_column(row, c) for c in columns)
+
+    def execute(self) -> LocalResponse:
+        self._db.ensure_table(self._table)
+        conn = self._db.connection()
+
+        if self._op in ("insert", "upsert"):
+            return self._write_rows(conn)
+        if self._op == "update":
+            return self._update(conn)
+        if self._op == "delete":
+            return self._delete(conn)
+        return self._select(conn)
+
+    def _select(self, conn: sqlite3.Connection) -> LocalResponse:
+        sql = f'SELECT doc FROM "{self._table}"{self._where_sql()}'
+        if self._order:
+            sql += f" ORDER BY {', '.join(self._order)}"
+        if self._limit is not None:
+            sql += f" LIMIT {int(self._limit)}"
+            if self._offset:
+                sql += f" OFFSET {int(self._offset)}"
+        rows = [self._project(json.loads(doc)) for (doc,) in conn.execute(sql, self._params)]
+
+        count = None
+        if self._count:
+            (count,) = conn.execute(
+                f'SELECT COUNT(*) FROM "{self._table}"{self._where_sql()}', self._params
+            ).fetchone()
+
+        if self._single or self._maybe_single:
+            if len(rows) > 1:
+                raise LocalBackendError(f"{len(rows)} rows returned for single() on {self._table}")
+            if not rows:
+                if self._single:
+                    raise LocalBackendError(f"0 rows returned for single() on {self._table}")
+                return LocalResponse(None, count)
+            return LocalResponse(rows[0], count)
+        return LocalResponse(rows, count)
+
+    def _write_rows(self, conn: sqlite3.Connection) -> LocalResponse:
+        rows = self._payload if isinstance(self._payload, list) else [self._payload]
+        written = []
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            for row in rows:
+                row = dict(row)
+                row.setdefault("id", str(uuid.uuid4()))
+                for column in TIMESTAMP_DEFAULTS.get(self._table, ()):
+                    row.setdefault(column, _now())
+                if self._op == "upsert":
+                    existing = conn.execute(
+                        f'SELECT doc FROM "{self._table}" WHERE json_extract(doc, \'$.{self._on_conflict}\') = ?',
+                        (_sql_value(row.get(self._on_conflict)),),
+                    ).fetchone()
+                    if existing:
+                        merged = {**json.loads(existing[0]), **row}
+                        merged["id"] = json.loads(existing[0])["id"]
+                        conn.execute(
+                            f'UPDATE "{self._table}" SET doc = ? WHERE id = ?',
+                            (json.dumps(merged, default=str), merged["id"]),
+                        )
+                        written.append(merged)
+                        continue
+                try:
+                    conn.execute(
+                        f'INSERT INTO "{self._table}" (id, doc) VALUES (?, ?)',
+                        (str(row["id"]), json.dumps(row, default=str)),
+                    )
+                except sqlite3.IntegrityError as e:
+                    raise LocalBackendError(f"duplicate key value on {self._table}: {row['id']}") from e
+                written.append(row)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return LocalResponse([self._project(r) for r in written])
+
+    def _update(self, conn: sqlite3.Connection) -> LocalResponse:
+        # BEGIN IMMEDIATE takes the write lock up front, so the read-modify-
+        # write below is atomic across threads and processes (like a single
+        # UPDATE ... WHERE in Postgres).
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            matched = conn.execute(
+                f'SELECT id, doc FROM "{self._table}"{self._where_sql()}', self._params
+            ).fetchall()
+            updated = []
+            for row_id, doc in matched:
+                row = {**json.loads(doc), **self._payload}
+                if "updated_at" in TIMESTAMP_DEFAULTS.get(self._table, ()) and "updated_at" not in self._payload:
+                    row["updated_at"] = _now()
+                conn.execute(
+                    f'UPDATE "{self._table}" SET doc = ? WHERE id = ?',
+                    (json.dumps(row, default=str), row_id),
+                )
+                updated.append(row)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return LocalResponse([self._project(r) for r in updated])
+
+    def _delete(self, conn: sqlite3.Connection) -> LocalResponse:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            matched = conn.execute(
+                f'SELECT doc FROM "{self._table}"{self._where_sql()}', self._params
+            ).fetchall()
+            conn.execute(f'DELETE FROM "{self._table}"{self._where_sql()}', self._params)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return LocalResponse([json.loads(doc) for (doc,) in matched])
+
+
+class LocalBucket:
+    """Filesystem-backed storage bucket."""
+
+    def __init__(self, root: Path):
+        self.root = root
+
+    def _resolve(self, path: str) -> Path:
+        target = (self.root / path).resolve()
+        if not str(target).startswith(str(self.root.resolve()) + os.sep):
+            raise LocalBackendError(f"Invalid storage path: {path}")
+        return target
+
+    def upload(self, path: str, file: bytes, file_options: Optional[dict] = None):
+        target = self._resolve(path)
+        if target.exists():
+            raise LocalBackendError(f"The resource already exists: {path}")
+        target.parent.mkdir(parents=True, exist_ok=True)
+        # Write-then-rename so readers never see a partial file
+        tmp = target.with_name(f".{target.name}.{uuid.uuid4().hex}.tmp")
+        tmp.write_bytes(file)
+        os.replace(tmp, target)
+        return SimpleNamespace(path=path, full_path=str(target))
+
+    def download(self, path: str) -> bytes:
+        target = self._resolve(path)
+        if not target.exists():
+            raise LocalBackendError(f"Object not found: {path}")
+        return target.read_bytes()
+
+    def list(self, path: Optional[str] = None, options: Optional[dict] = None) -> List[dict]:
+        folder = self._resolve(path) if path else self.root
+        if not folder.is_dir():
+            return []
+        limit = (options or {}).get("limit", 100)
+        return [{"name": entry.name} for entry in sorted(folder.iterdir())[:limit]]
+
+    def remove(self, paths: List[str]) -> List[dict]:
+        removed = []
+        for path in paths:
+            target = self._resolve(path)
+            if target.exists():
+                target.unlink()
+                removed.append({"name": path})
+        return removed
+
+    def get_public_url(self, path: str) -> str:
+        return self._resolve(path).as_uri()
+
+
+class LocalStorage:
+    def __init__(self, root: str):
+        self.root = Path(root)
+
+    def from_(self, bucket: str) -> LocalBucket:
+        path = self.root / bucket
+        path.mkdir(parents=True, exist_ok=True)
+        return LocalBucket(path)
+
+
+def mint_token(user_id: str, email: str, role: str, secret: str) -> str:
+    """Create a signed bearer token accepted by LocalAuth."""
+    payload = base64.urlsafe_b64encode(
+        json.dumps({"sub": user_id, "email": email, "role": role}).encode()
+    ).decode().rstrip("=")
+    signature = hmac.new(secret.encode(), payload.encode(), hashlib.sha256).hexdigest()
+    return f"{payload}.{signature}"
+
+
+class LocalAuth:
+    """
+    Verifies HMAC-signed tokens made by mint_token().
+
+    There is no user directory offline; the token itself carries the user
+    id, email and role, signed with LOCAL_AUTH_SECRET.
+    """
+
+    def __init__(self, secret: str):
+        self.secret = secret
+
+    def get_user(self, token: str):
+        if not self.secret:
+            raise LocalBackendError("LOCAL_AUTH_SECRET is not configured")
+        try:
+            payload, signature = token.rsplit(".", 1)
+        except ValueError:
+            return SimpleNamespace(user=None)
+
+        expected = hmac.new(self.secret.encode(), payload.encode(), hashlib.sha256).hexdigest()
+        if not hmac.compare_digest(expected, signature):
+            return SimpleNamespace(user=None)
+
+        claims = json.loads(base64.urlsafe_b64decode(payload + "=" * (-len(payload) % 4)))
+        user = SimpleNamespace(
+            id=claims["sub"],
+            email=claims.get("email"),
+            user_metadata={"role": claims.get("role", "user")},
+        )
+        return SimpleNamespace(user=user)
+
+
+def _increment_claim_stats(conn: sqlite3.Connection, params: dict) -> None:
+    """Local version of the increment_claim_stats() Postgres function (migrations/create_claim_stats.sql)."""
+    delta = params.get("p_delta", 1)
+    risk = params.get("p_risk_score")
+    keys = {
+        "claim_stats_daily": {"user_id": params["p_user_id"], "day": params["p_day"], "outcome": params["p_outcome"]},
+        "claim_stats_totals": {"user_id": params["p_user_id"], "outcome": params["p_outcome"]},
+    }
+    for table, key in keys.items():
+        where = " AND ".join(f"json_extract(doc, '$.{column}') = ?" for column in key)
+        existing = conn.execute(f'SELECT doc FROM "{table}" WHERE {where}', list(key.values())).fetchone()
+        if existing:
+            row = json.loads(existing[0])
+        else:
+            row = {"id": str(uuid.uuid4()), **key,
+                   "claims": 0, "claimed_total": 0, "risk_sum": 0, "risk_count": 0, "risk_histogram": [0] * 10}
+        row["claims"] += delta
+        row["claimed_total"] += delta * (params.get("p_claimed_total") or 0)
+        if risk is not None:
+            row["risk_sum"] += delta * risk
+            row["risk_count"] += delta
+            row["risk_histogram"][min(max(int(risk // 10), 0), 9)] += delta
+        conn.execute(f'INSERT OR REPLACE INTO "{table}" (id, doc) VALUES (?, ?)', (row["id"], json.dumps(row)))
+
+
+def _increment_tenant_usage(conn: sqlite3.Connection, params: dict) -> None:
+    """Local version of the increment_tenant_usage() Postgres function (migrations/create_tenant_usage.sql)."""
+    key = {"user_id": params["p_user_id"], "day": params["p_day"]}
+    existing = conn.execute(
+        "SELECT doc FROM \"tenant_usage_daily\" WHERE json_extract(doc, '$.user_id') = ? AND json_extract(doc, '$.day') = ?",
+        list(key.values()),
+    ).fetchone()
+    row = json.loads(existing[0]) if existing else {"id": str(uuid.uuid4()), **key}
+    for column in ("claims", "cpu_seconds", "ocr_pages", "pages_rasterized", "small_prompt_tokens",
+                   "small_completion_tokens", "large_prompt_tokens", "large_completion_tokens",
+                   "bytes_stored", "llm_cost_usd", "cost_usd"):
+        row[column] = row.get(column, 0) + params.get(f"p_{column}", 1 if column == "claims" else 0)
+    conn.execute('INSERT OR REPLACE INTO "tenant_usage_daily" (id, doc) VALUES (?, ?)', (row["id"], json.dumps(row)))
+
+
+# Postgres functions callable through client.rpc(), implemented locally
+LOCAL_FUNCTIONS = {
+    "increment_claim_stats": (_increment_claim_stats, ("claim_stats_daily", "claim_stats_totals")),
+    "increment_tenant_usage": (_increment_tenant_usage, ("tenant_usage_daily",)),
+}
+
+
+class LocalRpc:
+    def __init__(self, db: LocalDatabase, name: str, params: dict):
+        self._db = db
+        self._name = name
+        self._params = params or {}
+
+    def execute(self) -> LocalResponse:
+        if self._name not in LOCAL_FUNCTIONS:
+            raise LocalBackendError(f"function {self._name} does not exist")
+        function, tables = LOCAL_FUNCTIONS[self._name]
+        for table in tables:
+            self._db.ensure_table(table)
+        conn = self._db.connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            result = function(conn, self._params)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return LocalResponse(result)
+
+
+class LocalClient:
+    """Drop-in replacement for supabase.Client backed by SQLite + filesystem."""
+
+    def __init__(self, data_dir: str, db_path: str = "", auth_secret: str = ""):
+        data_dir = os.path.abspath(data_dir)
+        self.database = LocalDatabase(db_path or os.path.join(data_dir, "priclaim.db"))
+        self.storage = LocalStorage(os.path.join(data_dir, "storage"))
+        self.auth = LocalAuth(auth_secret)
+
+    def table(self, name: str) -> LocalQuery:
+        return LocalQuery(self.database, name)
+
+    def rpc(self, name: str, params: Optional[dict] = None) -> LocalRpc:
+        return LocalRpc(self.database, name, params)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from app.core.config import settings
+
+    parser = argparse.ArgumentParser(description="Mint a bearer token for the local backend")
+    parser.add_argument("--user-id", default=str(uuid.uuid4()))
+    parser.add_argument("--email", required=True)
+    parser.add_argument("--role", default="user", choices=["user", "admin"])
+    args = parser.parse_args()
+
+    if not settings.local_auth_secret:
+        raise SystemExit("Set LOCAL_AUTH_SECRET before minting tokens")
+    print(mint_token(args.user_id, args.email, args.role, settings.local_auth_secret))
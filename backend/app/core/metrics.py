@@ -0,0 +1,221 @@
+"""
+Prometheus metrics for the claim processing pipeline.
+
+Stage timings are recorded twice: once into the process-wide histograms
+scraped from /metrics, and once into a per-claim dict (when one has been
+started with start_claim_timings) so they can be stored on the claim row.
+time_stage() also measures the CPU time of the calling thread per stage,
+for the claim's resource ledger (start_claim_cpu).
+"""
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Optional
+
+from prometheus_client import Counter, Gauge, Histogram
+
+# Buckets span a single regex pass (~ms) up to a 100-page OCR job (minutes)
+STAGE_BUCKETS = (0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+STAGE_SECONDS = Histogram(
+    "priclaim_stage_seconds",
+    "Time spent in each claim pipeline stage",
+    ["stage"],
+    buckets=STAGE_BUCKETS,
+)
+
+EXTRACTION_METHOD = Counter(
+    "priclaim_extraction_method_total",
+    "Documents processed by text extraction method",
+    ["method"],
+)
+
+EXTRACTION_FALLBACKS = Counter(
+    "priclaim_extraction_fallbacks_total",
+    "Fallbacks from one extraction strategy to another",
+    ["from_method", "to_method"],
+)
+
+CACHE_REQUESTS = Counter(
+    "priclaim_cache_requests_total",
+    "Cache lookups by cache name and result (hit/miss)",
+    ["cache", "result"],
+)
+
+CLAIM_RETRIES = Counter(
+    "priclaim_claim_retries_total",
+    "Claim processing attempts beyond the first",
+)
+
+CLAIMS_PROCESSED = Counter(
+    "priclaim_claims_processed_total",
+    "Claims that finished processing, by final status",
+    ["status"],
+)
+
+LLM_TOKENS = Counter(
+    "priclaim_llm_tokens_total",
+    "Groq tokens consumed, by model and kind (prompt/completion/cached_prompt)",
+    ["model", "kind"],
+)
+
+QUEUE_DEPTH = Gauge(
+    "priclaim_queue_depth",
+    "Claims waiting to be processed",
+)
+
+DEPENDENCY_LATENCY = Gauge(
+    "priclaim_dependency_probe_seconds",
+    "Latency of the last readiness probe per dependency",
+    ["dependency"],
+)
+
+QUEUE_WAIT = Histogram(
+    "priclaim_queue_wait_seconds",
+    "Time claims spend queued before a worker picks them up",
+    ["priority"],
+    buckets=STAGE_BUCKETS,
+)
+
+IN_FLIGHT = Gauge(
+    "priclaim_claims_in_flight",
+    "Claims currently being processed",
+)
+
+LLM_ROUTES = Counter(
+    "priclaim_llm_routes_total",
+    "Model routing decisions, by task (extraction/audit), route (rules/small/large) and whether escalated",
+    ["task", "route", "escalated"],
+)
+
+LLM_ROUTE_SECONDS = Histogram(
+    "priclaim_llm_route_seconds",
+    "LLM time per routed extraction or audit, by task and route",
+    ["task", "route"],
+    buckets=STAGE_BUCKETS,
+)
+
+LLM_ROUTE_COST = Counter(
+    "priclaim_llm_route_cost_usd_total",
+    "Estimated Groq spend by task and route",
+    ["task", "route"],
+)
+
+LEASE_EVENTS = Counter(
+    "priclaim_claim_lease_events_total",
+    "Claim lease activity (acquired, contended, lost, reclaimed, abandoned)",
+    ["event"],
+)
+
+
+_claim_timings: ContextVar[Optional[Dict[str, float]]] = ContextVar("claim_timings", default=None)
+_claim_cpu: ContextVar[Optional[Dict[str, float]]] = ContextVar("claim_cpu", default=None)
+_llm_usage: ContextVar[tuple] = ContextVar("llm_usage", default=())
+
+
+def start_claim_timings() -> Dict[str, float]:
+    """
+    Start collecting stage timings for the claim being processed in this context.
+
+    Returns:
+        The dict that time_stage() will fill in (stage -> seconds)
+    """
+    timings: Dict[str, float] = {}
+    _claim_timings.set(timings)
+    return timings
+
+
+def stop_claim_timings() -> None:
+    """Stop collecting per-claim timings in this context."""
+    _claim_timings.set(None)
+
+
+def start_claim_cpu() -> Dict[str, float]:
+    """
+    Start collecting per-stage CPU seconds (this thread's) for the claim being processed.
+
+    Returns:
+        The dict that time_stage() will fill in (stage -> CPU seconds)
+    """
+    cpu: Dict[str, float] = {}
+    _claim_cpu.set(cpu)
+    return cpu
+
+
+def stop_claim_cpu() -> None:
+    _claim_cpu.set(None)
+
+
+def observe_stage(stage: str, seconds: float) -> None:
+    """
+    Record time spent in a pipeline stage.
+
+    Observes the stage histogram and, if per-claim timings are active,
+    adds the seconds to the current claim's timings. Stages that run more
+    than once per claim (e.g. ocr_page) accumulate.
+
+    Use this directly for work timed elsewhere (e.g. in an OCR worker process).
+    """
+    STAGE_SECONDS.labels(stage=stage).observe(seconds)
+    timings = _claim_timings.get()
+    if timings is not None:
+        timings[stage] = round(timings.get(stage, 0.0) + seconds, 4)
+
+
+@contextmanager
+def time_stage(stage: str):
+    """Time the enclosed block as a pipeline stage (see observe_stage)."""
+    start, cpu_start = time.perf_counter(), time.thread_time()
+    try:
+        yield
+    finally:
+        observe_stage(stage, time.perf_counter() - start)
+        cpu = _claim_cpu.get()
+        if cpu is not None:
+            cpu[stage] = round(cpu.get(stage, 0.0) + time.thread_time() - cpu_start, 4)
+
+
+def record_cache_lookup(cache: str, hit: bool) -> None:
+    """Count a cache hit or miss."""
+    CACHE_REQUESTS.labels(cache=cache, result="hit" if hit else "miss").inc()
+
+
+def record_llm_usage(model: str, usage) -> None:
+    """
+    Count Groq token usage from a completion's `usage` block.
+
+    Args:
+        model: Model name the request was sent to
+        usage: response.usage from the Groq client (may be None)
+    """
+    if usage is None:
+        return
+    for tracked in _llm_usage.get():
+        tokens = tracked.setdefault(model, {"prompt": 0, "completion": 0})
+        tokens["prompt"] += getattr(usage, "prompt_tokens", 0) or 0
+        tokens["completion"] += getattr(usage, "completion_tokens", 0) or 0
+    LLM_TOKENS.labels(model=model, kind="prompt").inc(getattr(usage, "prompt_tokens", 0) or 0)
+    LLM_TOKENS.labels(model=model, kind="completion").inc(getattr(usage, "completion_tokens", 0) or 0)
+    # Prompt tokens served from the backend's prompt cache (shared policy prefix), where reported
+    details = getattr(usage, "prompt_tokens_details", None)
+    cached = getattr(details, "cached_tokens", 0) if details is not None else 0
+    if cached:
+        LLM_TOKENS.labels(model=model, kind="cached_prompt").inc(cached)
+
+
+@contextmanager
+def track_llm_usage():
+    """
+    Collect the token usage of Groq calls made in the enclosed block (this context only).
+
+    Blocks may nest; a call counts towards every enclosing block.
+
+    Yields:
+        dict model -> {"prompt": tokens, "completion": tokens}, filled in as calls complete
+    """
+    usage: Dict[str, Dict[str, int]] = {}
+    token = _llm_usage.set(_llm_usage.get() + (usage,))
+    try:
+        yield usage
+    finally:
+        _llm_usage.reset(token)
@@ -0,0 +1,19 @@
+"""
+JSON responses encoded with orjson.
+
+FastJSONResponse is the app's default response class. Endpoints that
+return large lists straight from the database (claims, policies) return
+one directly, which skips FastAPI's jsonable_encoder pass and any
+response_model validation: the rows come from our own tables and are
+already JSON types.
+"""
+from typing import Any
+
+from fastapi.responses import JSONResponse
+
+from app.models.serialization import encode
+
+
+class FastJSONResponse(JSONResponse):
+    def render(self, content: Any) -> bytes:
+        return encode(content)
@@ -1,13 +1,35 @@
+import threading
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from app.api.routes import health, claims, policies
+from fastapi.middleware.gzip import GZipMiddleware
+from app.api.routes import health, claims, policies, metrics, admin
 
 from app.core.config import settings
+from app.core.responses import FastJSONResponse
+from app.services import warmup
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Warm up in the background so the process accepts liveness probes
+    # immediately; /health/ready stays 503 until this finishes.
+    if settings.warmup_on_startup:
+        threading.Thread(target=warmup.warm_up, name="warmup", daemon=True).start()
+    else:
+        warmup.mark_ready()
+    yield
+    from app.services.ocr_pool import shutdown_ocr_pool
+    shutdown_ocr_pool()
+
 
 app = FastAPI(
     title="PriClaim API",
     description="Medical Insurance Claim Auditing Platform",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
+    default_response_class=FastJSONResponse,
 )
 
 #cors
@@ -19,7 +41,26 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+#compression: claim and policy lists are large and repetitive JSON
+if settings.response_compression:
+    try:
+        from brotli_asgi import BrotliMiddleware  # optional; falls back to gzip for clients without br
+        app.add_middleware(
+            BrotliMiddleware,
+            quality=settings.response_brotli_quality,
+            minimum_size=settings.response_compression_min_bytes,
+            gzip_fallback=True,
+        )
+    except ImportError:
+        app.add_middleware(
+            GZipMiddleware,
+            minimum_size=settings.response_compression_min_bytes,
+            compresslevel=settings.response_gzip_level,
+        )
+
 #routes
 app.include_router(health.router, tags=["Health"])
+app.include_router(metrics.router, tags=["Metrics"])
 app.include_router(claims.router, tags=["Claims"])
-app.include_router(policies.router, prefix="/api/v1", tags=["Policies"])
\ No newline at end of file
+app.include_router(policies.router, prefix="/api/v1", tags=["Policies"])
+app.include_router(admin.router, prefix="/api/v1", tags=["Admin"])
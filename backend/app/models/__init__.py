@@ -0,0 +1,4 @@
+from app.models.claim import AuditResult, Finding, LineItems, StructuredClaim
+from app.models.serialization import dumps, encode, loads
+
+__all__ = ["AuditResult", "Finding", "LineItems", "StructuredClaim", "dumps", "encode", "loads"]
@@ -0,0 +1,220 @@
+"""
+Typed claim data passed between pipeline stages.
+
+The normalizer produces a StructuredClaim, the auditor an AuditResult; the
+worker, master data matching, duplicate detection and the model router all
+work on these instead of loose dicts. They're slotted dataclasses (no
+per-instance __dict__) and line items are stored column-wise, as one
+float64 array per numeric column, so a claim with hundreds of items is a
+handful of objects rather than hundreds of dicts.
+
+to_dict()/from_dict() convert to and from the JSON stored in
+claims.extracted_data["structured_data"] and claims.audit_result, which
+keeps its existing shape (claim_items is still a list of item objects).
+"""
+import math
+from array import array
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+VERDICTS = ("APPROVED", "PARTIALLY_APPROVED", "REJECTED", "NEEDS_REVIEW")
+
+_MISSING = math.nan
+
+
+def to_float(value: Any) -> Optional[float]:
+    """Numbers, and strings like '1,200.50'; None for anything else."""
+    if value is None or value == "" or isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return None if math.isnan(value) else float(value)
+    try:
+        return float(str(value).replace(",", ""))
+    except ValueError:
+        return None
+
+
+def _optional(value: float) -> Optional[float]:
+    return None if math.isnan(value) else value
+
+
+@dataclass(slots=True)
+class LineItems:
+    """Line items as parallel columns; numeric columns are float64 arrays with NaN for missing values."""
+
+    description: List[str] = field(default_factory=list)
+    amount: array = field(default_factory=lambda: array("d"))
+    quantity: array = field(default_factory=lambda: array("d"))
+    rate: array = field(default_factory=lambda: array("d"))
+    tariff_code: List[Optional[str]] = field(default_factory=list)
+
+    def __len__(self) -> int:
+        return len(self.description)
+
+    def append(self, description: str, amount: Any, quantity: Any = None, rate: Any = None,
+               tariff_code: Optional[str] = None) -> None:
+        self.description.append(str(description or ""))
+        for column, value in ((self.amount, amount), (self.quantity, quantity), (self.rate, rate)):
+            number = to_float(value)
+            column.append(_MISSING if number is None else number)
+        self.tariff_code.append(tariff_code)
+
+    def rows(self) -> Iterator[Tuple[str, Optional[float], Optional[float], Optional[float]]]:
+        """(description, amount, quantity, rate) per item; None where missing."""
+        for i in range(len(self.description)):
+            yield (self.description[i], _optional(self.amount[i]), _optional(self.quantity[i]),
+                   _optional(self.rate[i]))
+
+    def total(self) -> float:
+        return sum(amount for amount in self.amount if not math.isnan(amount))
+
+    @classmethod
+    def from_dicts(cls, items: Optional[List[Any]]) -> "LineItems":
+        line_items = cls()
+        for item in items or []:
+            if isinstance(item, dict):
+                line_items.append(item.get("description"), item.get("amount"), item.get("quantity"),
+                                  item.get("rate"), item.get("tariff_code"))
+        return line_items
+
+    def to_dicts(self) -> List[Dict]:
+        items = []
+        for i, (description, amount, quantity, rate) in enumerate(self.rows()):
+            item = {"description": description, "amount": amount}
+            if quantity is not None:
+                item["quantity"] = quantity
+            if rate is not None:
+                item["rate"] = rate
+            if self.tariff_code[i]:
+                item["tariff_code"] = self.tariff_code[i]
+            items.append(item)
+        return items
+
+
+@dataclass(slots=True)
+class StructuredClaim:
+    """Normalized claim data (claim_normalizer.normalize_claim)."""
+
+    hospital_name: Optional[str] = None
+    patient_name: Optional[str] = None
+    items: LineItems = field(default_factory=LineItems)
+    total_claimed: float = 0.0
+    diagnosis: Optional[str] = None
+    admission_date: Optional[str] = None
+    discharge_date: Optional[str] = None
+    policy_number: Optional[str] = None
+    extraction_confidence: str = "none"  # high, medium, low, none, error
+    extraction_source: Optional[str] = None  # table, regex, llm
+    confidence_score: Optional[float] = None
+    hospital_id: Optional[str] = None
+    hospital_canonical_name: Optional[str] = None
+    normalizer_version: Optional[int] = None  # claim_normalizer.NORMALIZER_VERSION that produced it
+    error: Optional[str] = None
+
+    # Optional fields left out of to_dict() when unset
+    _OPTIONAL = ("diagnosis", "admission_date", "discharge_date", "policy_number", "extraction_source",
+                 "confidence_score", "hospital_id", "hospital_canonical_name", "normalizer_version", "error")
+
+    @classmethod
+    def from_dict(cls, data: Optional[Dict]) -> "StructuredClaim":
+        data = data or {}
+        text = lambda key: str(data[key]) if data.get(key) not in (None, "") else None  # noqa: E731
+        return cls(
+            hospital_name=text("hospital_name"),
+            patient_name=text("patient_name"),
+            items=LineItems.from_dicts(data.get("claim_items")),
+            total_claimed=to_float(data.get("total_claimed")) or 0.0,
+            diagnosis=text("diagnosis"),
+            admission_date=text("admission_date"),
+            discharge_date=text("discharge_date"),
+            policy_number=text("policy_number"),
+            extraction_confidence=data.get("extraction_confidence") or "none",
+            extraction_source=data.get("extraction_source"),
+            confidence_score=to_float(data.get("confidence_score")),
+            hospital_id=data.get("hospital_id"),
+            hospital_canonical_name=data.get("hospital_canonical_name"),
+            normalizer_version=data.get("normalizer_version"),
+            error=data.get("error"),
+        )
+
+    def to_dict(self) -> Dict:
+        data = {
+            "hospital_name": self.hospital_name,
+            "patient_name": self.patient_name,
+            "claim_items": self.items.to_dicts(),
+            "total_claimed": self.total_claimed,
+            "extraction_confidence": self.extraction_confidence,
+        }
+        for name in self._OPTIONAL:
+            value = getattr(self, name)
+            if value is not None:
+                data[name] = value
+        return data
+
+
+@dataclass(slots=True)
+class Finding:
+    type: str = "other"
+    severity: str = "medium"
+    description: str = ""
+    details: Optional[Dict[str, Any]] = None  # type-specific fields (matched_claim_id, tariff_code, ...)
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "Finding":
+        details = {key: value for key, value in data.items() if key not in ("type", "severity", "description")}
+        return cls(
+            type=str(data.get("type") or "other"),
+            severity=str(data.get("severity") or "medium"),
+            description=str(data.get("description") or ""),
+            details=details or None,
+        )
+
+    def to_dict(self) -> Dict:
+        return {"type": self.type, "severity": self.severity, "description": self.description, **(self.details or {})}
+
+
+@dataclass(slots=True)
+class AuditResult:
+    """Audit verdict for one claim (audit_engine.run_audit)."""
+
+    verdict: str = "NEEDS_REVIEW"
+    risk_score: int = 50
+    findings: List[Finding] = field(default_factory=list)
+    explanation: str = ""
+    confidence: float = 0.0
+    error: Optional[str] = None
+
+    @classmethod
+    def from_dict(cls, data: Optional[Dict]) -> "AuditResult":
+        """Parse a stored result or an LLM reply; out-of-range values are clamped, unknown verdicts need review."""
+        data = data or {}
+        verdict = str(data.get("verdict") or "").upper()
+        risk = to_float(data.get("risk_score"))
+        confidence = to_float(data.get("confidence"))
+        return cls(
+            verdict=verdict if verdict in VERDICTS else "NEEDS_REVIEW",
+            risk_score=int(min(max(risk, 0), 100)) if risk is not None else 50,
+            findings=[Finding.from_dict(f) for f in data.get("findings") or [] if isinstance(f, dict)],
+            explanation=str(data.get("explanation") or ""),
+            confidence=min(max(confidence, 0.0), 1.0) if confidence is not None else 0.0,
+            error=data.get("error"),
+        )
+
+    def to_dict(self) -> Dict:
+        data = {
+            "verdict": self.verdict,
+            "risk_score": self.risk_score,
+            "findings": [finding.to_dict() for finding in self.findings],
+            "explanation": self.explanation,
+            "confidence": self.confidence,
+        }
+        if self.error is not None:
+            data["error"] = self.error
+        return data
+
+    def replace_findings(self, finding_type: str, findings: List[Finding]) -> None:
+        """Swap this result's findings of one type for `findings`."""
+        self.findings = [f for f in self.findings if f.type != finding_type] + list(findings)
+
+    def raise_risk(self, floor: int) -> None:
+        self.risk_score = max(self.risk_score, floor)
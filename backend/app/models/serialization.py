@@ -0,0 +1,41 @@
+"""
+JSON encoding for the claim models (orjson).
+
+orjson encodes the slotted dataclasses natively; the default hook covers
+what it doesn't know: line item arrays (as lists) and the models'
+to_dict() shape where that differs from their fields (LineItems and
+StructuredClaim are written row-oriented, as stored). NaN becomes null.
+"""
+from array import array
+from typing import Any
+
+import orjson
+
+_OPTIONS = orjson.OPT_PASSTHROUGH_DATACLASS | orjson.OPT_NON_STR_KEYS
+
+
+def _default(value: Any) -> Any:
+    if hasattr(value, "to_dict"):
+        return value.to_dict()
+    if hasattr(value, "to_dicts"):
+        return value.to_dicts()
+    if isinstance(value, array):
+        return value.tolist()
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+def encode(value: Any, indent: bool = False) -> bytes:
+    """UTF-8 JSON for `value` (dicts, lists, claim models, arrays)."""
+    return orjson.dumps(value, default=_default, option=_OPTIONS | (orjson.OPT_INDENT_2 if indent else 0))
+
+
+def dumps(value: Any, indent: bool = False) -> str:
+    return encode(value, indent).decode()
+
+
+def loads(data: Any) -> Any:
+    """Parse JSON from str or bytes."""
+    return orjson.loads(data)
+
+
+JSONDecodeError = orjson.JSONDecodeError
@@ -2,6 +2,11 @@ from pydantic import BaseModel
 from typing import Optional
 from datetime import datetime
 
+# Claim contents (extracted_data.structured_data, audit_result) are the
+# slotted models in app.models, not pydantic: they're built for every claim
+# the worker processes, and their to_dict() is the JSON shape the API
+# returns for those columns.
+
 
 class ClaimCreate(BaseModel):
     policy_id: Optional[str] = None
@@ -11,10 +16,11 @@ class ClaimResponse(BaseModel):
     job_id: str
     status: str
     message: str
+    duplicate: bool = False  # an earlier upload of the same claim; job_id is that claim's
 
 
 class ClaimStatus(BaseModel):
     job_id: str
     status: str
     file_name: Optional[str] = None
-    created_at: Optional[datetime] = None
\ No newline at end of file
+    created_at: Optional[datetime] = None
@@ -1,19 +1,144 @@
-from app.services.groq_service import analyze_claim
+from app.services.claim_state import ClaimState, ClaimVersionConflict
+from app.services.groq_service import AuditPolicy, analyze_claim, analyze_claims, prepare_policy
+from app.services.master_data import apply_tariff_findings, tariff_findings
+from app.services.model_router import (
+    ROUTE_LARGE,
+    ROUTE_MODELS,
+    ROUTE_SMALL,
+    audit_escalation,
+    measure,
+    record,
+    route_audit,
+)
+from app.services.rate_limiter import RateLimiter
 from app.core.database import supabase
+from app.models import AuditResult, Finding, StructuredClaim
+from typing import List, Optional
 import logging
 
 logger = logging.getLogger(__name__)
 
 
-def audit_claim(claim_id: str, policy_text: str = None) -> dict:
+def needs_llm_audit(structured_data: Optional[StructuredClaim]) -> bool:
+    """False when there's nothing to audit; such claims get a fixed NEEDS_REVIEW."""
+    return structured_data is not None and structured_data.extraction_confidence != "none"
+
+
+def _no_data_result() -> AuditResult:
+    return AuditResult(
+        verdict="NEEDS_REVIEW",
+        risk_score=50,
+        findings=[Finding("missing_document", "high", "No structured claim data available")],
+        explanation="Unable to extract claim details from the document. Manual review required.",
+        confidence=0.0,
+    )
+
+
+def run_audit(structured_data: Optional[StructuredClaim], policy_text: str = None,
+              policy: AuditPolicy = None) -> AuditResult:
+    """
+    Audit already-extracted claim data without touching the database.
+    
+    Used by the worker, which holds the structured data in memory and
+    persists the result together with its other claim updates.
+    
+    Args:
+        structured_data: Normalized claim data from claim_normalizer
+        policy_text: Optional policy text (if not provided, uses generic analysis)
+        policy: Prepared policy (from prepare_policy); takes precedence over policy_text
+        
+    Returns:
+        AuditResult (audit_claim returns its to_dict())
+    """
+    if not needs_llm_audit(structured_data):
+        return _no_data_result()
+    
+    # Run AI analysis on the routed model (escalating doubtful small-model
+    # verdicts), then the tariff checks that don't need it
+    policy = policy or prepare_policy(policy_text)
+    decision = route_audit(structured_data, policy)
+    try:
+        with measure(decision):
+            result = analyze_claim(structured_data, policy=policy, model=decision.model)
+        reason = audit_escalation(decision, result)
+        if reason:
+            decision.escalate(reason)
+            with measure(decision):
+                result = analyze_claim(structured_data, policy=policy, model=decision.model)
+    finally:
+        record(decision)
+    return apply_tariff_findings(result, tariff_findings(structured_data))
+
+
+def run_audits(structured_data: List[StructuredClaim], policy: AuditPolicy,
+               limiter: Optional[RateLimiter] = None) -> List[AuditResult]:
     """
-    Audit a claim using AI analysis.
+    Audit many claims against one policy, batching them into shared LLM calls.
+    
+    Args:
+        structured_data: Normalized claim data, one per claim
+        policy: Prepared policy (from prepare_policy)
+        limiter: Caller's own rate limiter (bulk jobs), charged for every LLM call made
+        
+    Returns:
+        One audit result per claim, in order
+    """
+    results = [None if needs_llm_audit(data) else _no_data_result() for data in structured_data]
+    decisions = {i: route_audit(data, policy) for i, data in enumerate(structured_data) if results[i] is None}
+    
+    # One batch per model; small-model results that need it are redone on the large one
+    for route in (ROUTE_SMALL, ROUTE_LARGE):
+        pending = [i for i, decision in decisions.items() if decision.route == route and results[i] is None]
+        if not pending:
+            continue
+        with measure(*(decisions[i] for i in pending)):
+            audited = analyze_claims([structured_data[i] for i in pending], policy, model=ROUTE_MODELS[route],
+                                     limiter=limiter)
+        for i, result in zip(pending, audited):
+            reason = audit_escalation(decisions[i], result)
+            if reason:
+                decisions[i].escalate(reason)
+            else:
+                results[i] = result
+    
+    for i, decision in decisions.items():
+        record(decision)
+        results[i] = apply_tariff_findings(results[i], tariff_findings(structured_data[i]))
+    return results
+
+
+def save_audit_result(claim: dict, audit_result: AuditResult, policy_text: str = None) -> None:
+    """
+    Store an audit result on the claim (version-checked, like every ClaimState write).
+    
+    Args:
+        claim: The claim's row as it was audited (at least id and version)
+        audit_result: Result from run_audit/run_audits
+        policy_text: If given, also stored, recording the policy the claim was audited against
+        
+    Raises:
+        ClaimVersionConflict: if the claim changed since `claim` was read
+    """
+    update = {"audit_result": audit_result.to_dict()}
+    if policy_text is not None:
+        update["policy_text"] = policy_text
+    state = ClaimState(claim)
+    state.stage(**update)
+    state.flush()
+
+
+def audit_claim(claim_id: str, policy_text: str = None, claim: dict = None, policy: AuditPolicy = None) -> dict:
+    """
+    Audit a stored claim using AI analysis and save the result.
     
     Compares claim data against policy using Mixtral-8x7B for reasoning.
     
     Args:
         claim_id: Claim UUID
         policy_text: Optional policy text (if not provided, uses generic analysis)
+        claim: The claim's row (version, extracted_data, policy_text) if the
+            caller already has it in memory; skips the fetch
+        policy: Prepared policy (from prepare_policy); takes precedence over policy_text
         
     Returns:
         dict with audit results:
@@ -27,9 +152,11 @@ def audit_claim(claim_id: str, policy_text: str = None) -> dict:
     """
     try:
         # Fetch claim
-        result = supabase.table("claims").select("*").eq("id", claim_id).single().execute()
+        if claim is None:
+            result = supabase.table("claims").select("id, version, extracted_data, policy_text").eq("id", claim_id).single().execute()
+            claim = result.data
         
-        if not result.data:
+        if not claim:
             return {
                 "verdict": "NEEDS_REVIEW",
                 "risk_score": 100,
@@ -38,41 +165,27 @@ def audit_claim(claim_id: str, policy_text: str = None) -> dict:
                 "confidence": 0.0
             }
         
-        claim = result.data
-        
         # Get structured data from extraction
-        extracted_data = claim.get("extracted_data", {})
-        structured_data = extracted_data.get("structured_data", {})
-        
-        if not structured_data or structured_data.get("extraction_confidence") == "none":
-            return {
-                "verdict": "NEEDS_REVIEW",
-                "risk_score": 50,
-                "findings": [{
-                    "type": "missing_document",
-                    "severity": "high",
-                    "description": "No structured claim data available"
-                }],
-                "explanation": "Unable to extract claim details from the document. Manual review required.",
-                "confidence": 0.0
-            }
+        extracted_data = claim.get("extracted_data") or {}
+        structured_data = extracted_data.get("structured_data")
+        structured_data = StructuredClaim.from_dict(structured_data) if structured_data else None
         
-        # Get policy text (from claim or use default)
-        if not policy_text:
-            policy_text = claim.get("policy_text")
+        # Get policy (given, or the text stored on the claim)
+        if policy is None:
+            policy = prepare_policy(policy_text or claim.get("policy_text"))
         
-        # Run AI analysis using Mixtral
         logger.info(f"Running AI audit for claim {claim_id}")
-        audit_result = analyze_claim(structured_data, policy_text)
+        audit_result = run_audit(structured_data, policy=policy)
         
         # Store audit results in database
-        supabase.table("claims").update({
-            "audit_result": audit_result
-        }).eq("id", claim_id).execute()
+        try:
+            save_audit_result({"id": claim_id, **claim}, audit_result)
+        except ClaimVersionConflict:
+            logger.warning(f"Claim {claim_id} changed while it was audited; result not saved")
         
-        logger.info(f"Audit complete for {claim_id}: {audit_result.get('verdict')} (risk: {audit_result.get('risk_score')})")
+        logger.info(f"Audit complete for {claim_id}: {audit_result.verdict} (risk: {audit_result.risk_score})")
         
-        return audit_result
+        return audit_result.to_dict()
         
     except Exception as e:
         logger.error(f"Audit failed for claim {claim_id}: {str(e)}")
@@ -0,0 +1,100 @@
+"""
+Short-TTL in-process cache for single-claim reads.
+
+GET /api/v1/claims/{job_id} and /claims/{job_id}/status are polled by the
+frontend while a claim is processed. Responses are cached here per claim
+and view, already encoded and with their ETag, so a poll within the TTL
+costs no database read and no JSON encoding, and a poll whose
+If-None-Match still matches gets a bodyless 304.
+
+Claims still in flight are cached for CLAIM_CACHE_TTL_SECONDS, completed
+and failed ones for CLAIM_CACHE_FINAL_TTL_SECONDS. Every write through
+ClaimState (worker transitions, renormalize) and the other claim writers
+(audit results, lease reclaims, failure updates) invalidates the claim in
+this process; writes made by other processes (standalone workers, other
+API replicas) show up when the entry expires. A load that races an
+invalidation of the same claim is returned but not stored, so a read from
+before the write can't outlive it in the cache.
+"""
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple
+
+from app.core.config import settings
+from app.core.metrics import record_cache_lookup
+
+FINAL_STATUSES = ("completed", "failed")
+
+# claim_id -> view -> (expires, owner, body, etag); least recently used claim first
+_entries: "OrderedDict[str, Dict[str, Tuple[float, Optional[str], bytes, str]]]" = OrderedDict()
+# claim_id -> [generation, loads in flight]; only claims currently being loaded
+_loading: Dict[str, List[int]] = {}
+_lock = threading.Lock()
+
+
+def etag(body: bytes) -> str:
+    return f'"{hashlib.blake2b(body, digest_size=12).hexdigest()}"'
+
+
+def get_or_load(view: str, claim_id: str,
+                load: Callable[[], Optional[Tuple[Dict, bytes]]]) -> Optional[Tuple[Optional[str], bytes, str]]:
+    """
+    The cached response for one view of a claim, loading it on a miss.
+
+    Args:
+        view: Which projection ("detail", "status")
+        claim_id: Claim UUID
+        load: Reads the claim; returns (row, encoded body), or None if it doesn't exist
+
+    Returns:
+        (uploaded_by, body, ETag), or None if the claim doesn't exist
+    """
+    now = time.monotonic()
+    with _lock:
+        entry = _entries.get(claim_id, {}).get(view)
+        if entry is not None and entry[0] > now:
+            _entries.move_to_end(claim_id)
+            record_cache_lookup("claim", True)
+            return entry[1:]
+        loading = _loading.setdefault(claim_id, [0, 0])
+        loading[1] += 1
+        generation = loading[0]
+
+    record_cache_lookup("claim", False)
+    try:
+        loaded = load()
+    finally:
+        with _lock:
+            loading[1] -= 1
+            invalidated = loading[0] != generation
+            if not loading[1]:
+                _loading.pop(claim_id, None)
+    if loaded is None:
+        return None
+    row, body = loaded
+    final = row.get("status") in FINAL_STATUSES
+    ttl = settings.claim_cache_final_ttl_seconds if final else settings.claim_cache_ttl_seconds
+    entry = (time.monotonic() + ttl, row.get("uploaded_by"), body, etag(body))
+    if ttl > 0 and not invalidated:
+        with _lock:
+            _entries.setdefault(claim_id, {})[view] = entry
+            _entries.move_to_end(claim_id)
+            while len(_entries) > settings.claim_cache_max_entries:
+                _entries.popitem(last=False)
+    return entry[1:]
+
+
+def invalidate(claim_id: str) -> None:
+    """Drop every cached view of a claim (call after writing it)."""
+    with _lock:
+        _entries.pop(claim_id, None)
+        loading = _loading.get(claim_id)
+        if loading is not None:
+            loading[0] += 1
+
+
+def clear() -> None:
+    with _lock:
+        _entries.clear()
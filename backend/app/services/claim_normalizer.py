@@ -1,85 +1,169 @@
 import re
 import logging
+from datetime import datetime
 from typing import Dict, List, Optional
 
+from app.core.config import settings
+from app.core.metrics import time_stage, EXTRACTION_FALLBACKS
+from app.models import LineItems, StructuredClaim
+
 logger = logging.getLogger(__name__)
 
+# Stamped on every result (structured_data.normalizer_version, claims.normalizer_version).
+# Bump it when the patterns below or the extraction prompt change, then run
+# workers/renormalize.py to bring stored claims up to date.
+NORMALIZER_VERSION = 2  # 2: tables whose rows don't add up to the stated total are no longer used
+
 
-def normalize_claim(raw_text: str) -> Dict:
+def normalize_claim(raw_text: str, table: Optional[Dict] = None, extraction_method: Optional[str] = None,
+                    page_count: Optional[int] = None, ocr_confidence: Optional[float] = None,
+                    regex_result: Optional[StructuredClaim] = None) -> StructuredClaim:
     """
     Extract structured claim data from raw OCR text.
     
     Strategy:
-    1. Try Groq LLM extraction (LLaMA-3-8B) - smart and accurate
-    2. If confidence < 0.5 or error, fall back to regex patterns
+    1. Regex extraction (using the table's line items when one was found);
+       takes milliseconds, so it always runs
+    2. The model router scores the document's complexity and picks a route:
+       - rules: the itemised table checks out (every row's qty x rate
+         matches its amount, items add up to the stated total) → the
+         regex result, no LLM call
+       - small: Groq LLM extraction with LLaMA-3-8B
+       - large: LLaMA-3.3-70B, for long or badly scanned documents
+    3. If the LLM's confidence < 0.5 or it errors, a small-route document is
+       escalated to the large model; failing that, the regex result is used
+    
+    Args:
+        raw_text: Extracted document text
+        table: Result of table_extractor.extract_line_items, if any
+        extraction_method: How the text was extracted (pdfplumber, tesseract_ocr)
+        page_count: Pages in the document
+        ocr_confidence: Mean Tesseract word confidence (0-1) for OCRed documents
+        regex_result: extract_with_regex(raw_text, table), if already computed
+            (the renormalize backfill runs it in a process pool)
     
-    Returns canonical claim schema with confidence score.
+    Returns StructuredClaim with confidence score and NORMALIZER_VERSION.
     """
+    result = _normalize(raw_text, table, extraction_method, page_count, ocr_confidence, regex_result)
+    result.normalizer_version = NORMALIZER_VERSION
+    return result
+
+
+def _normalize(raw_text: str, table: Optional[Dict], extraction_method: Optional[str], page_count: Optional[int],
+               ocr_confidence: Optional[float], regex_result: Optional[StructuredClaim]) -> StructuredClaim:
     if not raw_text or not raw_text.strip():
-        return {
-            "hospital_name": None,
-            "patient_name": None,
-            "claim_items": [],
-            "total_claimed": 0,
-            "extraction_confidence": "none",
-            "error": "No text to parse"
-        }
-    
-    # Try LLM extraction first (new AI-powered approach)
+        return StructuredClaim(extraction_confidence="none", error="No text to parse")
+    
+    from app.services.model_router import ROUTE_RULES, ROUTE_SMALL, record, route_extraction
+    
+    if regex_result is None:
+        with time_stage("regex_extraction"):
+            regex_result = extract_with_regex(raw_text, table)
+    
+    decision = route_extraction(raw_text, page_count, extraction_method, ocr_confidence, table, regex_result)
     try:
-        from app.services.groq_service import extract_claim_data
+        if decision.route == ROUTE_RULES:
+            logger.info(f"Extraction routed to rules ({', '.join(decision.reasons)}), skipping LLM extraction")
+            return regex_result
         
-        logger.info("Attempting LLM extraction with Groq...")
-        llm_result = extract_claim_data(raw_text)
+        llm_result = _extract_with_llm(raw_text, decision)
+        if (llm_result.confidence_score or 0) < 0.5 and decision.route == ROUTE_SMALL and settings.model_routing:
+            decision.escalate(f"confidence {llm_result.confidence_score or 0}")
+            llm_result = _extract_with_llm(raw_text, decision)
         
         # If LLM succeeded with decent confidence, use it
-        if llm_result.get('confidence_score', 0) >= 0.5:
-            logger.info(f"LLM extraction successful with confidence {llm_result.get('confidence_score')}")
+        if (llm_result.confidence_score or 0) >= 0.5:
+            logger.info(f"LLM extraction successful with confidence {llm_result.confidence_score}")
+            llm_result.extraction_source = "llm"
             return llm_result
         
-        logger.warning(f"LLM confidence too low ({llm_result.get('confidence_score')}), falling back to regex")
+        logger.warning(f"LLM confidence too low ({llm_result.confidence_score}), falling back to regex")
         
     except Exception as e:
         logger.error(f"LLM extraction failed: {str(e)}, falling back to regex")
+    finally:
+        record(decision)
     
     # Fallback to regex-based extraction
     logger.info("Using regex-based extraction")
-    return extract_with_regex(raw_text)
+    EXTRACTION_FALLBACKS.labels(from_method="llm", to_method="regex").inc()
+    return regex_result
+
+
+def _extract_with_llm(raw_text: str, decision) -> StructuredClaim:
+    from app.services.groq_service import extract_claim_data
+    from app.services.model_router import measure
+    
+    logger.info(f"Attempting LLM extraction with Groq ({decision.model}, {decision.route} route)...")
+    with time_stage("llm_extraction"), measure(decision):
+        return extract_claim_data(raw_text, model=decision.model)
 
 
-def extract_with_regex(raw_text: str) -> Dict:
-    """Original regex-based extraction (fallback method)"""
+def extract_with_regex(raw_text: str, table: Optional[Dict] = None) -> StructuredClaim:
+    """
+    Regex-based extraction (fallback method).
+    
+    Line items come from the layout-aware table when it found any rows it
+    can vouch for; otherwise from the amount look-back in extract_claim_items.
+    """
     try:
         # Extract fields using patterns
         hospital_name = extract_hospital_name(raw_text)
         patient_name = extract_patient_name(raw_text)
-        claim_items = extract_claim_items(raw_text)
-        total_claimed = calculate_total(claim_items)
+        use_table = bool(table and table.get("line_items") and table.get("confidence") in ("high", "medium"))
+        claim_items = LineItems.from_dicts(table["line_items"] if use_table else extract_claim_items(raw_text))
         
         # Calculate confidence based on how many fields were extracted
         confidence = calculate_confidence(hospital_name, patient_name, claim_items)
         
-        result = {
-            "hospital_name": hospital_name,
-            "patient_name": patient_name,
-            "claim_items": claim_items,
-            "total_claimed": total_claimed,
-            "extraction_confidence": confidence
-        }
+        result = StructuredClaim(
+            hospital_name=hospital_name,
+            patient_name=patient_name,
+            items=claim_items,
+            total_claimed=claim_items.total(),
+            **extract_labelled_fields(raw_text),
+            extraction_confidence=confidence,
+            extraction_source="table" if use_table else "regex",
+        )
         
         logger.info(f"Normalized claim: {len(claim_items)} items, confidence={confidence}")
         return result
         
     except Exception as e:
         logger.error(f"Normalization failed: {str(e)}")
-        return {
-            "hospital_name": None,
-            "patient_name": None,
-            "claim_items": [],
-            "total_claimed": 0,
-            "extraction_confidence": "error",
-            "error": str(e)
-        }
+        return StructuredClaim(extraction_confidence="error", error=str(e))
+
+
+def _labelled_value(text: str, labels: str) -> Optional[str]:
+    """Value after 'Label:' on the same line, for any of the alternatives in `labels`."""
+    match = re.search(rf"(?:{labels})\s*[:\-]\s*([^\n]+)", text, re.IGNORECASE)
+    return match.group(1).strip() if match else None
+
+
+def _iso_date(value: Optional[str]) -> Optional[str]:
+    """Normalise 2025-05-07, 07/05/2025, 07-05-2025 or 07.05.2025 to YYYY-MM-DD."""
+    if not value:
+        return None
+    match = re.search(r"\d{4}-\d{2}-\d{2}|\d{1,2}[/.\-]\d{1,2}[/.\-]\d{4}", value)
+    if not match:
+        return None
+    for fmt in ("%Y-%m-%d", "%d/%m/%Y", "%d-%m-%Y", "%d.%m.%Y"):
+        try:
+            return datetime.strptime(match.group(0), fmt).date().isoformat()
+        except ValueError:
+            continue
+    return None
+
+
+def extract_labelled_fields(text: str) -> Dict:
+    """Diagnosis, admission/discharge dates and policy number from 'Label: value' lines."""
+    policy = _labelled_value(text, r"Policy\s*(?:No\.?|Number)")
+    return {
+        "diagnosis": _labelled_value(text, r"Diagnosis|Provisional Diagnosis|Final Diagnosis"),
+        "admission_date": _iso_date(_labelled_value(text, r"Date of Admission|Admission Date|Admitted On|DOA")),
+        "discharge_date": _iso_date(_labelled_value(text, r"Date of Discharge|Discharge Date|Discharged On|DOD")),
+        "policy_number": policy.split()[0] if policy else None,
+    }
 
 
 def extract_hospital_name(text: str) -> Optional[str]:
@@ -171,7 +255,7 @@ def calculate_total(claim_items: List[Dict]) -> float:
     return sum(item.get("amount", 0) for item in claim_items)
 
 
-def calculate_confidence(hospital: Optional[str], patient: Optional[str], items: List[Dict]) -> str:
+def calculate_confidence(hospital: Optional[str], patient: Optional[str], items) -> str:
     """
     Determine extraction confidence based on what was found.
     
@@ -0,0 +1,93 @@
+"""
+In-memory claim state for one pipeline run.
+
+The worker loads the claim once, keeps it in memory while the stages run,
+and writes stage transitions back in as few updates as possible: changes
+are staged locally and flushed together at the points where other
+readers need to see them (processing started, finished, failed).
+
+Every flush is an optimistic-concurrency update guarded by the claim's
+`version` column, so a write based on a stale copy of the row is rejected
+instead of silently overwriting someone else's change.
+"""
+import logging
+from typing import Any, Dict, Optional
+
+from app.core.database import supabase
+from app.core.metrics import time_stage
+from app.services.claim_cache import invalidate
+
+logger = logging.getLogger(__name__)
+
+# Columns the pipeline needs; never select("*"), which drags raw_text along
+PIPELINE_COLUMNS = "id, file_path, policy_text, uploaded_by, status, version, lease_attempts, profile, source_claim_id, content_hash"
+
+
+class ClaimVersionConflict(Exception):
+    """The claim row changed since it was loaded."""
+
+
+class ClaimState:
+    def __init__(self, row: Dict[str, Any]):
+        self.row = row
+        self.pending: Dict[str, Any] = {}
+
+    @property
+    def id(self) -> str:
+        return self.row["id"]
+
+    @property
+    def version(self) -> Optional[int]:
+        return self.row.get("version")
+
+    @classmethod
+    def load(cls, claim_id: str, columns: str = PIPELINE_COLUMNS) -> Optional["ClaimState"]:
+        """Fetch the claim once. Returns None if it doesn't exist."""
+        result = supabase.table("claims")\
+            .select(columns)\
+            .eq("id", claim_id)\
+            .limit(1)\
+            .execute()
+        if not result.data:
+            return None
+        return cls(result.data[0])
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return self.row.get(key, default)
+
+    def stage(self, **fields) -> None:
+        """Record changes locally; they are written on the next flush()."""
+        self.pending.update(fields)
+        self.row.update(fields)
+
+    def flush(self) -> None:
+        """
+        Write all staged changes in one update.
+
+        Raises:
+            ClaimVersionConflict: if the row's version no longer matches
+        """
+        if not self.pending:
+            return
+
+        current = self.version
+        payload = {**self.pending, "version": (current or 0) + 1}
+
+        query = supabase.table("claims").update(payload).eq("id", self.id)
+        # Rows created before the version column existed have NULL there
+        query = query.eq("version", current) if current is not None else query.is_("version", "null")
+
+        with time_stage("db_write"):
+            result = query.execute()
+
+        if not result.data:
+            raise ClaimVersionConflict(f"Claim {self.id} changed since version {current}")
+
+        self.row["version"] = payload["version"]
+        self.pending.clear()
+        invalidate(self.id)
+
+    def transition(self, status: str, **fields) -> None:
+        """Stage a status change (plus any fields) and flush immediately."""
+        self.stage(status=status, **fields)
+        self.flush()
@@ -0,0 +1,248 @@
+"""
+Incrementally maintained claim statistics for the dashboard.
+
+Every event that changes what the dashboard shows adds one claim to a
+rollup row through the increment_claim_stats() database function
+(migrations/create_claim_stats.sql), which updates a per user/day/outcome
+row and a per user/outcome all-time row in one statement:
+
+- ingest              → outcome "submitted" on the upload day
+- worker completes    → the audit verdict on the processing day, with the
+                        claimed total and risk score
+- worker gives up     → "failed" on the processing day
+- re-audit            → -1 on the old verdict, +1 on the new one
+
+GET /api/v1/claims/stats reads the user's all-time rows plus one row per
+day and outcome in the requested window, so its cost doesn't depend on how
+many claims the user has. Updates are best effort (a failed update is
+logged, never fails the claim); rebuild_claim_stats() recomputes the
+rollups from the claims table, e.g. after deploying or to repair drift.
+"""
+import logging
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Optional
+
+from app.core.database import supabase
+from app.models import AuditResult, StructuredClaim
+from app.models.claim import VERDICTS
+
+logger = logging.getLogger(__name__)
+
+NO_VERDICT = "UNAUDITED"  # completed, but the audit didn't produce a verdict
+HISTOGRAM_BUCKETS = 10
+
+REBUILD_PAGE_SIZE = 1000
+
+
+def _day(timestamp: Optional[str] = None) -> str:
+    """UTC date of an ISO timestamp (default: today)."""
+    if not timestamp:
+        return datetime.now(timezone.utc).date().isoformat()
+    return str(timestamp)[:10]
+
+
+def _number(value) -> Optional[float]:
+    try:
+        return float(str(value).replace(",", "")) if value is not None else None
+    except ValueError:
+        return None
+
+
+def completion_outcome(audit_result: Optional[AuditResult]) -> str:
+    return audit_result.verdict if audit_result is not None else NO_VERDICT
+
+
+def _increment(user_id: str, day: str, outcome: str, delta: int = 1,
+               claimed_total: Optional[float] = None, risk_score: Optional[float] = None) -> None:
+    if not user_id:
+        return
+    try:
+        supabase.rpc("increment_claim_stats", {
+            "p_user_id": user_id,
+            "p_day": day,
+            "p_outcome": outcome,
+            "p_delta": delta,
+            "p_claimed_total": claimed_total or 0,
+            "p_risk_score": risk_score,
+        }).execute()
+    except Exception as e:
+        logger.error(f"Failed to update claim stats ({user_id}, {day}, {outcome}): {str(e)}")
+
+
+def record_submission(user_id: str, created_at: Optional[str] = None) -> None:
+    _increment(user_id, _day(created_at), "submitted")
+
+
+def record_failure(user_id: str, processed_at: Optional[str] = None) -> None:
+    _increment(user_id, _day(processed_at), "failed")
+
+
+def record_completion(user_id: str, audit_result: Optional[AuditResult], structured_data: Optional[StructuredClaim],
+                      processed_at: Optional[str] = None, delta: int = 1) -> None:
+    """Count a completed claim under its verdict (delta=-1 takes it back out, for re-audits)."""
+    _increment(
+        user_id,
+        _day(processed_at),
+        completion_outcome(audit_result),
+        delta=delta,
+        claimed_total=structured_data.total_claimed if structured_data is not None else None,
+        risk_score=audit_result.risk_score if audit_result is not None else None,
+    )
+
+
+def record_reaudit(user_id: str, processed_at: Optional[str], structured_data: Optional[StructuredClaim],
+                   previous: Optional[AuditResult], current: AuditResult) -> None:
+    """Move a re-audited claim from its previous verdict/risk to the new one."""
+    record_completion(user_id, previous, structured_data, processed_at, delta=-1)
+    record_completion(user_id, current, structured_data, processed_at)
+
+
+# --- reading ---
+
+def _empty() -> Dict:
+    return {"claims": 0, "claimed_total": 0.0, "risk_sum": 0.0, "risk_count": 0,
+            "risk_histogram": [0] * HISTOGRAM_BUCKETS}
+
+
+def _add(total: Dict, row: Dict) -> None:
+    total["claims"] += row.get("claims") or 0
+    total["claimed_total"] += float(row.get("claimed_total") or 0)
+    total["risk_sum"] += float(row.get("risk_sum") or 0)
+    total["risk_count"] += row.get("risk_count") or 0
+    for i, count in enumerate((row.get("risk_histogram") or [])[:HISTOGRAM_BUCKETS]):
+        total["risk_histogram"][i] += count
+
+
+def _summary(by_outcome: Dict[str, Dict]) -> Dict:
+    """Dashboard numbers from rollup rows (one per outcome)."""
+    completed = _empty()
+    for outcome, row in by_outcome.items():
+        if outcome not in ("submitted", "failed"):
+            _add(completed, row)
+
+    submitted = by_outcome.get("submitted", {}).get("claims", 0)
+    failed = by_outcome.get("failed", {}).get("claims", 0)
+    return {
+        "total": submitted,
+        "processing": max(0, submitted - completed["claims"] - failed),
+        "completed": completed["claims"],
+        "failed": failed,
+        "verdicts": {
+            outcome: by_outcome.get(outcome, {}).get("claims", 0) for outcome in (*VERDICTS, NO_VERDICT)
+        },
+        "claimed_total": round(completed["claimed_total"], 2),
+        "average_risk": round(completed["risk_sum"] / completed["risk_count"], 1) if completed["risk_count"] else None,
+        "risk_histogram": completed["risk_histogram"],
+    }
+
+
+def get_claim_stats(user_id: str, days: int = 30) -> Dict:
+    """
+    Dashboard statistics for one user.
+
+    Args:
+        user_id: The user's UUID
+        days: Length of the daily series, ending today (UTC)
+
+    Returns:
+        dict with all-time "totals" and a "daily" list (oldest first),
+        each with counts by status and verdict, claimed total, average
+        risk and a 10-bucket risk histogram
+    """
+    totals = supabase.table("claim_stats_totals")\
+        .select("outcome, claims, claimed_total, risk_sum, risk_count, risk_histogram")\
+        .eq("user_id", user_id)\
+        .execute().data or []
+
+    today = datetime.now(timezone.utc).date()
+    since = today - timedelta(days=max(1, days) - 1)
+    daily_rows = supabase.table("claim_stats_daily")\
+        .select("day, outcome, claims, claimed_total, risk_sum, risk_count, risk_histogram")\
+        .eq("user_id", user_id)\
+        .gte("day", since.isoformat())\
+        .execute().data or []
+
+    by_day: Dict[str, Dict[str, Dict]] = defaultdict(dict)
+    for row in daily_rows:
+        by_day[str(row["day"])[:10]][row["outcome"]] = row
+
+    daily = []
+    for offset in range((today - since).days + 1):
+        day = (since + timedelta(days=offset)).isoformat()
+        daily.append({"day": day, **_summary(by_day.get(day, {}))})
+
+    return {
+        "totals": _summary({row["outcome"]: row for row in totals}),
+        "daily": daily,
+    }
+
+
+# --- backfill ---
+
+def rebuild_claim_stats() -> Dict[str, int]:
+    """
+    Recompute both rollup tables from the claims table.
+
+    Run once after creating the tables, and whenever the rollups may have
+    drifted (a worker died between finishing a claim and counting it).
+    Counts from claims changing while this runs may be off by those claims.
+
+    Returns:
+        Counts of claims scanned and rollup rows written
+    """
+    daily: Dict[tuple, Dict] = defaultdict(_empty)
+    totals: Dict[tuple, Dict] = defaultdict(_empty)
+
+    def add(user_id, day, outcome, claimed_total=None, risk_score=None):
+        for bucket in (daily[(user_id, day, outcome)], totals[(user_id, outcome)]):
+            bucket["claims"] += 1
+            bucket["claimed_total"] += claimed_total or 0
+            if risk_score is not None:
+                bucket["risk_sum"] += risk_score
+                bucket["risk_count"] += 1
+                bucket["risk_histogram"][min(max(int(risk_score // 10), 0), HISTOGRAM_BUCKETS - 1)] += 1
+
+    scanned, last_id = 0, ""
+    while True:
+        rows = supabase.table("claims")\
+            .select("id, uploaded_by, status, created_at, processed_at, audit_result, extracted_data->structured_data")\
+            .gt("id", last_id)\
+            .order("id")\
+            .limit(REBUILD_PAGE_SIZE)\
+            .execute().data or []
+        for row in rows:
+            user_id = row.get("uploaded_by")
+            if not user_id:
+                continue
+            add(user_id, _day(row.get("created_at")), "submitted")
+            if row.get("status") == "failed":
+                add(user_id, _day(row.get("processed_at")), "failed")
+            elif row.get("status") == "completed":
+                audit = AuditResult.from_dict(row["audit_result"]) if row.get("audit_result") else None
+                add(user_id, _day(row.get("processed_at")), completion_outcome(audit),
+                    _number((row.get("structured_data") or {}).get("total_claimed")),
+                    audit.risk_score if audit is not None else None)
+        scanned += len(rows)
+        if len(rows) < REBUILD_PAGE_SIZE:
+            break
+        last_id = rows[-1]["id"]
+
+    for table, rollup, columns in (
+        ("claim_stats_daily", daily, ("user_id", "day", "outcome")),
+        ("claim_stats_totals", totals, ("user_id", "outcome")),
+    ):
+        supabase.table(table).delete().neq("outcome", "").execute()
+        rows = [{**dict(zip(columns, key)), **values} for key, values in rollup.items()]
+        for i in range(0, len(rows), REBUILD_PAGE_SIZE):
+            supabase.table(table).insert(rows[i:i + REBUILD_PAGE_SIZE]).execute()
+
+    logger.info(f"Claim stats rebuilt from {scanned} claims: {len(daily)} daily rows, {len(totals)} total rows")
+    return {"claims": scanned, "daily_rows": len(daily), "total_rows": len(totals)}
+
+
+if __name__ == "__main__":
+    import json
+
+    logging.basicConfig(level=logging.INFO)
+    print(json.dumps(rebuild_claim_stats(), indent=2))
@@ -0,0 +1,263 @@
+"""
+Cross-claim duplicate and fraud detection.
+
+Each completed claim is indexed in claim_fingerprints under three kinds of
+keys, and looked up against everything indexed before it:
+
+- "bill":  hash of (hospital, patient, total, admission date); the same
+           bill submitted twice, by the same or another user
+- "items": hash of (hospital, sorted line items); the same itemised
+           charges reused on a bill with new dates or a new patient
+- "lsh":   MinHash LSH bands of the raw text's word shingles; near-
+           duplicate documents (re-scanned, lightly edited)
+
+Lookups are one indexed `key IN (...)` query, so their cost depends on
+how many claims share a key, not on how many claims exist. LSH candidates
+are confirmed by comparing MinHash signatures (estimated Jaccard
+similarity >= DUPLICATE_SIMILARITY_THRESHOLD).
+
+Matches become "duplicate" findings on the claim's audit result; a high-
+severity match moves an approval to NEEDS_REVIEW.
+"""
+import hashlib
+import logging
+import re
+import random
+import zlib
+from typing import Dict, Iterable, List, Optional
+
+from app.core.config import settings
+from app.core.database import supabase
+from app.models import AuditResult, Finding, StructuredClaim
+
+logger = logging.getLogger(__name__)
+
+TABLE = "claim_fingerprints"
+
+# MinHash / LSH parameters: 16 bands of 4 rows make documents with
+# similarity ~0.8 candidates with >99% probability, ~0.3 with <15%
+NUM_PERMUTATIONS = 64
+BANDS = 16
+ROWS_PER_BAND = NUM_PERMUTATIONS // BANDS
+SHINGLE_WORDS = 5
+MERSENNE_PRIME = (1 << 61) - 1
+
+MIN_ITEMS_FOR_ITEMS_KEY = 3  # short item lists (e.g. "Consultation 500") match too easily
+MAX_CANDIDATES = 500
+MAX_FINDINGS = 5
+
+_rng = random.Random(20240601)  # fixed: signatures must be comparable across processes and deploys
+_PERMUTATIONS = [
+    (_rng.randrange(1, MERSENNE_PRIME), _rng.randrange(0, MERSENNE_PRIME)) for _ in range(NUM_PERMUTATIONS)
+]
+
+
+# --- keys and signatures ---
+
+def _normalize(text) -> str:
+    return re.sub(r"[^a-z0-9]+", " ", str(text or "").lower()).strip()
+
+
+def _digest(*parts) -> str:
+    return hashlib.blake2b("|".join(str(p) for p in parts).encode(), digest_size=12).hexdigest()
+
+
+def _amount(value) -> Optional[float]:
+    try:
+        return round(float(str(value).replace(",", "")), 2) if value not in (None, "") else None
+    except ValueError:
+        return None
+
+
+def bill_key(structured_data: StructuredClaim) -> Optional[str]:
+    hospital = _normalize(structured_data.hospital_name)
+    patient = _normalize(structured_data.patient_name)
+    total = _amount(structured_data.total_claimed)
+    if not (hospital and patient and total):
+        return None
+    return "bill:" + _digest(hospital, patient, total, structured_data.admission_date or "")
+
+
+def items_key(structured_data: StructuredClaim) -> Optional[str]:
+    hospital = _normalize(structured_data.hospital_name)
+    items = sorted(
+        ((_normalize(description), _amount(amount)) for description, amount, _, _ in structured_data.items.rows()),
+        # Items without an amount sort after the same description with one (None doesn't compare with floats)
+        key=lambda item: (item[0], item[1] is None, item[1] or 0.0),
+    )
+    if not hospital or len(items) < MIN_ITEMS_FOR_ITEMS_KEY:
+        return None
+    return "items:" + _digest(hospital, *(f"{description}={amount}" for description, amount in items))
+
+
+def shingles(raw_text: str) -> set:
+    words = _normalize(raw_text).split()
+    if len(words) < SHINGLE_WORDS:
+        return {" ".join(words)} if words else set()
+    return {" ".join(words[i:i + SHINGLE_WORDS]) for i in range(len(words) - SHINGLE_WORDS + 1)}
+
+
+def minhash(raw_text: str) -> Optional[List[int]]:
+    """MinHash signature of the text's word shingles, or None for (near-)empty text."""
+    hashes = [zlib.crc32(shingle.encode()) for shingle in shingles(raw_text)]
+    if not hashes:
+        return None
+    return [min((a * h + b) % MERSENNE_PRIME for h in hashes) for a, b in _PERMUTATIONS]
+
+
+def band_keys(signature: List[int]) -> List[str]:
+    return [
+        f"lsh:{band}:" + _digest(*signature[band * ROWS_PER_BAND:(band + 1) * ROWS_PER_BAND])
+        for band in range(BANDS)
+    ]
+
+
+def similarity(a: List[int], b: List[int]) -> float:
+    """Estimated Jaccard similarity of two documents from their signatures."""
+    return sum(x == y for x, y in zip(a, b)) / len(a) if a and b and len(a) == len(b) else 0.0
+
+
+# --- index ---
+
+def index_claim(claim_id: str, uploaded_by: Optional[str], raw_text: str,
+                structured_data: Optional[StructuredClaim]) -> Dict:
+    """
+    (Re)index one claim: replaces its fingerprint rows.
+
+    Returns:
+        dict with the keys written and the signature, for check_duplicates
+    """
+    structured_data = structured_data or StructuredClaim()
+    signature = minhash(raw_text or "")
+    keys = {"bill": bill_key(structured_data), "items": items_key(structured_data)}
+    rows = [
+        {"claim_id": claim_id, "uploaded_by": uploaded_by, "kind": kind, "key": key}
+        for kind, key in keys.items() if key
+    ]
+    if signature:
+        rows += [{"claim_id": claim_id, "uploaded_by": uploaded_by, "kind": "lsh", "key": key}
+                 for key in band_keys(signature)]
+        rows.append({"claim_id": claim_id, "uploaded_by": uploaded_by, "kind": "signature",
+                     "key": f"sig:{claim_id}", "signature": signature})
+
+    supabase.table(TABLE).delete().eq("claim_id", claim_id).execute()
+    if rows:
+        supabase.table(TABLE).insert(rows).execute()
+    return {"keys": [row["key"] for row in rows if row["kind"] != "signature"], "signature": signature}
+
+
+def _finding(kind: str, match: Dict, same_user: bool, score: Optional[float] = None) -> Finding:
+    who = "the same user" if same_user else "a different user"
+    if kind == "bill":
+        severity = "high"
+        description = f"Same hospital, patient, amount and admission date as claim {match['claim_id']} from {who}."
+    elif kind == "items":
+        severity = "medium" if same_user else "high"
+        description = f"Identical itemised charges to claim {match['claim_id']} from {who}, with different details."
+    else:
+        severity = "high" if score >= 0.95 else "medium"
+        description = f"Document is {round(score * 100)}% similar to claim {match['claim_id']} from {who}."
+    details = {"matched_claim_id": match["claim_id"], "match": kind}
+    if score is not None:
+        details["similarity"] = round(score, 3)
+    return Finding("duplicate", severity, description, details)
+
+
+def check_duplicates(claim_id: str, uploaded_by: Optional[str], raw_text: str,
+                     structured_data: Optional[StructuredClaim], exclude: Iterable[str] = ()) -> List[Finding]:
+    """
+    Index a claim and return duplicate findings against previously indexed claims.
+
+    Indexing first means two copies processed at the same time still catch
+    each other: whichever looks up second sees the first.
+
+    Args:
+        exclude: Claims that aren't duplicates even if they match (the same
+            upload filed under another policy; see ingest_dedup.same_document_claims)
+
+    Returns:
+        "duplicate" findings, strongest first (at most MAX_FINDINGS)
+    """
+    indexed = index_claim(claim_id, uploaded_by, raw_text, structured_data)
+    if not indexed["keys"]:
+        return []
+
+    hits = supabase.table(TABLE)\
+        .select("claim_id, uploaded_by, kind")\
+        .in_("key", indexed["keys"])\
+        .neq("claim_id", claim_id)\
+        .limit(MAX_CANDIDATES)\
+        .execute().data or []
+
+    exclude = set(exclude)
+    findings: Dict[str, Finding] = {}
+    lsh_candidates: Dict[str, Dict] = {}
+    for hit in hits:
+        if hit["claim_id"] in exclude:
+            continue
+        same_user = bool(uploaded_by) and hit.get("uploaded_by") == uploaded_by
+        if hit["kind"] in ("bill", "items"):
+            if hit["claim_id"] not in findings or hit["kind"] == "bill":
+                findings[hit["claim_id"]] = _finding(hit["kind"], hit, same_user)
+        elif hit["kind"] == "lsh":
+            lsh_candidates[hit["claim_id"]] = hit
+
+    lsh_candidates = {cid: hit for cid, hit in lsh_candidates.items() if cid not in findings}
+    if lsh_candidates and indexed["signature"]:
+        signatures = supabase.table(TABLE)\
+            .select("claim_id, uploaded_by, signature")\
+            .in_("key", [f"sig:{cid}" for cid in lsh_candidates])\
+            .execute().data or []
+        for row in signatures:
+            score = similarity(indexed["signature"], row.get("signature") or [])
+            if score >= settings.duplicate_similarity_threshold:
+                same_user = bool(uploaded_by) and row.get("uploaded_by") == uploaded_by
+                findings[row["claim_id"]] = _finding("lsh", row, same_user, score)
+
+    ranked = sorted(findings.values(), key=lambda f: (f.severity != "high", -(f.details.get("similarity") or 1.0)))
+    if ranked:
+        logger.warning(f"Claim {claim_id} matches {len(ranked)} earlier claims: {[f.details['matched_claim_id'] for f in ranked]}")
+    return ranked[:MAX_FINDINGS]
+
+
+def apply_duplicate_findings(audit_result: AuditResult, findings: List[Finding]) -> AuditResult:
+    """
+    Add duplicate findings to an audit result (replacing earlier ones).
+
+    A high-severity match caps the verdict at NEEDS_REVIEW and raises the
+    risk score to at least 80.
+    """
+    if not findings and not any(f.type == "duplicate" for f in audit_result.findings):
+        return audit_result
+    audit_result.replace_findings("duplicate", findings)
+    if any(f.severity == "high" for f in findings):
+        if audit_result.verdict in ("APPROVED", "PARTIALLY_APPROVED"):
+            audit_result.verdict = "NEEDS_REVIEW"
+        audit_result.raise_risk(80)
+    return audit_result
+
+
+def backfill_index(page_size: int = 200) -> int:
+    """Index completed claims that predate the index (no findings are written)."""
+    indexed, last_id = 0, ""
+    while True:
+        rows = supabase.table("claims")\
+            .select("id, uploaded_by, extracted_data")\
+            .eq("status", "completed")\
+            .gt("id", last_id)\
+            .order("id")\
+            .limit(page_size)\
+            .execute().data or []
+        for row in rows:
+            extracted = row.get("extracted_data") or {}
+            index_claim(row["id"], row.get("uploaded_by"), extracted.get("raw_text") or "",
+                        StructuredClaim.from_dict(extracted.get("structured_data")))
+        indexed += len(rows)
+        if len(rows) < page_size:
+            return indexed
+        last_id = rows[-1]["id"]
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    print(f"Indexed {backfill_index()} claims")
@@ -1,15 +1,62 @@
-from groq import Groq
 from app.core.config import settings
-import json
+from app.core.metrics import record_llm_usage
+from app.models import AuditResult, Finding, StructuredClaim, dumps, loads
+from app.models.serialization import JSONDecodeError
+from app.services.rate_limiter import RateLimiter, llm_limiter
+from functools import lru_cache
+import hashlib
 import logging
+import threading
 
 logger = logging.getLogger(__name__)
 
-# Initialize Groq client
-client = Groq(api_key=settings.groq_api_key)
+EXTRACTION_MODEL = "llama-3.1-8b-instant"
+AUDIT_MODEL = "llama-3.3-70b-versatile"
 
+# Characters of claim text sent for extraction; the large model gets more
+EXTRACTION_TEXT_LIMITS = {EXTRACTION_MODEL: 4000, AUDIT_MODEL: 12000}
 
-def extract_claim_data(raw_text: str) -> dict:
+# Typical size of an audit verdict; used for rate limiting and cost estimates
+EXPECTED_AUDIT_COMPLETION_TOKENS = 400
+
+# USD per million tokens (Groq list prices; update when they change)
+MODEL_PRICING = {
+    "llama-3.1-8b-instant": {"prompt": 0.05, "completion": 0.08},
+    "llama-3.3-70b-versatile": {"prompt": 0.59, "completion": 0.79},
+}
+
+
+def estimate_cost(usage: dict) -> float:
+    """USD for token usage as collected by metrics.track_llm_usage (model -> prompt/completion tokens)."""
+    total = 0.0
+    for model, tokens in usage.items():
+        pricing = MODEL_PRICING.get(model, {"prompt": 0.0, "completion": 0.0})
+        total += (tokens["prompt"] * pricing["prompt"] + tokens["completion"] * pricing["completion"]) / 1_000_000
+    return total
+
+
+# Groq client is created on first use (see get_groq_client)
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_groq_client():
+    """Shared Groq client; its HTTP connection pool is reused across calls."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                from groq import Groq
+                _client = Groq(api_key=settings.groq_api_key)
+    return _client
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count for English/JSON text (~4 characters per token)."""
+    return len(text) // 4 + 1
+
+
+def extract_claim_data(raw_text: str, model: str = EXTRACTION_MODEL) -> StructuredClaim:
     """
     Extract structured claim data from raw OCR text using LLaMA-3-8B.
     
@@ -17,9 +64,10 @@ def extract_claim_data(raw_text: str) -> dict:
     
     Args:
         raw_text: Raw text from OCR
+        model: Groq model; the model router escalates hard documents to AUDIT_MODEL
         
     Returns:
-        dict with extracted fields and confidence score
+        StructuredClaim with the extracted fields and confidence score
     """
     try:
         prompt = f"""You are an AI assistant extracting insurance claim data.
@@ -27,7 +75,7 @@ def extract_claim_data(raw_text: str) -> dict:
 Extract the following from this Indian insurance claim document:
 
 TEXT:
-{raw_text[:4000]}  
+{raw_text[:EXTRACTION_TEXT_LIMITS.get(model, 4000)]}  
 
 Return ONLY valid JSON (no markdown, no explanations):
 {{
@@ -46,82 +94,43 @@ Return ONLY valid JSON (no markdown, no explanations):
 If any field is not found, use null. Amounts should be in INR (₹).
 """
 
-        response = client.chat.completions.create(
-            model="llama-3.1-8b-instant",  # Fast model for extraction
+        llm_limiter.acquire(estimate_tokens(prompt) + 300)
+        response = get_groq_client().chat.completions.create(
+            model=model,
             messages=[{"role": "user", "content": prompt}],
             temperature=0.1,  # Low temperature for consistent extraction
             max_tokens=1000,
         )
+        record_llm_usage(model, getattr(response, "usage", None))
         
         result_text = response.choices[0].message.content.strip()
         
-        # Parse JSON response
-        try:
-            extracted_data = json.loads(result_text)
-        except json.JSONDecodeError:
-            # Try to extract JSON from markdown code blocks
-            if "```json" in result_text:
-                json_str = result_text.split("```json")[1].split("```")[0].strip()
-                extracted_data = json.loads(json_str)
-            elif "```" in result_text:
-                json_str = result_text.split("```")[1].split("```")[0].strip()
-                extracted_data = json.loads(json_str)
-            else:
-                raise
+        extracted_data = _parse_json(result_text)
         
         # Calculate confidence based on how many fields were found
         non_null_fields = sum(1 for v in extracted_data.values() if v not in [None, [], 0])
         total_fields = len(extracted_data)
         confidence = non_null_fields / total_fields if total_fields > 0 else 0
         
-        return {
-            **extracted_data,
-            "extraction_confidence": "high" if confidence > 0.7 else "medium" if confidence > 0.4 else "low",
-            "confidence_score": round(confidence, 2)
-        }
+        claim = StructuredClaim.from_dict(extracted_data)
+        claim.extraction_confidence = "high" if confidence > 0.7 else "medium" if confidence > 0.4 else "low"
+        claim.confidence_score = round(confidence, 2)
+        return claim
         
     except Exception as e:
         logger.error(f"LLM extraction failed: {str(e)}")
-        return {
-            "hospital_name": None,
-            "patient_name": None,
-            "claim_items": [],
-            "total_claimed": 0,
-            "extraction_confidence": "error",
-            "error": str(e)
-        }
+        return StructuredClaim(extraction_confidence="error", error=str(e))
 
 
-def analyze_claim(claim_data: dict, policy_text: str = None) -> dict:
-    """
-    Analyze claim against policy using Mixtral-8x7B for reasoning.
-    
-    Args:
-        claim_data: Structured claim data
-        policy_text: Insurance policy text (optional)
-        
-    Returns:
-        dict with verdict, risk score, findings, and explanation
-    """
-    try:
-        # Format claim data for prompt
-        claim_json = json.dumps(claim_data, indent=2)
-        
-        # Use generic policy if none provided
-        if not policy_text or len(policy_text.strip()) < 50:
-            policy_context = "No specific policy provided. Use general Indian health insurance guidelines."
-        else:
-            policy_context = policy_text[:3000]  # Limit policy text
-        
-        prompt = f"""You are an AI insurance claim auditor for Indian health insurance.
-
-CLAIM DATA:
-{claim_json}
+# Instructions + policy go first and are identical for every claim audited
+# against the same policy, so backends with prefix prompt caching reuse them;
+# the claim data comes last, in the user message.
+AUDIT_SYSTEM_PROMPT = """You are an AI insurance claim auditor for Indian health insurance.
 
 POLICY CONTEXT:
 {policy_context}
 
-Analyze this claim and return ONLY valid JSON:
+Analyze each claim you are given against this policy. A verdict is this JSON object:
 
 {{
   "verdict": "APPROVED" or "PARTIALLY_APPROVED" or "REJECTED" or "NEEDS_REVIEW",
@@ -146,41 +155,170 @@ Consider:
 Be helpful and clear in your explanation.
 """
 
-        response = client.chat.completions.create(
-            model="llama-3.3-70b-versatile",  # Updated: Mixtral was deprecated, using LLaMA-3.3-70B
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0.2,
-            max_tokens=2000,
-        )
-        
-        result_text = response.choices[0].message.content.strip()
+# Claims per batched audit call; larger batches risk truncated or mixed-up verdicts
+MAX_AUDIT_BATCH = 10
+
+
+class AuditPolicy:
+    """
+    A policy prepared for auditing (the handle audits take instead of raw text).
+    
+    Holds the system prompt built from the policy, so it is formatted once per
+    policy rather than once per claim. Get one with prepare_policy().
+    """
+    
+    def __init__(self, policy_text: str = None):
+        # Use generic policy if none provided
+        if not policy_text or len(policy_text.strip()) < 50:
+            policy_context = "No specific policy provided. Use general Indian health insurance guidelines."
+            self.policy_chars = 0
+        else:
+            policy_context = policy_text[:3000]  # Limit policy text
+            self.policy_chars = len(policy_context)
         
-        # Parse JSON
-        try:
-            audit_result = json.loads(result_text)
-        except json.JSONDecodeError:
-            if "```json" in result_text:
-                json_str = result_text.split("```json")[1].split("```")[0].strip()
-                audit_result = json.loads(json_str)
-            elif "```" in result_text:
-                json_str = result_text.split("```")[1].split("```")[0].strip()
-                audit_result = json.loads(json_str)
-            else:
-                raise
+        self.system_prompt = AUDIT_SYSTEM_PROMPT.format(policy_context=policy_context)
+        self.key = hashlib.sha256(self.system_prompt.encode()).hexdigest()[:16]
+        self.prefix_tokens = estimate_tokens(self.system_prompt)
+
+
+@lru_cache(maxsize=128)
+def _prepared_policy(policy_text: str) -> AuditPolicy:
+    return AuditPolicy(policy_text)
+
+
+def prepare_policy(policy_text: str = None) -> AuditPolicy:
+    """Prepared policy for `policy_text`, cached so claims on the same policy share it."""
+    return _prepared_policy(policy_text or "")
+
+
+def build_audit_messages(claim_data: StructuredClaim, policy: AuditPolicy) -> list:
+    """Chat messages for auditing one claim (also used to estimate token cost)."""
+    claim_json = dumps(claim_data, indent=True)
+    return [
+        {"role": "system", "content": policy.system_prompt},
+        {"role": "user", "content": f"""CLAIM DATA:
+{claim_json}
+
+Analyze this claim and return ONLY valid JSON: one verdict object."""},
+    ]
+
+
+def build_batch_audit_messages(claims: list, policy: AuditPolicy) -> list:
+    """Chat messages for auditing several claims in one call."""
+    claims_json = dumps([{"claim_index": i, "claim": claim} for i, claim in enumerate(claims)], indent=True)
+    return [
+        {"role": "system", "content": policy.system_prompt},
+        {"role": "user", "content": f"""CLAIMS:
+{claims_json}
+
+Analyze each claim independently and return ONLY valid JSON:
+{{"results": [one verdict object per claim, each with its "claim_index"]}}"""},
+    ]
+
+
+def estimate_message_tokens(messages: list) -> int:
+    return sum(estimate_tokens(message["content"]) for message in messages)
+
+
+def _parse_json(result_text: str):
+    """Parse a JSON reply, also when the model wrapped it in a markdown code block."""
+    try:
+        return loads(result_text)
+    except JSONDecodeError:
+        if "```json" in result_text:
+            json_str = result_text.split("```json")[1].split("```")[0].strip()
+            return loads(json_str)
+        elif "```" in result_text:
+            json_str = result_text.split("```")[1].split("```")[0].strip()
+            return loads(json_str)
+        raise
+
+
+def _analysis_failed(e: Exception) -> AuditResult:
+    return AuditResult(
+        verdict="NEEDS_REVIEW",
+        risk_score=50,
+        findings=[Finding("other", "high", f"Automated analysis failed: {str(e)}")],
+        explanation="Unable to automatically analyze this claim. Manual review required.",
+        confidence=0.0,
+        error=str(e),
+    )
+
+
+def _complete_audit(messages: list, max_tokens: int, expected_completion_tokens: int, model: str = AUDIT_MODEL,
+                    limiter: RateLimiter = None) -> str:
+    tokens = estimate_message_tokens(messages) + expected_completion_tokens
+    if limiter is not None:
+        limiter.acquire(tokens)
+    llm_limiter.acquire(tokens)
+    response = get_groq_client().chat.completions.create(
+        model=model,  # Updated: Mixtral was deprecated, using LLaMA-3.3-70B (smaller for simple claims, see model_router)
+        messages=messages,
+        temperature=0.2,
+        max_tokens=max_tokens,
+    )
+    record_llm_usage(model, getattr(response, "usage", None))
+    return response.choices[0].message.content.strip()
+
+
+def analyze_claim(claim_data: StructuredClaim, policy_text: str = None, policy: AuditPolicy = None,
+                  model: str = AUDIT_MODEL, limiter: RateLimiter = None) -> AuditResult:
+    """
+    Analyze claim against policy using Mixtral-8x7B for reasoning.
+    
+    Args:
+        claim_data: Structured claim data
+        policy_text: Insurance policy text (optional)
+        policy: Prepared policy (from prepare_policy); takes precedence over policy_text
+        model: Groq model (see model_router for which claims get a smaller one)
+        limiter: Caller's own rate limiter, charged for the call on top of the process-wide one
         
-        return audit_result
+    Returns:
+        AuditResult with verdict, risk score, findings, and explanation
+    """
+    try:
+        policy = policy or prepare_policy(policy_text)
+        messages = build_audit_messages(claim_data, policy)
+        return AuditResult.from_dict(_parse_json(_complete_audit(messages, 2000, EXPECTED_AUDIT_COMPLETION_TOKENS, model, limiter)))
         
     except Exception as e:
         logger.error(f"LLM analysis failed: {str(e)}")
-        return {
-            "verdict": "NEEDS_REVIEW",
-            "risk_score": 50,
-            "findings": [{
-                "type": "other",
-                "severity": "high",
-                "description": f"Automated analysis failed: {str(e)}"
-            }],
-            "explanation": "Unable to automatically analyze this claim. Manual review required.",
-            "confidence": 0.0,
-            "error": str(e)
-        }
+        return _analysis_failed(e)
+
+
+def analyze_claims(claims: list, policy: AuditPolicy, model: str = AUDIT_MODEL, limiter: RateLimiter = None) -> list:
+    """
+    Analyze several claims against one policy, MAX_AUDIT_BATCH per LLM call.
+    
+    The policy prompt is sent once per call instead of once per claim.
+    Claims missing from (or garbled in) a batched reply are re-run
+    individually, so a bad batch costs extra calls but never a wrong verdict.
+    
+    Args:
+        claims: StructuredClaims
+        policy: Prepared policy (from prepare_policy)
+        model: Groq model for every claim in `claims`
+        limiter: Caller's own rate limiter, charged once per LLM call (retries included)
+        
+    Returns:
+        One result per claim, in order (same shape as analyze_claim)
+    """
+    results = [None] * len(claims)
+    for start in range(0, len(claims), MAX_AUDIT_BATCH):
+        chunk = claims[start:start + MAX_AUDIT_BATCH]
+        if len(chunk) > 1:
+            try:
+                messages = build_batch_audit_messages(chunk, policy)
+                expected = EXPECTED_AUDIT_COMPLETION_TOKENS * len(chunk)
+                reply = _parse_json(_complete_audit(messages, 2000 * len(chunk), expected, model, limiter))
+                for item in reply.get("results") or []:
+                    index = item.pop("claim_index", None) if isinstance(item, dict) else None
+                    if isinstance(index, int) and 0 <= index < len(chunk) and "verdict" in item:
+                        results[start + index] = AuditResult.from_dict(item)
+            except Exception as e:
+                logger.warning(f"Batched audit of {len(chunk)} claims failed, auditing individually: {str(e)}")
+        
+        for i, claim_data in enumerate(chunk):
+            if results[start + i] is None:
+                results[start + i] = analyze_claim(claim_data, policy=policy, model=model, limiter=limiter)
+    return results
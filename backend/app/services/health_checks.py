@@ -0,0 +1,91 @@
+"""
+Dependency probes for the readiness endpoint.
+
+Each probe (database, storage, LLM) runs at most once per
+PROBE_TTL_SECONDS no matter how often the orchestrator polls; callers in
+between get the cached result. Probes run in a worker thread with a
+timeout so a hanging dependency can't block the event loop.
+"""
+import asyncio
+import logging
+import threading
+import time
+from datetime import datetime
+from typing import Callable, Dict
+
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.core.metrics import DEPENDENCY_LATENCY
+
+logger = logging.getLogger(__name__)
+
+
+class DependencyProbe:
+    def __init__(self, name: str, check: Callable[[], None]):
+        self.name = name
+        self.check = check
+        self._result: Dict = {}
+        self._checked_at = 0.0
+        self._refreshing = threading.Lock()
+
+    def _fresh(self) -> bool:
+        return bool(self._result) and time.monotonic() - self._checked_at < settings.probe_ttl_seconds
+
+    async def result(self) -> Dict:
+        if self._fresh():
+            return self._result
+        # Only one refresh at a time; concurrent callers get the last result
+        if not self._refreshing.acquire(blocking=False):
+            return self._result or {"ok": False, "error": "first probe in progress"}
+        try:
+            start = time.perf_counter()
+            try:
+                await asyncio.wait_for(run_in_threadpool(self.check), settings.probe_timeout_seconds)
+                result = {"ok": True}
+            except asyncio.TimeoutError:
+                result = {"ok": False, "error": f"timed out after {settings.probe_timeout_seconds}s"}
+            except Exception as e:
+                result = {"ok": False, "error": str(e)}
+            latency = time.perf_counter() - start
+            DEPENDENCY_LATENCY.labels(dependency=self.name).set(latency)
+            if not result["ok"]:
+                logger.warning(f"Dependency probe '{self.name}' failed: {result['error']}")
+
+            self._result = {
+                **result,
+                "latency_ms": round(latency * 1000, 1),
+                "checked_at": datetime.utcnow().isoformat(),
+            }
+            self._checked_at = time.monotonic()
+            return self._result
+        finally:
+            self._refreshing.release()
+
+
+def _check_database():
+    from app.core.database import get_db
+    get_db().table("claims").select("id").limit(1).execute()
+
+
+def _check_storage():
+    from app.core.database import get_db
+    get_db().storage.from_("claim-documents").list(None, {"limit": 1})
+
+
+def _check_llm():
+    from app.services.groq_service import get_groq_client
+    get_groq_client().models.list()
+
+
+PROBES: Dict[str, DependencyProbe] = {
+    "database": DependencyProbe("database", _check_database),
+    "storage": DependencyProbe("storage", _check_storage),
+    "llm": DependencyProbe("llm", _check_llm),
+}
+
+
+async def check_dependencies() -> Dict[str, Dict]:
+    """Cached results for every dependency probe, probed concurrently."""
+    results = await asyncio.gather(*(probe.result() for probe in PROBES.values()))
+    return dict(zip(PROBES.keys(), results))
@@ -0,0 +1,108 @@
+"""
+Duplicate upload detection at ingest.
+
+The ingest endpoint hashes the PDF (SHA-256) while reading the upload and
+stores the hash on the claim (claims.content_hash), with the client's
+Idempotency-Key header if it sent one. Before uploading anything it looks
+for an earlier claim of the same user:
+
+- same Idempotency-Key: that claim is the answer, whatever its status or
+  age (a different file under the same key is rejected)
+- same content and policy within INGEST_DEDUP_WINDOW_SECONDS, not
+  failed: a retried upload; its job_id is returned and nothing is stored
+  or queued
+- same content within the window, different policy: a new claim is created for the new
+  policy, but it points at the earlier claim (source_claim_id): the stored
+  file is reused and the worker takes the earlier claim's extraction
+  instead of downloading and OCRing the document again
+
+A claim created for another policy shares its document with the earlier
+claim, so the worker leaves the user's claims of the same file out of its
+duplicate check (same_document_claims); uploads of it by other users are
+still flagged.
+
+Lookups go through the (uploaded_by, content_hash, created_at) and
+(uploaded_by, idempotency_key) indexes (migrations/add_claim_dedup.sql).
+Two identical uploads racing through different API processes can both
+get through the content check; the unique Idempotency-Key index catches
+those that carry a key.
+"""
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Optional, Set
+
+from app.core.config import settings
+from app.core.database import supabase
+
+logger = logging.getLogger(__name__)
+
+COLUMNS = "id, status, policy_id, file_path, content_hash, created_at"
+
+
+def _since() -> str:
+    return (datetime.now(timezone.utc) - timedelta(seconds=settings.ingest_dedup_window_seconds)).isoformat()
+
+
+def find_by_idempotency_key(user_id: str, idempotency_key: str) -> Optional[Dict]:
+    """The user's claim created with this Idempotency-Key, if any."""
+    rows = supabase.table("claims")\
+        .select(COLUMNS)\
+        .eq("uploaded_by", user_id)\
+        .eq("idempotency_key", idempotency_key)\
+        .limit(1)\
+        .execute().data or []
+    return rows[0] if rows else None
+
+
+def find_by_content(user_id: str, content_hash: str) -> Optional[Dict]:
+    """The user's most recent claim (not failed) for the same file within INGEST_DEDUP_WINDOW_SECONDS, if any."""
+    rows = supabase.table("claims")\
+        .select(COLUMNS)\
+        .eq("uploaded_by", user_id)\
+        .eq("content_hash", content_hash)\
+        .gte("created_at", _since())\
+        .neq("status", "failed")\
+        .order("created_at", desc=True)\
+        .limit(1)\
+        .execute().data or []
+    return rows[0] if rows else None
+
+
+def source_extraction(source_claim_id: str) -> Optional[Dict]:
+    """
+    The extracted_data of the claim a duplicate upload points at, for the worker to reuse.
+
+    Returns:
+        The stored extracted_data, or None if that claim hasn't completed
+        (the duplicate is then processed from the file)
+    """
+    rows = supabase.table("claims")\
+        .select("status, extracted_data")\
+        .eq("id", source_claim_id)\
+        .limit(1)\
+        .execute().data or []
+    if not rows or rows[0].get("status") != "completed":
+        return None
+    extracted = rows[0].get("extracted_data") or {}
+    return extracted if extracted.get("raw_text") and extracted.get("structured_data") else None
+
+
+def same_document_claims(claim_id: str, user_id: Optional[str], content_hash: Optional[str],
+                         source_claim_id: Optional[str] = None) -> Set[str]:
+    """
+    The user's other claims of the same uploaded file (any policy, any age).
+
+    They are one document filed more than once, not duplicate bills, so the
+    worker excludes them from the cross-claim duplicate check.
+    """
+    claim_ids = {source_claim_id} if source_claim_id else set()
+    if user_id and content_hash:
+        rows = supabase.table("claims")\
+            .select("id")\
+            .eq("uploaded_by", user_id)\
+            .eq("content_hash", content_hash)\
+            .neq("id", claim_id)\
+            .limit(100)\
+            .execute().data or []
+        claim_ids.update(row["id"] for row in rows)
+    return claim_ids
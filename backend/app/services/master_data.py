@@ -0,0 +1,387 @@
+"""
+Hospital and procedure tariff master data.
+
+Extracted hospital names and line-item descriptions are free text ("CITY
+CARE HOSPITAL PVT LTD", "Room Chrgs - Semi Pvt"). This module resolves them
+to rows of the hospitals and procedure_tariffs tables
+(migrations/create_master_data.sql) with an in-memory trigram index over
+each row's name and aliases:
+
+- exact matches (after normalising case and punctuation) are a dict lookup
+- otherwise candidates are the names sharing a distinctive word with the
+  query, allowing for OCR damage to the word (an inverted index of words,
+  plus a trigram index over the vocabulary); failing that, the names
+  sharing enough trigrams to reach MASTER_DATA_MATCH_THRESHOLD. They are
+  ranked by Dice similarity of trigram sets
+- results are cached per index, since the same descriptions recur on
+  almost every bill
+
+The index is loaded on first use and each process checks every
+MASTER_DATA_REFRESH_SECONDS whether either table changed (row count and
+latest updated_at), rebuilding only if so; admin edits also refresh it
+immediately in the process that made them.
+
+Line items resolved to a tariff with a max_rate are checked for
+overcharges without asking the LLM: findings of type "overcharge" on the
+audit result.
+"""
+import logging
+import math
+import re
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+
+from app.core.config import settings
+from app.core.database import supabase
+from app.models import AuditResult, Finding, StructuredClaim
+from app.models.claim import to_float
+
+logger = logging.getLogger(__name__)
+
+PAGE_SIZE = 1000
+MAX_CACHED_LOOKUPS = 100_000
+WORD_MATCH_THRESHOLD = 0.5  # trigram similarity for an OCR-damaged word to count as the same word
+COMMON_WORD_SHARE = 0.02  # words in more than 2% of names don't select candidates...
+MIN_COMMON_WORD_ENTRIES = 50  # ...unless the index is small
+HEADER_LINES = 8
+
+
+# --- trigram index ---
+
+def normalize_name(text) -> str:
+    return re.sub(r"[^a-z0-9]+", " ", str(text or "").lower()).strip()
+
+
+def trigrams(normalized: str) -> frozenset:
+    """Word trigrams, each word padded like pg_trgm ("  ab " for "ab")."""
+    grams = set()
+    for word in normalized.split():
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return frozenset(grams)
+
+
+class TrigramIndex:
+    """Fuzzy name → record id lookup over a fixed set of names."""
+
+    def __init__(self):
+        self._exact: Dict[str, str] = {}
+        self._entries: List[Tuple[str, frozenset]] = []  # (record id, name trigrams)
+        self._postings: Dict[str, List[int]] = defaultdict(list)  # trigram → entries
+        self._words: Dict[str, List[int]] = defaultdict(list)  # word → entries
+        self._vocabulary: Dict[str, List[str]] = defaultdict(list)  # trigram → words
+        self._word_sizes: Dict[str, int] = {}  # word → its trigram count
+        self._cache: Dict[Tuple[str, float], Optional[Tuple[str, float]]] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def add(self, record_id: str, names: List[str]) -> None:
+        for name in names:
+            normalized = normalize_name(name)
+            if not normalized:
+                continue
+            self._exact.setdefault(normalized, record_id)
+            grams = trigrams(normalized)
+            entry = len(self._entries)
+            self._entries.append((record_id, grams))
+            for gram in grams:
+                self._postings[gram].append(entry)
+            for word in set(normalized.split()):
+                if word not in self._words:
+                    word_grams = trigrams(word)
+                    self._word_sizes[word] = len(word_grams)
+                    for gram in word_grams:
+                        self._vocabulary[gram].append(word)
+                self._words[word].append(entry)
+
+    def _similar_words(self, word: str) -> List[str]:
+        """Indexed words within OCR distance of `word` (itself, if indexed)."""
+        if word in self._words:
+            return [word]
+        grams = trigrams(word)
+        shared: Dict[str, int] = defaultdict(int)
+        for gram in grams:
+            for candidate in self._vocabulary.get(gram, ()):
+                shared[candidate] += 1
+        return [
+            candidate for candidate, count in shared.items()
+            if 2 * count / (len(grams) + self._word_sizes[candidate]) >= WORD_MATCH_THRESHOLD
+        ]
+
+    def _word_candidates(self, words: List[str]) -> set:
+        """Entries sharing a distinctive word (or a near-miss of one) with the query."""
+        common = max(MIN_COMMON_WORD_ENTRIES, COMMON_WORD_SHARE * len(self._entries))
+        candidates = set()
+        for word in words:
+            for similar in self._similar_words(word):
+                entries = self._words[similar]
+                if len(entries) <= common:
+                    candidates.update(entries)
+        return candidates
+
+    def _prefix_candidates(self, grams: frozenset, threshold: float) -> set:
+        """Every entry that could score >= threshold (slow when the query has only common trigrams)."""
+        # Such an entry shares at least `needed` of the query's trigrams, so it
+        # contains one of the len - needed + 1 rarest ones
+        needed = max(1, math.ceil(threshold * len(grams) / (2 - threshold)))
+        probes = sorted(grams, key=lambda gram: len(self._postings.get(gram, ())))[:len(grams) - needed + 1]
+        candidates = set()
+        for gram in probes:
+            candidates.update(self._postings.get(gram, ()))
+        return candidates
+
+    def match(self, text, threshold: float) -> Optional[Tuple[str, float]]:
+        """
+        Best matching record for `text`.
+
+        Candidates are the names sharing a distinctive word with `text`
+        (words in more than COMMON_WORD_SHARE of names, like "hospital" or
+        a city, don't count), or, if there are none, every name that shares
+        enough trigrams to reach the threshold.
+
+        Returns:
+            (record id, Dice similarity 0-1), or None if nothing scores >= threshold
+        """
+        normalized = normalize_name(text)
+        if not normalized:
+            return None
+        record_id = self._exact.get(normalized)
+        if record_id is not None:
+            return record_id, 1.0
+
+        key = (normalized, threshold)
+        if key in self._cache:
+            return self._cache[key]
+
+        grams = trigrams(normalized)
+        candidates = self._word_candidates(normalized.split()) or self._prefix_candidates(grams, threshold)
+        best = None
+        for entry in candidates:
+            record_id, entry_grams = self._entries[entry]
+            score = 2 * len(grams & entry_grams) / (len(grams) + len(entry_grams))
+            if score >= threshold and (best is None or score > best[1]):
+                best = (record_id, score)
+
+        if len(self._cache) >= MAX_CACHED_LOOKUPS:
+            self._cache.clear()
+        self._cache[key] = best
+        return best
+
+
+class MasterData:
+    """One loaded snapshot of both tables and their indexes."""
+
+    def __init__(self, hospitals: List[Dict], tariffs: List[Dict], version: tuple = ()):
+        self.version = version
+        self.loaded_at = time.time()
+        self.hospitals = {row["id"]: row for row in hospitals}
+        self.tariffs = {row["id"]: row for row in tariffs}
+        self.hospital_index = TrigramIndex()
+        self.tariff_index = TrigramIndex()
+        for row in hospitals:
+            self.hospital_index.add(row["id"], [row.get("name")] + list(row.get("aliases") or []))
+        for row in tariffs:
+            self.tariff_index.add(row["id"], [row.get("name"), row.get("code")] + list(row.get("aliases") or []))
+
+
+# --- loading ---
+
+_current = MasterData([], [])
+_checked_at = 0.0
+_refresh_lock = threading.Lock()
+
+
+def _load_table(table: str, columns: str) -> List[Dict]:
+    rows: List[Dict] = []
+    while True:
+        page = supabase.table(table)\
+            .select(columns)\
+            .order("id")\
+            .range(len(rows), len(rows) + PAGE_SIZE - 1)\
+            .execute().data or []
+        rows.extend(page)
+        if len(page) < PAGE_SIZE:
+            return rows
+
+
+def _version() -> tuple:
+    """(row count, latest updated_at) per table: changes whenever a row is added, edited or deleted."""
+    version = []
+    for table in ("hospitals", "procedure_tariffs"):
+        result = supabase.table(table)\
+            .select("updated_at", count="exact")\
+            .order("updated_at", desc=True)\
+            .limit(1)\
+            .execute()
+        version.append((result.count, result.data[0]["updated_at"] if result.data else None))
+    return tuple(version)
+
+
+def refresh(force: bool = False) -> MasterData:
+    """
+    Reload the index if either table changed since it was built.
+
+    Args:
+        force: Reload without checking for changes
+    """
+    global _current, _checked_at
+    with _refresh_lock:
+        _checked_at = time.monotonic()
+        try:
+            version = _version()
+            if force or version != _current.version:
+                hospitals = _load_table("hospitals", "id, name, aliases, city")
+                tariffs = _load_table("procedure_tariffs", "id, code, name, aliases, category, max_rate, unit")
+                _current = MasterData(hospitals, tariffs, version)
+                logger.info(f"Master data loaded: {len(hospitals)} hospitals, {len(tariffs)} tariffs")
+        except Exception as e:
+            # Keep matching against the last good snapshot
+            logger.error(f"Failed to load master data: {str(e)}")
+        return _current
+
+
+def get_master_data() -> MasterData:
+    """Current snapshot; checks for changes at most every MASTER_DATA_REFRESH_SECONDS."""
+    if time.monotonic() - _checked_at >= settings.master_data_refresh_seconds and not _refresh_lock.locked():
+        return refresh()
+    return _current
+
+
+def status() -> Dict:
+    data = _current
+    return {
+        "hospitals": len(data.hospitals),
+        "hospital_names": len(data.hospital_index),
+        "tariffs": len(data.tariffs),
+        "tariff_names": len(data.tariff_index),
+        "loaded_at": data.loaded_at,
+        "version": data.version,
+    }
+
+
+# --- resolving ---
+
+def resolve_hospital(name: Optional[str]) -> Optional[Dict]:
+    """Canonical hospital for an extracted name: {"id", "name", "score"}, or None."""
+    data = get_master_data()
+    match = data.hospital_index.match(name, settings.master_data_match_threshold) if name else None
+    if not match:
+        return None
+    row = data.hospitals[match[0]]
+    return {"id": row["id"], "name": row["name"], "score": round(match[1], 3)}
+
+
+def resolve_item(description: Optional[str]) -> Optional[Dict]:
+    """Tariff for a line-item description: {"id", "code", "name", "max_rate", "unit", "score"}, or None."""
+    data = get_master_data()
+    match = data.tariff_index.match(description, settings.master_data_match_threshold) if description else None
+    if not match:
+        return None
+    row = data.tariffs[match[0]]
+    return {
+        "id": row["id"],
+        "code": row["code"],
+        "name": row["name"],
+        "max_rate": row.get("max_rate"),
+        "unit": row.get("unit"),
+        "score": round(match[1], 3),
+    }
+
+
+def annotate_claim(structured_data: Optional[StructuredClaim], raw_text: Optional[str] = None) -> Optional[StructuredClaim]:
+    """
+    Add canonical IDs to normalized claim data.
+
+    Args:
+        structured_data: Output of claim_normalizer.normalize_claim
+        raw_text: The document text; if the extracted hospital name doesn't
+            resolve, the letterhead (first HEADER_LINES lines) is tried
+
+    Returns:
+        The same claim, with hospital_id/hospital_canonical_name and each
+        resolved line item's tariff_code set
+    """
+    if structured_data is None:
+        return structured_data
+
+    hospital = resolve_hospital(structured_data.hospital_name)
+    if not hospital and raw_text:
+        lines = [line for line in raw_text.splitlines() if line.strip()][:HEADER_LINES]
+        matches = [match for match in map(resolve_hospital, lines) if match]
+        hospital = max(matches, key=lambda match: match["score"], default=None)
+    if hospital:
+        structured_data.hospital_id = hospital["id"]
+        structured_data.hospital_canonical_name = hospital["name"]
+
+    items = structured_data.items
+    for i, description in enumerate(items.description):
+        tariff = resolve_item(description)
+        if tariff:
+            items.tariff_code[i] = tariff["code"]
+    return structured_data
+
+
+# --- overcharge checks ---
+
+def _unit_rate(amount: Optional[float], quantity: Optional[float], rate: Optional[float],
+               tariff: Dict) -> Optional[float]:
+    if rate:
+        return rate
+    if amount and quantity:
+        return amount / quantity
+    # An amount alone is only comparable to a flat tariff, not a per-day/per-unit one
+    return amount if not tariff.get("unit") else None
+
+
+def tariff_findings(structured_data: Optional[StructuredClaim]) -> List[Finding]:
+    """
+    "overcharge" findings for line items charged above their tariff's max_rate
+    (plus TARIFF_TOLERANCE); "high" severity at twice the tariff or more.
+    """
+    findings = []
+    if structured_data is None:
+        return findings
+    for description, amount, quantity, rate in structured_data.items.rows():
+        tariff = resolve_item(description)
+        max_rate = to_float(tariff.get("max_rate")) if tariff else None
+        rate = _unit_rate(amount, quantity, rate, tariff) if max_rate else None
+        if not rate or rate <= max_rate * (1 + settings.tariff_tolerance):
+            continue
+        units = quantity or 1
+        unit = f" per {tariff['unit']}" if tariff.get("unit") else ""
+        findings.append(Finding(
+            type="overcharge",
+            severity="high" if rate >= 2 * max_rate else "medium",
+            description=(
+                f"{description}: charged ₹{rate:,.2f}{unit} against a tariff of "
+                f"₹{max_rate:,.2f} ({tariff['code']} {tariff['name']})."
+            ),
+            details={
+                "item": description,
+                "tariff_code": tariff["code"],
+                "charged_rate": round(rate, 2),
+                "tariff_rate": max_rate,
+                "excess_amount": round((rate - max_rate) * units, 2),
+            },
+        ))
+    return findings
+
+
+def apply_tariff_findings(audit_result: AuditResult, findings: List[Finding]) -> AuditResult:
+    """
+    Add overcharge findings to an audit result (replacing earlier ones).
+
+    An overcharge turns an approval into a partial approval and raises the
+    risk score to at least 40 (70 for a high-severity one).
+    """
+    if not findings and not any(f.type == "overcharge" for f in audit_result.findings):
+        return audit_result
+    audit_result.replace_findings("overcharge", findings)
+    if findings:
+        if audit_result.verdict == "APPROVED":
+            audit_result.verdict = "PARTIALLY_APPROVED"
+        audit_result.raise_risk(70 if any(f.severity == "high" for f in findings) else 40)
+    return audit_result
@@ -0,0 +1,267 @@
+"""
+Model routing for claim extraction and audits.
+
+Each extraction and audit is scored for complexity and sent down one of
+three routes:
+
+- "rules": no LLM. Extraction only: the layout-aware table checks out
+  (every row's qty x rate matches, items add up to the total) on a digital
+  PDF, or on a scan with good OCR confidence whose regex extraction found
+  hospital, patient and items
+- "small": EXTRACTION_MODEL (8B), for ordinary documents and simple audits
+- "large": AUDIT_MODEL (70B), for long, badly scanned or otherwise hard
+  documents and for complex audits
+
+A small-route result that looks unreliable is escalated to the large
+model: an extraction below the normalizer's confidence cut-off, or an
+audit that failed, came back with confidence below
+ROUTING_ESCALATION_CONFIDENCE, or would reject / send the claim to review
+(adverse verdicts always come from the large model).
+
+Every decision is recorded with its complexity score and reasons, LLM time
+and estimated cost: in Prometheus (priclaim_llm_route*), in this process's
+totals (GET /api/v1/admin/routing) and, for the claim being processed, on
+the claim's `routing` column. That's what the ROUTING_* thresholds are
+tuned from. MODEL_ROUTING=false restores the old behaviour (8B extraction
+unless the digital table checks out, 70B audits).
+
+Claims of a tenant over its daily budget (resource_ledger) take the cheap
+path regardless of complexity: rules (regex) extraction and small-model
+audits, never escalated.
+"""
+import time
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from app.core.config import settings
+from app.core.metrics import LLM_ROUTE_COST, LLM_ROUTE_SECONDS, LLM_ROUTES, track_llm_usage
+from app.models import AuditResult, StructuredClaim
+from app.services.groq_service import (
+    AUDIT_MODEL,
+    EXTRACTION_MODEL,
+    EXTRACTION_TEXT_LIMITS,
+    AuditPolicy,
+    estimate_cost,
+)
+
+ROUTE_RULES = "rules"
+ROUTE_SMALL = "small"
+ROUTE_LARGE = "large"
+
+ROUTE_MODELS = {ROUTE_SMALL: EXTRACTION_MODEL, ROUTE_LARGE: AUDIT_MODEL}
+
+ADVERSE_VERDICTS = ("REJECTED", "NEEDS_REVIEW")
+
+
+@dataclass
+class RouteDecision:
+    task: str  # "extraction" or "audit"
+    route: str
+    score: float
+    reasons: List[str] = field(default_factory=list)
+    escalated: bool = False
+    seconds: float = 0.0
+    cost_usd: float = 0.0
+
+    @property
+    def model(self) -> Optional[str]:
+        return ROUTE_MODELS.get(self.route)
+
+    def escalate(self, reason: str) -> None:
+        self.route, self.escalated = ROUTE_LARGE, True
+        self.reasons.append(f"escalated: {reason}")
+
+    def to_dict(self) -> Dict:
+        return {
+            **asdict(self),
+            "model": self.model,
+            "score": round(self.score, 2),
+            "seconds": round(self.seconds, 3),
+            "cost_usd": round(self.cost_usd, 6),
+        }
+
+
+# --- complexity ---
+
+class _Score:
+    def __init__(self):
+        self.value = 0.0
+        self.reasons: List[str] = []
+
+    def add(self, weight: float, reason: str) -> None:
+        self.value += weight
+        self.reasons.append(reason)
+
+    def result(self) -> Tuple[float, List[str]]:
+        return min(self.value, 1.0), self.reasons
+
+
+def extraction_complexity(raw_text: str, page_count: Optional[int], extraction_method: Optional[str],
+                          ocr_confidence: Optional[float], table: Optional[Dict],
+                          regex_result: StructuredClaim) -> Tuple[float, List[str]]:
+    """Complexity of extracting a document, 0 (trivial) to 1 (hard), with the reasons."""
+    score = _Score()
+    if page_count and page_count > settings.routing_long_document_pages:
+        score.add(0.3, f"{page_count} pages")
+    if len(raw_text or "") > EXTRACTION_TEXT_LIMITS[EXTRACTION_MODEL]:
+        score.add(0.3, f"{len(raw_text)} characters (small model sees {EXTRACTION_TEXT_LIMITS[EXTRACTION_MODEL]})")
+    if extraction_method == "tesseract_ocr":
+        score.add(0.1, "scanned")
+        if ocr_confidence is not None and ocr_confidence < settings.routing_min_ocr_confidence:
+            score.add(0.3, f"OCR confidence {ocr_confidence:.2f}")
+    regex_confidence = regex_result.extraction_confidence
+    if regex_confidence in ("low", "none", "error"):
+        score.add(0.2, f"regex confidence {regex_confidence}")
+    table_confidence = (table or {}).get("confidence")
+    if table_confidence not in ("high", "medium"):
+        score.add(0.1, f"line-item table confidence {table_confidence or 'none'}")
+    return score.result()
+
+
+def audit_complexity(structured_data: StructuredClaim, policy: AuditPolicy) -> Tuple[float, List[str]]:
+    """Complexity of auditing a claim, 0 (trivial) to 1 (hard), with the reasons."""
+    score = _Score()
+    items = len(structured_data.items)
+    if items > settings.routing_simple_audit_items:
+        score.add(0.3, f"{items} line items")
+    total = structured_data.total_claimed
+    if total > settings.routing_simple_audit_amount:
+        score.add(0.3, f"claimed {total:,.0f}")
+    if policy.policy_chars:
+        score.add(0.1, "policy-specific")
+        if policy.policy_chars > 1500:
+            score.add(0.1, f"{policy.policy_chars}-character policy")
+    if structured_data.extraction_confidence not in ("high",):
+        score.add(0.2, f"extraction confidence {structured_data.extraction_confidence}")
+    return score.result()
+
+
+# --- decisions ---
+
+def route_extraction(raw_text: str, page_count: Optional[int], extraction_method: Optional[str],
+                     ocr_confidence: Optional[float], table: Optional[Dict],
+                     regex_result: StructuredClaim) -> RouteDecision:
+    score, reasons = extraction_complexity(raw_text, page_count, extraction_method, ocr_confidence, table, regex_result)
+    table_checks_out = (table or {}).get("confidence") == "high"
+
+    if _over_budget.get():
+        return RouteDecision("extraction", ROUTE_RULES, score, reasons + ["tenant over budget"])
+    if not settings.model_routing:
+        route = ROUTE_RULES if table_checks_out and extraction_method == "pdfplumber" else ROUTE_SMALL
+        return RouteDecision("extraction", route, score, reasons + ["routing disabled"])
+
+    if table_checks_out and (
+        extraction_method == "pdfplumber"
+        or (regex_result.extraction_confidence == "high"
+            and ocr_confidence is not None and ocr_confidence >= settings.routing_min_ocr_confidence)
+    ):
+        return RouteDecision("extraction", ROUTE_RULES, score, reasons + ["line-item table checks out"])
+    route = ROUTE_LARGE if score >= settings.routing_large_extraction_score else ROUTE_SMALL
+    return RouteDecision("extraction", route, score, reasons)
+
+
+def route_audit(structured_data: StructuredClaim, policy: AuditPolicy) -> RouteDecision:
+    score, reasons = audit_complexity(structured_data, policy)
+    if _over_budget.get():
+        return RouteDecision("audit", ROUTE_SMALL, score, reasons + ["tenant over budget"])
+    if not settings.model_routing:
+        return RouteDecision("audit", ROUTE_LARGE, score, reasons + ["routing disabled"])
+    route = ROUTE_SMALL if score < settings.routing_small_audit_score else ROUTE_LARGE
+    return RouteDecision("audit", route, score, reasons)
+
+
+def audit_escalation(decision: RouteDecision, result: AuditResult) -> Optional[str]:
+    """Why a small-route audit result should be redone on the large model (None if it's fine)."""
+    if decision.route != ROUTE_SMALL or _over_budget.get():
+        return None
+    if result.error:
+        return "small model failed"
+    if result.verdict in ADVERSE_VERDICTS:
+        return f"verdict {result.verdict}"
+    if result.confidence < settings.routing_escalation_confidence:
+        return f"confidence {result.confidence:.2f}"
+    return None
+
+
+# --- recording ---
+
+_claim_routing: ContextVar[Optional[Dict[str, Dict]]] = ContextVar("claim_routing", default=None)
+_over_budget: ContextVar[bool] = ContextVar("over_budget", default=False)
+_totals: Dict[Tuple[str, str], Dict] = {}
+_totals_lock = threading.Lock()
+
+
+def start_claim_routing(over_budget: bool = False) -> Dict[str, Dict]:
+    """
+    Start collecting routing decisions for the claim being processed in this context.
+
+    Args:
+        over_budget: The claim's tenant is over its budget; route everything the cheap way
+
+    Returns:
+        The dict record() fills in (task -> decision)
+    """
+    routing: Dict[str, Dict] = {}
+    _claim_routing.set(routing)
+    _over_budget.set(over_budget)
+    return routing
+
+
+def stop_claim_routing() -> None:
+    _claim_routing.set(None)
+    _over_budget.set(False)
+
+
+@contextmanager
+def measure(*decisions: RouteDecision):
+    """Add the enclosed LLM calls' time and estimated cost to the decisions (split evenly)."""
+    start = time.perf_counter()
+    with track_llm_usage() as usage:
+        yield
+    share = 1 / max(1, len(decisions))
+    seconds, cost = (time.perf_counter() - start) * share, estimate_cost(usage) * share
+    for decision in decisions:
+        decision.seconds += seconds
+        decision.cost_usd += cost
+
+
+def record(decision: RouteDecision) -> None:
+    """Count a finished decision in metrics, process totals and the current claim's routing."""
+    escalated = "true" if decision.escalated else "false"
+    LLM_ROUTES.labels(task=decision.task, route=decision.route, escalated=escalated).inc()
+    if decision.route != ROUTE_RULES:
+        LLM_ROUTE_SECONDS.labels(task=decision.task, route=decision.route).observe(decision.seconds)
+        LLM_ROUTE_COST.labels(task=decision.task, route=decision.route).inc(decision.cost_usd)
+
+    with _totals_lock:
+        totals = _totals.setdefault((decision.task, decision.route),
+                                    {"count": 0, "escalated": 0, "seconds": 0.0, "cost_usd": 0.0, "score": 0.0})
+        totals["count"] += 1
+        totals["escalated"] += decision.escalated
+        totals["seconds"] += decision.seconds
+        totals["cost_usd"] += decision.cost_usd
+        totals["score"] += decision.score
+
+    routing = _claim_routing.get()
+    if routing is not None:
+        routing[decision.task] = decision.to_dict()
+
+
+def routing_stats() -> Dict[str, Dict[str, Dict]]:
+    """Decisions made by this process: per task and route, count, escalations, mean seconds/cost/score."""
+    stats: Dict[str, Dict[str, Dict]] = {}
+    with _totals_lock:
+        for (task, route), totals in sorted(_totals.items()):
+            count = totals["count"]
+            stats.setdefault(task, {})[route] = {
+                "count": count,
+                "escalated": totals["escalated"],
+                "mean_seconds": round(totals["seconds"] / count, 3),
+                "mean_cost_usd": round(totals["cost_usd"] / count, 6),
+                "total_cost_usd": round(totals["cost_usd"], 4),
+                "mean_score": round(totals["score"] / count, 2),
+            }
+    return stats
@@ -0,0 +1,207 @@
+"""
+Shared on-disk cache for OCR work.
+
+Two kinds of entries live in one SQLite database (WAL mode, so any number
+of worker processes on the host can read and write it concurrently):
+
+- "ocr":   a page's OCR result (text, word boxes, blank/skew info), keyed
+           by (document SHA-256, page, OCR profile)
+- "image": the preprocessed page image (PNG), keyed by (document SHA-256,
+           page, preprocessing settings), so a profile that only changes
+           Tesseract settings doesn't rasterize the page again
+
+Entries are compressed, the total size is held under OCR_CACHE_MAX_BYTES
+and the least recently used entries are evicted first. Retries,
+reprocessing and re-audits of the same document therefore never OCR it
+twice, whichever worker handled it before.
+"""
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Bump when OCR output changes shape or quality so old entries stop matching
+CACHE_VERSION = 1
+
+# Hits refresh last_access at most this often, to keep reads mostly read-only
+TOUCH_INTERVAL_SECONDS = 60
+EVICT_BATCH = 64
+
+IMAGE_SETTINGS = ("dpi", "grayscale", "denoise", "binarize", "deskew")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    last_access REAL NOT NULL,
+    payload BLOB NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_entries_last_access ON entries(last_access);
+CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value INTEGER NOT NULL);
+INSERT OR IGNORE INTO meta (name, value) VALUES ('bytes', 0);
+"""
+
+
+def document_hash(pdf_bytes: bytes) -> str:
+    return hashlib.sha256(pdf_bytes).hexdigest()
+
+
+def _settings_key(profile: Dict, fields: Optional[Iterable[str]] = None) -> str:
+    selected = {k: v for k, v in profile.items() if fields is None or k in fields}
+    encoded = json.dumps({"v": CACHE_VERSION, **selected}, sort_keys=True)
+    return hashlib.sha1(encoded.encode()).hexdigest()[:16]
+
+
+def profile_key(profile: Dict) -> str:
+    """Key for OCR results: every profile setting matters."""
+    return _settings_key(profile)
+
+
+def image_key(profile: Dict) -> str:
+    """Key for page images: only rendering and preprocessing settings matter."""
+    return _settings_key(profile, IMAGE_SETTINGS)
+
+
+class OcrCache:
+    def __init__(self, path: str, max_bytes: int):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._local = threading.local()
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+
+    def _connection(self) -> sqlite3.Connection:
+        # One connection per thread, reopened in a forked child
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(SCHEMA)
+            self._local.conn, self._local.pid = conn, os.getpid()
+        return conn
+
+    # --- generic entries ---
+
+    def _get_many(self, keys: List[str]) -> Dict[str, bytes]:
+        if not keys:
+            return {}
+        conn = self._connection()
+        placeholders = ",".join("?" * len(keys))
+        rows = conn.execute(
+            f"SELECT key, payload, last_access FROM entries WHERE key IN ({placeholders})", keys
+        ).fetchall()
+
+        now = time.time()
+        stale = [key for key, _, last_access in rows if now - last_access > TOUCH_INTERVAL_SECONDS]
+        if stale:
+            conn.execute(
+                f"UPDATE entries SET last_access = ? WHERE key IN ({','.join('?' * len(stale))})",
+                [now, *stale],
+            )
+        return {key: zlib.decompress(payload) for key, payload, _ in rows}
+
+    def _put_many(self, kind: str, items: Dict[str, bytes]) -> None:
+        if not items:
+            return
+        conn = self._connection()
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            delta = 0
+            for key, data in items.items():
+                payload = zlib.compress(data, 6)
+                old = conn.execute("SELECT size FROM entries WHERE key = ?", (key,)).fetchone()
+                conn.execute(
+                    "INSERT OR REPLACE INTO entries (key, kind, size, last_access, payload) VALUES (?, ?, ?, ?, ?)",
+                    (key, kind, len(payload), now, payload),
+                )
+                delta += len(payload) - (old[0] if old else 0)
+            conn.execute("UPDATE meta SET value = value + ? WHERE name = 'bytes'", (delta,))
+            self._evict(conn)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def _evict(self, conn: sqlite3.Connection) -> None:
+        """Drop least recently used entries until under budget (caller holds the write lock)."""
+        (total,) = conn.execute("SELECT value FROM meta WHERE name = 'bytes'").fetchone()
+        evicted = 0
+        while total > self.max_bytes:
+            rows = conn.execute(
+                "SELECT key, size FROM entries ORDER BY last_access LIMIT ?", (EVICT_BATCH,)
+            ).fetchall()
+            if not rows:
+                total = 0
+                break
+            for key, size in rows:
+                if total <= self.max_bytes:
+                    break
+                conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+                total -= size
+                evicted += 1
+        conn.execute("UPDATE meta SET value = ? WHERE name = 'bytes'", (total,))
+        if evicted:
+            logger.info(f"OCR cache evicted {evicted} entries")
+
+    # --- OCR results ---
+
+    def get_pages(self, doc_hash: str, pages: Iterable[int], profile: Dict) -> Dict[int, Dict]:
+        """Cached OCR results for the given pages, by page number."""
+        variant = profile_key(profile)
+        keys = {f"ocr:{doc_hash}:{page}:{variant}": page for page in pages}
+        found = self._get_many(list(keys))
+        return {keys[key]: json.loads(data) for key, data in found.items()}
+
+    def put_pages(self, doc_hash: str, results: List[Dict], profile: Dict) -> None:
+        """Store OCR results (page dicts from ocr_pool.ocr_page)."""
+        variant = profile_key(profile)
+        self._put_many("ocr", {
+            f"ocr:{doc_hash}:{result['page_number']}:{variant}": json.dumps({
+                key: result[key] for key in ("page_number", "text", "words", "blank", "skew_degrees")
+            }).encode()
+            for result in results
+        })
+
+    # --- preprocessed page images ---
+
+    def get_image(self, doc_hash: str, page: int, profile: Dict) -> Optional[bytes]:
+        key = f"image:{doc_hash}:{page}:{image_key(profile)}"
+        return self._get_many([key]).get(key)
+
+    def put_image(self, doc_hash: str, page: int, profile: Dict, png: bytes) -> None:
+        self._put_many("image", {f"image:{doc_hash}:{page}:{image_key(profile)}": png})
+
+    def stats(self) -> Dict:
+        conn = self._connection()
+        (total,) = conn.execute("SELECT value FROM meta WHERE name = 'bytes'").fetchone()
+        counts = dict(conn.execute("SELECT kind, COUNT(*) FROM entries GROUP BY kind").fetchall())
+        return {"path": self.path, "bytes": total, "max_bytes": self.max_bytes, "entries": counts}
+
+
+_cache: Optional[OcrCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_ocr_cache() -> Optional[OcrCache]:
+    """Process-wide cache, or None when OCR_CACHE_MAX_BYTES is 0."""
+    global _cache
+    if settings.ocr_cache_max_bytes <= 0:
+        return None
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                path = settings.ocr_cache_path or os.path.join(settings.local_data_dir, "ocr_cache.db")
+                _cache = OcrCache(path, settings.ocr_cache_max_bytes)
+    return _cache
@@ -0,0 +1,306 @@
+"""
+Pre-started process pool for page OCR.
+
+Each worker imports pytesseract/pdf2image and resolves the Tesseract
+binary once, instead of every claim paying that on its first page. Pages
+of one document are rasterized, preprocessed and OCRed in parallel across
+workers (see OCR_PROFILES in text_extractor for the per-page settings).
+
+OCR_WORKERS=0 disables the pool and OCRs pages in the calling thread.
+"""
+import logging
+import multiprocessing
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, List, Optional
+
+from app.core.config import settings
+from app.core.metrics import observe_stage, record_cache_lookup
+
+logger = logging.getLogger(__name__)
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+_warm_workers = 0
+_pending = 0
+_pending_lock = threading.Lock()
+
+
+def _init_worker():
+    """Import OCR dependencies and set the Tesseract path (pool initializer)."""
+    import pdf2image  # noqa: F401
+    import pytesseract  # noqa: F401
+    try:
+        from app.core import ocr_config  # noqa: F401  (sets Tesseract path)
+    except ImportError:
+        pass
+
+
+def _warm_worker() -> int:
+    """Load the Tesseract binary once so the first real page doesn't pay for it."""
+    import pytesseract
+    try:
+        pytesseract.get_tesseract_version()
+    except Exception as e:
+        logger.warning(f"Tesseract not available in OCR worker: {str(e)}")
+    # Hold the worker briefly so concurrent warm-up tasks land on different processes
+    time.sleep(0.2)
+    return os.getpid()
+
+
+def _cpu_time() -> float:
+    """CPU seconds of this thread plus finished child processes (pdftoppm, tesseract)."""
+    times = os.times()
+    return time.thread_time() + times.children_user + times.children_system
+
+
+def ocr_page(pdf_path: str, page_number: int, profile: Dict, doc_hash: Optional[str] = None) -> Dict:
+    """
+    Rasterize, preprocess and OCR one page (1-indexed). Runs inside a pool worker.
+
+    The page is rendered straight at the profile's DPI (and in grayscale
+    when the profile wants it), which is cheaper than rendering large and
+    downscaling. With `doc_hash`, the preprocessed image is looked up in
+    and stored to the shared OCR cache (binarizing profiles only; colour
+    renders are too large to be worth keeping).
+
+    Returns:
+        dict with text, blank/skew info, whether the image came from the
+        cache, the seconds spent per step and the CPU seconds used (child
+        process CPU is exact in a pool worker; with OCR_WORKERS=0 it can
+        include other threads' children that finished meanwhile)
+    """
+    from app.services.ocr_cache import get_ocr_cache
+    from app.services.text_extractor import (
+        decode_page_image,
+        encode_page_image,
+        preprocess_page,
+        run_tesseract,
+    )
+
+    _init_worker()  # Tesseract path setup; a no-op after the first call in a process
+
+    cache = get_ocr_cache() if doc_hash and profile.get("binarize") else None
+
+    start, cpu_start = time.perf_counter(), _cpu_time()
+    png = None
+    if cache:
+        try:
+            png = cache.get_image(doc_hash, page_number, profile)
+        except Exception as e:
+            logger.warning(f"Failed to read cached page image: {str(e)}")
+            cache = None
+    if png is not None:
+        page, info = decode_page_image(png)
+        rasterized = preprocessed = time.perf_counter()
+    else:
+        from pdf2image import convert_from_path
+
+        images = convert_from_path(
+            pdf_path,
+            dpi=profile["dpi"],
+            first_page=page_number,
+            last_page=page_number,
+            grayscale=profile.get("grayscale", False),
+        )
+        rasterized = time.perf_counter()
+        if images:
+            page, info = preprocess_page(images[0], profile)
+        else:
+            page, info = None, {"blank": True, "skew_degrees": 0.0}
+        if cache and page is not None:
+            try:
+                cache.put_image(doc_hash, page_number, profile, encode_page_image(page, info))
+            except Exception as e:
+                logger.warning(f"Failed to cache page image: {str(e)}")
+        preprocessed = time.perf_counter()
+
+    text, words = run_tesseract(page, profile) if page is not None else ("", [])
+    finished = time.perf_counter()
+
+    return {
+        "page_number": page_number,
+        "text": text,
+        "words": words,
+        **info,
+        "image_cached": png is not None,
+        "rasterize_seconds": rasterized - start,
+        "preprocess_seconds": preprocessed - rasterized,
+        "ocr_seconds": finished - preprocessed,
+        "cpu_seconds": _cpu_time() - cpu_start,
+    }
+
+
+def get_ocr_pool() -> Optional[ProcessPoolExecutor]:
+    """Shared OCR pool, or None when OCR_WORKERS=0."""
+    global _pool
+    if settings.ocr_workers <= 0:
+        return None
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                # forkserver avoids forking a process that already runs threads
+                methods = multiprocessing.get_all_start_methods()
+                context = multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+                _pool = ProcessPoolExecutor(
+                    max_workers=settings.ocr_workers,
+                    mp_context=context,
+                    initializer=_init_worker,
+                )
+    return _pool
+
+
+def warm_ocr_pool() -> int:
+    """
+    Start every OCR worker process ahead of the first job.
+
+    Returns:
+        Number of distinct worker processes that answered
+    """
+    global _warm_workers
+    pool = get_ocr_pool()
+    if pool is None:
+        return 0
+    futures = [pool.submit(_warm_worker) for _ in range(settings.ocr_workers)]
+    _warm_workers = len({f.result() for f in futures})
+    logger.info(f"OCR pool warm: {_warm_workers}/{settings.ocr_workers} workers")
+    return _warm_workers
+
+
+def shutdown_ocr_pool() -> None:
+    global _pool, _warm_workers
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+            _warm_workers = 0
+
+
+def pool_status() -> Dict:
+    """Snapshot of the OCR pool for health reporting."""
+    return {
+        "enabled": settings.ocr_workers > 0,
+        "workers": settings.ocr_workers,
+        "started": _pool is not None,
+        "warm_workers": _warm_workers,
+        "pending_pages": _pending,
+    }
+
+
+def _track(delta: int) -> None:
+    global _pending
+    with _pending_lock:
+        _pending += delta
+
+
+def _count_pages(pdf_path: str) -> int:
+    from pdf2image import pdfinfo_from_path
+    return int(pdfinfo_from_path(pdf_path)["Pages"])
+
+
+def ocr_document(pdf_bytes: bytes, page_count: int = 0, profile: Optional[Dict] = None) -> List[Dict]:
+    """
+    OCR every page of a PDF, in parallel when the pool is enabled.
+
+    Pages already in the shared OCR cache (same document bytes, page and
+    profile) are returned from there; only the rest are OCRed, and their
+    results are cached for the next attempt, worker or re-audit.
+
+    Args:
+        pdf_bytes: PDF content
+        page_count: Known page count (0 = ask Poppler)
+        profile: OCR profile (default: OCR_PROFILE setting)
+
+    Returns:
+        Per-page results from ocr_page(), in page order
+    """
+    from app.services.ocr_cache import document_hash, get_ocr_cache
+
+    if profile is None:
+        from app.services.text_extractor import get_ocr_profile
+        profile = get_ocr_profile()
+
+    cache = get_ocr_cache()
+    doc_hash = document_hash(pdf_bytes) if cache else None
+
+    # Workers read the PDF from a temp file rather than each receiving a copy of the bytes
+    fd, pdf_path = tempfile.mkstemp(suffix=".pdf", prefix="priclaim-ocr-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(pdf_bytes)
+
+        page_count = page_count or _count_pages(pdf_path)
+
+        cached = {}
+        if cache:
+            try:
+                cached = cache.get_pages(doc_hash, range(1, page_count + 1), profile)
+            except Exception as e:
+                logger.warning(f"Failed to read cached OCR results, OCRing without the cache: {str(e)}")
+                cache, doc_hash = None, None
+        for _ in cached:
+            record_cache_lookup("ocr_page", True)
+        pages = [n for n in range(1, page_count + 1) if n not in cached]
+        for _ in pages:
+            record_cache_lookup("ocr_page", False)
+
+        results = []
+        if pages:
+            pool = get_ocr_pool()
+            computed = None
+            if pool is not None:
+                _track(len(pages))
+                try:
+                    computed = list(pool.map(
+                        ocr_page, [pdf_path] * len(pages), pages, [profile] * len(pages), [doc_hash] * len(pages)
+                    ))
+                except BrokenProcessPool:
+                    logger.error("OCR pool broke, restarting it and OCRing in-process")
+                    shutdown_ocr_pool()
+                finally:
+                    _track(-len(pages))
+
+            if computed is None:
+                computed = [ocr_page(pdf_path, n, profile, doc_hash) for n in pages]
+            results = computed
+    finally:
+        os.unlink(pdf_path)
+
+    from app.services.resource_ledger import charge_ocr
+
+    charge_ocr(
+        pages=len(results),
+        cached_pages=len(cached),
+        rasterized=sum(not result["image_cached"] for result in results),
+        cpu_seconds=sum(result.get("cpu_seconds", 0.0) for result in results),
+    )
+
+    blank = 0
+    for result in results:
+        if result["image_cached"]:
+            record_cache_lookup("page_image", True)
+        else:
+            observe_stage("rasterize", result["rasterize_seconds"])
+            if profile.get("binarize") and cache:
+                record_cache_lookup("page_image", False)
+        observe_stage("ocr_preprocess", result["preprocess_seconds"])
+        if result["blank"]:
+            blank += 1
+        else:
+            observe_stage("ocr_page", result["ocr_seconds"])
+    if blank:
+        logger.info(f"Skipped OCR on {blank}/{len(results)} blank pages")
+
+    if cache and results:
+        try:
+            cache.put_pages(doc_hash, results, profile)
+        except Exception as e:
+            logger.warning(f"Failed to cache OCR results: {str(e)}")
+
+    if cached:
+        logger.info(f"OCR cache: {len(cached)}/{page_count} pages reused")
+    return sorted(results + list(cached.values()), key=lambda page: page["page_number"])
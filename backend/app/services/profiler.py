@@ -0,0 +1,308 @@
+"""
+Sampling profiler for API and worker processes.
+
+One daemon thread wakes every PROFILE_INTERVAL_MS, reads the current stack
+of every thread (sys._current_frames()) and counts it in each running
+profile. Nothing is traced between samples, so the cost is the sampling
+itself (a few microseconds per sampled thread) and nothing at all while no
+profile is running; that's cheap enough to profile a fraction of claims
+in production.
+
+Two kinds of profile:
+
+- process: every thread of this process, started and stopped on demand
+  (POST /api/v1/admin/profiler/start and /stop for the API process,
+  SIGUSR2 for a standalone worker). Stops itself after PROFILE_MAX_SECONDS.
+- claim: only the worker thread processing one claim, for claims flagged
+  with `profile` and a random PROFILE_SAMPLE_RATE of the rest. OCR runs in
+  the OCR pool's processes, which aren't sampled: their time shows up as
+  the worker waiting in ocr_document().
+
+Finished profiles are written to PROFILE_DIR (default
+<local_data_dir>/profiles) as <name>.folded, collapsed stacks ("a;b;c 42"
+per line, for flamegraph.pl or speedscope), and <name>.svg, a flamegraph.
+"""
+import logging
+import os
+import random
+import socket
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from html import escape
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+MAX_PROFILES_LISTED = 50
+
+
+@dataclass
+class Profile:
+    name: str
+    thread_id: Optional[int] = None  # None: every thread of the process
+    max_seconds: Optional[float] = None
+    started: float = field(default_factory=time.monotonic)
+    started_at: str = field(default_factory=lambda: datetime.now(timezone.utc).isoformat())
+    samples: Counter = field(default_factory=Counter)  # stack (root first) -> samples
+    seconds: float = 0.0
+    files: Dict[str, str] = field(default_factory=dict)
+
+    def to_dict(self) -> Dict:
+        return {
+            "name": self.name,
+            "scope": "process" if self.thread_id is None else "thread",
+            "started_at": self.started_at,
+            "seconds": round(self.seconds or time.monotonic() - self.started, 1),
+            "samples": sum(self.samples.values()),
+            "files": self.files,
+        }
+
+
+_profiles: Dict[str, Profile] = {}  # running, by name
+_process_profile: Optional[Profile] = None
+_sampler: Optional[threading.Thread] = None
+_lock = threading.Lock()
+_labels: Dict[object, str] = {}  # code object -> frame label
+
+
+def profile_dir() -> Path:
+    return Path(settings.profile_dir or os.path.join(settings.local_data_dir, "profiles"))
+
+
+def _label(code) -> str:
+    label = _labels.get(code)
+    if label is None:
+        label = f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+        _labels[code] = label
+    return label
+
+
+def _stack(frame) -> Tuple[str, ...]:
+    labels = []
+    while frame is not None:
+        labels.append(_label(frame.f_code))
+        frame = frame.f_back
+    labels.reverse()
+    return tuple(labels)
+
+
+def _sample_loop() -> None:
+    global _sampler
+    me = threading.get_ident()
+    interval = max(settings.profile_interval_ms, 1.0) / 1000
+    while True:
+        with _lock:
+            if not _profiles:
+                _sampler = None
+                return
+            running = list(_profiles.values())
+
+        frames = sys._current_frames()
+        process_wide = any(profile.thread_id is None for profile in running)
+        if process_wide:
+            wanted = [thread_id for thread_id in frames if thread_id != me]
+        else:
+            wanted = [profile.thread_id for profile in running if profile.thread_id in frames]
+        stacks = {thread_id: _stack(frames[thread_id]) for thread_id in wanted}
+        del frames
+
+        names = {thread.ident: thread.name for thread in threading.enumerate()} if process_wide else {}
+        with _lock:
+            # Profiles finished meanwhile are no longer in _profiles and stay untouched
+            for profile in running:
+                if profile.name not in _profiles:
+                    continue
+                if profile.thread_id is None:
+                    # Process profiles get one root per thread
+                    for thread_id, stack in stacks.items():
+                        profile.samples[(names.get(thread_id, str(thread_id)),) + stack] += 1
+                elif profile.thread_id in stacks:
+                    profile.samples[stacks[profile.thread_id]] += 1
+
+        for profile in running:
+            if profile.max_seconds and time.monotonic() - profile.started >= profile.max_seconds:
+                logger.info(f"Profile {profile.name} reached {profile.max_seconds:.0f}s; stopping it")
+                _finish(profile)
+        time.sleep(interval)
+
+
+def _begin(profile: Profile) -> Profile:
+    global _sampler
+    with _lock:
+        _profiles[profile.name] = profile
+        if _sampler is None:
+            _sampler = threading.Thread(target=_sample_loop, name="profiler", daemon=True)
+            _sampler.start()
+    return profile
+
+
+def _finish(profile: Profile) -> Profile:
+    global _process_profile
+    with _lock:
+        if _profiles.pop(profile.name, None) is None:
+            return profile  # already finished
+        if _process_profile is profile:
+            _process_profile = None
+    profile.seconds = time.monotonic() - profile.started
+    try:
+        profile.files = write_profile(profile)
+    except Exception as e:
+        logger.error(f"Failed to write profile {profile.name}: {str(e)}")
+    return profile
+
+
+def _name(kind: str) -> str:
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S")
+    return f"{kind}-{socket.gethostname()}-{os.getpid()}-{stamp}"
+
+
+# --- process profiles ---
+
+def start_profile(max_seconds: Optional[float] = None) -> Profile:
+    """
+    Start profiling every thread of this process.
+
+    Args:
+        max_seconds: Stop after this long (default and upper bound PROFILE_MAX_SECONDS)
+
+    Raises:
+        RuntimeError: if a process profile is already running
+    """
+    global _process_profile
+    limit = settings.profile_max_seconds
+    with _lock:
+        if _process_profile is not None:
+            raise RuntimeError(f"Profile {_process_profile.name} is already running")
+        _process_profile = Profile(_name("process"), max_seconds=min(max_seconds or limit, limit))
+    logger.info(f"Started profile {_process_profile.name}")
+    return _begin(_process_profile)
+
+
+def stop_profile() -> Optional[Profile]:
+    """Stop this process's profile and write it out; None if none was running."""
+    profile = _process_profile
+    if profile is None:
+        return None
+    _finish(profile)
+    logger.info(f"Stopped profile {profile.name}: {sum(profile.samples.values())} samples, {profile.files}")
+    return profile
+
+
+def toggle_profile() -> None:
+    """Start a process profile, or stop the running one (SIGUSR2 in standalone workers; call it outside the signal handler)."""
+    if stop_profile() is None:
+        start_profile()
+
+
+def profiler_status() -> Dict:
+    """Running profiles and the most recent profiles written to PROFILE_DIR."""
+    with _lock:
+        running = [profile.to_dict() for profile in _profiles.values()]
+    directory = profile_dir()
+    written = sorted(directory.glob("*.folded"), key=lambda path: path.stat().st_mtime, reverse=True) \
+        if directory.is_dir() else []
+    return {
+        "running": running,
+        "directory": str(directory),
+        "recent": [path.stem for path in written[:MAX_PROFILES_LISTED]],
+    }
+
+
+# --- claim profiles ---
+
+@contextmanager
+def profile_claim(claim_id: str, flagged: bool = False):
+    """
+    Profile the calling thread while it processes a claim.
+
+    Args:
+        claim_id: Claim being processed (part of the profile's name)
+        flagged: The claim asked to be profiled; otherwise it's sampled at PROFILE_SAMPLE_RATE
+
+    Yields:
+        The Profile, or None if this claim isn't profiled
+    """
+    if not flagged and random.random() >= settings.profile_sample_rate:
+        yield None
+        return
+    profile = _begin(Profile(f"{_name('claim')}-{claim_id}", thread_id=threading.get_ident()))
+    try:
+        yield profile
+    finally:
+        _finish(profile)
+        logger.info(f"Profiled claim {claim_id}: {sum(profile.samples.values())} samples, {profile.files}")
+
+
+# --- output ---
+
+def collapsed(samples: Counter) -> List[str]:
+    """Collapsed stack lines ("root;child;leaf count"), heaviest first."""
+    return [f"{';'.join(stack)} {count}" for stack, count in samples.most_common()]
+
+
+def write_profile(profile: Profile) -> Dict[str, str]:
+    """Write <name>.folded and <name>.svg to PROFILE_DIR. Returns the paths."""
+    directory = profile_dir()
+    directory.mkdir(parents=True, exist_ok=True)
+    folded = directory / f"{profile.name}.folded"
+    svg = directory / f"{profile.name}.svg"
+    folded.write_text("\n".join(collapsed(profile.samples)) + "\n")
+    svg.write_text(flamegraph_svg(profile.samples, title=profile.name))
+    return {"folded": str(folded), "svg": str(svg)}
+
+
+def flamegraph_svg(samples: Counter, title: str = "", width: int = 1200, frame_height: int = 16) -> str:
+    """Render collapsed stacks as a flamegraph (root at the bottom, hover a frame for its share)."""
+    # Merge stacks into a tree: name -> [samples, children]
+    root: List = [0, {}]
+    for stack, count in samples.items():
+        root[0] += count
+        node = root
+        for frame in stack:
+            node = node[1].setdefault(frame, [0, {}])
+            node[0] += count
+
+    total = max(root[0], 1)
+    min_samples = total / width  # frames narrower than a pixel are left out
+
+    def depth(node) -> int:
+        return 1 + max((depth(child) for child in node[1].values() if child[0] >= min_samples), default=0)
+
+    height = (depth(root) + 1) * frame_height + 30
+    rects: List[str] = []
+
+    def draw(node, name: str, x: float, level: int) -> None:
+        w = node[0] / total * (width - 20)
+        y = height - (level + 1) * frame_height - 10
+        share = 100.0 * node[0] / total
+        hue = 10 + hash(name) % 40
+        rects.append(
+            f'<g><title>{escape(name)} ({node[0]} samples, {share:.1f}%)</title>'
+            f'<rect x="{x + 10:.1f}" y="{y}" width="{w:.1f}" height="{frame_height - 1}" '
+            f'fill="hsl({hue},85%,{55 + hash(name) % 15}%)" rx="2"/>'
+            + (f'<text x="{x + 13:.1f}" y="{y + frame_height - 4}">{escape(name[:int(w / 7)])}</text>'
+               if w > 35 else "")
+            + "</g>"
+        )
+        for child_name, child in sorted(node[1].items()):
+            if child[0] >= min_samples:
+                draw(child, child_name, x, level + 1)
+            x += child[0] / total * (width - 20)
+
+    draw(root, "all", 0.0, 0)
+    return (
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" '
+        f'font-family="monospace" font-size="11">'
+        f'<rect width="100%" height="100%" fill="#fdfdf6"/>'
+        f'<text x="10" y="18" font-size="14">{escape(title)} ({root[0]} samples)</text>'
+        + "".join(rects)
+        + "</svg>\n"
+    )
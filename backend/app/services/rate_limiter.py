@@ -0,0 +1,77 @@
+"""
+Token-bucket rate limiting for Groq calls.
+
+Groq enforces requests-per-minute and tokens-per-minute quotas per model;
+going over them turns into 429s and failed audits. RateLimiter keeps a
+bucket for each and blocks the caller until both have room.
+
+`llm_limiter` applies to every Groq call in the process
+(LLM_REQUESTS_PER_MINUTE / LLM_TOKENS_PER_MINUTE, 0 = unlimited). Batch
+jobs such as the bulk re-audit add their own, tighter limiter on top so
+they leave quota for live claims.
+"""
+import threading
+import time
+
+from app.core.config import settings
+
+
+class _Bucket:
+    def __init__(self, per_minute: float):
+        self.capacity = per_minute
+        self.rate = per_minute / 60.0
+        self.level = per_minute
+        self.updated = time.monotonic()
+
+    def refill(self, now: float) -> None:
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_for(self, amount: float) -> float:
+        """Seconds until `amount` is available (0 if it already is)."""
+        return 0.0 if self.level >= amount else (amount - self.level) / self.rate
+
+
+class RateLimiter:
+    def __init__(self, requests_per_minute: float = 0, tokens_per_minute: float = 0):
+        self._requests = _Bucket(requests_per_minute) if requests_per_minute > 0 else None
+        self._tokens = _Bucket(tokens_per_minute) if tokens_per_minute > 0 else None
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self._requests is not None or self._tokens is not None
+
+    def acquire(self, tokens: int = 0) -> float:
+        """
+        Block until one request using about `tokens` tokens fits the limits.
+
+        Returns:
+            Seconds spent waiting
+        """
+        if not self.enabled:
+            return 0.0
+
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                needs = []
+                if self._requests is not None:
+                    self._requests.refill(now)
+                    needs.append((self._requests, 1))
+                if self._tokens is not None:
+                    self._tokens.refill(now)
+                    # A single request larger than the whole budget waits for a full bucket
+                    needs.append((self._tokens, min(tokens, self._tokens.capacity)))
+
+                delay = max(bucket.wait_for(amount) for bucket, amount in needs)
+                if delay <= 0:
+                    for bucket, amount in needs:
+                        bucket.level -= amount
+                    return waited
+            time.sleep(delay)
+            waited += delay
+
+
+llm_limiter = RateLimiter(settings.llm_requests_per_minute, settings.llm_tokens_per_minute)
@@ -0,0 +1,279 @@
+"""
+Per-claim resource ledger and per-tenant budgets.
+
+While the worker processes a claim it keeps a ledger of what the claim
+used:
+
+- per stage: wall seconds (the claim's timings) and CPU seconds of the
+  worker thread (metrics.time_stage)
+- OCR: pages OCRed, pages served from the OCR cache, pages rasterized, and
+  the CPU seconds of the OCR processes (Poppler and Tesseract included)
+- Groq tokens per model (8B vs 70B), from metrics.track_llm_usage
+- bytes stored: the uploaded document and the extracted data / audit
+  result written to the claim
+
+and prices it: LLM tokens at groq_service.MODEL_PRICING, CPU at
+COST_CPU_HOUR_USD, storage at one month of COST_STORAGE_GB_MONTH_USD. The
+ledger is written to the claim's `resources` column (also for failed
+attempts) and added to the tenant's (uploading user's) row in
+tenant_usage_daily through increment_tenant_usage()
+(migrations/create_tenant_usage.sql).
+
+Budgets: a tenant whose spend today (UTC) has reached its daily budget
+(tenant_budgets.daily_budget_usd, default TENANT_DAILY_BUDGET_USD; 0 or
+unset = no budget) gets the cheap path for its next claims: the
+BUDGET_OCR_PROFILE for scans, rules (regex) extraction and small-model
+audits (model_router). Spend is re-read at most every
+TENANT_BUDGET_CACHE_SECONDS, so a tenant can overshoot by the claims it
+has in flight.
+"""
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Optional, Tuple
+
+from app.core.config import settings
+from app.core.database import supabase
+from app.core.metrics import start_claim_cpu, stop_claim_cpu, track_llm_usage
+from app.services.groq_service import AUDIT_MODEL, EXTRACTION_MODEL, estimate_cost
+
+logger = logging.getLogger(__name__)
+
+USAGE_TABLE = "tenant_usage_daily"
+BUDGET_TABLE = "tenant_budgets"
+
+
+@dataclass(slots=True)
+class ResourceLedger:
+    stage_seconds: Dict[str, float]  # the claim's timings (metrics.start_claim_timings)
+    stage_cpu: Dict[str, float]  # metrics.start_claim_cpu
+    llm: Dict[str, Dict[str, int]]  # model -> prompt/completion tokens (metrics.track_llm_usage)
+    over_budget: bool = False
+    ocr_pages: int = 0
+    ocr_cached_pages: int = 0
+    pages_rasterized: int = 0
+    ocr_cpu_seconds: float = 0.0
+    bytes_stored: Dict[str, int] = field(default_factory=dict)
+
+    def cpu_seconds(self) -> float:
+        # "total" wraps every other stage
+        return sum(cpu for stage, cpu in self.stage_cpu.items() if stage != "total") + self.ocr_cpu_seconds
+
+    def tokens(self, *models: str) -> Dict[str, int]:
+        """Prompt and completion tokens summed over `models` (default: all)."""
+        totals = {"prompt": 0, "completion": 0}
+        for model, tokens in self.llm.items():
+            if not models or model in models:
+                totals["prompt"] += tokens["prompt"]
+                totals["completion"] += tokens["completion"]
+        return totals
+
+    def costs(self) -> Dict[str, float]:
+        costs = {
+            "llm": estimate_cost(self.llm),
+            "compute": self.cpu_seconds() / 3600 * settings.cost_cpu_hour_usd,
+            "storage": sum(self.bytes_stored.values()) / 1e9 * settings.cost_storage_gb_month_usd,
+        }
+        costs["total"] = sum(costs.values())
+        return costs
+
+    def to_dict(self) -> Dict:
+        return {
+            "stages": {
+                stage: {"seconds": seconds, "cpu_seconds": self.stage_cpu.get(stage, 0.0)}
+                for stage, seconds in self.stage_seconds.items()
+            },
+            "cpu_seconds": round(self.cpu_seconds(), 4),
+            "ocr": {
+                "pages": self.ocr_pages,
+                "cached_pages": self.ocr_cached_pages,
+                "pages_rasterized": self.pages_rasterized,
+                "cpu_seconds": round(self.ocr_cpu_seconds, 4),
+            },
+            "llm_tokens": {model: dict(tokens) for model, tokens in self.llm.items()},
+            "bytes_stored": dict(self.bytes_stored),
+            "cost_usd": {kind: round(cost, 6) for kind, cost in self.costs().items()},
+            "over_budget": self.over_budget,
+        }
+
+
+# --- collecting ---
+
+_ledger: ContextVar[Optional[ResourceLedger]] = ContextVar("resource_ledger", default=None)
+
+
+@contextmanager
+def claim_ledger(timings: Dict[str, float], over_budget: bool = False):
+    """
+    Keep a ledger for the claim processed in the enclosed block (this context).
+
+    Args:
+        timings: The claim's stage timings (from metrics.start_claim_timings)
+        over_budget: The tenant was over budget when the claim started
+
+    Yields:
+        The ResourceLedger, filled in as the pipeline runs
+    """
+    cpu = start_claim_cpu()
+    with track_llm_usage() as usage:
+        ledger = ResourceLedger(timings, cpu, usage, over_budget)
+        token = _ledger.set(ledger)
+        try:
+            yield ledger
+        finally:
+            _ledger.reset(token)
+            stop_claim_cpu()
+
+
+def charge_ocr(pages: int, cached_pages: int, rasterized: int, cpu_seconds: float) -> None:
+    """Add OCR work (ocr_pool.ocr_document) to the current claim's ledger, if any."""
+    ledger = _ledger.get()
+    if ledger is not None:
+        ledger.ocr_pages += pages
+        ledger.ocr_cached_pages += cached_pages
+        ledger.pages_rasterized += rasterized
+        ledger.ocr_cpu_seconds += cpu_seconds
+
+
+def charge_storage(kind: str, size: int) -> None:
+    """Record `size` bytes stored for the current claim (replaces an earlier figure for `kind`)."""
+    ledger = _ledger.get()
+    if ledger is not None:
+        ledger.bytes_stored[kind] = size
+
+
+# --- tenant totals and budgets ---
+
+_spend: Dict[str, Tuple[float, str, float, Optional[float]]] = {}  # user -> (checked, day, spent, budget)
+_spend_lock = threading.Lock()
+
+
+def _today() -> str:
+    return datetime.now(timezone.utc).date().isoformat()
+
+
+def record_usage(user_id: Optional[str], ledger: ResourceLedger) -> None:
+    """Add a claim's ledger to its tenant's usage today (best effort, like claim_stats)."""
+    if not user_id:
+        return
+    small, large = ledger.tokens(EXTRACTION_MODEL), ledger.tokens(AUDIT_MODEL)
+    costs = ledger.costs()
+    day = _today()
+    try:
+        supabase.rpc("increment_tenant_usage", {
+            "p_user_id": user_id,
+            "p_day": day,
+            "p_claims": 1,
+            "p_cpu_seconds": round(ledger.cpu_seconds(), 4),
+            "p_ocr_pages": ledger.ocr_pages,
+            "p_pages_rasterized": ledger.pages_rasterized,
+            "p_small_prompt_tokens": small["prompt"],
+            "p_small_completion_tokens": small["completion"],
+            "p_large_prompt_tokens": large["prompt"],
+            "p_large_completion_tokens": large["completion"],
+            "p_bytes_stored": sum(ledger.bytes_stored.values()),
+            "p_llm_cost_usd": round(costs["llm"], 6),
+            "p_cost_usd": round(costs["total"], 6),
+        }).execute()
+    except Exception as e:
+        logger.error(f"Failed to record resource usage for {user_id}: {str(e)}")
+        return
+
+    # Count it towards this process's view of the tenant's spend right away
+    with _spend_lock:
+        cached = _spend.get(user_id)
+        if cached and cached[1] == day:
+            _spend[user_id] = (cached[0], day, cached[2] + costs["total"], cached[3])
+
+
+def _budget(user_id: str) -> Optional[float]:
+    rows = supabase.table(BUDGET_TABLE)\
+        .select("daily_budget_usd")\
+        .eq("user_id", user_id)\
+        .limit(1)\
+        .execute().data or []
+    budget = rows[0].get("daily_budget_usd") if rows else None
+    budget = settings.tenant_daily_budget_usd if budget is None else float(budget)
+    return budget or None
+
+
+def _spent(user_id: str, day: str) -> float:
+    rows = supabase.table(USAGE_TABLE)\
+        .select("cost_usd")\
+        .eq("user_id", user_id)\
+        .eq("day", day)\
+        .execute().data or []
+    return sum(float(row.get("cost_usd") or 0) for row in rows)
+
+
+def tenant_spend(user_id: str) -> Tuple[float, Optional[float]]:
+    """(USD spent today, daily budget or None), at most TENANT_BUDGET_CACHE_SECONDS old."""
+    day = _today()
+    with _spend_lock:
+        cached = _spend.get(user_id)
+    if cached and cached[1] == day and time.monotonic() - cached[0] < settings.tenant_budget_cache_seconds:
+        return cached[2], cached[3]
+
+    spent, budget = _spent(user_id, day), _budget(user_id)
+    with _spend_lock:
+        _spend[user_id] = (time.monotonic(), day, spent, budget)
+    return spent, budget
+
+
+def tenant_over_budget(user_id: Optional[str]) -> bool:
+    """Whether the tenant's claims should take the cheap path; False if unknown or the check fails."""
+    if not user_id:
+        return False
+    try:
+        spent, budget = tenant_spend(user_id)
+    except Exception as e:
+        logger.error(f"Budget check failed for {user_id}, not enforcing it: {str(e)}")
+        return False
+    if budget is not None and spent >= budget:
+        logger.info(f"Tenant {user_id} is over budget ({spent:.4f} of {budget:.4f} USD today); using the cheap path")
+        return True
+    return False
+
+
+def set_tenant_budget(user_id: str, daily_budget_usd: Optional[float]) -> None:
+    """Set a tenant's daily budget (None: back to TENANT_DAILY_BUDGET_USD; 0: no budget)."""
+    supabase.table(BUDGET_TABLE).upsert(
+        {"user_id": user_id, "daily_budget_usd": daily_budget_usd}, on_conflict="user_id"
+    ).execute()
+    with _spend_lock:
+        _spend.pop(user_id, None)
+
+
+def get_tenant_usage(user_id: str, days: int = 30) -> Dict:
+    """A tenant's daily usage rows for the last `days` days (newest first), today's spend and budget."""
+    since = (datetime.now(timezone.utc).date() - timedelta(days=max(1, days) - 1)).isoformat()
+    rows = supabase.table(USAGE_TABLE)\
+        .select("*")\
+        .eq("user_id", user_id)\
+        .gte("day", since)\
+        .order("day", desc=True)\
+        .execute().data or []
+    spent, budget = tenant_spend(user_id)
+    return {
+        "user_id": user_id,
+        "spent_today_usd": round(spent, 4),
+        "daily_budget_usd": budget,
+        "over_budget": budget is not None and spent >= budget,
+        "daily": rows,
+    }
+
+
+def list_tenant_usage(day: Optional[str] = None, limit: int = 100) -> Dict:
+    """Every tenant's usage on `day` (default today), most expensive first."""
+    day = day or _today()
+    rows = supabase.table(USAGE_TABLE)\
+        .select("*")\
+        .eq("day", day)\
+        .order("cost_usd", desc=True)\
+        .limit(limit)\
+        .execute().data or []
+    return {"day": day, "tenants": rows}
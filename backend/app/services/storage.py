@@ -23,4 +23,9 @@ def upload_claim_file(file_content: bytes, original_filename: str, user_id: str)
         "file_path": unique_filename,
         "file_url": file_url,
         "original_name": original_filename
-    }
\ No newline at end of file
+    }
+
+
+def delete_claim_file(file_path: str) -> None:
+    """Delete a claim PDF from Supabase Storage"""
+    supabase.storage.from_("claim-documents").remove([file_path])
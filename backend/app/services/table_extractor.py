@@ -0,0 +1,273 @@
+"""
+Layout-aware line-item extraction for itemised hospital bills.
+
+Works on positioned words rather than flattened text: pdfplumber's
+extract_words() for digital PDFs and Tesseract's word boxes
+(image_to_data) for scans. Words are grouped into rows by their vertical
+position; the table header ("Description ... Qty  Rate  Amount") fixes the
+column positions, and each row's numbers are assigned to the nearest
+column. The columns carry over to continuation pages without a header.
+
+Each row becomes {"description", "quantity", "rate", "amount"}, checked
+against quantity x rate and the bill's stated total, so callers can tell
+whether the table is trustworthy enough to skip LLM extraction.
+"""
+import logging
+import re
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+DESCRIPTION_HEADERS = {"description", "particulars", "item", "items", "service", "services", "details"}
+QUANTITY_HEADERS = {"qty", "qty.", "quantity", "units", "nos", "nos."}
+RATE_HEADERS = {"rate", "price", "mrp", "unit price", "rate/unit"}
+AMOUNT_HEADERS = {"amount", "amt", "amt.", "net", "value"}
+TOTAL_WORDS = {"total", "grand", "payable"}
+TOTAL_PHRASES = ("grand total", "total amount", "net payable", "amount payable", "total payable",
+                 "net amount", "bill amount")
+SUBTOTAL_WORDS = {"subtotal", "sub-total"}
+CURRENCY_TOKENS = {"₹", "rs", "rs.", "inr", "rs/-"}
+
+NUMBER_PATTERN = re.compile(r"^(?:₹|Rs\.?|INR)?\(?(-?\d[\d,]*(?:\.\d+)?)\)?(?:/-)?$", re.IGNORECASE)
+
+
+def words_from_tesseract(data: Dict) -> List[Dict]:
+    """Convert pytesseract.image_to_data(output_type=DICT) into word boxes."""
+    words = []
+    for i, text in enumerate(data.get("text", [])):
+        if not text or not text.strip():
+            continue
+        left, top = data["left"][i], data["top"][i]
+        words.append({
+            "text": text.strip(),
+            "x0": float(left),
+            "x1": float(left + data["width"][i]),
+            "top": float(top),
+            "bottom": float(top + data["height"][i]),
+            "conf": float(data["conf"][i]) if "conf" in data else -1.0,
+        })
+    return words
+
+
+def parse_number(token: str) -> Optional[float]:
+    """'₹1,23,456.00', 'Rs.500', '(250.00)' → float; None if not a number."""
+    match = NUMBER_PATTERN.match(token.strip())
+    if not match:
+        return None
+    try:
+        return float(match.group(1).replace(",", ""))
+    except ValueError:
+        return None
+
+
+def group_rows(words: List[Dict]) -> List[List[Dict]]:
+    """Group words into rows by vertical position, each row sorted left to right."""
+    if not words:
+        return []
+    heights = sorted(w["bottom"] - w["top"] for w in words)
+    tolerance = max(heights[len(heights) // 2] * 0.5, 1.0)
+
+    rows: List[List[Dict]] = []
+    row_top = None
+    for word in sorted(words, key=lambda w: (w["top"], w["x0"])):
+        if row_top is None or word["top"] - row_top > tolerance:
+            rows.append([])
+            row_top = word["top"]
+        rows[-1].append(word)
+    return [sorted(row, key=lambda w: w["x0"]) for row in rows]
+
+
+def _center(word: Dict) -> float:
+    return (word["x0"] + word["x1"]) / 2
+
+
+def _find_columns(row: List[Dict]) -> Optional[Dict[str, Dict]]:
+    """Column boxes from a header row, or None if the row isn't a header."""
+    columns: Dict[str, Dict] = {}
+    for word in row:
+        text = word["text"].lower().strip(":")
+        for name, headers in (("description", DESCRIPTION_HEADERS), ("quantity", QUANTITY_HEADERS),
+                              ("rate", RATE_HEADERS), ("amount", AMOUNT_HEADERS)):
+            if text in headers and name not in columns:
+                columns[name] = word
+    if "description" in columns and "amount" in columns:
+        return columns
+    return None
+
+
+def _nearest_column(word: Dict, columns: Dict[str, Dict]) -> str:
+    """Numeric column a number belongs to; handles left-, right- and centre-aligned columns."""
+    def distance(column: Dict) -> float:
+        return min(abs(word["x0"] - column["x0"]), abs(word["x1"] - column["x1"]),
+                   abs(_center(word) - _center(column)))
+
+    numeric = {name: box for name, box in columns.items() if name != "description"}
+    return min(numeric, key=lambda name: distance(numeric[name]))
+
+
+def _parse_row(row: List[Dict], columns: Optional[Dict[str, Dict]]) -> Optional[Dict]:
+    """One table row → line item, or None if the row has no amount."""
+    description_words: List[str] = []
+    numbers: List[tuple] = []  # (word, value) after the description starts
+    has_currency = False
+
+    for word in row:
+        if word["text"].lower() in CURRENCY_TOKENS:
+            has_currency = True
+            continue
+        value = parse_number(word["text"])
+        if value is not None and description_words:
+            numbers.append((word, value))
+        elif value is not None:
+            continue  # leading serial number
+        else:
+            if numbers:
+                # Text after the numbers (e.g. "48 Years"): not an amount row
+                return None
+            description_words.append(word["text"])
+
+    if not description_words or not numbers:
+        return None
+    if columns is None:
+        # Without a header only rows that look like money count ("Rs. 500", "1,200.00")
+        last = numbers[-1][0]["text"]
+        if not (has_currency or "." in last or "," in last or re.match(r"^(?:₹|Rs|INR)", last, re.IGNORECASE)):
+            return None
+
+    item = {"description": " ".join(description_words), "quantity": None, "rate": None, "amount": None}
+    if columns and len(columns) > 2:
+        for word, value in numbers:
+            item[_nearest_column(word, columns)] = value
+    else:
+        # No usable header: the rightmost numbers are amount, rate, quantity
+        values = [value for _, value in numbers]
+        item["amount"] = values[-1]
+        if len(values) >= 3:
+            item["quantity"], item["rate"] = values[-3], values[-2]
+        elif len(values) == 2:
+            item["rate"] = values[-2]
+
+    if not item["amount"]:
+        return None
+    return item
+
+
+def _total_kind(row: List[Dict], columns: Optional[Dict[str, Dict]]) -> Optional[str]:
+    """
+    "total" if a row is the bill's total, "subtotal" for a section's, None for anything else.
+
+    "Grand Total", "Net Payable" etc. always are totals; a row starting with
+    a total word only if it has no quantity or rate, so items such as
+    "Total Knee Replacement 1 1,50,000.00 1,50,000.00" stay line items.
+    """
+    words = [word["text"].lower().strip(":") for word in row
+             if parse_number(word["text"]) is None and word["text"].lower() not in CURRENCY_TOKENS]
+    if not words:
+        return None
+    if words[0] in SUBTOTAL_WORDS or words[:2] == ["sub", "total"]:
+        return "subtotal"
+    if any(phrase in " ".join(words) for phrase in TOTAL_PHRASES):
+        return "total"
+    if words[0] not in TOTAL_WORDS:
+        return None
+    item = _parse_row(row, columns)
+    return "total" if item is None or (item["quantity"] is None and item["rate"] is None) else None
+
+
+def _is_consistent(item: Dict) -> Optional[bool]:
+    """quantity x rate == amount (within rounding), or None if it can't be checked."""
+    if item["quantity"] is None or item["rate"] is None:
+        return None
+    return abs(item["quantity"] * item["rate"] - item["amount"]) <= max(1.0, item["amount"] * 0.005)
+
+
+def table_confidence(table: Dict) -> str:
+    """
+    How far a table can be trusted: "high", "medium", "low" or "none".
+
+    Takes extract_line_items()'s result (or the summary the worker stores
+    plus its rows). "high" needs something actually verified: every checked
+    row's qty x rate and the stated total, with at least one of them present.
+    Rows that don't add up to the stated total are "low": the table missed
+    or misread rows, and extract_with_regex only uses high and medium tables.
+    """
+    items = table.get("line_items") or []
+    stated_total = table.get("stated_total")
+    checked, consistent = table.get("checked_rows") or 0, table.get("consistent_rows") or 0
+    if not items:
+        return "none"
+    if stated_total is not None and \
+            abs(sum(item.get("amount") or 0 for item in items) - stated_total) > max(1.0, stated_total * 0.01):
+        return "low"
+    if table.get("header_found") and consistent == checked and (consistent or stated_total is not None):
+        return "high"
+    if not checked or consistent / checked >= 0.8:
+        return "medium"
+    return "low"
+
+
+def extract_line_items(pages: List[List[Dict]]) -> Dict:
+    """
+    Extract the itemised table from a document's pages of word boxes.
+
+    Args:
+        pages: one list of words per page; each word has text, x0, x1, top, bottom
+
+    Returns:
+        dict with line_items, header_found, stated_total, checked_rows,
+        consistent_rows and confidence ("high", "medium", "low" or "none")
+    """
+    columns: Optional[Dict[str, Dict]] = None
+    in_table = False
+    items: List[Dict] = []
+    open_item: Optional[Dict] = None  # the row a text-only row would continue
+    stated_total: Optional[float] = None
+
+    for words in pages:
+        for row in group_rows(words):
+            header = _find_columns(row)
+            if header:
+                if columns is None:
+                    items.clear()  # money-looking rows above the first header aren't line items
+                columns, in_table = header, True
+                continue
+
+            kind = _total_kind(row, columns)
+            if kind == "subtotal":
+                # A section ends; the table goes on (the next row may be a section heading)
+                open_item = None
+                continue
+            if kind == "total":
+                amounts = [parse_number(word["text"]) for word in row]
+                amounts = [value for value in amounts if value is not None]
+                if amounts and (in_table or items):
+                    stated_total = amounts[-1]
+                    in_table = False
+                open_item = None
+                continue
+
+            if columns is not None and not in_table:
+                continue  # text between the end of the table and the next header
+
+            item = _parse_row(row, columns)
+            if item is not None:
+                items.append(item)
+                open_item = item
+            elif open_item is not None and in_table and columns is not None:
+                # A text-only row inside the table continues the previous description
+                description_x0 = columns["description"]["x0"]
+                if all(parse_number(w["text"]) is None for w in row) and row[0]["x0"] >= description_x0 - 5:
+                    open_item["description"] += " " + " ".join(w["text"] for w in row)
+
+    checks = [check for check in (_is_consistent(item) for item in items) if check is not None]
+    table = {
+        "line_items": items,
+        "header_found": columns is not None,
+        "stated_total": stated_total,
+        "checked_rows": len(checks),
+        "consistent_rows": sum(checks),
+    }
+    table["confidence"] = table_confidence(table)
+
+    logger.info(f"Table extraction: {len(items)} rows, {sum(checks)}/{len(checks)} consistent, confidence={table['confidence']}")
+    return table
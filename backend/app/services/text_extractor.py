@@ -1,18 +1,233 @@
-import pdfplumber
 import io
 import logging
-from typing import Dict, Optional
+from typing import Dict, List, Optional, Tuple
 
-# Import OCR config to set Tesseract path
-try:
-    from app.core import ocr_config
-except ImportError:
-    pass  # Config is optional if Tesseract is in PATH
+from app.core.metrics import time_stage, EXTRACTION_FALLBACKS
 
 logger = logging.getLogger(__name__)
 
+# OCR profiles: render resolution, page preprocessing and Tesseract settings.
+#   psm 3 = automatic page segmentation (Tesseract default)
+#   psm 4 = single column of text of variable sizes (receipts, bills)
+#   psm 6 = single uniform block of text (dense itemised tables)
+#   oem 1 = LSTM engine only, oem 3 = whatever the traineddata supports
+# "legacy" reproduces the old behaviour (200 DPI colour render, defaults).
+OCR_PROFILES = {
+    "legacy": {"dpi": 200, "grayscale": False, "denoise": False, "binarize": False, "deskew": False,
+               "psm": 3, "oem": 3, "lang": "eng"},
+    "fast": {"dpi": 150, "grayscale": True, "denoise": False, "binarize": True, "deskew": False,
+             "psm": 6, "oem": 1, "lang": "eng"},
+    "balanced": {"dpi": 200, "grayscale": True, "denoise": True, "binarize": True, "deskew": True,
+                 "psm": 6, "oem": 1, "lang": "eng"},
+    "multilingual": {"dpi": 300, "grayscale": True, "denoise": True, "binarize": True, "deskew": True,
+                     "psm": 4, "oem": 1, "lang": "eng+hin"},
+}
 
-def extract_text_from_pdf(pdf_bytes: bytes) -> Dict[str, any]:
+MAX_DESKEW_DEGREES = 5.0
+BLANK_DARK_RATIO = 0.002  # pages with fewer dark pixels than this are skipped
+MAX_PAGE_PIXELS = 4000 * 4000  # cap for oversized pages, whatever their DPI
+
+
+def get_ocr_profile(name: Optional[str] = None) -> Dict:
+    """Settings for an OCR profile (default: OCR_PROFILE setting)."""
+    from app.core.config import settings
+
+    name = name or settings.ocr_profile
+    if name not in OCR_PROFILES:
+        logger.warning(f"Unknown OCR profile '{name}', using 'balanced'")
+        name = "balanced"
+    return {"name": name, **OCR_PROFILES[name]}
+
+
+def otsu_threshold(gray) -> int:
+    """Global threshold that best separates ink from paper (Otsu's method)."""
+    histogram = gray.histogram()[:256]
+    total = sum(histogram)
+    sum_all = sum(i * count for i, count in enumerate(histogram))
+
+    best_threshold, best_variance = 127, 0.0
+    weight_bg, sum_bg = 0, 0.0
+    for threshold, count in enumerate(histogram):
+        weight_bg += count
+        if weight_bg == 0:
+            continue
+        weight_fg = total - weight_bg
+        if weight_fg == 0:
+            break
+        sum_bg += threshold * count
+        mean_bg = sum_bg / weight_bg
+        mean_fg = (sum_all - sum_bg) / weight_fg
+        variance = weight_bg * weight_fg * (mean_bg - mean_fg) ** 2
+        if variance > best_variance:
+            best_threshold, best_variance = threshold, variance
+    return best_threshold
+
+
+def binarize(gray, threshold: Optional[int] = None):
+    """Black text on white background (mode "L", values 0/255)."""
+    threshold = otsu_threshold(gray) if threshold is None else threshold
+    return gray.point([0 if value <= threshold else 255 for value in range(256)])
+
+
+def is_blank_page(gray) -> bool:
+    """True if a page has (almost) no ink: too few dark pixels to hold text."""
+    histogram = gray.histogram()[:256]
+    dark = sum(histogram[:128])
+    return dark / max(sum(histogram), 1) < BLANK_DARK_RATIO
+
+
+def _row_profile_score(binary, angle: float) -> float:
+    """How sharply text rows line up after rotating by `angle` degrees."""
+    from PIL import Image
+
+    rotated = binary.rotate(angle, fillcolor=255)
+    # Mean of each row, i.e. the horizontal projection profile
+    rows = list(rotated.resize((1, rotated.height), resample=Image.Resampling.BOX).getdata())
+    mean = sum(rows) / len(rows)
+    return sum((value - mean) ** 2 for value in rows)
+
+
+def estimate_skew(binary) -> float:
+    """
+    Skew angle in degrees (projection-profile method).
+
+    Text rows give the sharpest row profile when they are horizontal; the
+    search runs coarse then fine on a downscaled copy.
+    """
+    small = binary.copy()
+    small.thumbnail((800, 800))
+
+    def best_of(angles):
+        return max(angles, key=lambda angle: _row_profile_score(small, angle))
+
+    steps = int(MAX_DESKEW_DEGREES)
+    coarse = best_of([float(a) for a in range(-steps, steps + 1)])
+    return best_of([coarse + delta / 10 for delta in range(-9, 10)])
+
+
+def preprocess_page(image, profile: Dict) -> Tuple[Optional[object], Dict]:
+    """
+    Prepare a rendered page for Tesseract.
+
+    Grayscale → (median denoise) → Otsu binarization → deskew. Blank pages
+    are detected before binarization and skip OCR entirely.
+
+    Returns:
+        (image or None if the page is blank, dict of what was done)
+    """
+    info = {"blank": False, "skew_degrees": 0.0}
+
+    if image.width * image.height > MAX_PAGE_PIXELS:
+        scale = (MAX_PAGE_PIXELS / (image.width * image.height)) ** 0.5
+        image = image.resize((int(image.width * scale), int(image.height * scale)))
+
+    if not profile.get("grayscale"):
+        return image, info
+
+    gray = image.convert("L")
+    if profile.get("denoise"):
+        from PIL import ImageFilter
+        gray = gray.filter(ImageFilter.MedianFilter(3))
+
+    if is_blank_page(gray):
+        info["blank"] = True
+        return None, info
+
+    page = binarize(gray) if profile.get("binarize") else gray
+
+    if profile.get("deskew"):
+        angle = estimate_skew(page if profile.get("binarize") else binarize(gray))
+        if abs(angle) >= 0.1:
+            page = page.rotate(angle, fillcolor=255, expand=True)
+        info["skew_degrees"] = angle
+
+    return page, info
+
+
+_available_languages: Optional[set] = None
+
+
+def tesseract_config(profile: Dict) -> Tuple[str, str]:
+    """
+    (lang, config) for pytesseract, dropping languages whose traineddata
+    isn't installed rather than failing the page.
+    """
+    global _available_languages
+    import pytesseract
+
+    if _available_languages is None:
+        try:
+            _available_languages = set(pytesseract.get_languages(config=""))
+        except Exception:
+            _available_languages = set()
+
+    requested = profile["lang"].split("+")
+    langs = [lang for lang in requested if not _available_languages or lang in _available_languages]
+    if len(langs) < len(requested):
+        logger.warning(f"Tesseract languages missing: {sorted(set(requested) - set(langs))}")
+    return "+".join(langs) or "eng", f"--psm {profile['psm']} --oem {profile['oem']}"
+
+
+def text_from_tesseract(data: Dict) -> str:
+    """Rebuild page text from image_to_data output: words joined per line, blank line between blocks."""
+    lines: Dict[tuple, list] = {}
+    for i, word in enumerate(data["text"]):
+        if word and word.strip():
+            key = (data["block_num"][i], data["par_num"][i], data["line_num"][i])
+            lines.setdefault(key, []).append(word.strip())
+
+    out, previous_block = [], None
+    for (block, _, _), words in lines.items():
+        if previous_block is not None and block != previous_block:
+            out.append("")
+        out.append(" ".join(words))
+        previous_block = block
+    return "\n".join(out)
+
+
+def run_tesseract(page, profile: Dict) -> Tuple[str, list]:
+    """
+    OCR a preprocessed page.
+
+    Returns:
+        (text, word boxes); one Tesseract pass gives both, the words feed
+        table extraction
+    """
+    import pytesseract
+    from app.services.table_extractor import words_from_tesseract
+
+    lang, config = tesseract_config(profile)
+    data = pytesseract.image_to_data(page, lang=lang, config=config, output_type=pytesseract.Output.DICT)
+    return text_from_tesseract(data), words_from_tesseract(data)
+
+
+def encode_page_image(page, info: Dict) -> bytes:
+    """Preprocessed (binarized) page as a 1-bit PNG, with its skew in a text chunk."""
+    from PIL.PngImagePlugin import PngInfo
+
+    meta = PngInfo()
+    meta.add_text("skew_degrees", str(info.get("skew_degrees", 0.0)))
+    buf = io.BytesIO()
+    page.convert("1").save(buf, format="PNG", pnginfo=meta, optimize=True)
+    return buf.getvalue()
+
+
+def decode_page_image(png: bytes) -> Tuple[object, Dict]:
+    """Inverse of encode_page_image()."""
+    from PIL import Image
+
+    image = Image.open(io.BytesIO(png))
+    skew = float(image.info.get("skew_degrees", 0.0))
+    return image.convert("L"), {"blank": False, "skew_degrees": skew}
+
+
+def ocr_confidence(pages: List[Dict]) -> Optional[float]:
+    """Mean Tesseract word confidence over all pages, 0-1 (None if not recorded)."""
+    confidences = [word["conf"] for page in pages for word in page.get("words", []) if word.get("conf", -1) >= 0]
+    return round(sum(confidences) / len(confidences) / 100, 3) if confidences else None
+
+
+def extract_text_from_pdf(pdf_bytes: bytes, ocr_profile: Optional[str] = None) -> Dict[str, any]:
     """
     Extract text from a PDF document with OCR fallback.
     
@@ -20,30 +235,43 @@ def extract_text_from_pdf(pdf_bytes: bytes) -> Dict[str, any]:
     1. Try pdfplumber (fast, for text-based PDFs)
     2. If empty → try Tesseract OCR (for scanned/image PDFs)
     
+    Either way the itemised table is also extracted from word positions
+    (see table_extractor) and returned under "table".
+    
     Args:
         pdf_bytes: PDF file content as bytes
+        ocr_profile: OCR profile name (default: OCR_PROFILE setting)
         
     Returns:
         Dict with extracted text and metadata
     """
+    from app.services.table_extractor import extract_line_items
+    
     # First attempt: pdfplumber (text-based PDFs)
     try:
-        with pdfplumber.open(io.BytesIO(pdf_bytes)) as pdf:
+        import pdfplumber
+        
+        with time_stage("pdfplumber"), pdfplumber.open(io.BytesIO(pdf_bytes)) as pdf:
             full_text = []
+            page_words = []
             for page in pdf.pages:
                 text = page.extract_text()
                 if text:
                     full_text.append(text)
+                    page_words.append(page.extract_words())
             
             raw_text = "\n\n".join(full_text)
             
             # If we got text, return immediately
             if raw_text.strip():
                 logger.info(f"Extracted {len(raw_text)} characters using pdfplumber")
+                with time_stage("table_extraction"):
+                    table = extract_line_items(page_words)
                 return {
                     "raw_text": raw_text,
                     "page_count": len(pdf.pages),
                     "extraction_method": "pdfplumber",
+                    "table": table,
                     "success": True
                 }
             
@@ -55,39 +283,37 @@ def extract_text_from_pdf(pdf_bytes: bytes) -> Dict[str, any]:
         logger.warning(f"pdfplumber failed: {str(e)}, trying OCR fallback...")
         page_count = 0
     
+    EXTRACTION_FALLBACKS.labels(from_method="pdfplumber", to_method="tesseract_ocr").inc()
+    
     # Second attempt: Tesseract OCR (image-based PDFs)
     try:
-        from pdf2image import convert_from_bytes
-        import pytesseract
-        
-        logger.info("Converting PDF to images for OCR...")
+        from app.services.ocr_pool import ocr_document
         
-        # Convert PDF pages to images
-        images = convert_from_bytes(pdf_bytes)
+        logger.info("Rasterizing and OCRing PDF pages...")
         
-        # Run OCR on each page
-        ocr_text = []
-        for i, image in enumerate(images):
-            logger.info(f"Running OCR on page {i + 1}/{len(images)}")
-            text = pytesseract.image_to_string(image)
-            if text.strip():
-                ocr_text.append(text)
+        # Pages are rasterized, preprocessed and OCRed in parallel on the OCR pool
+        pages = ocr_document(pdf_bytes, page_count, profile=get_ocr_profile(ocr_profile))
+        ocr_text = [page["text"] for page in pages if page["text"].strip()]
         
         raw_text = "\n\n".join(ocr_text)
         
         if raw_text.strip():
             logger.info(f"Extracted {len(raw_text)} characters using Tesseract OCR")
+            with time_stage("table_extraction"):
+                table = extract_line_items([page.get("words", []) for page in pages])
             return {
                 "raw_text": raw_text,
-                "page_count": len(images),
+                "page_count": len(pages),
                 "extraction_method": "tesseract_ocr",
+                "ocr_confidence": ocr_confidence(pages),
+                "table": table,
                 "success": True
             }
         else:
             # Even OCR couldn't extract text
             return {
                 "raw_text": "",
-                "page_count": len(images) if images else page_count,
+                "page_count": len(pages) if pages else page_count,
                 "extraction_method": "ocr_failed",
                 "success": False,
                 "error": "No text could be extracted with pdfplumber or OCR"
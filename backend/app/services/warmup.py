@@ -0,0 +1,97 @@
+"""
+Startup warm-up.
+
+Clients are built lazily, so without this the first request or claim pays
+for importing supabase-py/Groq, opening HTTP connections and starting the
+OCR workers. warm_up() does all of that up front; the readiness probe
+reports not-ready until it has finished.
+"""
+import logging
+import time
+from datetime import datetime
+from typing import Callable, Dict
+
+logger = logging.getLogger(__name__)
+
+_state: Dict = {
+    "ready": False,
+    "started_at": None,
+    "completed_at": None,
+    "steps": {},
+}
+
+
+def _warm_database():
+    from app.core.database import get_db
+    # A real query opens the HTTP/2 connection pool (or the SQLite file)
+    get_db().table("claims").select("id").limit(1).execute()
+
+
+def _warm_storage():
+    from app.core.database import get_db
+    get_db().storage.from_("claim-documents")
+
+
+def _warm_llm():
+    from app.services.groq_service import get_groq_client
+    get_groq_client().models.list()
+
+
+def _warm_ocr():
+    from app.services.ocr_pool import warm_ocr_pool
+    warm_ocr_pool()
+
+
+def _warm_parsers():
+    import pdfplumber  # noqa: F401  (import cost paid here, not on the first upload)
+
+
+WARMUP_STEPS: Dict[str, Callable[[], None]] = {
+    "parsers": _warm_parsers,
+    "database": _warm_database,
+    "storage": _warm_storage,
+    "llm": _warm_llm,
+    "ocr_pool": _warm_ocr,
+}
+
+
+def warm_up() -> Dict:
+    """
+    Run every warm-up step, recording duration and errors per step.
+
+    A failing step (e.g. Groq unreachable) is logged and recorded but does
+    not stop the others; the clients will retry on first real use.
+
+    Returns:
+        Warm-up state (see warmup_status)
+    """
+    _state["started_at"] = datetime.utcnow().isoformat()
+    for name, step in WARMUP_STEPS.items():
+        start = time.perf_counter()
+        try:
+            step()
+            _state["steps"][name] = {"ok": True, "seconds": round(time.perf_counter() - start, 3)}
+        except Exception as e:
+            logger.warning(f"Warm-up step '{name}' failed: {str(e)}")
+            _state["steps"][name] = {
+                "ok": False,
+                "seconds": round(time.perf_counter() - start, 3),
+                "error": str(e),
+            }
+    _state["completed_at"] = datetime.utcnow().isoformat()
+    _state["ready"] = True
+    logger.info(f"Warm-up complete: {_state['steps']}")
+    return warmup_status()
+
+
+def mark_ready() -> None:
+    """Skip warm-up (WARMUP_ON_STARTUP=false) and report ready immediately."""
+    _state["ready"] = True
+
+
+def is_warm() -> bool:
+    return _state["ready"]
+
+
+def warmup_status() -> Dict:
+    return {**_state, "steps": dict(_state["steps"])}
@@ -0,0 +1,173 @@
+"""
+Duplicate detection benchmark.
+
+Indexes a growing corpus of synthetic bills in the local backend
+(app.services.duplicate_index, the same code the worker runs) and probes it
+with three kinds of planted duplicates:
+
+- exact:  the same bill uploaded again by another user
+- items:  the same itemised charges with a new patient and new dates
+- edited: the same document with a few words changed (age, policy number,
+          one line item), as from a re-scan or a doctored copy
+
+plus fresh, unrelated bills that must not match anything. Synthetic bills
+share their template text (headers, item names), so the unrelated ones are
+a fair test of the similarity threshold.
+
+The report has recall per duplicate kind, false positives, and lookup
+latency at each corpus size; latency should stay roughly flat as the corpus
+grows, since a lookup only touches claims that share a key.
+
+Usage (from backend/):
+    python -m benchmarks.bench_duplicates --sizes 1000,4000,16000 --probes 50
+"""
+import argparse
+import json
+import os
+import random
+import re
+import shutil
+import statistics
+import tempfile
+import time
+import uuid
+from typing import Dict, List, Tuple
+
+from benchmarks.corpus import CURRENCY_DIGITAL, generate_bill_lines
+
+ITEM_LINE = re.compile(r"^\d+\s+(.+?)\s{2,}\d+\s+[\d,.]+\s+\S+\s+([\d,.]+)$")
+
+
+def _bill(rng: random.Random) -> Tuple[List[str], Dict]:
+    """Bill text lines and the structured data extraction would produce."""
+    lines, expected = generate_bill_lines(rng, rng.randint(1, 3), CURRENCY_DIGITAL)
+    return lines, _structure(lines, expected)
+
+
+def _structure(lines: List[str], expected: Dict) -> Dict:
+    items = []
+    admission = None
+    for line in lines:
+        match = ITEM_LINE.match(line)
+        if match:
+            items.append({"description": match.group(1).strip(), "amount": match.group(2).replace(",", "")})
+        elif line.startswith("Date of Admission:"):
+            admission = line.split(":", 1)[1].strip()
+    return {
+        "hospital_name": expected["hospital_name"],
+        "patient_name": expected["patient_name"],
+        "total_claimed": expected["total_claimed"],
+        "admission_date": admission,
+        "claim_items": items,
+    }
+
+
+def _replace_prefixed(lines: List[str], prefix: str, value: str) -> List[str]:
+    return [f"{prefix} {value}" if line.startswith(prefix) else line for line in lines]
+
+
+def _plant(kind: str, lines: List[str], structured: Dict, rng: random.Random) -> Tuple[str, Dict]:
+    """A duplicate of one indexed bill: (raw_text, structured_data)."""
+    if kind == "exact":
+        return "\n".join(lines), dict(structured)
+
+    if kind == "items":
+        patient = f"Patient {rng.randint(1000, 9999)}"
+        admitted = f"2026-{rng.randint(1, 12):02d}-{rng.randint(1, 20):02d}"
+        lines = _replace_prefixed(lines, "Patient Name:", patient)
+        lines = _replace_prefixed(lines, "Date of Admission:", admitted)
+        return "\n".join(lines), {**structured, "patient_name": patient, "admission_date": admitted}
+
+    # edited: a handful of tokens change, the bill's facts mostly don't
+    lines = _replace_prefixed(lines, "Age:", f"{rng.randint(18, 85)} Years")
+    lines = _replace_prefixed(lines, "Policy Number:", f"POL{rng.randint(10**7, 10**8 - 1)}")
+    items = [i for i, line in enumerate(lines) if ITEM_LINE.match(line)]
+    target = rng.choice(items)
+    lines[target] = re.sub(r"[\d,]+\.\d\d$", "99,999.00", lines[target])
+    total = float(structured["total_claimed"]) + rng.randint(1, 500)
+    return "\n".join(lines), {**structured, "total_claimed": total, "claim_items": []}
+
+
+def run(sizes: List[int], probes: int, seed: int) -> Dict:
+    from app.core.config import settings
+    from app.models import StructuredClaim
+    from app.services import duplicate_index
+
+    rng = random.Random(seed)
+    users = [str(uuid.uuid4()) for _ in range(50)]
+    indexed: List[Tuple[List[str], Dict]] = []
+    report = {"threshold": settings.duplicate_similarity_threshold, "sizes": []}
+
+    for size in sizes:
+        started = time.perf_counter()
+        while len(indexed) < size:
+            lines, structured = _bill(rng)
+            duplicate_index.index_claim(str(uuid.uuid4()), rng.choice(users), "\n".join(lines),
+                                        StructuredClaim.from_dict(structured))
+            indexed.append((lines, structured))
+        index_seconds = time.perf_counter() - started
+
+        found = {"exact": 0, "items": 0, "edited": 0}
+        false_positives = 0
+        latencies = []
+        for _ in range(probes):
+            for kind in (*found, "unrelated"):
+                if kind == "unrelated":
+                    lines, structured = _bill(rng)
+                    raw_text = "\n".join(lines)
+                else:
+                    raw_text, structured = _plant(kind, *rng.choice(indexed), rng)
+
+                claim_id = str(uuid.uuid4())
+                started = time.perf_counter()
+                findings = duplicate_index.check_duplicates(claim_id, rng.choice(users), raw_text,
+                                                            StructuredClaim.from_dict(structured))
+                latencies.append(time.perf_counter() - started)
+                # Keep the corpus at `size`: probes aren't part of it
+                duplicate_index.supabase.table(duplicate_index.TABLE).delete().eq("claim_id", claim_id).execute()
+
+                if kind == "unrelated":
+                    false_positives += bool(findings)
+                else:
+                    found[kind] += bool(findings)
+
+        latencies.sort()
+        report["sizes"].append({
+            "claims": size,
+            "index_claims_per_second": round((size - (report["sizes"][-1]["claims"] if report["sizes"] else 0))
+                                             / index_seconds, 1) if index_seconds else None,
+            "recall": {kind: round(count / probes, 3) for kind, count in found.items()},
+            "false_positive_rate": round(false_positives / probes, 3),
+            "lookup_ms": {
+                "p50": round(1000 * statistics.median(latencies), 2),
+                "p95": round(1000 * latencies[int(0.95 * (len(latencies) - 1))], 2),
+            },
+        })
+        print(json.dumps(report["sizes"][-1]))
+    return report
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="1000,4000,16000", help="Comma-separated corpus sizes")
+    parser.add_argument("--probes", type=int, default=50, help="Probes per duplicate kind and size")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="Write the JSON report here")
+    args = parser.parse_args()
+
+    data_dir = tempfile.mkdtemp(prefix="bench-duplicates-")
+    os.environ.update({"DATA_BACKEND": "local", "LOCAL_DATA_DIR": data_dir})
+    try:
+        report = run(sorted(int(s) for s in args.sizes.split(",")), args.probes, args.seed)
+    finally:
+        shutil.rmtree(data_dir, ignore_errors=True)
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+    print(output)
+
+
+if __name__ == "__main__":
+    main()
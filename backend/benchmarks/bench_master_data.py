@@ -0,0 +1,135 @@
+"""
+Master data matching benchmark.
+
+Builds the hospital and tariff trigram indexes (app.services.master_data)
+in memory from synthetic master data, then resolves noisy variants of the
+names as they come out of OCR/extraction: upper-cased, suffixed ("PVT
+LTD"), with a character dropped or swapped, with words missing. Reports
+build time, accuracy (resolved to the right row), wrong matches, and
+microseconds per lookup, uncached and cached.
+
+Usage (from backend/):
+    python -m benchmarks.bench_master_data --hospitals 1000,10000,50000
+"""
+import argparse
+import json
+import random
+import statistics
+import time
+from typing import Dict, List, Tuple
+
+from benchmarks.corpus import HOSPITALS, LINE_ITEMS
+
+PREFIXES = ["", "", "", "Sri ", "Dr. ", "New ", "St. ", "Shree "]
+SYLLABLES = ["ka", "ve", "ri", "na", "ra", "ya", "ma", "ni", "pa", "la", "san", "jee", "van", "shan", "ti", "go",
+             "vin", "da", "kri", "shna", "lak", "shmi", "ven", "kat", "esh", "war", "an", "sai", "mu", "ru", "gan",
+             "bha", "gya", "dev", "pra", "kash", "su", "dha", "mo", "han"]
+MIDDLES = ["Care", "Speciality", "Multispeciality", "Memorial", "General", "Children's", "Heart", "Eye",
+           "Ortho", "Cancer", "Women's", "Community", "Super Speciality", "Mission", "District"]
+SUFFIXES = ["Hospital", "Clinic", "Medical Center", "Health Care", "Nursing Home", "Institute of Medical Sciences"]
+CITIES = ["Chennai", "Pune", "Delhi", "Kochi", "Jaipur", "Lucknow", "Indore", "Nagpur", "Mysuru", "Surat",
+          "Bhopal", "Vizag", "Patna", "Ranchi", "Madurai", "Hubli", "Guntur", "Nashik", "Rajkot", "Agra"]
+
+
+def _hospitals(count: int, rng: random.Random) -> List[Dict]:
+    names = set(HOSPITALS)
+    while len(names) < count:
+        # Most real names have a distinctive proper name plus common words
+        proper = "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))).capitalize()
+        names.add(f"{rng.choice(PREFIXES)}{proper} {rng.choice(MIDDLES)} {rng.choice(SUFFIXES)} {rng.choice(CITIES)}")
+    return [{"id": f"h{i}", "name": name, "aliases": []} for i, name in enumerate(sorted(names))]
+
+
+def _tariffs() -> List[Dict]:
+    return [
+        {"id": f"t{i}", "code": f"PT{i:03d}", "name": name, "aliases": [], "max_rate": high, "unit": None}
+        for i, (name, _, high) in enumerate(LINE_ITEMS)
+    ]
+
+
+def _noisy(name: str, rng: random.Random) -> str:
+    """One of the ways extracted names differ from the master data."""
+    kind = rng.randrange(5)
+    if kind == 0:
+        return name.upper()
+    if kind == 1:
+        return f"{name} Pvt. Ltd."
+    if kind == 2:  # OCR dropped a character
+        i = rng.randrange(1, len(name) - 1)
+        return name[:i] + name[i + 1:]
+    if kind == 3:  # OCR swapped two characters
+        i = rng.randrange(1, len(name) - 2)
+        return name[:i] + name[i + 1] + name[i] + name[i + 2:]
+    words = name.split()  # a word lost to layout
+    if len(words) > 3:
+        del words[rng.randrange(1, len(words))]
+    return " ".join(words)
+
+
+def _measure(index, queries: List[Tuple[str, str]], threshold: float) -> Dict:
+    correct = wrong = 0
+    latencies = []
+    for text, expected in queries:
+        started = time.perf_counter()
+        match = index.match(text, threshold)
+        latencies.append(time.perf_counter() - started)
+        if match:
+            correct += match[0] == expected
+            wrong += match[0] != expected
+    latencies.sort()
+    return {
+        "accuracy": round(correct / len(queries), 3),
+        "wrong_matches": round(wrong / len(queries), 3),
+        "lookup_us": {
+            "p50": round(1e6 * statistics.median(latencies), 1),
+            "p95": round(1e6 * latencies[int(0.95 * (len(latencies) - 1))], 1),
+        },
+    }
+
+
+def run(sizes: List[int], queries: int, seed: int, threshold: float) -> Dict:
+    from app.services.master_data import MasterData
+
+    rng = random.Random(seed)
+    report = {"threshold": threshold, "sizes": []}
+    tariffs = _tariffs()
+    for size in sizes:
+        hospitals = _hospitals(size, rng)
+        started = time.perf_counter()
+        data = MasterData(hospitals, tariffs)
+        build_seconds = time.perf_counter() - started
+
+        hospital_queries = [(_noisy(row["name"], rng), row["id"]) for row in rng.choices(hospitals, k=queries)]
+        item_queries = [(_noisy(row["name"], rng), row["id"]) for row in rng.choices(tariffs, k=queries)]
+        report["sizes"].append({
+            "hospitals": size,
+            "build_seconds": round(build_seconds, 3),
+            "hospital": _measure(data.hospital_index, hospital_queries, threshold),
+            "hospital_cached": _measure(data.hospital_index, hospital_queries, threshold),
+            "tariff": _measure(data.tariff_index, item_queries, threshold),
+        })
+        print(json.dumps(report["sizes"][-1]))
+    return report
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--hospitals", default="1000,10000,50000", help="Comma-separated hospital counts")
+    parser.add_argument("--queries", type=int, default=2000, help="Lookups per index and size")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="Write the JSON report here")
+    args = parser.parse_args()
+
+    from app.core.config import settings
+
+    report = run(sorted(int(s) for s in args.hospitals.split(",")), args.queries, args.seed,
+                 settings.master_data_match_threshold)
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+    print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+OCR profile benchmark.
+
+OCRs the scanned part of the synthetic corpus with each OCR profile
+(text_extractor.OCR_PROFILES) and reports speed next to what the OCR text
+is worth downstream: the regex extractor's confidence and how many of the
+known fields (hospital, patient, line items, total) it recovers, with
+line items taken from the word-box table extraction where it succeeds.
+
+The LLM is not involved, so differences come from OCR quality alone.
+Needs Tesseract and Poppler (and the `hin` traineddata for the
+multilingual profile).
+
+Usage (from backend/):
+    python -m benchmarks.bench_ocr_profiles --docs 12 --max-pages 5
+    python -m benchmarks.bench_ocr_profiles --profiles legacy,balanced
+"""
+import argparse
+import json
+import logging
+import os
+import time
+from collections import Counter
+from typing import Dict, List
+
+from benchmarks.corpus import SyntheticClaim, generate_corpus
+
+
+def score_document(doc: SyntheticClaim, raw_text: str, table: Dict) -> Dict:
+    """Compare regex/table extraction on OCR output against the document's ground truth."""
+    from app.services.claim_normalizer import extract_with_regex
+
+    extracted = extract_with_regex(raw_text, table).to_dict()
+    expected = doc.expected
+    total = extracted.get("total_claimed") or 0.0
+    return {
+        "confidence": extracted.get("extraction_confidence"),
+        "table_confidence": table.get("confidence"),
+        "hospital": (extracted.get("hospital_name") or "").lower() == expected["hospital_name"].lower(),
+        "patient": (extracted.get("patient_name") or "").lower() == expected["patient_name"].lower(),
+        "item_recall": min(1.0, len(extracted.get("claim_items") or []) / expected["item_count"]),
+        "total": abs(total - expected["total_claimed"]) <= 0.01 * expected["total_claimed"],
+    }
+
+
+def run_profile(name: str, corpus: List[SyntheticClaim]) -> Dict:
+    from app.services.ocr_pool import ocr_document
+    from app.services.table_extractor import extract_line_items
+    from app.services.text_extractor import get_ocr_profile
+
+    profile = get_ocr_profile(name)
+    pages, blank, skew = 0, 0, []
+    stage_seconds = Counter()
+    scores = []
+
+    started = time.perf_counter()
+    for doc in corpus:
+        results = ocr_document(doc.pdf_bytes, doc.page_count, profile=profile)
+        pages += len(results)
+        for page in results:
+            blank += page["blank"]
+            skew.append(abs(page["skew_degrees"]))
+            for step in ("rasterize", "preprocess", "ocr"):
+                stage_seconds[step] += page.get(f"{step}_seconds", 0.0)
+        raw_text = "\n\n".join(page["text"] for page in results if page["text"].strip())
+        table = extract_line_items([page["words"] for page in results])
+        scores.append(score_document(doc, raw_text, table))
+    elapsed = time.perf_counter() - started
+
+    count = len(scores)
+    return {
+        "profile": profile,
+        "pages": pages,
+        "blank_pages_skipped": blank,
+        "elapsed_seconds": round(elapsed, 3),
+        "pages_per_second": round(pages / elapsed, 3) if elapsed else 0.0,
+        "seconds_per_page": {step: round(seconds / pages, 4) for step, seconds in stage_seconds.items()} if pages else {},
+        "mean_abs_skew_degrees": round(sum(skew) / len(skew), 2) if skew else 0.0,
+        "confidence": dict(Counter(score["confidence"] for score in scores)),
+        "table_confidence": dict(Counter(score["table_confidence"] for score in scores)),
+        "hospital_accuracy": round(sum(score["hospital"] for score in scores) / count, 3),
+        "patient_accuracy": round(sum(score["patient"] for score in scores) / count, 3),
+        "item_recall": round(sum(score["item_recall"] for score in scores) / count, 3),
+        "total_accuracy": round(sum(score["total"] for score in scores) / count, 3),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="PriClaim OCR profile benchmark")
+    parser.add_argument("--profiles", default="legacy,fast,balanced,multilingual", help="comma-separated profile names")
+    parser.add_argument("--docs", type=int, default=12, help="scanned claims to OCR")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--min-pages", type=int, default=1)
+    parser.add_argument("--max-pages", type=int, default=5)
+    parser.add_argument("--output", help="write machine-readable results to this JSON file")
+    parser.add_argument("--use-cache", action="store_true", help="allow OCR cache hits (off: every page is OCRed)")
+    args = parser.parse_args(argv)
+
+    if not args.use_cache:
+        os.environ["OCR_CACHE_MAX_BYTES"] = "0"
+    logging.basicConfig(level=logging.WARNING)
+    corpus = generate_corpus(args.docs, seed=args.seed, kinds=("scanned",),
+                             min_pages=args.min_pages, max_pages=args.max_pages)
+    results = [run_profile(name, corpus) for name in args.profiles.split(",")]
+
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+"""
+Response serialization benchmark.
+
+Builds GET /api/v1/claims and GET /api/v1/policies payloads shaped like
+production rows (raw text, structured data with line items, audit findings;
+full policy texts) and times each way of turning them into bytes:
+
+- default:   what FastAPI did before: jsonable_encoder, then json.dumps
+             (JSONResponse); for policies, validating every row through
+             List[PolicyResponse] first
+- fast:      FastJSONResponse (orjson), returned directly by the endpoint
+- gzip/br:   compressing the fast body at RESPONSE_GZIP_LEVEL (and brotli at
+             RESPONSE_BROTLI_QUALITY, if the brotli module is installed)
+
+and reports milliseconds per response and bytes on the wire.
+
+Usage (from backend/):
+    python -m benchmarks.bench_responses --claims 1000 --policies 200
+"""
+import argparse
+import gzip
+import json
+import random
+import statistics
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, List
+
+from benchmarks.corpus import CURRENCY_DIGITAL, generate_bill_lines
+
+
+def _claim_rows(count: int, rng: random.Random) -> List[Dict]:
+    from app.services.claim_normalizer import extract_with_regex
+
+    user_id = str(uuid.uuid4())
+    created = datetime(2025, 6, 1, tzinfo=timezone.utc)
+    rows = []
+    for i in range(count):
+        lines, _ = generate_bill_lines(rng, 1, CURRENCY_DIGITAL)
+        raw_text = "\n".join(lines)
+        structured = extract_with_regex(raw_text)
+        rows.append({
+            "id": str(uuid.uuid4()),
+            "file_name": f"claim-{i:05d}.pdf",
+            "file_path": f"{user_id}/claim-{i:05d}.pdf",
+            "uploaded_by": user_id,
+            "status": "completed",
+            "policy_id": None,
+            "created_at": (created + timedelta(minutes=i)).isoformat(),
+            "processed_at": (created + timedelta(minutes=i, seconds=40)).isoformat(),
+            "extracted_data": {
+                "raw_text": raw_text,
+                "page_count": 1,
+                "extraction_method": "pdfplumber",
+                "extracted_at": (created + timedelta(minutes=i, seconds=30)).isoformat(),
+                "structured_data": structured.to_dict(),
+                "table": {"confidence": "high", "rows": len(structured.items)},
+            },
+            "audit_result": {
+                "verdict": rng.choice(["APPROVED", "PARTIALLY_APPROVED", "NEEDS_REVIEW"]),
+                "risk_score": rng.randint(5, 90),
+                "findings": [
+                    {"type": "policy_limit", "severity": "medium",
+                     "description": "Room rent exceeds the 1% of sum insured sub-limit for this policy."},
+                    {"type": "other", "severity": "low",
+                     "description": "Pharmacy bills are not itemised; verify against prescriptions."},
+                ],
+                "explanation": "The claim is mostly covered. Room rent is above the policy sub-limit, "
+                               "so part of it will be deducted proportionately.",
+                "confidence": 0.85,
+            },
+            "timings": {"download": 0.01, "pdfplumber": 0.3, "regex_extraction": 0.002, "audit": 1.8},
+        })
+    return rows
+
+
+def _policy_rows(count: int, rng: random.Random) -> List[Dict]:
+    clauses = [
+        "Room rent is limited to 1% of the sum insured per day.",
+        "Pre-existing diseases are covered after a waiting period of 48 months.",
+        "Cosmetic and aesthetic treatments are excluded unless required after an accident.",
+        "Cataract surgery is limited to Rs. 40,000 per eye.",
+        "Day care procedures are covered as listed in Annexure II.",
+        "Ambulance charges are covered up to Rs. 2,000 per hospitalisation.",
+    ]
+    now = datetime.now(timezone.utc).isoformat()
+    return [{
+        "id": str(uuid.uuid4()),
+        "name": f"Health Shield Plan {i}",
+        "policy_text": " ".join(rng.choice(clauses) for _ in range(60))[:3000],
+        "company_name": "Example General Insurance",
+        "policy_type": "individual",
+        "coverage_limit": 500000.0,
+        "created_by": str(uuid.uuid4()),
+        "created_at": now,
+        "updated_at": now,
+    } for i in range(count)]
+
+
+def _time(fn: Callable[[], bytes], repeat: int) -> Dict:
+    timings, body = [], b""
+    for _ in range(repeat):
+        started = time.perf_counter()
+        body = fn()
+        timings.append(time.perf_counter() - started)
+    return {"ms": round(1000 * statistics.median(timings), 2), "bytes": len(body)}
+
+
+def _compare(default: Callable[[], bytes], fast: Callable[[], bytes], repeat: int) -> Dict:
+    from app.core.config import settings
+
+    body = fast()
+    report = {
+        "default": _time(default, repeat),
+        "fast": _time(fast, repeat),
+        "gzip": _time(lambda: gzip.compress(body, compresslevel=settings.response_gzip_level), repeat),
+    }
+    try:
+        import brotli
+
+        report["brotli"] = _time(lambda: brotli.compress(body, quality=settings.response_brotli_quality), repeat)
+    except ImportError:
+        report["brotli"] = None
+    report["speedup"] = round(report["default"]["ms"] / report["fast"]["ms"], 1)
+    assert json.loads(default()) == json.loads(body), "fast encoder changed the payload"
+    return report
+
+
+def run(claims: int, policies: int, repeat: int, seed: int) -> Dict:
+    from typing import List as ListOf
+
+    from fastapi.encoders import jsonable_encoder
+    from fastapi.responses import JSONResponse
+    from pydantic import TypeAdapter
+
+    from app.api.routes.policies import PolicyResponse
+    from app.core.responses import FastJSONResponse
+
+    rng = random.Random(seed)
+    claim_payload = {"claims": _claim_rows(claims, rng)}
+    policy_rows = _policy_rows(policies, rng)
+    policy_adapter = TypeAdapter(ListOf[PolicyResponse])
+
+    return {
+        "claims": {
+            "rows": claims,
+            **_compare(
+                lambda: JSONResponse(jsonable_encoder(claim_payload)).body,
+                lambda: FastJSONResponse(claim_payload).body,
+                repeat,
+            ),
+        },
+        "policies": {
+            "rows": policies,
+            **_compare(
+                lambda: JSONResponse(jsonable_encoder(
+                    policy_adapter.dump_python(policy_adapter.validate_python(policy_rows), mode="json"))).body,
+                lambda: FastJSONResponse(policy_rows).body,
+                repeat,
+            ),
+        },
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--claims", type=int, default=1000, help="Claims in the GET /claims response")
+    parser.add_argument("--policies", type=int, default=200, help="Policies in the GET /policies response")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed runs per encoder (median is reported)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="Write the JSON report here")
+    args = parser.parse_args()
+
+    report = run(args.claims, args.policies, args.repeat, args.seed)
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+    print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+"""
+Multi-worker scaling benchmark.
+
+Starts N separate worker processes (workers.claim_processor.run_worker)
+against one shared queue in the local SQLite/filesystem backend and checks
+that:
+
+- every claim ends up completed,
+- no claim was run by more than one worker (each worker reports the claims
+  it ran; the lists must not overlap, and every claim took exactly one
+  lease, except the stuck ones which take two),
+- claims left in text_extraction by a "crashed" worker (expired lease) are
+  reclaimed and processed,
+- throughput grows roughly linearly with N.
+
+The LLM is simulated with a fixed latency, so the pipeline is I/O bound
+like in production and one worker can't saturate the machine.
+
+Usage (from backend/):
+    python -m benchmarks.bench_workers --workers 1,2,4 --docs 32
+"""
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import shutil
+import tempfile
+import time
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List
+
+from benchmarks.corpus import generate_corpus
+
+BUCKET = "claim-documents"
+STUCK_OWNER = "crashed-worker:0"
+
+
+def _worker_main(data_dir: str, concurrency: int, llm_latency: float, start, results) -> None:
+    """Child process: run one worker until the queue is empty."""
+    os.environ.update({
+        "DATA_BACKEND": "local",
+        "LOCAL_DATA_DIR": data_dir,
+        "WORKER_CONCURRENCY": str(concurrency),
+        "TENANT_MAX_CONCURRENCY": "0",
+        "OCR_WORKERS": "0",
+        "LEASE_SECONDS": "5",
+    })
+    logging.basicConfig(level=logging.WARNING)
+
+    from app.services import groq_service
+    from benchmarks.fakes import FakeGroq
+    from workers import claim_processor
+    from workers.leases import worker_id
+
+    groq_service._client = FakeGroq(latency=llm_latency)
+
+    ran: List[str] = []
+    run_pipeline = claim_processor._run_pipeline
+
+    def counting_pipeline(claim_id, *args):
+        ran.append(claim_id)
+        return run_pipeline(claim_id, *args)
+
+    claim_processor._run_pipeline = counting_pipeline
+    # Start all workers together, after imports, so only processing is timed
+    start.wait()
+    claim_processor.run_worker(poll_seconds=0.2, until_empty=True)
+    results.put({"worker": worker_id(), "claims": ran})
+
+
+def seed_queue(data_dir: str, docs: int, stuck: int, seed: int) -> List[str]:
+    """Create queued claims, plus `stuck` ones held by an expired lease."""
+    from app.core.local_backend import LocalClient
+
+    client = LocalClient(data_dir)
+    expired = (datetime.now(timezone.utc) - timedelta(minutes=5)).isoformat()
+    ids = []
+    for i, doc in enumerate(generate_corpus(docs + stuck, seed=seed, kinds=("digital",), max_pages=3)):
+        path = f"benchmark/{doc.doc_id}.pdf"
+        client.storage.from_(BUCKET).upload(path, doc.pdf_bytes)
+        row = {
+            "id": doc.doc_id,
+            "file_name": f"{doc.doc_id}.pdf",
+            "file_path": path,
+            "status": "queued",
+            "priority": "bulk",
+            "uploaded_by": f"tenant-{i % 4}",
+            "policy_text": None,
+            "version": 0,
+            "lease_attempts": 0,
+        }
+        if i >= docs:
+            row.update(status="text_extraction", lease_owner=STUCK_OWNER, lease_expires_at=expired, lease_attempts=1)
+        client.table("claims").insert(row).execute()
+        ids.append(doc.doc_id)
+    return ids
+
+
+def run_round(workers: int, args) -> Dict:
+    data_dir = tempfile.mkdtemp(prefix="priclaim-workers-")
+    try:
+        ids = seed_queue(data_dir, args.docs, args.stuck, args.seed)
+
+        ctx = multiprocessing.get_context("spawn")
+        results = ctx.Queue()
+        start = ctx.Barrier(workers + 1)
+        procs = [
+            ctx.Process(target=_worker_main, args=(data_dir, args.concurrency, args.llm_latency, start, results))
+            for _ in range(workers)
+        ]
+        for proc in procs:
+            proc.start()
+        start.wait(timeout=args.timeout)
+        started = time.perf_counter()
+        reports = [results.get(timeout=args.timeout) for _ in procs]
+        elapsed = time.perf_counter() - started
+        for proc in procs:
+            proc.join()
+
+        from app.core.local_backend import LocalClient
+
+        rows = LocalClient(data_dir).table("claims")\
+            .select("id, status, lease_owner, lease_attempts")\
+            .execute().data
+
+        runs = Counter(claim_id for report in reports for claim_id in report["claims"])
+        expected_leases = {claim_id: 1 for claim_id in ids[:args.docs]}
+        expected_leases.update({claim_id: 2 for claim_id in ids[args.docs:]})
+        return {
+            "workers": workers,
+            "claims": len(ids),
+            "elapsed_seconds": round(elapsed, 3),
+            "throughput_claims_per_second": round(len(ids) / elapsed, 3),
+            "statuses": dict(Counter(row["status"] for row in rows)),
+            "claims_per_worker": sorted(len(report["claims"]) for report in reports),
+            "double_processed": sorted(claim_id for claim_id, count in runs.items() if count > 1),
+            "never_processed": sorted(set(ids) - set(runs)),
+            "unexpected_lease_counts": sorted(
+                row["id"] for row in rows if row.get("lease_attempts") != expected_leases[row["id"]]
+            ),
+            "leases_left": sorted(row["id"] for row in rows if row.get("lease_owner")),
+        }
+    finally:
+        shutil.rmtree(data_dir, ignore_errors=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="PriClaim multi-worker scaling benchmark")
+    parser.add_argument("--workers", default="1,2,4", help="comma-separated worker process counts")
+    parser.add_argument("--docs", type=int, default=32, help="queued claims per round")
+    parser.add_argument("--stuck", type=int, default=2, help="claims held by an expired lease per round")
+    parser.add_argument("--concurrency", type=int, default=2, help="claim threads per worker process")
+    parser.add_argument("--llm-latency", type=float, default=1.0, help="simulated seconds per LLM call")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--timeout", type=float, default=600, help="seconds to wait for each round")
+    args = parser.parse_args(argv)
+
+    rounds = [run_round(int(n), args) for n in args.workers.split(",")]
+    base = rounds[0]
+    for result in rounds:
+        speedup = result["throughput_claims_per_second"] / base["throughput_claims_per_second"]
+        result["speedup"] = round(speedup, 2)
+        result["scaling_efficiency"] = round(speedup * base["workers"] / result["workers"], 2)
+
+    ok = all(
+        not r["double_processed"] and not r["never_processed"] and not r["unexpected_lease_counts"]
+        and not r["leases_left"] and r["statuses"] == {"completed": r["claims"]}
+        for r in rounds
+    )
+    print(json.dumps({"ok": ok, "rounds": rounds}, indent=2))
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
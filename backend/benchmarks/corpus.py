@@ -0,0 +1,300 @@
+"""
+Reproducible synthetic claim corpus.
+
+Generates Indian hospital bills as PDFs in three flavours:
+- digital: text pages (pdfplumber path)
+- scanned: rasterized, slightly rotated and noisy image pages (OCR path)
+- mixed:   a digital first page followed by scanned pages
+
+The same seed always produces byte-identical documents, so benchmark runs
+on different commits see the same input.
+"""
+import io
+import random
+import zlib
+from dataclasses import dataclass, field
+from typing import Dict, List, Tuple
+
+HOSPITALS = [
+    "City Care Hospital",
+    "Apollo Speciality Hospital",
+    "Sri Ramachandra Medical Center",
+    "Lotus Multispeciality Clinic",
+    "Sanjeevani Health Care",
+    "Fortis Memorial Hospital",
+]
+
+PATIENTS = [
+    "Rahul Sharma", "Priya Nair", "Amit Verma", "Sunita Reddy",
+    "Arjun Mehta", "Kavya Iyer", "Vikram Singh", "Meera Joshi",
+]
+
+DIAGNOSES = [
+    "Acute Appendicitis", "Dengue Fever", "Type 2 Diabetes Mellitus",
+    "Fracture of Left Radius", "Community Acquired Pneumonia", "Cholelithiasis",
+]
+
+LINE_ITEMS = [
+    ("Room Charges (Semi-Private)", 2500, 6000),
+    ("ICU Charges", 8000, 15000),
+    ("Consultation Fees", 500, 1500),
+    ("Surgeon Fees", 15000, 60000),
+    ("Anaesthesia Charges", 5000, 15000),
+    ("Operation Theatre Charges", 10000, 30000),
+    ("Pharmacy and Consumables", 1000, 20000),
+    ("Laboratory Investigations", 800, 6000),
+    ("Radiology - X Ray", 400, 1200),
+    ("Radiology - CT Scan", 3000, 8000),
+    ("Nursing Charges", 800, 2500),
+    ("Physiotherapy", 600, 2000),
+    ("Ambulance Charges", 1000, 3000),
+    ("Dietary Charges", 300, 900),
+]
+
+# Currency markers seen on real bills; "₹" only survives in digital PDFs
+# (the built-in raster font has no rupee glyph).
+CURRENCY_DIGITAL = ["₹", "Rs.", "INR", "Rs"]
+CURRENCY_SCANNED = ["Rs.", "INR", "Rs"]
+
+RUPEE_CODE = 128  # Code point mapped to /uni20B9 in the font encoding
+
+PAGE_WIDTH = 595   # A4 in points
+PAGE_HEIGHT = 842
+LINES_PER_PAGE = 45
+
+
+@dataclass
+class SyntheticClaim:
+    """One generated claim document and what it should extract to."""
+    doc_id: str
+    kind: str
+    page_count: int
+    pdf_bytes: bytes
+    expected: Dict = field(default_factory=dict)
+
+
+def format_inr(amount: float) -> str:
+    """Format an amount with Indian digit grouping (12,34,567.00)."""
+    whole, frac = f"{amount:.2f}".split(".")
+    if len(whole) > 3:
+        head, tail = whole[:-3], whole[-3:]
+        groups = []
+        while len(head) > 2:
+            groups.insert(0, head[-2:])
+            head = head[:-2]
+        if head:
+            groups.insert(0, head)
+        whole = ",".join(groups + [tail])
+    return f"{whole}.{frac}"
+
+
+def generate_bill_lines(rng: random.Random, page_count: int, currencies: List[str]) -> Tuple[List[str], Dict]:
+    """Build the text lines of a bill that spans `page_count` pages."""
+    hospital = rng.choice(HOSPITALS)
+    patient = rng.choice(PATIENTS)
+    admitted = f"2025-{rng.randint(1, 12):02d}-{rng.randint(1, 20):02d}"
+    discharged = f"{admitted[:8]}{int(admitted[8:]) + rng.randint(1, 8):02d}"
+
+    lines = [
+        hospital.upper(),
+        "Final Inpatient Bill",
+        f"Hospital Name: {hospital}",
+        f"Patient Name: {patient}",
+        f"Age: {rng.randint(18, 85)} Years",
+        f"Policy Number: POL{rng.randint(10**7, 10**8 - 1)}",
+        f"Diagnosis: {rng.choice(DIAGNOSES)}",
+        f"Date of Admission: {admitted}",
+        f"Date of Discharge: {discharged}",
+        "",
+        "S.No  Description                         Qty   Rate        Amount",
+    ]
+
+    # Enough rows to fill the requested number of pages
+    row_count = max(4, page_count * LINES_PER_PAGE - len(lines) - 4)
+    items = []
+    for i in range(row_count):
+        description, low, high = rng.choice(LINE_ITEMS)
+        quantity = rng.randint(1, 5)
+        rate = float(rng.randrange(low, high, 50))
+        amount = rate * quantity
+        currency = rng.choice(currencies)
+        items.append({"description": description, "amount": amount})
+        lines.append(
+            f"{i + 1:<5} {description:<35} {quantity:<5} {format_inr(rate):<11} {currency} {format_inr(amount)}"
+        )
+
+    total = sum(item["amount"] for item in items)
+    lines += ["", f"Total Amount Payable: {rng.choice(currencies)} {format_inr(total)}", "Authorised Signatory"]
+
+    expected = {
+        "hospital_name": hospital,
+        "patient_name": patient,
+        "item_count": len(items),
+        "total_claimed": total,
+    }
+    return lines, expected
+
+
+def paginate(lines: List[str]) -> List[List[str]]:
+    return [lines[i:i + LINES_PER_PAGE] for i in range(0, len(lines), LINES_PER_PAGE)]
+
+
+def _pdf_escape(line: str) -> bytes:
+    out = bytearray()
+    for ch in line:
+        if ch == "₹":
+            out += f"\\{RUPEE_CODE:o}".encode()
+        elif ch in "()\\":
+            out += b"\\" + ch.encode()
+        else:
+            out += ch.encode("latin-1", "replace")
+    return bytes(out)
+
+
+def text_page_stream(lines: List[str]) -> bytes:
+    parts = [b"BT /F1 9 Tf 11 TL 40 800 Td"]
+    for line in lines:
+        parts.append(b"(" + _pdf_escape(line) + b") Tj T*")
+    parts.append(b"ET")
+    return b"\n".join(parts)
+
+
+def render_scanned_page(lines: List[str], rng: random.Random, dpi: int = 150):
+    """Render text lines into a noisy, slightly skewed greyscale page image."""
+    from PIL import Image, ImageDraw, ImageFont
+
+    scale = dpi / 72
+    width, height = int(PAGE_WIDTH * scale), int(PAGE_HEIGHT * scale)
+    image = Image.new("L", (width, height), 245)
+    draw = ImageDraw.Draw(image)
+    try:
+        font = ImageFont.load_default(size=int(9 * scale))
+    except TypeError:  # Pillow < 10.1 has no sized default font
+        font = ImageFont.load_default()
+
+    y = int(40 * scale)
+    for line in lines:
+        draw.text((int(40 * scale), y), line, fill=20, font=font)
+        y += int(11 * scale)
+
+    # Phone-camera artefacts: small rotation and salt-and-pepper noise
+    image = image.rotate(rng.uniform(-1.5, 1.5), fillcolor=245)
+    pixels = image.load()
+    for _ in range(width * height // 400):
+        x, y = rng.randrange(width), rng.randrange(height)
+        pixels[x, y] = rng.choice((0, 255))
+    return image
+
+
+class PdfWriter:
+    """Minimal PDF writer for text pages and JPEG image pages."""
+
+    def __init__(self):
+        self.objects: List[bytes] = []
+
+    def add(self, body: bytes) -> int:
+        self.objects.append(body)
+        return len(self.objects)
+
+    def add_stream(self, header: bytes, data: bytes, compress: bool = True) -> int:
+        if compress:
+            data = zlib.compress(data)
+            header += b" /Filter /FlateDecode"
+        return self.add(b"<< " + header + b" /Length %d >>\nstream\n" % len(data) + data + b"\nendstream")
+
+    def build(self, pages: List[Tuple[str, object]]) -> bytes:
+        """
+        Args:
+            pages: list of ("text", [lines]) or ("image", PIL.Image)
+        """
+        catalog = self.add(b"")  # placeholders, filled once ids are known
+        pages_id = self.add(b"")
+        font = self.add(
+            b"<< /Type /Font /Subtype /Type1 /BaseFont /Courier "
+            b"/Encoding << /Type /Encoding /BaseEncoding /WinAnsiEncoding "
+            b"/Differences [%d /uni20B9] >> >>" % RUPEE_CODE
+        )
+
+        page_ids = []
+        for kind, payload in pages:
+            if kind == "text":
+                content = self.add_stream(b"", text_page_stream(payload))
+                resources = b"<< /Font << /F1 %d 0 R >> >>" % font
+            else:
+                buf = io.BytesIO()
+                payload.save(buf, format="JPEG", quality=70)
+                w, h = payload.size
+                image = self.add_stream(
+                    b"/Type /XObject /Subtype /Image /Width %d /Height %d "
+                    b"/ColorSpace /DeviceGray /BitsPerComponent 8 /Filter /DCTDecode" % (w, h),
+                    buf.getvalue(),
+                    compress=False,
+                )
+                content = self.add_stream(b"", b"q %d 0 0 %d 0 0 cm /Im1 Do Q" % (PAGE_WIDTH, PAGE_HEIGHT))
+                resources = b"<< /XObject << /Im1 %d 0 R >> >>" % image
+            page_ids.append(self.add(
+                b"<< /Type /Page /Parent %d 0 R /MediaBox [0 0 %d %d] /Contents %d 0 R /Resources %s >>"
+                % (pages_id, PAGE_WIDTH, PAGE_HEIGHT, content, resources)
+            ))
+
+        self.objects[catalog - 1] = b"<< /Type /Catalog /Pages %d 0 R >>" % pages_id
+        kids = b" ".join(b"%d 0 R" % pid for pid in page_ids)
+        self.objects[pages_id - 1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (kids, len(page_ids))
+
+        out = bytearray(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+        offsets = []
+        for i, body in enumerate(self.objects, start=1):
+            offsets.append(len(out))
+            out += b"%d 0 obj\n" % i + body + b"\nendobj\n"
+        xref = len(out)
+        out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(self.objects) + 1)
+        for offset in offsets:
+            out += b"%010d 00000 n \n" % offset
+        out += b"trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (
+            len(self.objects) + 1, catalog, xref
+        )
+        return bytes(out)
+
+
+def generate_claim(rng: random.Random, doc_id: str, kind: str, page_count: int) -> SyntheticClaim:
+    currencies = CURRENCY_DIGITAL if kind == "digital" else CURRENCY_SCANNED
+    lines, expected = generate_bill_lines(rng, page_count, currencies)
+    chunks = paginate(lines)
+
+    pages = []
+    for index, chunk in enumerate(chunks):
+        if kind == "digital" or (kind == "mixed" and index == 0):
+            pages.append(("text", chunk))
+        else:
+            pages.append(("image", render_scanned_page(chunk, rng)))
+
+    pdf_bytes = PdfWriter().build(pages)
+    return SyntheticClaim(doc_id=doc_id, kind=kind, page_count=len(pages), pdf_bytes=pdf_bytes, expected=expected)
+
+
+def generate_corpus(
+    count: int,
+    seed: int = 42,
+    kinds: Tuple[str, ...] = ("digital", "scanned", "mixed"),
+    min_pages: int = 1,
+    max_pages: int = 100,
+) -> List[SyntheticClaim]:
+    """
+    Generate `count` claim documents deterministically from `seed`.
+
+    Page counts are skewed towards short bills (most real claims are a
+    few pages) but reach `max_pages`.
+    """
+    rng = random.Random(seed)
+    corpus = []
+    for i in range(count):
+        kind = kinds[i % len(kinds)]
+        page_count = min(max_pages, max(min_pages, int(rng.paretovariate(1.2))))
+        corpus.append(generate_claim(rng, f"bench-{seed}-{i:05d}", kind, page_count))
+    return corpus
+
+
+def generate_text_samples(count: int, seed: int = 42) -> List[str]:
+    """Raw bill text (with ₹ amounts) for normalizer-only benchmarks."""
+    rng = random.Random(seed)
+    return ["\n".join(generate_bill_lines(rng, rng.randint(1, 3), CURRENCY_DIGITAL)[0]) for _ in range(count)]
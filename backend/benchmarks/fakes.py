@@ -0,0 +1,229 @@
+"""
+In-process stand-ins for Supabase (tables + storage) and the Groq client.
+
+They implement only the subset of the client APIs the pipeline uses, so
+the benchmark measures our code rather than network round-trips. LLM
+latency is simulated with a configurable sleep.
+"""
+import copy
+import json
+import re
+import threading
+import time
+from types import SimpleNamespace
+from typing import Dict, List
+
+
+class _Result:
+    def __init__(self, data, count=None):
+        self.data = data
+        self.count = count
+
+
+class FakeQuery:
+    def __init__(self, store: "FakeSupabase", table: str):
+        self._store = store
+        self._table = table
+        self._filters = []
+        self._op = "select"
+        self._payload = None
+        self._single = False
+        self._order = None
+        self._offset = 0
+        self._limit = None
+
+    def select(self, columns: str = "*", count: str = None):
+        self._op = "select"
+        return self
+
+    def insert(self, data):
+        self._op, self._payload = "insert", data
+        return self
+
+    def update(self, data):
+        self._op, self._payload = "update", data
+        return self
+
+    def delete(self):
+        self._op = "delete"
+        return self
+
+    def eq(self, column, value):
+        self._filters.append(lambda row: row.get(column) == value)
+        return self
+
+    def neq(self, column, value):
+        self._filters.append(lambda row: row.get(column) != value)
+        return self
+
+    def is_(self, column, value):
+        expected = None if value in (None, "null") else value
+        self._filters.append(lambda row: row.get(column) is expected)
+        return self
+
+    def in_(self, column, values):
+        values = list(values)
+        self._filters.append(lambda row: row.get(column) in values)
+        return self
+
+    def lt(self, column, value):
+        self._filters.append(lambda row: row.get(column) is not None and row.get(column) < value)
+        return self
+
+    def lte(self, column, value):
+        self._filters.append(lambda row: row.get(column) is not None and row.get(column) <= value)
+        return self
+
+    def gt(self, column, value):
+        self._filters.append(lambda row: row.get(column) is not None and row.get(column) > value)
+        return self
+
+    def gte(self, column, value):
+        self._filters.append(lambda row: row.get(column) is not None and row.get(column) >= value)
+        return self
+
+    def order(self, column, desc=False):
+        self._order = (column, desc)
+        return self
+
+    def limit(self, count):
+        self._limit = count
+        return self
+
+    def range(self, start, end):
+        self._offset, self._limit = start, end - start + 1
+        return self
+
+    def single(self):
+        self._single = True
+        return self
+
+    def execute(self):
+        with self._store.lock:
+            self._store.calls[self._op] = self._store.calls.get(self._op, 0) + 1
+            rows = self._store.tables.setdefault(self._table, [])
+            if self._op == "insert":
+                new_rows = self._payload if isinstance(self._payload, list) else [self._payload]
+                rows.extend(copy.deepcopy(new_rows))
+                return _Result(copy.deepcopy(new_rows))
+
+            matched = [row for row in rows if all(f(row) for f in self._filters)]
+            if self._op == "update":
+                for row in matched:
+                    row.update(copy.deepcopy(self._payload))
+            elif self._op == "delete":
+                self._store.tables[self._table] = [row for row in rows if row not in matched]
+
+            if self._order:
+                column, desc = self._order
+                matched.sort(key=lambda row: row.get(column) or "", reverse=desc)
+            count = len(matched)
+            matched = matched[self._offset:]
+            if self._limit is not None:
+                matched = matched[:self._limit]
+
+            data = copy.deepcopy(matched)
+            if self._single:
+                data = data[0] if data else None
+            return _Result(data, count=count)
+
+
+class FakeBucket:
+    def __init__(self, files: Dict[str, bytes]):
+        self._files = files
+
+    def upload(self, path, file, file_options=None):
+        self._files[path] = bytes(file)
+        return SimpleNamespace(path=path)
+
+    def download(self, path):
+        return self._files[path]
+
+    def get_public_url(self, path):
+        return f"memory://{path}"
+
+
+class FakeStorage:
+    def __init__(self):
+        self.buckets: Dict[str, Dict[str, bytes]] = {}
+
+    def from_(self, bucket: str) -> FakeBucket:
+        return FakeBucket(self.buckets.setdefault(bucket, {}))
+
+
+class FakeSupabase:
+    """Thread-safe in-memory Supabase client."""
+
+    def __init__(self):
+        self.tables: Dict[str, List[dict]] = {}
+        self.storage = FakeStorage()
+        self.lock = threading.RLock()
+        self.calls: Dict[str, int] = {}  # round-trips by operation
+
+    def table(self, name: str) -> FakeQuery:
+        return FakeQuery(self, name)
+
+    def rpc(self, name: str, params: dict = None):
+        """Database functions are counted but not run (nothing reads their results here)."""
+        def execute():
+            with self.lock:
+                self.calls["rpc"] = self.calls.get("rpc", 0) + 1
+            return _Result(None)
+        return SimpleNamespace(execute=execute)
+
+
+class FakeGroq:
+    """
+    Groq chat-completions stand-in.
+
+    Extraction prompts are answered by running the regex extractor over the
+    claim text embedded in the prompt; audit prompts get a fixed verdict
+    (one per claim for batched audits).
+    Each call sleeps `latency` seconds to model the network + inference time.
+    """
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+        self.models = SimpleNamespace(list=lambda: [])
+
+    def _create(self, model, messages, **kwargs):
+        from app.services.claim_normalizer import extract_with_regex
+
+        prompt = messages[-1]["content"]
+        if self.latency:
+            time.sleep(self.latency)
+
+        if "extracting insurance claim data" in prompt:
+            text = prompt.split("TEXT:", 1)[1].split("Return ONLY valid JSON", 1)[0]
+            extracted = extract_with_regex(text).to_dict()
+            admission = re.search(r"Admission:\s*(\S+)", text)
+            discharge = re.search(r"Discharge:\s*(\S+)", text)
+            content = json.dumps({
+                "hospital_name": extracted["hospital_name"],
+                "patient_name": extracted["patient_name"],
+                "claim_items": extracted["claim_items"],
+                "total_claimed": extracted["total_claimed"],
+                "diagnosis": None,
+                "admission_date": admission.group(1) if admission else None,
+                "discharge_date": discharge.group(1) if discharge else None,
+                "policy_number": None,
+            })
+        else:
+            verdict = {
+                "verdict": "APPROVED",
+                "risk_score": 20,
+                "findings": [],
+                "explanation": "Synthetic benchmark verdict.",
+                "confidence": 0.9,
+            }
+            if prompt.startswith("CLAIMS:"):
+                claims = json.loads(prompt.split("CLAIMS:", 1)[1].split("\n\nAnalyze each claim", 1)[0])
+                content = json.dumps({"results": [{"claim_index": c["claim_index"], **verdict} for c in claims]})
+            else:
+                content = json.dumps(verdict)
+
+        prompt_chars = sum(len(message["content"]) for message in messages)
+        usage = SimpleNamespace(prompt_tokens=prompt_chars // 4, completion_tokens=len(content) // 4)
+        message = SimpleNamespace(content=content)
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)], usage=usage)
@@ -0,0 +1,87 @@
+"""
+Import-time profile of the API and worker entry points.
+
+Runs `python -X importtime -c "import <module>"` in a fresh interpreter for
+each entry point and reports total import time plus the slowest modules
+(cumulative), so regressions in cold start are easy to spot.
+
+Usage (from backend/):
+    python -m benchmarks.import_time
+    python -m benchmarks.import_time --top 25 --output imports.json
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+from typing import Dict, List
+
+ENTRY_POINTS = ["app.main", "workers.claim_processor"]
+
+
+def profile_import(module: str, repeat: int = 3) -> Dict:
+    """Best-of-`repeat` import profile of one module."""
+    best = None
+    for _ in range(repeat):
+        proc = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+            capture_output=True,
+            text=True,
+            env={**os.environ, "PYTHONDONTWRITEBYTECODE": "1"},
+        )
+        if proc.returncode != 0:
+            raise RuntimeError(f"import {module} failed:\n{proc.stderr[-2000:]}")
+
+        rows = []
+        for line in proc.stderr.splitlines():
+            if not line.startswith("import time:") or "cumulative" in line:
+                continue
+            self_us, cumulative_us, name = line[len("import time:"):].split("|")
+            rows.append((name.strip(), int(self_us), int(cumulative_us)))
+        total = next((cum for name, _, cum in rows if name == module), 0)
+        if best is None or total < best["total_ms"] * 1000:
+            best = {
+                "module": module,
+                "total_ms": round(total / 1000, 1),
+                "modules_imported": len(rows),
+                "rows": rows,
+            }
+    return best
+
+
+def top_modules(rows: List, count: int) -> List[Dict]:
+    ranked = sorted(rows, key=lambda row: row[2], reverse=True)
+    return [
+        {"module": name, "self_ms": round(self_us / 1000, 1), "cumulative_ms": round(cum_us / 1000, 1)}
+        for name, self_us, cum_us in ranked[:count]
+    ]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Import-time profile of PriClaim entry points")
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", help="write results to this JSON file")
+    args = parser.parse_args(argv)
+
+    results = []
+    for module in ENTRY_POINTS:
+        profile = profile_import(module, args.repeat)
+        results.append({
+            "module": module,
+            "total_ms": profile["total_ms"],
+            "modules_imported": profile["modules_imported"],
+            "top": top_modules(profile["rows"], args.top),
+        })
+
+    for result in results:
+        print(f"{result['module']}: {result['total_ms']} ms, {result['modules_imported']} modules")
+        for row in result["top"]:
+            print(f"  {row['cumulative_ms']:>8.1f} ms  {row['module']}")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
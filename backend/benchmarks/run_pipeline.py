@@ -0,0 +1,208 @@
+"""
+End-to-end pipeline benchmark.
+
+Runs workers.claim_processor.process_claim over a synthetic corpus with
+in-process stand-ins for Supabase and Groq, then reports throughput,
+per-stage latency percentiles and peak RSS.
+
+Usage (from backend/):
+    python -m benchmarks.run_pipeline --docs 60 --max-pages 20 --output bench.json
+    python -m benchmarks.run_pipeline --docs 60 --compare bench.json
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List
+
+from benchmarks.corpus import generate_corpus
+from benchmarks.fakes import FakeGroq, FakeSupabase
+
+BUCKET = "claim-documents"
+
+
+def install_stand_ins(backend: str, llm: FakeGroq):
+    """
+    Point the pipeline at in-process stand-ins and return the DB client.
+
+    backend "memory" uses FakeSupabase (no I/O at all); "local" uses the
+    SQLite/filesystem backend (DATA_BACKEND=local) in a temp directory,
+    which includes real disk and SQLite costs.
+    """
+    if backend == "local":
+        os.environ["DATA_BACKEND"] = "local"
+        os.environ["LOCAL_DATA_DIR"] = tempfile.mkdtemp(prefix="priclaim-bench-")
+
+    from app.core import database
+    from app.services import groq_service
+
+    if backend == "memory":
+        database._client = FakeSupabase()
+    groq_service._client = llm
+    return database.get_db()
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered) + 0.5)) - 1))
+    return ordered[rank]
+
+
+def summarize(samples: Dict[str, List[float]]) -> Dict[str, Dict[str, float]]:
+    return {
+        stage: {
+            "count": len(values),
+            "mean": round(sum(values) / len(values), 5),
+            "p50": round(percentile(values, 50), 5),
+            "p95": round(percentile(values, 95), 5),
+            "p99": round(percentile(values, 99), 5),
+        }
+        for stage, values in sorted(samples.items())
+        if values
+    }
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True).strip()
+    except Exception:
+        return "unknown"
+
+
+def run(args) -> Dict:
+    db = install_stand_ins(args.backend, FakeGroq(latency=args.llm_latency))
+    from workers.claim_processor import process_claim
+
+    kinds = tuple(args.kinds.split(","))
+    corpus = generate_corpus(args.docs, seed=args.seed, kinds=kinds, min_pages=args.min_pages, max_pages=args.max_pages)
+
+    for doc in corpus:
+        path = f"benchmark/{doc.doc_id}.pdf"
+        db.storage.from_(BUCKET).upload(path, doc.pdf_bytes)
+        db.table("claims").insert({
+            "id": doc.doc_id,
+            "file_name": f"{doc.doc_id}.pdf",
+            "file_path": path,
+            "status": "queued",
+            "uploaded_by": "benchmark",
+            "policy_text": None,
+        }).execute()
+
+    wall_times: Dict[str, float] = {}
+
+    def run_one(doc_id: str) -> None:
+        start = time.perf_counter()
+        process_claim(doc_id)
+        wall_times[doc_id] = time.perf_counter() - start
+
+    calls_before = dict(getattr(db, "calls", {}))
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        list(pool.map(run_one, [doc.doc_id for doc in corpus]))
+    elapsed = time.perf_counter() - started
+
+    # DB round-trips made by the pipeline itself (in-memory backend only)
+    db_calls = {
+        op: round((count - calls_before.get(op, 0)) / len(corpus), 2)
+        for op, count in getattr(db, "calls", {}).items()
+    }
+
+    rows = {row["id"]: row for row in db.table("claims").select("id, status, timings").execute().data}
+    samples: Dict[str, List[float]] = {"total": list(wall_times.values())}
+    by_kind: Dict[str, List[float]] = {}
+    statuses: Dict[str, int] = {}
+    for doc in corpus:
+        row = rows[doc.doc_id]
+        statuses[row["status"]] = statuses.get(row["status"], 0) + 1
+        for stage, seconds in (row.get("timings") or {}).items():
+            if stage != "total":
+                samples.setdefault(stage, []).append(seconds)
+        by_kind.setdefault(doc.kind, []).append(wall_times[doc.doc_id])
+
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    peak_rss_mb = max_rss / (1024 * 1024) if sys.platform == "darwin" else max_rss / 1024
+
+    return {
+        "revision": git_revision(),
+        "python": platform.python_version(),
+        "config": {
+            "docs": args.docs,
+            "seed": args.seed,
+            "kinds": list(kinds),
+            "min_pages": args.min_pages,
+            "max_pages": args.max_pages,
+            "concurrency": args.concurrency,
+            "backend": args.backend,
+            "llm_latency": args.llm_latency,
+        },
+        "pages": sum(doc.page_count for doc in corpus),
+        "statuses": statuses,
+        "elapsed_seconds": round(elapsed, 3),
+        "throughput_claims_per_second": round(len(corpus) / elapsed, 3) if elapsed else 0.0,
+        "throughput_pages_per_second": round(sum(doc.page_count for doc in corpus) / elapsed, 3) if elapsed else 0.0,
+        "peak_rss_mb": round(peak_rss_mb, 1),
+        "db_calls_per_claim": db_calls,
+        "stages": summarize(samples),
+        "total_by_kind": summarize(by_kind),
+    }
+
+
+def compare(current: Dict, baseline: Dict) -> List[str]:
+    """Human-readable per-stage p50/p95 deltas against a previous run."""
+    lines = [f"baseline {baseline.get('revision')} -> current {current.get('revision')}"]
+    for key in ("throughput_claims_per_second", "peak_rss_mb"):
+        old, new = baseline.get(key, 0), current.get(key, 0)
+        change = f"{(new - old) / old * 100:+.1f}%" if old else "n/a"
+        lines.append(f"  {key:<32} {old:>10} -> {new:<10} ({change})")
+    for stage, stats in current["stages"].items():
+        old_stats = baseline.get("stages", {}).get(stage)
+        if not old_stats:
+            lines.append(f"  {stage:<32} (new stage)")
+            continue
+        for pct in ("p50", "p95"):
+            old, new = old_stats[pct], stats[pct]
+            change = f"{(new - old) / old * 100:+.1f}%" if old else "n/a"
+            lines.append(f"  {stage + ' ' + pct:<32} {old:>10.4f} -> {new:<10.4f} ({change})")
+    return lines
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="PriClaim end-to-end pipeline benchmark")
+    parser.add_argument("--docs", type=int, default=30, help="number of synthetic claims")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--kinds", default="digital,scanned,mixed")
+    parser.add_argument("--min-pages", type=int, default=1)
+    parser.add_argument("--max-pages", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=1, help="claims processed in parallel")
+    parser.add_argument("--backend", choices=["memory", "local"], default="memory",
+                        help="in-memory fake DB or the SQLite/filesystem local backend")
+    parser.add_argument("--llm-latency", type=float, default=0.0, help="simulated seconds per LLM call")
+    parser.add_argument("--output", help="write machine-readable results to this JSON file")
+    parser.add_argument("--compare", help="previous results JSON to diff against")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING)
+    results = run(args)
+
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    if args.compare:
+        with open(args.compare) as f:
+            print("\n".join(compare(results, json.load(f))))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,20 @@
+-- Duplicate upload detection at ingest (app/services/ingest_dedup.py)
+
+ALTER TABLE claims
+ADD COLUMN IF NOT EXISTS content_hash VARCHAR(64),
+ADD COLUMN IF NOT EXISTS idempotency_key VARCHAR(255),
+ADD COLUMN IF NOT EXISTS source_claim_id UUID REFERENCES claims(id) ON DELETE SET NULL;
+
+-- Recent uploads of a user by content
+CREATE INDEX IF NOT EXISTS idx_claims_uploaded_by_content_hash
+ON claims(uploaded_by, content_hash, created_at DESC)
+WHERE content_hash IS NOT NULL;
+
+-- One claim per user and Idempotency-Key
+CREATE UNIQUE INDEX IF NOT EXISTS idx_claims_uploaded_by_idempotency_key
+ON claims(uploaded_by, idempotency_key)
+WHERE idempotency_key IS NOT NULL;
+
+COMMENT ON COLUMN claims.content_hash IS 'SHA-256 of the uploaded PDF';
+COMMENT ON COLUMN claims.idempotency_key IS 'Idempotency-Key header of the ingest request';
+COMMENT ON COLUMN claims.source_claim_id IS 'Earlier claim with the same document; its file and extraction are reused';
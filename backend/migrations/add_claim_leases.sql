@@ -0,0 +1,16 @@
+-- Lease-based claim ownership for multiple workers / API replicas
+-- A worker owns a claim while lease_owner is set and lease_expires_at is in the future.
+
+ALTER TABLE claims
+ADD COLUMN IF NOT EXISTS lease_owner TEXT,
+ADD COLUMN IF NOT EXISTS lease_expires_at TIMESTAMP WITH TIME ZONE,
+ADD COLUMN IF NOT EXISTS lease_attempts INTEGER NOT NULL DEFAULT 0;
+
+-- Reclaimer scan: claims whose lease may have expired
+CREATE INDEX IF NOT EXISTS idx_claims_lease_expires
+ON claims(lease_expires_at)
+WHERE lease_expires_at IS NOT NULL;
+
+COMMENT ON COLUMN claims.lease_owner IS 'Worker (<hostname>:<pid>) currently processing the claim';
+COMMENT ON COLUMN claims.lease_expires_at IS 'Renewed by the owning worker; expired leases are returned to the queue';
+COMMENT ON COLUMN claims.lease_attempts IS 'Leases taken on this claim; after LEASE_MAX_ATTEMPTS expiries it is marked failed';
@@ -0,0 +1,10 @@
+-- Version of the normalizer that produced a claim's structured_data
+-- (claim_normalizer.NORMALIZER_VERSION); workers/renormalize.py brings older
+-- claims up to date from their stored raw text
+
+ALTER TABLE claims
+ADD COLUMN IF NOT EXISTS normalizer_version INTEGER NOT NULL DEFAULT 0;
+
+CREATE INDEX IF NOT EXISTS idx_claims_normalizer_version ON claims(status, normalizer_version, id);
+
+COMMENT ON COLUMN claims.normalizer_version IS 'NORMALIZER_VERSION of extracted_data.structured_data; 0 for claims normalized before versioning';
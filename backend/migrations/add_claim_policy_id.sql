@@ -0,0 +1,19 @@
+-- Link claims to the policy they were audited against
+-- Lets a policy update find the claims whose audit_result is now stale.
+
+ALTER TABLE claims
+ADD COLUMN IF NOT EXISTS policy_id UUID REFERENCES insurance_policies(id) ON DELETE SET NULL;
+
+CREATE INDEX IF NOT EXISTS idx_claims_policy_id
+ON claims(policy_id)
+WHERE policy_id IS NOT NULL;
+
+-- Backfill claims created before the column existed (they only stored a copy of the text)
+UPDATE claims c
+SET policy_id = p.id
+FROM insurance_policies p
+WHERE c.policy_id IS NULL
+  AND c.policy_text IS NOT NULL
+  AND c.policy_text = p.policy_text;
+
+COMMENT ON COLUMN claims.policy_id IS 'Policy attached at upload; claims.policy_text holds the text the last audit used';
@@ -0,0 +1,18 @@
+-- Scheduling priority class per claim
+
+ALTER TABLE claims
+ADD COLUMN IF NOT EXISTS priority VARCHAR(20) NOT NULL DEFAULT 'interactive';
+
+ALTER TABLE claims
+DROP CONSTRAINT IF EXISTS claims_priority_check;
+
+ALTER TABLE claims
+ADD CONSTRAINT claims_priority_check
+CHECK (priority IN ('urgent', 'interactive', 'bulk'));
+
+-- Worker queue scan: queued claims with their tenant and priority
+CREATE INDEX IF NOT EXISTS idx_claims_queued
+ON claims(priority, created_at)
+WHERE status = 'queued';
+
+COMMENT ON COLUMN claims.priority IS 'urgent (cashless pre-auth), interactive (single upload) or bulk (backfill)';
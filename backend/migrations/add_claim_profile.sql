@@ -0,0 +1,6 @@
+-- Per-claim profiling flag (app/services/profiler.py)
+
+ALTER TABLE claims
+ADD COLUMN IF NOT EXISTS profile BOOLEAN NOT NULL DEFAULT FALSE;
+
+COMMENT ON COLUMN claims.profile IS 'Profile the worker while it processes this claim; the flamegraph is written to the worker''s PROFILE_DIR';
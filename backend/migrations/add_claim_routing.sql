@@ -0,0 +1,6 @@
+-- Add model routing decisions to claims (app/services/model_router.py)
+
+ALTER TABLE claims
+ADD COLUMN IF NOT EXISTS routing JSONB;
+
+COMMENT ON COLUMN claims.routing IS 'Per task (extraction, audit): route (rules/small/large), model, complexity score and reasons, escalation, LLM seconds and estimated cost';
@@ -0,0 +1,6 @@
+-- Add per-stage pipeline timings to claims
+
+ALTER TABLE claims
+ADD COLUMN IF NOT EXISTS timings JSONB;
+
+COMMENT ON COLUMN claims.timings IS 'Seconds spent per pipeline stage (download, pdfplumber, rasterize, ocr_page, llm_extraction, regex_extraction, audit, db_write)';
@@ -0,0 +1,27 @@
+-- Last-modified timestamp on claims
+-- The analytics export picks up claims changed since its last watermark
+-- (including re-audits, which don't touch processed_at).
+
+ALTER TABLE claims
+ADD COLUMN IF NOT EXISTS updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW();
+
+CREATE OR REPLACE FUNCTION set_claims_updated_at()
+RETURNS TRIGGER AS $$
+BEGIN
+    NEW.updated_at = NOW();
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS claims_set_updated_at ON claims;
+CREATE TRIGGER claims_set_updated_at
+BEFORE UPDATE ON claims
+FOR EACH ROW
+EXECUTE FUNCTION set_claims_updated_at();
+
+-- Export scan: finished claims in (updated_at, id) order
+CREATE INDEX IF NOT EXISTS idx_claims_updated_at
+ON claims(updated_at, id)
+WHERE status IN ('completed', 'failed');
+
+COMMENT ON COLUMN claims.updated_at IS 'Set on every update; watermark for the analytics export';
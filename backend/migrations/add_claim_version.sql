@@ -0,0 +1,7 @@
+-- Optimistic concurrency for claim updates
+-- The worker only writes a claim when its version still matches the copy it loaded.
+
+ALTER TABLE claims
+ADD COLUMN IF NOT EXISTS version INTEGER NOT NULL DEFAULT 0;
+
+COMMENT ON COLUMN claims.version IS 'Incremented on every pipeline write; used for optimistic concurrency';
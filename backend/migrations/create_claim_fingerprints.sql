@@ -0,0 +1,22 @@
+-- Duplicate / fraud detection index (app/services/duplicate_index.py)
+-- One row per (claim, key): bill and line-item hashes, MinHash LSH band
+-- keys, plus one "signature" row per claim holding its MinHash signature.
+
+CREATE TABLE IF NOT EXISTS claim_fingerprints (
+    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    claim_id UUID NOT NULL REFERENCES claims(id) ON DELETE CASCADE,
+    uploaded_by UUID,
+    kind VARCHAR(16) NOT NULL CHECK (kind IN ('bill', 'items', 'lsh', 'signature')),
+    key TEXT NOT NULL,
+    signature BIGINT[],
+    created_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+-- Lookups: key IN (...); re-indexing: delete by claim_id
+CREATE INDEX IF NOT EXISTS idx_claim_fingerprints_key ON claim_fingerprints(key);
+CREATE INDEX IF NOT EXISTS idx_claim_fingerprints_claim ON claim_fingerprints(claim_id);
+
+-- Written and read by the backend (service role) only
+ALTER TABLE claim_fingerprints ENABLE ROW LEVEL SECURITY;
+
+COMMENT ON TABLE claim_fingerprints IS 'Duplicate detection keys per claim; matches surface as "duplicate" audit findings';
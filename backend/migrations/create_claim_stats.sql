@@ -0,0 +1,79 @@
+-- Dashboard rollups, maintained incrementally as claims are submitted,
+-- finish and get re-audited (app/services/claim_stats.py)
+-- outcome: 'submitted', 'failed', or the audit verdict of a completed claim
+-- (APPROVED, PARTIALLY_APPROVED, REJECTED, NEEDS_REVIEW, UNAUDITED)
+
+CREATE TABLE IF NOT EXISTS claim_stats_daily (
+    user_id UUID NOT NULL,
+    day DATE NOT NULL,
+    outcome VARCHAR(32) NOT NULL,
+    claims BIGINT NOT NULL DEFAULT 0,
+    claimed_total NUMERIC NOT NULL DEFAULT 0,
+    risk_sum NUMERIC NOT NULL DEFAULT 0,
+    risk_count BIGINT NOT NULL DEFAULT 0,
+    risk_histogram INTEGER[] NOT NULL DEFAULT array_fill(0, ARRAY[10]),
+    PRIMARY KEY (user_id, day, outcome)
+);
+
+CREATE TABLE IF NOT EXISTS claim_stats_totals (
+    user_id UUID NOT NULL,
+    outcome VARCHAR(32) NOT NULL,
+    claims BIGINT NOT NULL DEFAULT 0,
+    claimed_total NUMERIC NOT NULL DEFAULT 0,
+    risk_sum NUMERIC NOT NULL DEFAULT 0,
+    risk_count BIGINT NOT NULL DEFAULT 0,
+    risk_histogram INTEGER[] NOT NULL DEFAULT array_fill(0, ARRAY[10]),
+    PRIMARY KEY (user_id, outcome)
+);
+
+-- Add (or, with p_delta = -1, remove) one claim to both rollups atomically.
+-- Risk histogram buckets are 0-9, 10-19, ..., 90-100.
+CREATE OR REPLACE FUNCTION increment_claim_stats(
+    p_user_id UUID,
+    p_day DATE,
+    p_outcome TEXT,
+    p_delta INTEGER DEFAULT 1,
+    p_claimed_total NUMERIC DEFAULT 0,
+    p_risk_score NUMERIC DEFAULT NULL
+)
+RETURNS VOID AS $$
+DECLARE
+    v_histogram INTEGER[] := array_fill(0, ARRAY[10]);
+    v_risk_count INTEGER := 0;
+BEGIN
+    IF p_risk_score IS NOT NULL THEN
+        v_histogram[LEAST(GREATEST(FLOOR(p_risk_score / 10)::INTEGER, 0), 9) + 1] := p_delta;
+        v_risk_count := p_delta;
+    END IF;
+
+    INSERT INTO claim_stats_daily AS s (user_id, day, outcome, claims, claimed_total, risk_sum, risk_count, risk_histogram)
+    VALUES (p_user_id, p_day, p_outcome, p_delta, p_delta * p_claimed_total,
+            p_delta * COALESCE(p_risk_score, 0), v_risk_count, v_histogram)
+    ON CONFLICT (user_id, day, outcome) DO UPDATE SET
+        claims = s.claims + EXCLUDED.claims,
+        claimed_total = s.claimed_total + EXCLUDED.claimed_total,
+        risk_sum = s.risk_sum + EXCLUDED.risk_sum,
+        risk_count = s.risk_count + EXCLUDED.risk_count,
+        risk_histogram = ARRAY(
+            SELECT a + b FROM unnest(s.risk_histogram, EXCLUDED.risk_histogram) WITH ORDINALITY AS h(a, b, i) ORDER BY i
+        );
+
+    INSERT INTO claim_stats_totals AS s (user_id, outcome, claims, claimed_total, risk_sum, risk_count, risk_histogram)
+    VALUES (p_user_id, p_outcome, p_delta, p_delta * p_claimed_total,
+            p_delta * COALESCE(p_risk_score, 0), v_risk_count, v_histogram)
+    ON CONFLICT (user_id, outcome) DO UPDATE SET
+        claims = s.claims + EXCLUDED.claims,
+        claimed_total = s.claimed_total + EXCLUDED.claimed_total,
+        risk_sum = s.risk_sum + EXCLUDED.risk_sum,
+        risk_count = s.risk_count + EXCLUDED.risk_count,
+        risk_histogram = ARRAY(
+            SELECT a + b FROM unnest(s.risk_histogram, EXCLUDED.risk_histogram) WITH ORDINALITY AS h(a, b, i) ORDER BY i
+        );
+END;
+$$ LANGUAGE plpgsql;
+
+-- Rollups are written by the backend (service role) and read through the API only
+ALTER TABLE claim_stats_daily ENABLE ROW LEVEL SECURITY;
+ALTER TABLE claim_stats_totals ENABLE ROW LEVEL SECURITY;
+
+COMMENT ON TABLE claim_stats_daily IS 'Per user/day/outcome claim counts, claimed totals and risk histograms for GET /api/v1/claims/stats';
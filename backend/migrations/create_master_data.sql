@@ -0,0 +1,54 @@
+-- Hospital and procedure tariff master data (app/services/master_data.py)
+-- Extracted hospital names and line-item descriptions are matched against
+-- these (names plus aliases) to get canonical IDs and tariff rates.
+
+CREATE TABLE IF NOT EXISTS hospitals (
+    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    name TEXT NOT NULL,
+    license_key TEXT,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+ALTER TABLE hospitals ADD COLUMN IF NOT EXISTS aliases TEXT[] NOT NULL DEFAULT '{}';
+ALTER TABLE hospitals ADD COLUMN IF NOT EXISTS city TEXT;
+ALTER TABLE hospitals ADD COLUMN IF NOT EXISTS updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW();
+
+CREATE TABLE IF NOT EXISTS procedure_tariffs (
+    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    code VARCHAR(32) NOT NULL UNIQUE,
+    name TEXT NOT NULL,
+    aliases TEXT[] NOT NULL DEFAULT '{}',
+    category TEXT,
+    max_rate NUMERIC(12, 2),  -- highest allowed rate per unit (day, visit, test); NULL = no cap
+    unit VARCHAR(16),
+    created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+-- Workers poll MAX(updated_at) to notice edits and reload their index
+CREATE OR REPLACE FUNCTION set_master_data_updated_at()
+RETURNS TRIGGER AS $$
+BEGIN
+    NEW.updated_at = NOW();
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS hospitals_updated_at ON hospitals;
+CREATE TRIGGER hospitals_updated_at
+    BEFORE UPDATE ON hospitals
+    FOR EACH ROW EXECUTE FUNCTION set_master_data_updated_at();
+
+DROP TRIGGER IF EXISTS procedure_tariffs_updated_at ON procedure_tariffs;
+CREATE TRIGGER procedure_tariffs_updated_at
+    BEFORE UPDATE ON procedure_tariffs
+    FOR EACH ROW EXECUTE FUNCTION set_master_data_updated_at();
+
+CREATE INDEX IF NOT EXISTS idx_hospitals_updated_at ON hospitals(updated_at);
+CREATE INDEX IF NOT EXISTS idx_procedure_tariffs_updated_at ON procedure_tariffs(updated_at);
+
+-- Read and written by the backend (service role) only
+ALTER TABLE hospitals ENABLE ROW LEVEL SECURITY;
+ALTER TABLE procedure_tariffs ENABLE ROW LEVEL SECURITY;
+
+COMMENT ON TABLE procedure_tariffs IS 'Procedure/charge master with per-unit tariff caps for overcharge checks';
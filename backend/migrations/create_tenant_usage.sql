@@ -0,0 +1,83 @@
+-- Per-claim resource ledger and per-tenant usage and budgets
+-- (app/services/resource_ledger.py). A tenant is the user who uploaded the claim.
+
+ALTER TABLE claims
+ADD COLUMN IF NOT EXISTS resources JSONB;
+
+COMMENT ON COLUMN claims.resources IS 'Per stage wall and CPU seconds, OCR pages (cached, rasterized) and CPU, LLM tokens per model, bytes stored, estimated cost in USD and whether the tenant was over budget';
+
+CREATE TABLE IF NOT EXISTS tenant_usage_daily (
+    user_id UUID NOT NULL,
+    day DATE NOT NULL,
+    claims BIGINT NOT NULL DEFAULT 0,
+    cpu_seconds NUMERIC NOT NULL DEFAULT 0,
+    ocr_pages BIGINT NOT NULL DEFAULT 0,
+    pages_rasterized BIGINT NOT NULL DEFAULT 0,
+    small_prompt_tokens BIGINT NOT NULL DEFAULT 0,
+    small_completion_tokens BIGINT NOT NULL DEFAULT 0,
+    large_prompt_tokens BIGINT NOT NULL DEFAULT 0,
+    large_completion_tokens BIGINT NOT NULL DEFAULT 0,
+    bytes_stored BIGINT NOT NULL DEFAULT 0,
+    llm_cost_usd NUMERIC NOT NULL DEFAULT 0,
+    cost_usd NUMERIC NOT NULL DEFAULT 0,
+    PRIMARY KEY (user_id, day)
+);
+
+CREATE INDEX IF NOT EXISTS idx_tenant_usage_daily_day ON tenant_usage_daily(day, cost_usd DESC);
+
+-- NULL daily_budget_usd: the TENANT_DAILY_BUDGET_USD default; 0: no budget
+CREATE TABLE IF NOT EXISTS tenant_budgets (
+    user_id UUID PRIMARY KEY,
+    daily_budget_usd NUMERIC,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+-- Add one claim attempt's ledger to the tenant's day atomically
+CREATE OR REPLACE FUNCTION increment_tenant_usage(
+    p_user_id UUID,
+    p_day DATE,
+    p_claims INTEGER DEFAULT 1,
+    p_cpu_seconds NUMERIC DEFAULT 0,
+    p_ocr_pages INTEGER DEFAULT 0,
+    p_pages_rasterized INTEGER DEFAULT 0,
+    p_small_prompt_tokens BIGINT DEFAULT 0,
+    p_small_completion_tokens BIGINT DEFAULT 0,
+    p_large_prompt_tokens BIGINT DEFAULT 0,
+    p_large_completion_tokens BIGINT DEFAULT 0,
+    p_bytes_stored BIGINT DEFAULT 0,
+    p_llm_cost_usd NUMERIC DEFAULT 0,
+    p_cost_usd NUMERIC DEFAULT 0
+)
+RETURNS VOID AS $$
+BEGIN
+    INSERT INTO tenant_usage_daily AS u (
+        user_id, day, claims, cpu_seconds, ocr_pages, pages_rasterized,
+        small_prompt_tokens, small_completion_tokens, large_prompt_tokens, large_completion_tokens,
+        bytes_stored, llm_cost_usd, cost_usd
+    )
+    VALUES (
+        p_user_id, p_day, p_claims, p_cpu_seconds, p_ocr_pages, p_pages_rasterized,
+        p_small_prompt_tokens, p_small_completion_tokens, p_large_prompt_tokens, p_large_completion_tokens,
+        p_bytes_stored, p_llm_cost_usd, p_cost_usd
+    )
+    ON CONFLICT (user_id, day) DO UPDATE SET
+        claims = u.claims + EXCLUDED.claims,
+        cpu_seconds = u.cpu_seconds + EXCLUDED.cpu_seconds,
+        ocr_pages = u.ocr_pages + EXCLUDED.ocr_pages,
+        pages_rasterized = u.pages_rasterized + EXCLUDED.pages_rasterized,
+        small_prompt_tokens = u.small_prompt_tokens + EXCLUDED.small_prompt_tokens,
+        small_completion_tokens = u.small_completion_tokens + EXCLUDED.small_completion_tokens,
+        large_prompt_tokens = u.large_prompt_tokens + EXCLUDED.large_prompt_tokens,
+        large_completion_tokens = u.large_completion_tokens + EXCLUDED.large_completion_tokens,
+        bytes_stored = u.bytes_stored + EXCLUDED.bytes_stored,
+        llm_cost_usd = u.llm_cost_usd + EXCLUDED.llm_cost_usd,
+        cost_usd = u.cost_usd + EXCLUDED.cost_usd;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Written by the backend (service role) and read through the admin API only
+ALTER TABLE tenant_usage_daily ENABLE ROW LEVEL SECURITY;
+ALTER TABLE tenant_budgets ENABLE ROW LEVEL SECURITY;
+
+COMMENT ON TABLE tenant_usage_daily IS 'Per user/day resource usage and estimated cost of claim processing, for GET /api/v1/admin/usage and budgets';
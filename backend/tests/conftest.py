@@ -0,0 +1,12 @@
+import pytest
+
+from app.core import database
+from app.core.local_backend import LocalClient
+
+
+@pytest.fixture
+def local_db(tmp_path, monkeypatch):
+    """A fresh local (SQLite/filesystem) backend behind app.core.database.supabase."""
+    client = LocalClient(str(tmp_path))
+    monkeypatch.setattr(database, "_client", client)
+    return client
@@ -0,0 +1,59 @@
+from app.models import LineItems, StructuredClaim
+from app.services.duplicate_index import check_duplicates, items_key
+from app.services.ingest_dedup import same_document_claims
+
+
+def _claim(items):
+    return StructuredClaim(hospital_name="City Hospital", items=LineItems.from_dicts(items))
+
+
+def test_items_key_handles_missing_amounts():
+    items = [
+        {"description": "Pharmacy", "amount": 1200},
+        {"description": "Pharmacy", "amount": None},
+        {"description": "Room Charges", "amount": "10,000.00"},
+        {"description": "Consultation", "amount": 500},
+    ]
+
+    key = items_key(_claim(items))
+
+    assert key is not None and key.startswith("items:")
+    # Order-independent: the same items in another order give the same key
+    assert items_key(_claim(list(reversed(items)))) == key
+
+
+def test_items_key_needs_enough_items():
+    assert items_key(_claim([{"description": "Consultation", "amount": 500}])) is None
+
+
+def _bill():
+    return StructuredClaim(
+        hospital_name="City Hospital",
+        patient_name="A Patient",
+        total_claimed=12500.0,
+        admission_date="2024-03-01",
+        items=LineItems.from_dicts([
+            {"description": "Room Charges", "amount": 10000},
+            {"description": "Pharmacy", "amount": 2000},
+            {"description": "Consultation", "amount": 500},
+        ]),
+    )
+
+
+RAW_TEXT = "City Hospital final bill for A Patient admitted 2024-03-01 room charges pharmacy consultation"
+
+
+def test_same_document_under_another_policy_is_not_a_duplicate(local_db):
+    local_db.table("claims").insert([
+        {"id": "source", "uploaded_by": "u1", "content_hash": "abc", "status": "completed"},
+        {"id": "refiled", "uploaded_by": "u1", "content_hash": "abc", "status": "queued", "source_claim_id": "source"},
+    ]).execute()
+    check_duplicates("source", "u1", RAW_TEXT, _bill())
+
+    exclude = same_document_claims("refiled", "u1", "abc", "source")
+    assert check_duplicates("refiled", "u1", RAW_TEXT, _bill(), exclude=exclude) == []
+
+    # Another user's copy of the same bill is still flagged
+    findings = check_duplicates("other", "u2", RAW_TEXT, _bill(), exclude=same_document_claims("other", "u2", "abc"))
+    assert {f.details["matched_claim_id"] for f in findings} == {"source", "refiled"}
+    assert all(f.severity == "high" for f in findings)
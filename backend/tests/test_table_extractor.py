@@ -0,0 +1,102 @@
+from app.services.table_extractor import extract_line_items
+
+# x positions of the columns in the synthetic bills below
+COLUMNS = {"description": 50, "quantity": 300, "rate": 380, "amount": 480}
+
+
+def _row(top, description, quantity=None, rate=None, amount=None):
+    words = []
+    x = COLUMNS["description"]
+    for text in description.split():
+        words.append({"text": text, "x0": x, "x1": x + 8 * len(text), "top": top, "bottom": top + 10})
+        x += 8 * len(text) + 6
+    for name, value in (("quantity", quantity), ("rate", rate), ("amount", amount)):
+        if value is not None:
+            x0 = COLUMNS[name]
+            words.append({"text": value, "x0": x0, "x1": x0 + 8 * len(value), "top": top, "bottom": top + 10})
+    return words
+
+
+def _header(top=100):
+    return [
+        {"text": text, "x0": COLUMNS[name], "x1": COLUMNS[name] + 8 * len(text), "top": top, "bottom": top + 10}
+        for name, text in (("description", "Description"), ("quantity", "Qty"), ("rate", "Rate"), ("amount", "Amount"))
+    ]
+
+
+def test_item_starting_with_total_is_not_the_total_row():
+    page = (
+        _header()
+        + _row(120, "Room Charges", "2", "5,000.00", "10,000.00")
+        + _row(140, "Total Knee Replacement", "1", "1,50,000.00", "1,50,000.00")
+        + _row(160, "Pharmacy", "1", "2,500.00", "2,500.00")
+        + _row(180, "Grand Total", amount="1,62,500.00")
+    )
+
+    table = extract_line_items([page])
+
+    assert [item["description"] for item in table["line_items"]] == [
+        "Room Charges", "Total Knee Replacement", "Pharmacy",
+    ]
+    assert table["stated_total"] == 162500.0
+    assert table["confidence"] == "high"
+
+
+def test_plain_total_row_ends_the_table():
+    page = (
+        _header()
+        + _row(120, "Room Charges", "2", "5,000.00", "10,000.00")
+        + _row(140, "Total", amount="10,000.00")
+        + _row(160, "Thank you", amount="1,00,000.00")
+    )
+
+    table = extract_line_items([page])
+
+    assert [item["description"] for item in table["line_items"]] == ["Room Charges"]
+    assert table["stated_total"] == 10000.0
+
+
+def test_unverified_table_is_not_high_confidence():
+    # No qty/rate to check and no stated total: nothing confirms the rows
+    page = (
+        _header()
+        + _row(120, "Room Charges", amount="10,000.00")
+        + _row(140, "Pharmacy", amount="2,500.00")
+    )
+
+    table = extract_line_items([page])
+
+    assert len(table["line_items"]) == 2
+    assert table["checked_rows"] == 0
+    assert table["confidence"] == "medium"
+
+
+def test_subtotals_leave_the_table_open():
+    page = (
+        _header()
+        + _row(120, "Room Charges", "2", "5,000.00", "10,000.00")
+        + _row(140, "Sub Total", amount="10,000.00")
+        + _row(160, "Pharmacy")
+        + _row(180, "Medicines", "4", "500.00", "2,000.00")
+        + _row(200, "Consumables", "1", "2,000.00", "2,000.00")
+        + _row(220, "Subtotal:", amount="4,000.00")
+        + _row(240, "Grand Total", amount="14,000.00")
+    )
+
+    table = extract_line_items([page])
+
+    assert [item["description"] for item in table["line_items"]] == ["Room Charges", "Medicines", "Consumables"]
+    assert table["stated_total"] == 14000.0
+    assert table["confidence"] == "high"
+
+
+def test_rows_not_adding_up_to_the_total_are_low_confidence():
+    page = (
+        _header()
+        + _row(120, "Room Charges", "2", "5,000.00", "10,000.00")
+        + _row(140, "Grand Total", amount="14,000.00")
+    )
+
+    table = extract_line_items([page])
+
+    assert table["confidence"] == "low"
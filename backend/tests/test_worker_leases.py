@@ -0,0 +1,25 @@
+"""
+Several worker processes on one queue (local backend): every claim runs
+exactly once, and claims held by a crashed worker's expired lease are
+reclaimed and processed.
+"""
+from argparse import Namespace
+
+from benchmarks.bench_workers import run_round
+
+DOCS = 6
+STUCK = 2
+
+
+def test_workers_process_each_claim_once():
+    args = Namespace(docs=DOCS, stuck=STUCK, concurrency=2, llm_latency=0.05, seed=7, timeout=180)
+
+    result = run_round(3, args)
+
+    assert result["double_processed"] == []
+    assert result["never_processed"] == []
+    assert result["statuses"] == {"completed": DOCS + STUCK}
+    # One lease per claim, two for the reclaimed ones (expired lease + the new owner's)
+    assert result["unexpected_lease_counts"] == []
+    assert result["leases_left"] == []
+    assert sum(result["claims_per_worker"]) == DOCS + STUCK
@@ -0,0 +1,430 @@
+"""
+Columnar analytics export of claims and audit outcomes.
+
+Ops and actuarial queries (verdicts, risk scores, line-item amounts) read
+these files instead of the transactional API. Three datasets are written,
+flattened to plain columns and partitioned Hive-style by the claim's
+submission month and policy:
+
+    <dest>/claims/month=2026-10/policy=<policy_id|none>/part-<run>-00000.parquet
+    <dest>/claim_items/...   one row per line item
+    <dest>/findings/...      one row per audit finding
+
+Claims are streamed from the DB in keyset pages ordered by
+(updated_at, id), selecting only structured_data from extracted_data, so
+raw_text is never transferred. Rows are buffered per partition and written
+out every ANALYTICS_EXPORT_FLUSH_ROWS rows, so memory stays constant
+however many claims there are.
+
+Exports are incremental: the (updated_at, id) of the last exported claim is
+kept in <dest>/_watermark.json and the next run starts after it. A claim
+that changes again (e.g. re-audited) is exported again in a later part
+file; readers keep the row with the latest updated_at per claim_id. Files
+are written to a staging directory and moved into place only when the run
+finishes, together with the new watermark, so a failed run leaves nothing
+behind and is simply repeated.
+
+Run from the admin API (POST /api/v1/admin/analytics/export) or as
+`python -m workers.analytics_export [--full]`.
+"""
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+import uuid
+from collections import defaultdict
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from app.core.config import settings
+from app.core.database import supabase
+
+logger = logging.getLogger(__name__)
+
+FINAL_STATUSES = ["completed", "failed"]
+
+# Skip the last few seconds of updates: a transaction that started earlier
+# may still commit an older updated_at behind the watermark
+SETTLE_SECONDS = 60
+
+EXPORT_COLUMNS = (
+    "id, uploaded_by, policy_id, status, priority, created_at, processed_at, updated_at, "
+    "error_message, audit_result, extracted_data->structured_data, "
+    "extracted_data->extraction_method, extracted_data->page_count"
+)
+
+WATERMARK_FILE = "_watermark.json"
+
+
+def _schemas() -> Dict:
+    import pyarrow as pa
+
+    ts = pa.timestamp("us", tz="UTC")
+    return {
+        "claims": pa.schema([
+            ("claim_id", pa.string()),
+            ("tenant", pa.string()),
+            ("policy_id", pa.string()),
+            ("status", pa.string()),
+            ("priority", pa.string()),
+            ("created_at", ts),
+            ("processed_at", ts),
+            ("updated_at", ts),
+            ("hospital_name", pa.string()),
+            ("patient_name", pa.string()),
+            ("diagnosis", pa.string()),
+            ("admission_date", pa.date32()),
+            ("discharge_date", pa.date32()),
+            ("total_claimed", pa.float64()),
+            ("item_count", pa.int32()),
+            ("page_count", pa.int32()),
+            ("extraction_method", pa.string()),
+            ("extraction_source", pa.string()),
+            ("extraction_confidence", pa.string()),
+            ("verdict", pa.string()),
+            ("risk_score", pa.float64()),
+            ("audit_confidence", pa.float64()),
+            ("finding_count", pa.int32()),
+            ("error_message", pa.string()),
+        ]),
+        "claim_items": pa.schema([
+            ("claim_id", pa.string()),
+            ("updated_at", ts),
+            ("item_index", pa.int32()),
+            ("description", pa.string()),
+            ("quantity", pa.float64()),
+            ("rate", pa.float64()),
+            ("amount", pa.float64()),
+        ]),
+        "findings": pa.schema([
+            ("claim_id", pa.string()),
+            ("updated_at", ts),
+            ("finding_index", pa.int32()),
+            ("type", pa.string()),
+            ("severity", pa.string()),
+            ("description", pa.string()),
+            ("verdict", pa.string()),
+        ]),
+    }
+
+
+# --- flattening ---
+
+def _timestamp(value) -> Optional[datetime]:
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+def _date(value) -> Optional[date]:
+    try:
+        return date.fromisoformat(str(value)[:10]) if value else None
+    except ValueError:
+        return None
+
+
+def _float(value) -> Optional[float]:
+    """LLM output isn't always typed: '1,200.50' and '85' become floats, junk becomes None."""
+    if value is None or isinstance(value, bool):
+        return None
+    try:
+        return float(str(value).replace(",", "")) if isinstance(value, str) else float(value)
+    except ValueError:
+        return None
+
+
+def _int(value) -> Optional[int]:
+    number = _float(value)
+    return int(number) if number is not None else None
+
+
+def _text(value) -> Optional[str]:
+    return None if value is None else str(value)
+
+
+def partition_of(row: Dict) -> Tuple[str, str]:
+    """(month, policy) partition for a claim row."""
+    month = str(row.get("created_at") or "")[:7] or "unknown"
+    return month, row.get("policy_id") or "none"
+
+
+def flatten_claim(row: Dict) -> Dict[str, List[Dict]]:
+    """One claim row → its rows in each dataset."""
+    structured = row.get("structured_data") or {}
+    audit = row.get("audit_result") or {}
+    items = structured.get("claim_items") or []
+    findings = audit.get("findings") or []
+    updated_at = _timestamp(row.get("updated_at"))
+    verdict = _text(audit.get("verdict"))
+
+    claim = {
+        "claim_id": row["id"],
+        "tenant": _text(row.get("uploaded_by")),
+        "policy_id": _text(row.get("policy_id")),
+        "status": row.get("status"),
+        "priority": row.get("priority"),
+        "created_at": _timestamp(row.get("created_at")),
+        "processed_at": _timestamp(row.get("processed_at")),
+        "updated_at": updated_at,
+        "hospital_name": _text(structured.get("hospital_name")),
+        "patient_name": _text(structured.get("patient_name")),
+        "diagnosis": _text(structured.get("diagnosis")),
+        "admission_date": _date(structured.get("admission_date")),
+        "discharge_date": _date(structured.get("discharge_date")),
+        "total_claimed": _float(structured.get("total_claimed")),
+        "item_count": len(items),
+        "page_count": _int(row.get("page_count")),
+        "extraction_method": _text(row.get("extraction_method")),
+        "extraction_source": _text(structured.get("extraction_source")),
+        "extraction_confidence": _text(structured.get("extraction_confidence")),
+        "verdict": verdict,
+        "risk_score": _float(audit.get("risk_score")),
+        "audit_confidence": _float(audit.get("confidence")),
+        "finding_count": len(findings),
+        "error_message": _text(row.get("error_message")),
+    }
+    return {
+        "claims": [claim],
+        "claim_items": [
+            {
+                "claim_id": row["id"],
+                "updated_at": updated_at,
+                "item_index": i,
+                "description": _text(item.get("description")),
+                "quantity": _float(item.get("quantity")),
+                "rate": _float(item.get("rate")),
+                "amount": _float(item.get("amount")),
+            }
+            for i, item in enumerate(items) if isinstance(item, dict)
+        ],
+        "findings": [
+            {
+                "claim_id": row["id"],
+                "updated_at": updated_at,
+                "finding_index": i,
+                "type": _text(finding.get("type")),
+                "severity": _text(finding.get("severity")),
+                "description": _text(finding.get("description")),
+                "verdict": verdict,
+            }
+            for i, finding in enumerate(findings) if isinstance(finding, dict)
+        ],
+    }
+
+
+# --- reading ---
+
+def _page(after: Optional[Tuple[str, str]], before: str, tied: bool, page_size: int) -> List[Dict]:
+    query = supabase.table("claims")\
+        .select(EXPORT_COLUMNS)\
+        .in_("status", FINAL_STATUSES)\
+        .lt("updated_at", before)
+    if tied:
+        # Rest of the claims sharing the cursor's updated_at (bulk updates produce many)
+        query = query.eq("updated_at", after[0]).gt("id", after[1]).order("id")
+    else:
+        if after:
+            query = query.gt("updated_at", after[0])
+        query = query.order("updated_at").order("id")
+    return query.limit(page_size).execute().data or []
+
+
+def stream_claims(after: Optional[Tuple[str, str]], before: str, page_size: int) -> Iterator[Dict]:
+    """
+    Finished claims with after < (updated_at, id) and updated_at < before,
+    in (updated_at, id) order, one DB page at a time.
+    """
+    tied = after is not None
+    while True:
+        rows = _page(after, before, tied, page_size)
+        yield from rows
+        if rows:
+            after = (rows[-1]["updated_at"], rows[-1]["id"])
+        if len(rows) == page_size:
+            tied = True
+        elif tied:
+            tied = False  # ties exhausted, continue with later timestamps
+        else:
+            return
+
+
+# --- writing ---
+
+class PartitionedWriter:
+    """Buffers rows per dataset and partition; writes a part file per partition on flush."""
+
+    def __init__(self, staging: Path, run_id: str, file_format: str, flush_rows: int):
+        self.staging = staging
+        self.run_id = run_id
+        self.file_format = file_format
+        self.flush_rows = max(1, flush_rows)
+        self.schemas = _schemas()
+        self.buffers: Dict[Tuple[str, str, str], List[Dict]] = defaultdict(list)
+        self.buffered = 0
+        self.sequence = 0
+        self.rows_written: Dict[str, int] = defaultdict(int)
+        self.files: List[Path] = []
+
+    def add(self, partition: Tuple[str, str], rows: Dict[str, List[Dict]]) -> None:
+        for dataset, dataset_rows in rows.items():
+            if dataset_rows:
+                self.buffers[(dataset, *partition)].extend(dataset_rows)
+                self.buffered += len(dataset_rows)
+        if self.buffered >= self.flush_rows:
+            self.flush()
+
+    def flush(self) -> None:
+        import pyarrow as pa
+        import pyarrow.feather as feather
+        import pyarrow.parquet as pq
+
+        extension = "parquet" if self.file_format == "parquet" else "arrow"
+        for (dataset, month, policy), rows in self.buffers.items():
+            directory = self.staging / dataset / f"month={month}" / f"policy={policy}"
+            directory.mkdir(parents=True, exist_ok=True)
+            path = directory / f"part-{self.run_id}-{self.sequence:05d}.{extension}"
+            table = pa.Table.from_pylist(rows, schema=self.schemas[dataset])
+            if self.file_format == "parquet":
+                pq.write_table(table, path, compression="zstd")
+            else:
+                feather.write_feather(table, path, compression="zstd")
+            self.rows_written[dataset] += len(rows)
+            self.files.append(path)
+        self.sequence += 1
+        self.buffers.clear()
+        self.buffered = 0
+
+
+def _export_dir(dest: Optional[str]) -> Path:
+    return Path(dest or settings.analytics_export_dir or os.path.join(settings.local_data_dir, "analytics"))
+
+
+def read_watermark(dest: Optional[str] = None) -> Optional[Dict]:
+    path = _export_dir(dest) / WATERMARK_FILE
+    if not path.exists():
+        return None
+    return json.loads(path.read_text())
+
+
+def _write_watermark(root: Path, watermark: Dict) -> None:
+    tmp = root / f"{WATERMARK_FILE}.tmp"
+    tmp.write_text(json.dumps(watermark, indent=2))
+    os.replace(tmp, root / WATERMARK_FILE)
+
+
+def export_claims(dest: Optional[str] = None, full: bool = False) -> Dict:
+    """
+    Export claims changed since the last watermark (or all of them).
+
+    Args:
+        dest: Output directory (default ANALYTICS_EXPORT_DIR)
+        full: Ignore the watermark and export every finished claim
+
+    Returns:
+        dict with run_id, claims exported, rows and files per dataset,
+        watermark and elapsed seconds
+    """
+    file_format = settings.analytics_export_format
+    if file_format not in ("parquet", "arrow"):
+        raise ValueError(f"Unknown ANALYTICS_EXPORT_FORMAT '{file_format}' (use parquet or arrow)")
+
+    root = _export_dir(dest)
+    root.mkdir(parents=True, exist_ok=True)
+    previous = None if full else read_watermark(dest)
+    after = (previous["updated_at"], previous["claim_id"]) if previous else None
+    before = (datetime.now(timezone.utc) - timedelta(seconds=SETTLE_SECONDS)).isoformat()
+
+    run_id = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S") + "-" + uuid.uuid4().hex[:6]
+    staging = root / "_staging" / run_id
+    writer = PartitionedWriter(staging, run_id, file_format, settings.analytics_export_flush_rows)
+    started = time.perf_counter()
+    exported, last = 0, None
+    try:
+        for row in stream_claims(after, before, settings.analytics_export_page_size):
+            writer.add(partition_of(row), flatten_claim(row))
+            exported += 1
+            last = row
+        writer.flush()
+
+        # Publish: move part files into place, then advance the watermark
+        for path in writer.files:
+            target = root / path.relative_to(staging)
+            target.parent.mkdir(parents=True, exist_ok=True)
+            os.replace(path, target)
+        watermark = previous
+        if last is not None:
+            watermark = {
+                "updated_at": last["updated_at"],
+                "claim_id": last["id"],
+                "run_id": run_id,
+                "exported_at": datetime.now(timezone.utc).isoformat(),
+            }
+            _write_watermark(root, watermark)
+    finally:
+        shutil.rmtree(staging, ignore_errors=True)
+        try:
+            staging.parent.rmdir()
+        except OSError:
+            pass  # another run's staging directory is still there
+
+    result = {
+        "run_id": run_id,
+        "full": full,
+        "format": file_format,
+        "claims": exported,
+        "rows": dict(writer.rows_written),
+        "files": len(writer.files),
+        "watermark": watermark,
+        "elapsed_seconds": round(time.perf_counter() - started, 3),
+    }
+    logger.info(f"Analytics export {run_id}: {exported} claims, {len(writer.files)} files to {root}")
+    return result
+
+
+# --- background runs (admin API) ---
+
+_run_lock = threading.Lock()
+_last_run: Dict = {}
+
+
+def start_export(full: bool = False) -> bool:
+    """Run export_claims in a background thread; False if one is already running here."""
+    if not _run_lock.acquire(blocking=False):
+        return False
+
+    def run():
+        try:
+            _last_run.clear()
+            _last_run.update(status="running", full=full, started_at=datetime.now(timezone.utc).isoformat())
+            _last_run.update(status="completed", **export_claims(full=full))
+        except Exception as e:
+            logger.error(f"Analytics export failed: {str(e)}")
+            _last_run.update(status="failed", error=str(e))
+        finally:
+            _run_lock.release()
+
+    threading.Thread(target=run, name="analytics-export", daemon=True).start()
+    return True
+
+
+def export_status() -> Dict:
+    return {"last_run": dict(_last_run) or None, "watermark": read_watermark()}
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Export claims to partitioned Parquet/Arrow files")
+    parser.add_argument("--full", action="store_true", help="ignore the watermark and export everything")
+    parser.add_argument("--dest", help="output directory (default ANALYTICS_EXPORT_DIR)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    print(json.dumps(export_claims(dest=args.dest, full=args.full), indent=2))
@@ -1,6 +1,26 @@
 import logging
+import random
+import threading
 import time
+from typing import Optional, Tuple
+from app.core.config import settings
 from app.core.database import supabase
+from app.models import AuditResult, StructuredClaim
+from app.core.metrics import (
+    time_stage,
+    start_claim_timings,
+    stop_claim_timings,
+    CLAIM_RETRIES,
+    CLAIMS_PROCESSED,
+    EXTRACTION_METHOD,
+    IN_FLIGHT,
+    STAGE_SECONDS,
+)
+from app.services.claim_cache import invalidate
+from app.services.claim_stats import record_completion, record_failure
+from app.services.model_router import start_claim_routing, stop_claim_routing
+from app.services.profiler import profile_claim
+from app.services.resource_ledger import charge_storage, claim_ledger, record_usage, tenant_over_budget
 from datetime import datetime
 
 logger = logging.getLogger(__name__)
@@ -16,168 +36,465 @@ def process_claim_with_retry(claim_id: str, max_retries: int = 3) -> bool:
     - Attempt 3: wait 10s
     - Attempt 4: wait 20s (final)
     
-    Returns True if successful, False if all retries exhausted.
+    The claim lease is held (and renewed) across all attempts and backoff
+    waits, so no other worker picks the claim up in between.
+    
+    Returns True if successful (or the claim belongs to another worker),
+    False if all retries exhausted.
     """
-    for attempt in range(1, max_retries + 1):
-        try:
-            logger.info(f"Processing claim {claim_id} (attempt {attempt}/{max_retries})")
-            
-            result = process_claim(claim_id)
-            
-            if result:
+    from workers.leases import ClaimLease
+    
+    lease = ClaimLease.acquire(claim_id)
+    if lease is None:
+        logger.info(f"Claim {claim_id} is not queued or is owned by another worker; skipping")
+        CLAIMS_PROCESSED.labels(status="skipped").inc()
+        return True
+    
+    with lease:
+        for attempt in range(1, max_retries + 1):
+            try:
+                logger.info(f"Processing claim {claim_id} (attempt {attempt}/{max_retries})")
                 if attempt > 1:
-                    logger.info(f"Claim {claim_id} succeeded on attempt {attempt}")
-                return True
-            else:
-                # process_claim returned False (not an exception)
-                logger.warning(f"Claim {claim_id} failed (attempt {attempt}/{max_retries})")
+                    CLAIM_RETRIES.inc()
                 
-        except Exception as e:
-            logger.error(f"Claim {claim_id} error on attempt {attempt}/{max_retries}: {str(e)}")
-            
-            # If this was the last attempt, mark as permanently failed
-            if attempt == max_retries:
-                logger.error(f"Claim {claim_id} exhausted all {max_retries} retries")
-                try:
-                    supabase.table("claims").update({
-                        "status": "failed",
-                        "error_message": f"Failed after {max_retries} attempts: {str(e)}",
-                        "processed_at": datetime.utcnow().isoformat()
-                    }).eq("id", claim_id).execute()
-                except Exception as update_error:
-                    logger.error(f"Failed to update final error status: {str(update_error)}")
-                return False
-            
-            # Calculate exponential backoff: 5s, 10s, 20s
-            wait_time = 5 * (2 ** (attempt - 1))
-            logger.info(f"Retrying claim {claim_id} in {wait_time}s...")
-            time.sleep(wait_time)
+                result = process_claim(claim_id, lease=lease)
+                
+                if result:
+                    if attempt > 1:
+                        logger.info(f"Claim {claim_id} succeeded on attempt {attempt}")
+                    return True
+                else:
+                    # process_claim returned False (not an exception)
+                    logger.warning(f"Claim {claim_id} failed (attempt {attempt}/{max_retries})")
+                    if lease.lost.is_set():
+                        logger.warning(f"Claim {claim_id} lease lost; leaving it to the reclaiming worker")
+                        return False
+                    
+            except Exception as e:
+                logger.error(f"Claim {claim_id} error on attempt {attempt}/{max_retries}: {str(e)}")
+                
+                # If this was the last attempt, mark as permanently failed
+                if attempt == max_retries:
+                    logger.error(f"Claim {claim_id} exhausted all {max_retries} retries")
+                    try:
+                        supabase.table("claims").update({
+                            "status": "failed",
+                            "error_message": f"Failed after {max_retries} attempts: {str(e)}",
+                            "processed_at": datetime.utcnow().isoformat()
+                        }).eq("id", claim_id).eq("lease_owner", lease.owner).execute()
+                        invalidate(claim_id)
+                    except Exception as update_error:
+                        logger.error(f"Failed to update final error status: {str(update_error)}")
+                    record_failure(lease.uploaded_by)
+                    return False
+                
+                # Calculate exponential backoff: 5s, 10s, 20s
+                wait_time = 5 * (2 ** (attempt - 1))
+                logger.info(f"Retrying claim {claim_id} in {wait_time}s...")
+                time.sleep(wait_time)
+        
+        # Every attempt ended with the claim marked failed
+        record_failure(lease.uploaded_by)
     
     return False
 
 
-def process_claim(claim_id: str) -> bool:
+def process_claim(claim_id: str, lease=None) -> bool:
     """
     Process a single claim: extract text from PDF and store structured data.
     
     Pipeline: queued → text_extraction → completed/failed
     
+    Per-stage timings are stored on the claim's `timings` column and the
+    resources the claim used (CPU, OCR pages, LLM tokens, bytes stored and
+    their cost) on `resources`; claims of a tenant over its daily budget
+    take the cheap path (resource_ledger). Claims flagged with `profile`,
+    and a PROFILE_SAMPLE_RATE fraction of the rest, are profiled (profiler).
+    
+    Args:
+        claim_id: Claim to process
+        lease: ClaimLease already held by the caller; if None the claim's
+            lease is acquired (and released) here
+    
     Returns True if successful, False otherwise.
     """
+    from workers.leases import ClaimLease
+    
+    own_lease = lease is None
+    if own_lease:
+        lease = ClaimLease.acquire(claim_id)
+        if lease is None:
+            logger.info(f"Claim {claim_id} is not queued or is owned by another worker; skipping")
+            CLAIMS_PROCESSED.labels(status="skipped").inc()
+            return True
+    
+    over_budget = tenant_over_budget(lease.uploaded_by)
+    timings = start_claim_timings()
+    routing = start_claim_routing(over_budget)
+    IN_FLIGHT.inc()
+    started = time.perf_counter()
+    try:
+        with profile_claim(claim_id, lease.profile), claim_ledger(timings, over_budget) as ledger:
+            success = _run_pipeline(claim_id, timings, routing, ledger, lease)
+        # The claim's stored timings get their "total" from _run_pipeline, just before the final write
+        STAGE_SECONDS.labels(stage="total").observe(time.perf_counter() - started)
+        record_usage(lease.uploaded_by, ledger)
+        CLAIMS_PROCESSED.labels(status="completed" if success else "failed").inc()
+        return success
+    finally:
+        IN_FLIGHT.dec()
+        stop_claim_timings()
+        stop_claim_routing()
+        if own_lease:
+            lease.release()
+
+
+def _run_pipeline(claim_id: str, timings: dict, routing: dict, ledger, lease) -> bool:
+    """
+    Run the claim pipeline stages, recording into `timings`, `routing` and
+    the resource `ledger`.
+    
+    The claim is read once and written twice: when the lease is acquired
+    (status and lease) and when it finishes (status, extracted data, audit
+    result, timings and lease release together). Retries re-read the claim.
+    """
+    from app.models import encode
+    from app.services.claim_state import ClaimState
+    
+    started = time.perf_counter()
+    state = None
     try:
-        # 1. Fetch the claim
-        claim = supabase.table("claims").select("*").eq("id", claim_id).single().execute()
+        # 1. Fetch the claim (once; the auditor reuses this copy). The first
+        #    attempt reuses the copy loaded when the lease was acquired.
+        state = lease.take_state() or ClaimState.load(claim_id)
         
-        if not claim.data:
+        if state is None:
             logger.error(f"Claim {claim_id} not found")
             return False
         
-        file_path = claim.data.get("file_path")
+        file_path = state.get("file_path")
         if not file_path:
             logger.error(f"Claim {claim_id} has no file_path")
             return False
         
         logger.info(f"Processing claim {claim_id}")
         
-        # 2. Update status to text_extraction
-        supabase.table("claims").update({
-            "status": "text_extraction"
-        }).eq("id", claim_id).execute()
-        
-        # 3. Download PDF from storage
-        from app.services.text_extractor import download_file_from_storage, extract_text_from_pdf
-        
-        logger.info(f"Downloading PDF for claim {claim_id}")
-        pdf_bytes = download_file_from_storage(file_path)
-        
-        if not pdf_bytes:
-            raise Exception("Failed to download PDF from storage")
-        
-        # 4. Extract text
-        logger.info(f"Extracting text from claim {claim_id}")
-        extraction_result = extract_text_from_pdf(pdf_bytes)
-        
-        if not extraction_result.get("success"):
-            raise Exception(f"Text extraction failed: {extraction_result.get('error', 'Unknown error')}")
-        
-        # 5. Normalize text into structured data
-        from app.services.claim_normalizer import normalize_claim
+        # 2. Update status to text_extraction (already done on lease acquisition)
+        if state.get("status") != "text_extraction":
+            state.transition("text_extraction")
         
-        logger.info(f"Normalizing claim {claim_id}")
-        raw_text = extraction_result["raw_text"]
-        structured_data = normalize_claim(raw_text)
+        # 3-6. Text and structured data; a re-upload of an earlier claim's document reuses its extraction
+        extracted_data = _reused_extraction(state)
+        if extracted_data is not None:
+            structured_data = StructuredClaim.from_dict(extracted_data["structured_data"])
+        else:
+            extracted_data, structured_data = _extract(claim_id, file_path, ledger)
+        raw_text = extracted_data["raw_text"]
+        state.stage(extracted_data=extracted_data)
+        charge_storage("extracted_data", len(encode(extracted_data)))
         
-        # 6. Store extracted data with structured fields
-        extracted_data = {
-            "raw_text": raw_text,
-            "page_count": extraction_result["page_count"],
-            "extraction_method": extraction_result["extraction_method"],
-            "extracted_at": datetime.utcnow().isoformat(),
-            "structured_data": structured_data  # Normalized claim data
-        }
-        
-        # 7. Update status to completed with extracted data (BEFORE audit so audit can access it)
-        supabase.table("claims").update({
-            "status": "completed",
-            "extracted_data": extracted_data,
-            "processed_at": datetime.utcnow().isoformat()
-        }).eq("id", claim_id).execute()
-        
-        # 8. Run AI Audit (Mixtral analysis) - runs AFTER data is saved
+        # 7. Run AI Audit on the in-memory structured data
+        audit_result = None
+        audit_error_message = None
         try:
-            from app.services.audit_engine import audit_claim
+            from app.services.audit_engine import run_audit
             
             logger.info(f"Running AI audit for claim {claim_id}")
-            audit_result = audit_claim(claim_id, policy_text=None)
+            with time_stage("audit"):
+                audit_result = run_audit(structured_data, state.get("policy_text"))
             
-            # Audit results are saved by audit_engine
-            logger.info(f"Audit completed: {audit_result.get('verdict')} with risk score {audit_result.get('risk_score')}")
+            logger.info(f"Audit completed: {audit_result.verdict} with risk score {audit_result.risk_score}")
         except Exception as audit_error:
             logger.error(f"Audit failed (non-critical): {str(audit_error)}")
+            audit_error_message = str(audit_error)
             # Continue even if audit fails
         
-        logger.info(f"Claim {claim_id} processed successfully. Extracted {len(raw_text)} chars, {len(structured_data.get('claim_items', []))} items, confidence={structured_data.get('extraction_confidence')}")
+        # 8. Cross-claim duplicate check; matches become findings on the audit result
+        if settings.duplicate_detection:
+            try:
+                from app.services.duplicate_index import apply_duplicate_findings, check_duplicates
+                from app.services.ingest_dedup import same_document_claims
+                
+                with time_stage("duplicate_check"):
+                    # The same upload filed under another policy isn't a duplicate bill
+                    same_document = same_document_claims(claim_id, state.get("uploaded_by"), state.get("content_hash"),
+                                                         state.get("source_claim_id"))
+                    duplicates = check_duplicates(claim_id, state.get("uploaded_by"), raw_text, structured_data,
+                                                  exclude=same_document)
+                if duplicates and audit_result is None:
+                    # No audit to attach the matches to: keep them on a result that needs review
+                    logger.warning(f"Claim {claim_id} matches {len(duplicates)} earlier claims but has no audit result; marking it for review")
+                    audit_result = AuditResult(
+                        explanation="The audit failed; the duplicate matches below need review.",
+                        error=audit_error_message,
+                    )
+                if duplicates:
+                    audit_result = apply_duplicate_findings(audit_result, duplicates)
+            except Exception as duplicate_error:
+                logger.error(f"Duplicate check failed (non-critical): {str(duplicate_error)}")
+        if audit_result is not None:
+            audit_data = audit_result.to_dict()
+            state.stage(audit_result=audit_data)
+            charge_storage("audit_result", len(encode(audit_data)))
+        
+        # 9. Single write: completed + extracted data + audit result + timings + routing + resources + lease release
+        timings["total"] = round(time.perf_counter() - started, 4)
+        state.transition(
+            "completed",
+            processed_at=datetime.utcnow().isoformat(),
+            timings=timings,
+            routing=routing,
+            resources=ledger.to_dict(),
+            normalizer_version=structured_data.normalizer_version or 0,
+            **lease.handoff(),
+        )
+        record_completion(state.get("uploaded_by"), audit_result, structured_data)
+        
+        logger.info(f"Claim {claim_id} processed successfully. Extracted {len(raw_text)} chars, {len(structured_data.items)} items, confidence={structured_data.extraction_confidence}")
         return True
         
     except Exception as e:
         logger.error(f"Error processing claim {claim_id}: {str(e)}")
         
         # Set status to failed with error message
+        timings["total"] = round(time.perf_counter() - started, 4)
+        failure = {
+            "status": "failed",
+            "error_message": str(e),
+            "processed_at": datetime.utcnow().isoformat(),
+            "timings": timings,
+            "routing": routing,
+            "resources": ledger.to_dict(),
+        }
         try:
-            supabase.table("claims").update({
-                "status": "failed",
-                "error_message": str(e),
-                "processed_at": datetime.utcnow().isoformat()
-            }).eq("id", claim_id).execute()
+            if state is not None:
+                # Drop half-finished stage output; record only the failure
+                state.pending.clear()
+                state.transition(**failure)
+            else:
+                supabase.table("claims").update(failure).eq("id", claim_id).execute()
+                invalidate(claim_id)
         except Exception as update_error:
             logger.error(f"Failed to update error status: {str(update_error)}")
         
         return False
 
 
+def _reused_extraction(state) -> Optional[dict]:
+    """The extracted data of the earlier claim this one re-uploads (source_claim_id), if it completed."""
+    source_claim_id = state.get("source_claim_id")
+    if not source_claim_id:
+        return None
+    from app.services.ingest_dedup import source_extraction
+    
+    with time_stage("reuse_extraction"):
+        extracted = source_extraction(source_claim_id)
+    if extracted is None:
+        return None
+    logger.info(f"Claim {state.id} reuses the extraction of claim {source_claim_id}")
+    return {**extracted, "reused_from": source_claim_id}
+
+
+def _extract(claim_id: str, file_path: str, ledger) -> Tuple[dict, StructuredClaim]:
+    """Download, extract text and normalize (steps 3-6). Returns the extracted data and structured data."""
+    # 3. Download PDF from storage
+    from app.services.text_extractor import download_file_from_storage, extract_text_from_pdf
+    
+    logger.info(f"Downloading PDF for claim {claim_id}")
+    with time_stage("download"):
+        pdf_bytes = download_file_from_storage(file_path)
+    
+    if not pdf_bytes:
+        raise Exception("Failed to download PDF from storage")
+    charge_storage("document", len(pdf_bytes))
+    
+    # 4. Extract text (over-budget tenants get the cheapest OCR profile)
+    logger.info(f"Extracting text from claim {claim_id}")
+    extraction_result = extract_text_from_pdf(
+        pdf_bytes, ocr_profile=settings.budget_ocr_profile if ledger.over_budget else None
+    )
+    EXTRACTION_METHOD.labels(method=extraction_result.get("extraction_method", "unknown")).inc()
+    
+    if not extraction_result.get("success"):
+        raise Exception(f"Text extraction failed: {extraction_result.get('error', 'Unknown error')}")
+    
+    # 5. Normalize text into structured data
+    from app.services.claim_normalizer import normalize_claim
+    
+    logger.info(f"Normalizing claim {claim_id}")
+    raw_text = extraction_result["raw_text"]
+    table = extraction_result.get("table")
+    structured_data = normalize_claim(
+        raw_text,
+        table=table,
+        extraction_method=extraction_result["extraction_method"],
+        page_count=extraction_result.get("page_count"),
+        ocr_confidence=extraction_result.get("ocr_confidence"),
+    )
+    
+    # Canonical hospital and tariff IDs from master data (used by the audit's overcharge checks)
+    try:
+        from app.services.master_data import annotate_claim
+    
+        with time_stage("master_data"):
+            structured_data = annotate_claim(structured_data, raw_text)
+    except Exception as master_data_error:
+        logger.error(f"Master data matching failed (non-critical): {str(master_data_error)}")
+    
+    # 6. Extracted data with structured fields
+    extracted_data = {
+        "raw_text": raw_text,
+        "page_count": extraction_result["page_count"],
+        "extraction_method": extraction_result["extraction_method"],
+        "ocr_confidence": extraction_result.get("ocr_confidence"),  # for re-normalizing later
+        "extracted_at": datetime.utcnow().isoformat(),
+        "structured_data": structured_data.to_dict(),  # Normalized claim data
+        # Table summary only; its rows are already in structured_data.claim_items
+        "table": {key: value for key, value in table.items() if key != "line_items"} if table else None,
+    }
+    return extracted_data, structured_data
+
+
+def submit_queued_claims(dispatcher, limit: Optional[int] = None) -> int:
+    """
+    Submit queued claims to the dispatcher.
+    
+    With a `limit`, a window of the oldest limit * 4 claims is read and a
+    random `limit` of them submitted, so workers polling the same queue
+    don't all race for the same rows; the lease decides who actually runs
+    each one.
+    
+    Returns the number of claims newly submitted.
+    """
+    query = supabase.table("claims")\
+        .select("id, uploaded_by, priority")\
+        .eq("status", "queued")\
+        .order("created_at")
+    if limit:
+        query = query.limit(limit * 4)
+    result = query.execute()
+    
+    claims = [claim for claim in result.data or [] if not dispatcher.is_active(claim["id"])]
+    random.shuffle(claims)
+    if limit:
+        claims = claims[:limit]
+    submitted = 0
+    for claim in claims:
+        # Claims picked up here weren't started at upload time; treat them as backfill
+        if dispatcher.submit(claim["id"], tenant=claim.get("uploaded_by"), priority=claim.get("priority") or "bulk"):
+            submitted += 1
+    return submitted
+
+
 def process_queued_claims():
     """
-    Fetch and process all queued claims.
+    Fetch all queued claims and process them on the worker pool.
     This would typically be run by a scheduler/cron job.
+    
+    Safe to run on several replicas at once: each claim is processed only by
+    the worker that acquires its lease.
     """
     try:
-        # Fetch all queued claims
-        result = supabase.table("claims").select("id").eq("status", "queued").execute()
+        from workers.leases import reclaim_expired_leases
+        from workers.dispatcher import get_dispatcher
+        
+        reclaim_expired_leases()
         
-        if not result.data:
+        dispatcher = get_dispatcher()
+        submitted = submit_queued_claims(dispatcher)
+        if not submitted:
             logger.info("No queued claims to process")
             return
         
-        logger.info(f"Found {len(result.data)} queued claims")
-        
-        for claim in result.data:
-            process_claim(claim["id"])
+        logger.info(f"Found {submitted} queued claims")
+        dispatcher.wait_idle()
             
     except Exception as e:
         logger.error(f"Error fetching queued claims: {str(e)}")
 
 
+def run_worker(poll_seconds: Optional[float] = None, until_empty: bool = False, stop: Optional[threading.Event] = None) -> None:
+    """
+    Long-running worker loop for standalone worker processes.
+    
+    Reclaims expired leases, then keeps the local dispatcher topped up with
+    queued claims, polling every `poll_seconds` when there is nothing to do.
+    Any number of these can run against the same database.
+    
+    Args:
+        poll_seconds: Idle poll interval (default WORKER_POLL_SECONDS)
+        until_empty: Return once the queue is empty and local work is done
+        stop: Event that ends the loop when set
+    """
+    from workers.dispatcher import get_dispatcher
+    from workers.leases import reclaim_expired_leases, worker_id
+    
+    poll_seconds = poll_seconds or settings.worker_poll_seconds
+    stop = stop or threading.Event()
+    dispatcher = get_dispatcher()
+    logger.info(f"Worker {worker_id()} started (concurrency {dispatcher.concurrency})")
+    
+    while not stop.is_set():
+        try:
+            reclaim_expired_leases()
+            submitted = 0
+            # Keep about one batch queued locally; leave the rest for other workers
+            if dispatcher.scheduler.queued < dispatcher.concurrency:
+                submitted = submit_queued_claims(dispatcher, limit=dispatcher.concurrency * 2)
+        except Exception as e:
+            logger.error(f"Worker poll failed: {str(e)}")
+            submitted = 0
+        
+        if until_empty and not submitted and dispatcher.wait_idle(timeout=0):
+            break
+        # Poll again soon while there is work, back off when the queue is empty
+        stop.wait(min(poll_seconds, 0.5) if submitted else poll_seconds)
+    
+    dispatcher.wait_idle()
+    logger.info(f"Worker {worker_id()} stopped")
+
+
 if __name__ == "__main__":
-    # For testing: process all queued claims
+    import argparse
+    import signal
+    
+    parser = argparse.ArgumentParser(description="PriClaim claim worker")
+    parser.add_argument("--once", action="store_true", help="process the current queue and exit")
+    args = parser.parse_args()
+    
     logging.basicConfig(level=logging.INFO)
-    process_queued_claims()
+    
+    if settings.worker_metrics_port:
+        from prometheus_client import start_http_server
+        start_http_server(settings.worker_metrics_port)
+    
+    if settings.warmup_on_startup:
+        from app.services.warmup import warm_up
+        warm_up()
+    
+    # kill -USR2 <pid> starts a profile of this worker; the next one stops it and writes it out.
+    # The handler only sets an event: toggling takes the profiler's lock and writes files, which
+    # would deadlock if the signal interrupted the main thread while it held that lock.
+    from app.services.profiler import toggle_profile
+    
+    profile_requested = threading.Event()
+    
+    def _profile_toggler():
+        while True:
+            profile_requested.wait()
+            profile_requested.clear()
+            try:
+                toggle_profile()
+            except Exception as e:
+                logger.error(f"Profiler toggle failed: {str(e)}")
+    
+    threading.Thread(target=_profile_toggler, name="profile-toggle", daemon=True).start()
+    signal.signal(signal.SIGUSR2, lambda *_: profile_requested.set())
+    
+    if args.once:
+        process_queued_claims()
+    else:
+        stop_event = threading.Event()
+        signal.signal(signal.SIGTERM, lambda *_: stop_event.set())
+        signal.signal(signal.SIGINT, lambda *_: stop_event.set())
+        run_worker(stop=stop_event)
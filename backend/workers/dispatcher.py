@@ -0,0 +1,114 @@
+"""
+In-process claim dispatcher.
+
+Runs claims on a bounded set of worker threads (WORKER_CONCURRENCY)
+instead of one unbounded thread per upload. Workers take claims from the
+FairScheduler, so tenants share capacity fairly and urgent claims go
+first. Queue depth and utilization feed the readiness probe.
+
+A claim that is already queued or running here is not submitted twice, so
+the worker loop can re-poll the queue freely; ownership across processes
+is settled by the claim lease (workers.leases).
+"""
+import logging
+import threading
+from typing import Dict, List, Optional, Set
+
+from app.core.config import settings
+from app.core.metrics import QUEUE_DEPTH
+from workers.scheduler import FairScheduler
+
+logger = logging.getLogger(__name__)
+
+
+class ClaimDispatcher:
+    def __init__(self, concurrency: int, scheduler: FairScheduler):
+        self.concurrency = concurrency
+        self.scheduler = scheduler
+        self._threads: List[threading.Thread] = []
+        self._start_lock = threading.Lock()
+        self._active: Set[str] = set()
+        self._active_lock = threading.Lock()
+
+    def _ensure_started(self) -> None:
+        if self._threads:
+            return
+        with self._start_lock:
+            if self._threads:
+                return
+            for i in range(self.concurrency):
+                thread = threading.Thread(target=self._work, name=f"claim-worker-{i}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def submit(self, claim_id: str, tenant: Optional[str] = None, priority: str = "interactive") -> bool:
+        """
+        Queue a claim for processing (with retries).
+
+        Returns False if the claim is already queued or running here.
+        """
+        self._ensure_started()
+        with self._active_lock:
+            if claim_id in self._active:
+                return False
+            self._active.add(claim_id)
+        try:
+            self.scheduler.submit(claim_id, tenant, priority)
+        except Exception:
+            with self._active_lock:
+                self._active.discard(claim_id)
+            raise
+        QUEUE_DEPTH.inc()
+        return True
+
+    def is_active(self, claim_id: str) -> bool:
+        with self._active_lock:
+            return claim_id in self._active
+
+    def _work(self) -> None:
+        from workers.claim_processor import process_claim_with_retry
+
+        while True:
+            job = self.scheduler.next()
+            if job is None:
+                return
+            QUEUE_DEPTH.dec()
+            try:
+                process_claim_with_retry(job.claim_id)
+            except Exception as e:
+                logger.error(f"Background processing failed for {job.claim_id}: {str(e)}")
+            finally:
+                with self._active_lock:
+                    self._active.discard(job.claim_id)
+                self.scheduler.done(job)
+
+    def wait_idle(self, timeout: Optional[float] = None) -> bool:
+        """Block until nothing is queued or running."""
+        return self.scheduler.wait_idle(timeout)
+
+    def stats(self) -> Dict:
+        running = self.scheduler.running
+        return {
+            "queue_depth": self.scheduler.queued,
+            "running": running,
+            "concurrency": self.concurrency,
+            "utilization": round(running / self.concurrency, 3) if self.concurrency else 0.0,
+        }
+
+
+_dispatcher: Optional[ClaimDispatcher] = None
+_dispatcher_lock = threading.Lock()
+
+
+def get_dispatcher() -> ClaimDispatcher:
+    """Process-wide dispatcher, created on first use."""
+    global _dispatcher
+    if _dispatcher is None:
+        with _dispatcher_lock:
+            if _dispatcher is None:
+                scheduler = FairScheduler(
+                    tenant_max_concurrency=settings.tenant_max_concurrency,
+                    aging_seconds=settings.scheduler_aging_seconds,
+                )
+                _dispatcher = ClaimDispatcher(settings.worker_concurrency, scheduler)
+    return _dispatcher
@@ -0,0 +1,210 @@
+"""
+Lease-based claim ownership.
+
+Several worker processes (or API replicas) can poll the same queue. A
+worker owns a claim only after atomically moving it from `queued` to
+`text_extraction` with its id in `lease_owner` and an expiry in
+`lease_expires_at`; the update is guarded by the claim's `version`, so
+when two workers race for the same row exactly one update matches.
+
+While the claim runs, a heartbeat thread pushes the expiry forward every
+LEASE_SECONDS / 3. If the worker dies, the lease runs out and
+reclaim_expired_leases() puts the claim back in the queue (or marks it
+failed after LEASE_MAX_ATTEMPTS expiries, so a claim that crashes every
+worker doesn't loop forever). Reclaiming bumps `version`, so a worker that
+was merely slow and lost its lease can no longer write the claim.
+"""
+import logging
+import os
+import socket
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Optional
+
+from app.core.config import settings
+from app.core.database import supabase
+from app.core.metrics import LEASE_EVENTS
+from app.services.claim_cache import invalidate
+from app.services.claim_state import ClaimState, ClaimVersionConflict
+from app.services.claim_stats import record_failure
+
+logger = logging.getLogger(__name__)
+
+RELEASED = {"lease_owner": None, "lease_expires_at": None}
+
+
+def worker_id() -> str:
+    """Identity written to `lease_owner` by this process."""
+    return settings.worker_id or f"{socket.gethostname()}:{os.getpid()}"
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _expiry(ttl: float) -> str:
+    return (_now() + timedelta(seconds=ttl)).isoformat()
+
+
+class ClaimLease:
+    def __init__(self, state: ClaimState, owner: str, ttl: float):
+        self.claim_id = state.id
+        self.uploaded_by = state.get("uploaded_by")
+        self.profile = bool(state.get("profile"))
+        self.owner = owner
+        self.ttl = ttl
+        self.lost = threading.Event()
+        self.released = False
+        self._state: Optional[ClaimState] = state
+        self._stop = threading.Event()
+        self._heartbeat_thread: Optional[threading.Thread] = None
+
+    @classmethod
+    def acquire(cls, claim_id: str, owner: Optional[str] = None, ttl: Optional[float] = None) -> Optional["ClaimLease"]:
+        """
+        Take ownership of a queued claim and start processing it.
+
+        Returns None if the claim doesn't exist, isn't queued, or another
+        worker acquired it first.
+        """
+        owner = owner or worker_id()
+        ttl = ttl or settings.lease_seconds
+
+        state = ClaimState.load(claim_id)
+        if state is None or state.get("status") != "queued":
+            return None
+
+        try:
+            # Acquiring the lease is also the queued -> text_extraction transition
+            state.transition(
+                "text_extraction",
+                lease_owner=owner,
+                lease_expires_at=_expiry(ttl),
+                lease_attempts=(state.get("lease_attempts") or 0) + 1,
+            )
+        except ClaimVersionConflict:
+            LEASE_EVENTS.labels(event="contended").inc()
+            logger.info(f"Claim {claim_id} was acquired by another worker")
+            return None
+
+        LEASE_EVENTS.labels(event="acquired").inc()
+        lease = cls(state, owner, ttl)
+        lease._start_heartbeat()
+        return lease
+
+    def take_state(self) -> Optional[ClaimState]:
+        """The claim as loaded at acquisition; returned once, then None."""
+        state, self._state = self._state, None
+        return state
+
+    def renew(self) -> bool:
+        """Push the expiry forward. Returns False if the lease was lost."""
+        result = supabase.table("claims")\
+            .update({"lease_expires_at": _expiry(self.ttl)})\
+            .eq("id", self.claim_id)\
+            .eq("lease_owner", self.owner)\
+            .execute()
+        if not result.data:
+            self.lost.set()
+            LEASE_EVENTS.labels(event="lost").inc()
+            logger.warning(f"Lost lease on claim {self.claim_id}")
+            return False
+        return True
+
+    def _start_heartbeat(self) -> None:
+        self._heartbeat_thread = threading.Thread(
+            target=self._heartbeat, name=f"lease-{self.claim_id}", daemon=True
+        )
+        self._heartbeat_thread.start()
+
+    def _heartbeat(self) -> None:
+        interval = max(self.ttl / 3, 0.1)
+        while not self._stop.wait(interval):
+            try:
+                if not self.renew():
+                    return
+            except Exception as e:
+                # Keep trying; the lease only lapses after a full ttl without renewal
+                logger.warning(f"Lease heartbeat failed for claim {self.claim_id}: {str(e)}")
+
+    def handoff(self) -> Dict[str, None]:
+        """
+        Stop renewing and return the fields that clear the lease, for the
+        caller to include in its final claim write.
+        """
+        self._stop.set()
+        self.released = True
+        return dict(RELEASED)
+
+    def release(self) -> None:
+        """Stop renewing and clear the lease unless handoff() already did."""
+        self._stop.set()
+        if self.released:
+            return
+        self.released = True
+        try:
+            supabase.table("claims")\
+                .update(RELEASED)\
+                .eq("id", self.claim_id)\
+                .eq("lease_owner", self.owner)\
+                .execute()
+        except Exception as e:
+            logger.error(f"Failed to release lease on claim {self.claim_id}: {str(e)}")
+
+    def __enter__(self) -> "ClaimLease":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.release()
+
+
+def reclaim_expired_leases(max_attempts: Optional[int] = None) -> Dict[str, int]:
+    """
+    Return claims whose lease expired (crashed or hung worker) to the queue.
+
+    Claims that already used up `max_attempts` leases are marked failed.
+    Each update re-checks owner and expiry, so a lease renewed in the
+    meantime is left alone.
+
+    Returns:
+        Counts of claims requeued and abandoned
+    """
+    max_attempts = max_attempts or settings.lease_max_attempts
+    now = _now().isoformat()
+
+    expired = supabase.table("claims")\
+        .select("id, status, version, lease_owner, lease_attempts, uploaded_by")\
+        .lt("lease_expires_at", now)\
+        .execute()
+
+    counts = {"requeued": 0, "abandoned": 0}
+    for row in expired.data or []:
+        attempts = row.get("lease_attempts") or 0
+        if attempts >= max_attempts:
+            payload = {
+                **RELEASED,
+                "status": "failed",
+                "error_message": f"Abandoned after {attempts} expired leases (last owner {row.get('lease_owner')})",
+                "processed_at": datetime.utcnow().isoformat(),
+            }
+            outcome = "abandoned"
+        else:
+            payload = {**RELEASED, "status": "queued"}
+            outcome = "requeued"
+        payload["version"] = (row.get("version") or 0) + 1
+
+        result = supabase.table("claims")\
+            .update(payload)\
+            .eq("id", row["id"])\
+            .eq("lease_owner", row.get("lease_owner"))\
+            .lt("lease_expires_at", now)\
+            .execute()
+        if result.data:
+            invalidate(row["id"])
+            counts[outcome] += 1
+            LEASE_EVENTS.labels(event="reclaimed" if outcome == "requeued" else outcome).inc()
+            if outcome == "abandoned":
+                record_failure(row.get("uploaded_by"))
+            logger.warning(f"Claim {row['id']} lease held by {row.get('lease_owner')} expired; {outcome}")
+
+    return counts
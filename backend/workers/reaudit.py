@@ -0,0 +1,327 @@
+"""
+Bulk re-audit after a policy changes.
+
+When an admin edits a policy's text, every completed claim that was audited
+against it has a stale verdict. A re-audit job finds those claims
+(claims.policy_id) and audits them again from the structured_data already
+stored in extracted_data, so nothing is downloaded or OCRed again. Queued
+claims just get the new policy text; claims being processed at that moment
+may have loaded the old one, so the job waits for them to complete
+(up to REAUDIT_IN_FLIGHT_TIMEOUT_SECONDS) and re-audits them too.
+
+Claims are loaded in batches of REAUDIT_BATCH_SIZE; within a batch,
+REAUDIT_CLAIMS_PER_CALL claims share one audit LLM call (the policy prompt
+is sent once per call, not once per claim) and REAUDIT_CONCURRENCY calls
+run at a time. The job has its own rate limiter
+(REAUDIT_REQUESTS_PER_MINUTE / REAUDIT_TOKENS_PER_MINUTE) on top of the
+process-wide LLM limiter, so a large policy doesn't starve live claims of
+Groq quota.
+
+A dry run walks the same claims and only builds the prompts, to estimate
+tokens and cost before committing to the real run.
+
+Jobs run in a background thread of the process that started them and their
+progress is kept in memory there (GET /api/v1/admin/reaudit/{job_id}).
+"""
+import logging
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from typing import Dict, Iterator, List, Optional
+
+from app.core.config import settings
+from app.core.database import supabase
+from app.models import AuditResult, StructuredClaim
+from app.services.audit_engine import needs_llm_audit, run_audits, save_audit_result
+from app.services.claim_state import ClaimVersionConflict
+from app.services.claim_stats import record_reaudit
+from app.services.duplicate_index import apply_duplicate_findings
+from app.services.groq_service import (
+    EXPECTED_AUDIT_COMPLETION_TOKENS,
+    MODEL_PRICING,
+    AuditPolicy,
+    build_audit_messages,
+    build_batch_audit_messages,
+    estimate_message_tokens,
+    prepare_policy,
+)
+from app.services.model_router import route_audit
+from app.services.rate_limiter import RateLimiter
+
+logger = logging.getLogger(__name__)
+
+PAGE_SIZE = 1000
+IN_FLIGHT_POLL_SECONDS = 2.0
+MAX_JOBS_KEPT = 50
+
+
+@dataclass
+class ReauditJob:
+    policy_id: str
+    dry_run: bool = False
+    id: str = field(default_factory=lambda: str(uuid.uuid4()))
+    status: str = "pending"  # pending, running, completed, failed
+    total: int = 0
+    processed: int = 0
+    failed: int = 0
+    skipped: int = 0  # changed by someone else twice while being re-audited; previous verdict kept
+    verdict_changes: Dict[str, int] = field(default_factory=dict)
+    estimated_prompt_tokens: int = 0
+    estimated_completion_tokens: int = 0
+    estimated_cost_usd: float = 0.0
+    created_at: str = field(default_factory=lambda: datetime.now(timezone.utc).isoformat())
+    started: Optional[float] = None
+    finished: Optional[float] = None
+    error: Optional[str] = None
+
+    def to_dict(self) -> Dict:
+        data = asdict(self)
+        elapsed = ((self.finished or time.monotonic()) - self.started) if self.started else 0.0
+        remaining = self.total - self.processed
+        data.update(
+            percent=round(100.0 * self.processed / self.total, 1) if self.total else (100.0 if self.finished else 0.0),
+            elapsed_seconds=round(elapsed, 1),
+            eta_seconds=round(elapsed / self.processed * remaining, 1) if self.processed and remaining else None,
+        )
+        del data["started"], data["finished"]
+        return data
+
+
+_jobs: Dict[str, ReauditJob] = {}
+_jobs_lock = threading.Lock()
+
+
+def find_affected_claims(policy_id: str, status: str = "completed") -> List[str]:
+    """Ids of the policy's claims in `status` (completed: audited against it)."""
+    ids: List[str] = []
+    start = 0
+    while True:
+        rows = supabase.table("claims")\
+            .select("id")\
+            .eq("policy_id", policy_id)\
+            .eq("status", status)\
+            .order("id")\
+            .range(start, start + PAGE_SIZE - 1)\
+            .execute().data or []
+        ids.extend(row["id"] for row in rows)
+        if len(rows) < PAGE_SIZE:
+            return ids
+        start += PAGE_SIZE
+
+
+def _wait_for_in_flight(job: ReauditJob, claim_ids: List[str]) -> List[str]:
+    """
+    Wait (up to REAUDIT_IN_FLIGHT_TIMEOUT_SECONDS) for claims that were being
+    processed when the policy changed to finish.
+
+    Returns:
+        The ones that completed; the rest (failed, or still running at the
+        deadline) are counted as processed without a re-audit
+    """
+    deadline = time.monotonic() + settings.reaudit_in_flight_timeout_seconds
+    while True:
+        rows = supabase.table("claims")\
+            .select("id, status")\
+            .in_("id", claim_ids)\
+            .execute().data or []
+        running = [row["id"] for row in rows if row["status"] in ("queued", "text_extraction")]
+        if not running or time.monotonic() >= deadline:
+            break
+        time.sleep(IN_FLIGHT_POLL_SECONDS)
+
+    completed = [row["id"] for row in rows if row["status"] == "completed"]
+    if len(completed) < len(claim_ids):
+        logger.warning(f"Re-audit {job.id}: {len(claim_ids) - len(completed)} claims in flight during the policy "
+                       f"update didn't complete ({len(running)} still running); not re-audited")
+        with _jobs_lock:
+            job.processed += len(claim_ids) - len(completed)
+    return completed
+
+
+def _load_batches(claim_ids: List[str]) -> Iterator[List[Dict]]:
+    """Stored claim rows, REAUDIT_BATCH_SIZE at a time."""
+    size = max(1, settings.reaudit_batch_size)
+    for i in range(0, len(claim_ids), size):
+        yield supabase.table("claims")\
+            .select("id, version, uploaded_by, processed_at, extracted_data, policy_text, audit_result")\
+            .in_("id", claim_ids[i:i + size])\
+            .execute().data or []
+
+
+def _structured_data(claim: Dict) -> Optional[StructuredClaim]:
+    structured_data = (claim.get("extracted_data") or {}).get("structured_data")
+    return StructuredClaim.from_dict(structured_data) if structured_data else None
+
+
+def _previous_result(claim: Dict) -> Optional[AuditResult]:
+    return AuditResult.from_dict(claim["audit_result"]) if claim.get("audit_result") else None
+
+
+def _chunks(claims: List[Dict]) -> Iterator[List[Dict]]:
+    """Groups of claims audited in one LLM call."""
+    size = max(1, settings.reaudit_claims_per_call)
+    for i in range(0, len(claims), size):
+        yield claims[i:i + size]
+
+
+def _call_estimates(chunk: List[Dict], policy: AuditPolicy) -> List[tuple]:
+    """
+    Estimated (model, prompt, completion) tokens of the calls auditing `chunk`.
+
+    Like run_audits, claims are grouped by the model route_audit picks, one
+    call per model. Escalations from the small model aren't predicted.
+    """
+    by_model: Dict[str, List[StructuredClaim]] = {}
+    for data in map(_structured_data, chunk):
+        # Claims without structured data get a fixed NEEDS_REVIEW and no LLM call
+        if needs_llm_audit(data):
+            by_model.setdefault(route_audit(data, policy).model, []).append(data)
+
+    estimates = []
+    for model, structured in by_model.items():
+        if len(structured) == 1:
+            messages = build_audit_messages(structured[0], policy)
+        else:
+            messages = build_batch_audit_messages(structured, policy)
+        estimates.append((model, estimate_message_tokens(messages), EXPECTED_AUDIT_COMPLETION_TOKENS * len(structured)))
+    return estimates
+
+
+def _estimate(job: ReauditJob, chunk: List[Dict], policy: AuditPolicy) -> None:
+    for model, prompt_tokens, completion_tokens in _call_estimates(chunk, policy):
+        pricing = MODEL_PRICING.get(model, {"prompt": 0.0, "completion": 0.0})
+        job.estimated_prompt_tokens += prompt_tokens
+        job.estimated_completion_tokens += completion_tokens
+        job.estimated_cost_usd += (prompt_tokens * pricing["prompt"] + completion_tokens * pricing["completion"]) / 1_000_000
+    job.processed += len(chunk)
+
+
+def _reaudit(job: ReauditJob, chunk: List[Dict], policy: AuditPolicy, policy_text: str, limiter: RateLimiter,
+             retry_conflicts: bool = True) -> None:
+    structured = [_structured_data(claim) for claim in chunk]
+    # The job's limiter is charged per LLM call: a chunk can take several (one per model, retries)
+    results = run_audits(structured, policy, limiter=limiter)
+
+    conflicts: List[str] = []
+    for claim, structured_data, result in zip(chunk, structured, results):
+        previous = _previous_result(claim)
+        # Duplicate findings come from the cross-claim index, not the policy; keep them
+        if previous is not None:
+            apply_duplicate_findings(result, [f for f in previous.findings if f.type == "duplicate"])
+        if not result.error:
+            # A failed LLM call keeps the previous verdict rather than overwriting it
+            try:
+                save_audit_result(claim, result, policy_text=policy_text)
+            except ClaimVersionConflict:
+                # Changed meanwhile (worker, renormalize): this result is based on a stale copy
+                conflicts.append(claim["id"])
+                continue
+            record_reaudit(claim.get("uploaded_by"), claim.get("processed_at"), structured_data, previous, result)
+
+        previous_verdict = previous.verdict if previous is not None else None
+        with _jobs_lock:
+            job.processed += 1
+            if result.error:
+                job.failed += 1
+            elif result.verdict != previous_verdict:
+                change = f"{previous_verdict}->{result.verdict}"
+                job.verdict_changes[change] = job.verdict_changes.get(change, 0) + 1
+
+    if conflicts and retry_conflicts:
+        logger.info(f"Re-audit {job.id}: {len(conflicts)} claims changed while audited; auditing them again")
+        for batch in _load_batches(conflicts):
+            _reaudit(job, batch, policy, policy_text, limiter, retry_conflicts=False)
+    elif conflicts:
+        logger.warning(f"Re-audit {job.id}: claims {conflicts} changed again while audited; keeping their previous verdict")
+        with _jobs_lock:
+            job.processed += len(conflicts)
+            job.skipped += len(conflicts)
+
+
+def _run(job: ReauditJob, policy_text: str) -> None:
+    job.status, job.started = "running", time.monotonic()
+    try:
+        if not job.dry_run:
+            # Claims not audited yet pick up the new text. Those already being processed may have
+            # loaded the old one: they're re-audited below once they complete.
+            supabase.table("claims")\
+                .update({"policy_text": policy_text})\
+                .eq("policy_id", job.policy_id)\
+                .in_("status", ["queued", "text_extraction"])\
+                .execute()
+        claim_ids = find_affected_claims(job.policy_id)
+        completed = set(claim_ids)
+        in_flight = [claim_id for claim_id in find_affected_claims(job.policy_id, "text_extraction")
+                     if claim_id not in completed]
+        job.total = len(claim_ids) + len(in_flight)
+        logger.info(f"Re-audit {job.id}: {job.total} claims for policy {job.policy_id} (dry_run={job.dry_run})")
+
+        policy = prepare_policy(policy_text)
+        if job.dry_run:
+            # In-flight claims are counted, but have no structured data to estimate from yet
+            for batch in _load_batches(claim_ids + in_flight):
+                for chunk in _chunks(batch):
+                    _estimate(job, chunk, policy)
+        else:
+            limiter = RateLimiter(settings.reaudit_requests_per_minute, settings.reaudit_tokens_per_minute)
+            with ThreadPoolExecutor(max_workers=max(1, settings.reaudit_concurrency)) as pool:
+                def reaudit(ids: List[str]) -> None:
+                    for batch in _load_batches(ids):
+                        # Finish a batch before loading the next, so memory stays bounded
+                        futures = [pool.submit(_reaudit, job, chunk, policy, policy_text, limiter)
+                                   for chunk in _chunks(batch)]
+                        for future in futures:
+                            future.result()
+
+                reaudit(claim_ids)
+                if in_flight:
+                    reaudit(_wait_for_in_flight(job, in_flight))
+
+        if job.dry_run:
+            job.estimated_cost_usd = round(job.estimated_cost_usd, 4)
+        job.status = "completed"
+        logger.info(
+            f"Re-audit {job.id} finished: {job.processed}/{job.total} claims, "
+            f"{job.failed} failed, verdict changes {job.verdict_changes}"
+        )
+    except Exception as e:
+        job.status, job.error = "failed", str(e)
+        logger.error(f"Re-audit {job.id} for policy {job.policy_id} failed: {str(e)}")
+    finally:
+        job.finished = time.monotonic()
+
+
+def start_reaudit(policy_id: str, policy_text: str, dry_run: bool = False) -> ReauditJob:
+    """
+    Start re-auditing a policy's claims in a background thread.
+
+    Args:
+        policy_id: Policy UUID
+        policy_text: The policy's current text
+        dry_run: Only estimate tokens and cost; no LLM calls, no writes
+
+    Returns:
+        The job; poll get_job(job.id) for progress
+    """
+    job = ReauditJob(policy_id=policy_id, dry_run=dry_run)
+    with _jobs_lock:
+        _jobs[job.id] = job
+        # Forget the oldest finished jobs
+        finished = [j for j in _jobs.values() if j.status in ("completed", "failed")]
+        for old in finished[:max(0, len(_jobs) - MAX_JOBS_KEPT)]:
+            del _jobs[old.id]
+
+    threading.Thread(target=_run, args=(job, policy_text), name=f"reaudit-{job.id[:8]}", daemon=True).start()
+    return job
+
+
+def get_job(job_id: str) -> Optional[ReauditJob]:
+    return _jobs.get(job_id)
+
+
+def list_jobs() -> List[ReauditJob]:
+    with _jobs_lock:
+        return sorted(_jobs.values(), key=lambda job: job.created_at, reverse=True)
@@ -0,0 +1,287 @@
+"""
+Re-normalize stored claims after the normalizer changes.
+
+Every structured_data records the NORMALIZER_VERSION that produced it
+(also on claims.normalizer_version). After a bump, a renormalize job walks
+the completed claims below the current version and re-runs only
+normalize_claim on the raw text already stored in extracted_data: nothing
+is downloaded or OCRed again. Master data annotation and the duplicate
+index are refreshed with the new structured data; audit verdicts are left
+alone (run a policy re-audit for that, it reads the new structured_data).
+
+Claims are read in pages of RENORMALIZE_BATCH_SIZE. Regex extraction for a
+page runs in a process pool of RENORMALIZE_PROCESSES; claims the model
+router sends to an LLM are then extracted RENORMALIZE_CONCURRENCY at a
+time under the job's own rate limiter (RENORMALIZE_REQUESTS_PER_MINUTE /
+RENORMALIZE_TOKENS_PER_MINUTE), on top of the process-wide LLM limiter.
+
+Each claim is written as soon as it's done (version-checked, so a claim
+changed meanwhile is skipped), so the job is resumable: after an
+interruption, start it again and it picks up the claims still below the
+current version. Claims that fail keep their old version and are retried
+by the next run.
+
+Jobs run in a background thread of the process that started them and their
+progress is kept in memory there (GET /api/v1/admin/renormalize/{job_id}).
+"""
+import logging
+import multiprocessing
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+from app.core.config import settings
+from app.core.database import supabase
+from app.models import AuditResult, StructuredClaim
+from app.services.claim_normalizer import NORMALIZER_VERSION, extract_with_regex, normalize_claim
+from app.services.claim_state import ClaimState, ClaimVersionConflict
+from app.services.claim_stats import record_completion
+from app.services.groq_service import EXTRACTION_TEXT_LIMITS, estimate_tokens
+from app.services.model_router import ROUTE_RULES, route_extraction
+from app.services.rate_limiter import RateLimiter
+from app.services.table_extractor import table_confidence
+
+logger = logging.getLogger(__name__)
+
+MAX_JOBS_KEPT = 50
+EXTRACTION_PROMPT_TOKENS = 150  # instructions around the document text
+EXTRACTION_COMPLETION_TOKENS = 300
+
+COLUMNS = "id, uploaded_by, status, version, processed_at, extracted_data, audit_result"
+
+
+@dataclass
+class RenormalizeJob:
+    id: str = field(default_factory=lambda: str(uuid.uuid4()))
+    version: int = NORMALIZER_VERSION
+    status: str = "pending"  # pending, running, completed, failed
+    total: int = 0
+    processed: int = 0
+    changed: int = 0
+    llm_extractions: int = 0
+    skipped: int = 0  # changed by someone else meanwhile; picked up by the next run
+    failed: int = 0
+    last_claim_id: Optional[str] = None
+    created_at: str = field(default_factory=lambda: datetime.now(timezone.utc).isoformat())
+    started: Optional[float] = None
+    finished: Optional[float] = None
+    error: Optional[str] = None
+
+    def to_dict(self) -> Dict:
+        data = asdict(self)
+        elapsed = ((self.finished or time.monotonic()) - self.started) if self.started else 0.0
+        remaining = self.total - self.processed
+        data.update(
+            percent=round(100.0 * self.processed / self.total, 1) if self.total else (100.0 if self.finished else 0.0),
+            elapsed_seconds=round(elapsed, 1),
+            eta_seconds=round(elapsed / self.processed * remaining, 1) if self.processed and remaining > 0 else None,
+        )
+        del data["started"], data["finished"]
+        return data
+
+
+_jobs: Dict[str, RenormalizeJob] = {}
+_jobs_lock = threading.Lock()
+
+
+def count_outdated() -> int:
+    """Completed claims normalized by an older NORMALIZER_VERSION."""
+    result = supabase.table("claims")\
+        .select("id", count="exact")\
+        .eq("status", "completed")\
+        .lt("normalizer_version", NORMALIZER_VERSION)\
+        .limit(1)\
+        .execute()
+    return result.count or 0
+
+
+def _load_page(after: str) -> List[Dict]:
+    return supabase.table("claims")\
+        .select(COLUMNS)\
+        .eq("status", "completed")\
+        .lt("normalizer_version", NORMALIZER_VERSION)\
+        .gt("id", after)\
+        .order("id")\
+        .limit(max(1, settings.renormalize_batch_size))\
+        .execute().data or []
+
+
+def _table(extracted: Dict) -> Optional[Dict]:
+    """The layout table normalize_claim saw, rebuilt from what the worker stored."""
+    table = extracted.get("table")
+    if not table:
+        return None
+    previous = extracted.get("structured_data") or {}
+    # Only the table summary is stored; its rows live on as claim_items when the table was used
+    rows = previous.get("claim_items") if previous.get("extraction_source") == "table" else None
+    table = {**table, "line_items": rows or []}
+    # Judged again: the rules may have changed since the table was extracted
+    table["confidence"] = table_confidence(table) if rows else table.get("confidence")
+    return table
+
+
+def _regex_results(pool: Optional[ProcessPoolExecutor], rows: List[Dict]) -> List[StructuredClaim]:
+    texts = [(row.get("extracted_data") or {}).get("raw_text") or "" for row in rows]
+    tables = [_table(row.get("extracted_data") or {}) for row in rows]
+    if pool is None:
+        return [extract_with_regex(text, table) for text, table in zip(texts, tables)]
+    chunksize = max(1, len(rows) // (4 * max(1, settings.renormalize_processes)))
+    return list(pool.map(extract_with_regex, texts, tables, chunksize=chunksize))
+
+
+def _renormalize(job: RenormalizeJob, row: Dict, regex_result: StructuredClaim, limiter: RateLimiter) -> None:
+    extracted = row.get("extracted_data") or {}
+    raw_text = extracted.get("raw_text") or ""
+    table = _table(extracted)
+    try:
+        # Same decision normalize_claim will make; only LLM-bound claims wait for the limiter
+        decision = route_extraction(raw_text, extracted.get("page_count"), extracted.get("extraction_method"),
+                                    extracted.get("ocr_confidence"), table, regex_result)
+        if decision.route != ROUTE_RULES:
+            limit = EXTRACTION_TEXT_LIMITS.get(decision.model, 4000)
+            limiter.acquire(estimate_tokens(raw_text[:limit]) + EXTRACTION_PROMPT_TOKENS + EXTRACTION_COMPLETION_TOKENS)
+
+        structured_data = normalize_claim(
+            raw_text,
+            table=table,
+            extraction_method=extracted.get("extraction_method"),
+            page_count=extracted.get("page_count"),
+            ocr_confidence=extracted.get("ocr_confidence"),
+            regex_result=regex_result,
+        )
+        if structured_data.extraction_confidence == "error":
+            raise Exception(structured_data.error or "normalization failed")
+        try:
+            from app.services.master_data import annotate_claim
+
+            structured_data = annotate_claim(structured_data, raw_text)
+        except Exception as master_data_error:
+            logger.error(f"Master data matching failed (non-critical): {str(master_data_error)}")
+
+        previous = StructuredClaim.from_dict(extracted.get("structured_data"))
+        new_data = structured_data.to_dict()
+        changed = {**previous.to_dict(), "normalizer_version": None} != {**new_data, "normalizer_version": None}
+
+        state = ClaimState(row)
+        state.stage(
+            extracted_data={**extracted, "structured_data": new_data, "renormalized_at": datetime.utcnow().isoformat()},
+            normalizer_version=NORMALIZER_VERSION,
+        )
+        state.flush()
+
+        if changed:
+            if settings.duplicate_detection:
+                from app.services.duplicate_index import index_claim
+
+                index_claim(row["id"], row.get("uploaded_by"), raw_text, structured_data)
+            if previous.total_claimed != structured_data.total_claimed:
+                # Move the claim's amount in the dashboard rollups
+                audit = AuditResult.from_dict(row["audit_result"]) if row.get("audit_result") else None
+                record_completion(row.get("uploaded_by"), audit, previous, row.get("processed_at"), delta=-1)
+                record_completion(row.get("uploaded_by"), audit, structured_data, row.get("processed_at"))
+
+        with _jobs_lock:
+            job.processed += 1
+            job.changed += changed
+            job.llm_extractions += decision.route != ROUTE_RULES
+    except ClaimVersionConflict:
+        logger.info(f"Claim {row['id']} changed while being re-normalized; leaving it for the next run")
+        with _jobs_lock:
+            job.processed += 1
+            job.skipped += 1
+    except Exception as e:
+        logger.error(f"Re-normalizing claim {row['id']} failed: {str(e)}")
+        with _jobs_lock:
+            job.processed += 1
+            job.failed += 1
+
+
+def _process_pool() -> Optional[ProcessPoolExecutor]:
+    if settings.renormalize_processes <= 0:
+        return None
+    # forkserver avoids forking a process that already runs threads
+    methods = multiprocessing.get_all_start_methods()
+    context = multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+    return ProcessPoolExecutor(max_workers=settings.renormalize_processes, mp_context=context)
+
+
+def _run(job: RenormalizeJob) -> None:
+    job.status, job.started = "running", time.monotonic()
+    pool = None
+    try:
+        job.total = count_outdated()
+        logger.info(f"Re-normalize {job.id}: {job.total} claims below normalizer version {job.version}")
+
+        limiter = RateLimiter(settings.renormalize_requests_per_minute, settings.renormalize_tokens_per_minute)
+        pool = _process_pool() if job.total else None
+        with ThreadPoolExecutor(max_workers=max(1, settings.renormalize_concurrency)) as threads:
+            after = ""
+            while True:
+                rows = _load_page(after)
+                if not rows:
+                    break
+                regex_results = _regex_results(pool, rows)
+                # Finish a page before loading the next, so memory stays bounded
+                futures = [threads.submit(_renormalize, job, row, regex_result, limiter)
+                           for row, regex_result in zip(rows, regex_results)]
+                for future in futures:
+                    future.result()
+                after = job.last_claim_id = rows[-1]["id"]
+
+        job.status = "completed"
+        logger.info(
+            f"Re-normalize {job.id} finished: {job.processed}/{job.total} claims, {job.changed} changed, "
+            f"{job.llm_extractions} LLM extractions, {job.skipped} skipped, {job.failed} failed"
+        )
+    except Exception as e:
+        job.status, job.error = "failed", str(e)
+        logger.error(f"Re-normalize {job.id} failed after claim {job.last_claim_id}: {str(e)}")
+    finally:
+        if pool is not None:
+            pool.shutdown()
+        job.finished = time.monotonic()
+
+
+def start_renormalize() -> RenormalizeJob:
+    """
+    Start re-normalizing outdated claims in a background thread.
+
+    Returns:
+        The job; poll get_job(job.id) for progress
+
+    Raises:
+        RuntimeError: if a renormalize job is already running in this process
+    """
+    with _jobs_lock:
+        running = [j for j in _jobs.values() if j.status in ("pending", "running")]
+        if running:
+            raise RuntimeError(f"Re-normalize job {running[0].id} is already running")
+        job = RenormalizeJob()
+        _jobs[job.id] = job
+        # Forget the oldest finished jobs
+        finished = [j for j in _jobs.values() if j.status in ("completed", "failed")]
+        for old in finished[:max(0, len(_jobs) - MAX_JOBS_KEPT)]:
+            del _jobs[old.id]
+
+    threading.Thread(target=_run, args=(job,), name=f"renormalize-{job.id[:8]}", daemon=True).start()
+    return job
+
+
+def get_job(job_id: str) -> Optional[RenormalizeJob]:
+    return _jobs.get(job_id)
+
+
+def list_jobs() -> List[RenormalizeJob]:
+    with _jobs_lock:
+        return sorted(_jobs.values(), key=lambda job: job.created_at, reverse=True)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    job = RenormalizeJob()
+    _run(job)
+    print(job.to_dict())
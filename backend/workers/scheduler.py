@@ -0,0 +1,185 @@
+"""
+Fair claim scheduler.
+
+Claims are queued per tenant (the uploading user, `uploaded_by`) inside
+three priority classes:
+
+- urgent:      cashless pre-authorisation claims, the patient is waiting
+- interactive: single uploads from the dashboard (default)
+- bulk:        backfills and re-processing of queued claims
+
+The next claim is the head of the tenant queue with the best
+(priority, least recently served tenant) pair, so one tenant's 2,000-claim
+dump is interleaved with everybody else's work instead of starving it.
+Claims that have waited longer than SCHEDULER_AGING_SECONDS move up a
+class per interval, so bulk work still makes progress under constant
+interactive load. Each tenant runs at most TENANT_MAX_CONCURRENCY claims
+at once.
+
+A tenant's stats and last-served slot are dropped once it has nothing
+queued or running, so they don't grow with every user who ever uploaded;
+a returning tenant ranks as never served, and /admin/queue shows only tenants
+with claims in the scheduler.
+"""
+import itertools
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Deque, Dict, Optional
+
+from app.core.metrics import QUEUE_WAIT
+
+PRIORITIES = ("urgent", "interactive", "bulk")
+PRIORITY_RANK = {name: rank for rank, name in enumerate(PRIORITIES)}
+DEFAULT_TENANT = "anonymous"
+
+
+@dataclass
+class Job:
+    claim_id: str
+    tenant: str
+    priority: str
+    enqueued_at: float = field(default_factory=time.monotonic)
+
+
+@dataclass
+class TenantStats:
+    queued: int = 0
+    running: int = 0
+    completed: int = 0
+    total_wait: float = 0.0
+    max_wait: float = 0.0
+
+
+class FairScheduler:
+    def __init__(self, tenant_max_concurrency: int = 0, aging_seconds: float = 0):
+        self.tenant_max_concurrency = tenant_max_concurrency
+        self.aging_seconds = aging_seconds
+        self._queues: Dict[str, Dict[str, Deque[Job]]] = {p: {} for p in PRIORITIES}
+        self._stats: Dict[str, TenantStats] = {}
+        self._last_served: Dict[str, int] = {}
+        self._serial = itertools.count(1)
+        self._cond = threading.Condition()
+        self._queued = 0
+        self._running = 0
+        self._closed = False
+
+    def submit(self, claim_id: str, tenant: Optional[str] = None, priority: str = "interactive") -> Job:
+        if priority not in PRIORITY_RANK:
+            raise ValueError(f"Unknown priority '{priority}', expected one of {PRIORITIES}")
+        job = Job(claim_id, tenant or DEFAULT_TENANT, priority)
+        with self._cond:
+            self._queues[priority].setdefault(job.tenant, deque()).append(job)
+            self._stats.setdefault(job.tenant, TenantStats()).queued += 1
+            self._queued += 1
+            self._cond.notify()
+        return job
+
+    def _effective_rank(self, job: Job, now: float) -> int:
+        rank = PRIORITY_RANK[job.priority]
+        if self.aging_seconds > 0:
+            rank -= int((now - job.enqueued_at) // self.aging_seconds)
+        return max(rank, 0)
+
+    def _pick(self) -> Optional[Job]:
+        """Choose the next job; caller holds the lock."""
+        now = time.monotonic()
+        best_key, best_queue = None, None
+        for tenants in self._queues.values():
+            for tenant, queue in tenants.items():
+                if not queue:
+                    continue
+                stats = self._stats[tenant]
+                if self.tenant_max_concurrency and stats.running >= self.tenant_max_concurrency:
+                    continue
+                head = queue[0]
+                key = (self._effective_rank(head, now), self._last_served.get(tenant, 0), head.enqueued_at)
+                if best_key is None or key < best_key:
+                    best_key, best_queue = key, queue
+        if best_queue is None:
+            return None
+
+        job = best_queue.popleft()
+        if not best_queue:
+            del self._queues[job.priority][job.tenant]
+        return job
+
+    def next(self, timeout: Optional[float] = None) -> Optional[Job]:
+        """
+        Block until a job can run and mark it running.
+
+        Returns None on timeout or after close().
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while not self._closed:
+                job = self._pick()
+                if job is not None:
+                    wait = time.monotonic() - job.enqueued_at
+                    stats = self._stats[job.tenant]
+                    stats.queued -= 1
+                    stats.running += 1
+                    stats.total_wait += wait
+                    stats.max_wait = max(stats.max_wait, wait)
+                    self._last_served[job.tenant] = next(self._serial)
+                    self._queued -= 1
+                    self._running += 1
+                    QUEUE_WAIT.labels(priority=job.priority).observe(wait)
+                    return job
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return None
+                self._cond.wait(remaining)
+            return None
+
+    def done(self, job: Job) -> None:
+        """Mark a job finished, freeing its tenant's concurrency slot."""
+        with self._cond:
+            stats = self._stats[job.tenant]
+            stats.running -= 1
+            stats.completed += 1
+            if not stats.queued and not stats.running:
+                del self._stats[job.tenant]
+                self._last_served.pop(job.tenant, None)
+            self._running -= 1
+            self._cond.notify_all()
+
+    def wait_idle(self, timeout: Optional[float] = None) -> bool:
+        with self._cond:
+            return self._cond.wait_for(lambda: not self._queued and not self._running, timeout)
+
+    def close(self) -> None:
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    @property
+    def queued(self) -> int:
+        return self._queued
+
+    @property
+    def running(self) -> int:
+        return self._running
+
+    def tenant_stats(self) -> Dict[str, Dict]:
+        """Per-tenant queue depth, running count and queue wait times."""
+        now = time.monotonic()
+        with self._cond:
+            oldest: Dict[str, float] = {}
+            for tenants in self._queues.values():
+                for tenant, queue in tenants.items():
+                    if queue:
+                        oldest[tenant] = max(oldest.get(tenant, 0.0), now - queue[0].enqueued_at)
+            return {
+                tenant: {
+                    "queued": stats.queued,
+                    "running": stats.running,
+                    "completed": stats.completed,
+                    "oldest_wait_seconds": round(oldest.get(tenant, 0.0), 2),
+                    "avg_wait_seconds": round(stats.total_wait / (stats.completed + stats.running), 2)
+                    if stats.completed + stats.running else 0.0,
+                    "max_wait_seconds": round(stats.max_wait, 2),
+                }
+                for tenant, stats in self._stats.items()
+            }
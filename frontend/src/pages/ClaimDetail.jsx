@@ -27,14 +27,14 @@ export default function ClaimDetail() {
             const { data: { session } } = await supabase.auth.getSession()
             if (!session) return
 
-            const response = await fetch(`${import.meta.env.VITE_API_URL}/api/v1/claims`, {
+            const response = await fetch(`${import.meta.env.VITE_API_URL}/api/v1/claims/${claimId}`, {
                 headers: { 'Authorization': `Bearer ${session.access_token}` }
             })
-            const data = await response.json()
 
-            if (response.ok && data.claims) {
-                const foundClaim = data.claims.find(c => c.id === claimId)
-                setClaim(foundClaim)
+            if (response.ok) {
+                setClaim(await response.json())
+            } else if (response.status === 404) {
+                setClaim(null)
             }
         } catch (err) {
             console.error('Failed to fetch claim:', err)
@@ -21,6 +21,7 @@ export default function Dashboard() {
     const navigate = useNavigate()
     const [showUpload, setShowUpload] = useState(false)
     const [claims, setClaims] = useState([])
+    const [serverStats, setServerStats] = useState(null)
     const [loading, setLoading] = useState(true)
     const [searchQuery, setSearchQuery] = useState('')
     const [statusFilter, setStatusFilter] = useState('all')
@@ -40,14 +41,20 @@ export default function Dashboard() {
             const { data: { session } } = await supabase.auth.getSession()
             if (!session) return
 
-            const response = await fetch(`${import.meta.env.VITE_API_URL}/api/v1/claims`, {
-                headers: { 'Authorization': `Bearer ${session.access_token}` }
-            })
+            const headers = { 'Authorization': `Bearer ${session.access_token}` }
+            const [response, statsResponse] = await Promise.all([
+                fetch(`${import.meta.env.VITE_API_URL}/api/v1/claims`, { headers }),
+                fetch(`${import.meta.env.VITE_API_URL}/api/v1/claims/stats`, { headers }),
+            ])
             const data = await response.json()
 
             if (response.ok && data.claims) {
                 setClaims(data.claims)
             }
+            if (statsResponse.ok) {
+                const statsData = await statsResponse.json()
+                setServerStats(statsData.totals)
+            }
         } catch (err) {
             console.error('Failed to fetch claims:', err)
         } finally {
@@ -70,12 +77,13 @@ export default function Dashboard() {
         })
     }, [claims, searchQuery, statusFilter])
 
-    const stats = useMemo(() => ({
+    // Server-side rollups; counted from the claim list only if the stats endpoint is unavailable
+    const stats = useMemo(() => serverStats ?? ({
         total: claims.length,
         processing: claims.filter(c => ['queued', 'text_extraction'].includes(c.status)).length,
         completed: claims.filter(c => c.status === 'completed').length,
         failed: claims.filter(c => c.status === 'failed').length,
-    }), [claims])
+    }), [claims, serverStats])
 
     // Chart Data
     const statusData = [